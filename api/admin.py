@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import UserProfile, VisualizationRequest, GeneratedImage, ReferenceImage
+from .models import UserProfile, VisualizationRequest, GeneratedImage, ReferenceImage, ModelUsage
 
 # Basic registration
 admin.site.register(UserProfile)
@@ -51,3 +51,18 @@ class ReferenceImageAdmin(admin.ModelAdmin):
         return "-"
 
     thumbnail_preview.short_description = "Preview"
+
+
+@admin.register(ModelUsage)
+class ModelUsageAdmin(admin.ModelAdmin):
+    """Read-only view of the model usage ledger."""
+
+    list_display = ('created_at', 'tenant_id', 'request', 'step', 'model', 'total_tokens', 'cost_usd')
+    list_filter = ('tenant_id', 'model', 'step')
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
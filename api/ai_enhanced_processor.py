@@ -5,11 +5,13 @@ This processor uses the Google Gemini AI service to generate realistic
 screen visualizations via the ScreenVisualizer pipeline.
 """
 
+import contextvars
 import logging
 import os
 import io
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
-from PIL import Image
+from django.conf import settings
 from django.core.files.base import ContentFile
 
 from .ai_services import (
@@ -18,8 +20,18 @@ from .ai_services import (
     ai_service_registry,
     AIServiceConfig
 )
+from .ai_services.gemini_backends import requires_api_key
 from .ai_services.providers.gemini_provider import GeminiProvider
+from .ai_services.utils.image_artifact import ImageArtifact
 from .audit.services import AuditService, AuditServiceError
+from .monitoring.production_monitor import production_monitor
+from .services.checkpoint_service import PipelineCheckpointStore
+from .services.derivative_service import schedule_derivatives
+from .services.ingestion_service import load_working_image
+from .services.preview_service import StepPreviewStore
+from .services.pricing_service import calculate_request_pricing
+from .services.tracing import span, start_trace
+from .services.usage_ledger import apply_budget, usage_scope
 
 logger = logging.getLogger(__name__)
 
@@ -54,10 +66,10 @@ class AIEnhancedImageProcessor:
     def _register_gemini_provider(self):
         """Register Gemini provider."""
         try:
-            # Check for API key in env
+            # Check for API key in env (offline backends need none)
             api_key = os.environ.get("GOOGLE_API_KEY")
             
-            if api_key:
+            if api_key or not requires_api_key():
                 gemini_provider = GeminiProvider()
                 ai_service_registry.register_provider('gemini', gemini_provider)
                 logger.info("Gemini provider registered successfully")
@@ -66,23 +78,62 @@ class AIEnhancedImageProcessor:
         except Exception as e:
             logger.error(f"Error registering Gemini provider: {str(e)}")
 
-    def process_image(self, visualization_request):
+    def process_image(self, visualization_request, task_id: str = None):
         """
-        Process an image using Gemini AI visualization.
+        Process an image using Gemini AI visualization, as one trace.
+
+        The job's span summary (see api.services.tracing) is stored in the
+        saved images' metadata under 'trace' once the job has finished, and
+        its outcome is recorded in the shared metrics registry. Model usage
+        is attributed to the request and written to the usage ledger when
+        the job ends.
 
         Args:
             visualization_request: VisualizationRequest instance
+            task_id: Background task ID to record on the request (optional)
 
         Returns:
             list: List of generated image instances
         """
+        with usage_scope(visualization_request) as usage, start_trace(
+            'visualization_job',
+            request_id=visualization_request.id,
+            tenant_id=visualization_request.tenant_id,
+        ) as trace:
+            saved_images = self._process_image(visualization_request, task_id)
+        self._save_trace_summary(saved_images, trace)
+        self._record_job_metrics(visualization_request, saved_images, trace, usage.cost_usd)
+        return saved_images
+
+    def _process_image(self, visualization_request, task_id: str = None):
+        """
+        Process an image using Gemini AI visualization.
+
+        Independent stages run concurrently and the PDF waits for all of them:
+
+            audit (original image) ──┐
+            pricing (scope) ─────────┼──> PDF ──> complete
+            pipeline (Gemini edits) ─┘
+
+        The audit only needs the uploaded photo, so its model call runs on
+        a worker thread while the pipeline runs here. Database writes all
+        stay on this thread.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='viz-audit')
         try:
             # Mark request as processing
-            visualization_request.mark_as_processing()
+            visualization_request.mark_as_processing(task_id=task_id)
             visualization_request.update_progress(10, "Initializing Gemini AI...")
 
-            # Load the original image
-            original_image = Image.open(visualization_request.original_image.path)
+            # Stop, or edit with the cheaper model, near the tenant's daily budget
+            apply_budget(visualization_request.tenant_id)
+
+            # Normalize the upload once; every step and the audit use this copy
+            original_image = load_working_image(visualization_request)
+
+            # Start the independent stages before the long pipeline
+            pending_audit = self._start_audit(visualization_request, executor)
+            calculate_request_pricing(visualization_request)
             
             # Derive screen_type from categories if available
             screen_type = visualization_request.screen_type # Default
@@ -122,7 +173,11 @@ class AIEnhancedImageProcessor:
                 "color": visualization_request.frame_color,
                 "mesh_type": visualization_request.mesh_choice,
                 "scope": {},  # Default empty scope
-                "tenant_id": visualization_request.tenant_id  # ADD THIS
+                "tenant_id": visualization_request.tenant_id,  # ADD THIS
+                # Resume from saved step outputs on regenerate/option changes
+                "checkpoint_store": PipelineCheckpointStore(visualization_request),
+                # Push each finished step to the client as a small preview
+                "preview_store": StepPreviewStore(visualization_request)
             }
             
             # Extract scope if available (new field)
@@ -146,40 +201,36 @@ class AIEnhancedImageProcessor:
                 visualization_request.update_progress(90, "Saving results...")
                 
                 # Save the result
-                image_data = result.metadata.get('generated_image_data')
-                clean_image_data = result.metadata.get('clean_image_data')
+                result_artifact = result.metadata.get('generated_image')
+                clean_artifact = result.metadata.get('clean_image')
                 
-                if clean_image_data:
+                # The checkpoint store already saved clean_image when cleanup ran
+                if clean_artifact and not visualization_request.clean_image:
                     logger.info("Saving clean image...")
                     # Save clean image to the request
                     clean_filename = f"clean_{visualization_request.id}.jpg"
                     if hasattr(visualization_request, 'clean_image'):
-                        visualization_request.clean_image.save(
-                            clean_filename,
-                            ContentFile(clean_image_data),
-                            save=True
-                        )
+                        with span('storage.write', kind='clean_image'):
+                            visualization_request.clean_image.save(
+                                clean_filename,
+                                ContentFile(clean_artifact.encoded('JPEG', self.quality)),
+                                save=True
+                            )
                     else:
                         logger.warning("VisualizationRequest has no clean_image field")
 
-                if image_data:
+                if result_artifact:
                     logger.info("Saving generated image...")
                     saved_images = self._save_generated_image(
-                        image_data, 
+                        result_artifact, 
                         variation_name, 
                         visualization_request,
                         metadata=result.metadata
                     )
                     
-                # Run security audit on original image
-                logger.info("Running security audit...")
+                # Wait for the site audit started alongside the pipeline
                 visualization_request.update_progress(92, "Analyzing image quality...")
-                try:
-                    audit_service = AuditService()
-                    audit_report = audit_service.perform_audit(visualization_request)
-                    logger.info(f"Audit complete: {len(audit_report.vulnerabilities)} vulnerabilities found")
-                except AuditServiceError as e:
-                    logger.warning(f"Audit failed (non-fatal): {e}")
+                self._finish_audit(visualization_request, pending_audit)
 
                 # Pre-generate PDF for lead capture
                 logger.info("Generating PDF report...")
@@ -187,13 +238,15 @@ class AIEnhancedImageProcessor:
                 try:
                     from .utils.pdf_generator import generate_visualization_pdf
 
-                    pdf_buffer = generate_visualization_pdf(visualization_request)
+                    with span('pdf.render'):
+                        pdf_buffer = generate_visualization_pdf(visualization_request)
                     pdf_filename = f"visualization_report_{visualization_request.id}.pdf"
-                    visualization_request.generated_pdf.save(
-                        pdf_filename,
-                        ContentFile(pdf_buffer.getvalue()),
-                        save=True
-                    )
+                    with span('storage.write', kind='pdf'):
+                        visualization_request.generated_pdf.save(
+                            pdf_filename,
+                            ContentFile(pdf_buffer.getvalue()),
+                            save=True
+                        )
                     logger.info(f"PDF generated: {pdf_filename}")
                 except Exception as e:
                     logger.warning(f"PDF generation failed (non-fatal): {e}")
@@ -211,42 +264,127 @@ class AIEnhancedImageProcessor:
             logger.error(error_msg)
             visualization_request.mark_as_failed(error_msg)
             return []
+        finally:
+            # Don't block on an in-flight audit if the pipeline failed
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start_audit(self, visualization_request, executor):
+        """
+        Start the site audit model call on a worker thread.
+
+        Returns:
+            (AuditService, Future) or None if the request already has an
+            audit or the audit cannot run
+        """
+        if hasattr(visualization_request, 'audit_report'):
+            return None
+
+        try:
+            audit_service = AuditService()
+            image_path = visualization_request.working_image.path
+        except Exception as e:
+            logger.warning(f"Audit not started (non-fatal): {e}")
+            return None
+
+        def analyze():
+            with span('audit.analyze'):
+                return audit_service.analyze_image(image_path)
+
+        logger.info("Running security audit...")
+        # Copy the context so the audit's spans join the job's trace
+        return audit_service, executor.submit(contextvars.copy_context().run, analyze)
+
+    def _finish_audit(self, visualization_request, pending_audit) -> None:
+        """Wait for a started audit and save its report (non-fatal on failure)."""
+        if not pending_audit:
+            return
+
+        audit_service, future = pending_audit
+        try:
+            audit_report = audit_service.save_report(visualization_request, future.result())
+            logger.info(f"Audit complete: {len(audit_report.vulnerabilities)} vulnerabilities found")
+        except AuditServiceError as e:
+            logger.warning(f"Audit failed (non-fatal): {e}")
 
     def _save_generated_image(
         self,
-        image_data: bytes,
+        artifact: ImageArtifact,
         variation: str,
         request,
         metadata: Dict[str, Any] = None
     ) -> List:
         """
         Save generated image and create GeneratedImage record.
+
+        Gemini's bytes are stored as they are when their format is in
+        RESULT_IMAGE_FORMATS; otherwise they are encoded as JPEG once.
+        Size and dimensions come from the artifact, so the saved file is
+        never reopened.
         """
         from .models import GeneratedImage
 
         try:
+            if artifact.format in getattr(settings, 'RESULT_IMAGE_FORMATS', ('JPEG',)):
+                image_format, image_data = artifact.format, artifact.data
+            else:
+                image_format, image_data = 'JPEG', artifact.encoded('JPEG', self.quality)
+            extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+
             # Create filename
-            filename = f"ai_generated_{request.id}_{variation}.jpg"
+            filename = f"ai_generated_{request.id}_{variation}.{extension}"
 
             # Create GeneratedImage record
-            generated_image = GeneratedImage(request=request)
+            generated_image = GeneratedImage(
+                request=request,
+                file_size=len(image_data),
+                image_width=artifact.width,
+                image_height=artifact.height,
+            )
             if metadata:
                 # Filter out binary data from metadata
                 clean_metadata = {
                     k: v for k, v in metadata.items() 
-                    if not isinstance(v, bytes) and k not in ['generated_image_data', 'clean_image_data']
+                    if not isinstance(v, (bytes, ImageArtifact))
                 }
                 generated_image.metadata = clean_metadata
                 
-            generated_image.generated_image.save(
-                filename,
-                ContentFile(image_data),
-                save=True
-            )
+            with span('storage.write', kind='result', bytes=len(image_data)):
+                generated_image.generated_image.save(
+                    filename,
+                    ContentFile(image_data),
+                    save=True
+                )
 
             logger.info(f"Saved generated image: {filename}")
+            schedule_derivatives(generated_image.generated_image.name)
             return [generated_image]
 
         except Exception as e:
             logger.error(f"Error saving generated image: {str(e)}")
             return []
+
+    def _save_trace_summary(self, saved_images: List, trace) -> None:
+        """Store the finished job's span summary in each saved image's metadata."""
+        if not saved_images:
+            return
+
+        summary = trace.summary()
+        for generated_image in saved_images:
+            try:
+                generated_image.metadata = dict(generated_image.metadata or {}, trace=summary)
+                generated_image.save(update_fields=['metadata'])
+            except Exception as e:
+                logger.warning(f"Failed to save trace summary for image {generated_image.pk}: {e}")
+
+    def _record_job_metrics(self, visualization_request, saved_images: List, trace, cost: float) -> None:
+        """Record the finished job for /metrics and the health checks."""
+        metadata = saved_images[0].metadata if saved_images else {}
+        production_monitor.record_request_metrics({
+            'tenant_id': visualization_request.tenant_id,
+            'success': visualization_request.status == 'complete',
+            'processing_time': trace.root.seconds,
+            'quality_score': metadata.get('quality_score'),
+            'cost': cost,
+            'model_used': 'gemini',
+            'error_type': visualization_request.error_message or None,
+        })
@@ -46,6 +46,10 @@ class AIServiceConfigManager:
             if config_file and os.path.exists(config_file):
                 self._load_from_file(config_file)
 
+            # Gemini model backend, unless configured above
+            if 'gemini' not in self._configs:
+                self._load_gemini_backend()
+
         except Exception as e:
             logger.error(f"Error loading default AI service configs: {str(e)}")
 
@@ -115,6 +119,20 @@ class AIServiceConfigManager:
         except Exception as e:
             logger.error(f"Error loading configs from environment: {str(e)}")
 
+    def _load_gemini_backend(self):
+        """Load the Gemini backend selection (live, fake, record, replay) from settings."""
+        self._configs['gemini'] = AIServiceConfig(
+            service_name='gemini',
+            service_type=AIServiceType.IMAGE_GENERATION,
+            api_key=os.getenv('GOOGLE_API_KEY'),
+            additional_params={
+                'backend': getattr(settings, 'GEMINI_BACKEND', 'live'),
+                'recordings_dir': getattr(settings, 'GEMINI_RECORDINGS_DIR', None),
+                'fake': getattr(settings, 'GEMINI_FAKE_PROFILE', {}),
+            }
+        )
+        logger.info(f"Gemini backend: {self._configs['gemini'].additional_params['backend']}")
+
     def _load_from_file(self, config_file: str):
         """Load configurations from a JSON file."""
         try:
@@ -0,0 +1,364 @@
+"""
+Gemini Backends - Live, fake and record/replay model clients.
+
+ScreenVisualizer and AuditService talk to Gemini through
+`client.models.generate_content`. get_model_client() returns the client for
+the backend selected by the 'gemini' config in AIServiceConfigManager
+(additional_params['backend'], from GEMINI_BACKEND by default):
+
+    live    the shared google-genai client (gemini_client.py)
+    fake    FakeGeminiClient: answers locally and deterministically, with a
+            configurable latency distribution, error rate and 429 bursts
+    record  the live client, saving every response to the recordings dir
+    replay  saved responses only; a call that was never recorded fails
+
+Fake and replay never open a network connection and need no API key, so
+pipelines can be load tested without spending quota. Responses are real
+google-genai response objects, so callers cannot tell the backends apart.
+
+Recordings are keyed on the model, input images, prompt text and
+generation config, and stored as the response's JSON; replay restores the
+same bytes that were recorded.
+
+Usage:
+    from api.ai_services.gemini_backends import get_model_client, requires_api_key
+
+    client = get_model_client(api_key)
+    response = client.models.generate_content(model=..., contents=..., config=...)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from google.genai import errors as genai_errors
+from google.genai import types
+from PIL import Image
+
+from .gemini_client import get_gemini_client
+from .utils.image_artifact import ImageArtifact
+from .utils.image_utils import generate_cache_key, get_image_hash
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('live', 'fake', 'record', 'replay')
+
+
+class ModelBackendError(Exception):
+    """Raised when a model backend is misconfigured."""
+    pass
+
+
+class ReplayMissError(ModelBackendError):
+    """Raised in replay mode for a call that was never recorded."""
+    pass
+
+
+def _split_contents(contents: List[Any]) -> Tuple[List[Any], List[str]]:
+    """Separate image inputs (PIL images or inline data parts) from text."""
+    images, texts = [], []
+    for item in contents:
+        if isinstance(item, str):
+            texts.append(item)
+        elif isinstance(item, types.Part) and item.inline_data is not None:
+            images.append(ImageArtifact(item.inline_data.data, item.inline_data.mime_type))
+        elif isinstance(item, types.Part):
+            texts.append(item.text or '')
+        else:
+            images.append(item)
+    return images, texts
+
+
+def _config_dict(config) -> Dict[str, Any]:
+    if config is None:
+        return {}
+    if isinstance(config, dict):
+        return config
+    return config.model_dump(mode='json', exclude_none=True)
+
+
+def request_key(model: str, contents: List[Any], config=None) -> Optional[str]:
+    """
+    Content key of a generate_content call.
+
+    Returns:
+        Hex digest, or None if an input image could not be hashed
+    """
+    images, texts = _split_contents(contents)
+    hashes = [get_image_hash(image) for image in images]
+    if any(image_hash is None for image_hash in hashes):
+        return None
+    return generate_cache_key(':'.join(hashes), '\x00'.join(texts), model, _config_dict(config))
+
+
+def _wants_image(config) -> bool:
+    return 'IMAGE' in (_config_dict(config).get('response_modalities') or [])
+
+
+class _AsyncModels:
+    """client.aio.models for a local backend: the sync call, off the event loop."""
+
+    def __init__(self, models):
+        self._models = models
+
+    async def generate_content(self, **kwargs):
+        return await asyncio.to_thread(self._models.generate_content, **kwargs)
+
+
+class _AsyncClient:
+
+    def __init__(self, models):
+        self.models = _AsyncModels(models)
+
+    async def aclose(self):
+        return None
+
+
+class _LocalClient:
+    """The parts of genai.Client that callers use (models, aio.models, close)."""
+
+    def __init__(self, models):
+        self.models = models
+        self.aio = _AsyncClient(models)
+
+    def close(self):
+        return None
+
+
+class FakeModels:
+    """
+    Deterministic stand-in for client.models.
+
+    Call n draws its latency and failures from a generator seeded with
+    (seed, n), so a run with the same profile sees the same sequence.
+    Image edits return the last input image unchanged; text calls return
+    profile['text'] (a JSON quality verdict by default).
+
+    Profile keys (all optional):
+        seed: int (default 0)
+        latency: {'distribution': 'fixed', 'seconds': 0.0}
+                 {'distribution': 'uniform', 'min': 5, 'max': 30}
+                 {'distribution': 'lognormal', 'median': 20, 'sigma': 0.4}
+        error_rate: Fraction of calls failing with 503 (default 0)
+        rate_limit_bursts: {'every': 50, 'length': 3}: calls 0-2, 50-52,
+                 ... fail with 429 RESOURCE_EXHAUSTED
+        text: Response text for text-only calls
+    """
+
+    def __init__(self, profile: Optional[Dict[str, Any]] = None):
+        self.profile = dict(profile or {})
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next_call(self) -> int:
+        with self._lock:
+            number = self.calls
+            self.calls += 1
+            return number
+
+    def sample_latency(self, rng: random.Random) -> float:
+        latency = self.profile.get('latency') or {}
+        distribution = latency.get('distribution', 'fixed')
+        if distribution == 'fixed':
+            return float(latency.get('seconds', 0.0))
+        if distribution == 'uniform':
+            return rng.uniform(float(latency.get('min', 0.0)), float(latency.get('max', 0.0)))
+        if distribution == 'lognormal':
+            median = float(latency.get('median', 1.0))
+            return median * rng.lognormvariate(0.0, float(latency.get('sigma', 0.5)))
+        raise ModelBackendError(f"Unknown fake latency distribution: {distribution}")
+
+    def _failure(self, number: int, rng: random.Random) -> Optional[Exception]:
+        bursts = self.profile.get('rate_limit_bursts') or {}
+        every = int(bursts.get('every', 0))
+        if every and number % every < int(bursts.get('length', 1)):
+            return genai_errors.ClientError(429, {
+                'error': {'code': 429, 'message': 'Fake quota exhausted', 'status': 'RESOURCE_EXHAUSTED'}
+            })
+        if rng.random() < float(self.profile.get('error_rate', 0.0)):
+            return genai_errors.ServerError(503, {
+                'error': {'code': 503, 'message': 'Fake backend unavailable', 'status': 'UNAVAILABLE'}
+            })
+        return None
+
+    def generate_content(self, model: str, contents: List[Any], config=None, **kwargs):
+        number = self._next_call()
+        rng = random.Random(f"{self.profile.get('seed', 0)}:{number}")
+        latency = self.sample_latency(rng)
+        failure = self._failure(number, rng)
+        if latency > 0:
+            time.sleep(latency)
+        if failure is not None:
+            raise failure
+
+        images, texts = _split_contents(contents)
+        prompt = '\n'.join(texts)
+        parts = []
+        if _wants_image(config):
+            parts.append(types.Part(text=f"Fake edit ({len(prompt)} prompt characters)."))
+            if images:
+                image = images[-1]
+                if isinstance(image, Image.Image):
+                    image = ImageArtifact.from_image(image)
+                parts.append(types.Part.from_bytes(data=image.data, mime_type=image.mime_type))
+            candidate_tokens = 1290
+        else:
+            text = self.profile.get('text', '{"score": 0.9, "reason": "Fake quality check."}')
+            parts.append(types.Part(text=text))
+            candidate_tokens = len(text) // 4
+
+        prompt_tokens = len(prompt) // 4 + 258 * len(images)
+        thoughts_tokens = 200 if _wants_image(config) else 0
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role='model', parts=parts))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=candidate_tokens,
+                thoughts_token_count=thoughts_tokens,
+                total_token_count=prompt_tokens + candidate_tokens + thoughts_tokens,
+            ),
+            model_version=model,
+        )
+
+
+class FakeGeminiClient(_LocalClient):
+    """Offline client answering from FakeModels."""
+
+    def __init__(self, profile: Optional[Dict[str, Any]] = None):
+        super().__init__(FakeModels(profile))
+
+
+class RecordingStore:
+    """Saved responses on disk, one JSON file per request key."""
+
+    suffix = '.json'
+
+    def __init__(self, directory: str):
+        self.directory = str(directory)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key: str) -> Optional[types.GenerateContentResponse]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return types.GenerateContentResponse.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, response: types.GenerateContentResponse) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(response.model_dump_json(exclude_none=True))
+        os.replace(tmp_path, path)
+
+
+class RecordReplayModels:
+    """
+    client.models that records live responses, or replays them offline.
+
+    Args:
+        store: RecordingStore
+        live_models: The live client's models (None in replay mode)
+    """
+
+    def __init__(self, store: RecordingStore, live_models=None):
+        self.store = store
+        self.live_models = live_models
+
+    def generate_content(self, model: str, contents: List[Any], config=None, **kwargs):
+        key = request_key(model, contents, config)
+        if self.live_models is None:
+            response = self.store.get(key) if key else None
+            if response is None:
+                raise ReplayMissError(f"No recorded response for {model} call {key and key[:12]}")
+            return response
+
+        response = self.live_models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        if key:
+            try:
+                self.store.save(key, response)
+            except OSError as e:
+                logger.warning(f"Could not record Gemini response {key[:12]}: {e}")
+        return response
+
+
+def get_backend_config() -> Dict[str, Any]:
+    """additional_params of the 'gemini' service config (backend, recordings_dir, fake)."""
+    from .config import ai_config_manager
+
+    config = ai_config_manager.get_config('gemini')
+    params = dict(config.additional_params) if config else {}
+    params.setdefault('backend', getattr(settings, 'GEMINI_BACKEND', 'live'))
+    if params['backend'] not in BACKENDS:
+        raise ModelBackendError(f"Unknown Gemini backend '{params['backend']}' (expected one of {BACKENDS})")
+    return params
+
+
+def requires_api_key() -> bool:
+    """Whether the selected backend calls the live API."""
+    return get_backend_config()['backend'] in ('live', 'record')
+
+
+_local_clients: Dict[str, Any] = {}
+_local_lock = threading.Lock()
+
+
+def build_model_client(params: Dict[str, Any], api_key: Optional[str] = None):
+    """
+    Create the client for a backend config.
+
+    Args:
+        params: Backend config (see get_backend_config)
+        api_key: Google API key (live and record only)
+
+    Returns:
+        genai.Client, FakeGeminiClient or record/replay client
+    """
+    backend = params['backend']
+    if backend == 'live':
+        return get_gemini_client(api_key)
+    if backend == 'fake':
+        return FakeGeminiClient(params.get('fake') or getattr(settings, 'GEMINI_FAKE_PROFILE', {}))
+
+    directory = params.get('recordings_dir') or getattr(
+        settings, 'GEMINI_RECORDINGS_DIR', os.path.join(settings.BASE_DIR, 'cache', 'gemini_recordings')
+    )
+    live_models = get_gemini_client(api_key).models if backend == 'record' else None
+    return _LocalClient(RecordReplayModels(RecordingStore(directory), live_models))
+
+
+def get_model_client(api_key: Optional[str] = None):
+    """
+    Process-wide client for the configured backend.
+
+    Local clients are shared like the live one, so a fake's 429 bursts
+    and call sequence span every caller in the process.
+    """
+    params = get_backend_config()
+    if params['backend'] == 'live':
+        return get_gemini_client(api_key)
+
+    cache_key = json.dumps([params, api_key], sort_keys=True, default=str)
+    with _local_lock:
+        client = _local_clients.get(cache_key)
+        if client is None:
+            client = build_model_client(params, api_key)
+            _local_clients[cache_key] = client
+            logger.info(f"Using {params['backend']} Gemini backend")
+        return client
+
+
+def reset_model_clients() -> None:
+    """Drop shared local clients (fake call counters start again)."""
+    with _local_lock:
+        _local_clients.clear()
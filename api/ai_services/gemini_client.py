@@ -0,0 +1,127 @@
+"""
+Shared Gemini Client - One pooled google-genai client per process.
+
+Every caller (visualizer, audit, asset scripts) gets the same client for a
+given API key, so HTTP/TLS connections are kept alive and reused instead of
+being set up again for each request. The same client exposes the sync API
+(`client.models`) and the async API (`client.aio.models`); both sit on
+bounded keep-alive connection pools.
+
+Pool sizes come from the environment so the module also works outside
+Django (e.g. scripts/refine_assets.py):
+    GEMINI_HTTP_MAX_CONNECTIONS       (default 20)
+    GEMINI_HTTP_MAX_KEEPALIVE         (default 10)
+    GEMINI_HTTP_KEEPALIVE_EXPIRY      (seconds, default 120)
+    GEMINI_HTTP_TIMEOUT               (seconds, default 300)
+
+Usage:
+    from api.ai_services.gemini_client import get_gemini_client
+
+    client = get_gemini_client()
+    response = client.models.generate_content(model=..., contents=...)
+    response = await client.aio.models.generate_content(model=..., contents=...)
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, genai.Client] = {}
+_clients_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+class GeminiClientError(Exception):
+    """Raised when a shared Gemini client cannot be created."""
+    pass
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+def build_http_options() -> types.HttpOptions:
+    """
+    Build HTTP options with bounded keep-alive pools for sync and async calls.
+
+    Returns:
+        types.HttpOptions for genai.Client
+    """
+    limits = httpx.Limits(
+        max_connections=_env_int('GEMINI_HTTP_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=_env_int('GEMINI_HTTP_MAX_KEEPALIVE', 10),
+        keepalive_expiry=_env_int('GEMINI_HTTP_KEEPALIVE_EXPIRY', 120),
+    )
+    return types.HttpOptions(
+        timeout=_env_int('GEMINI_HTTP_TIMEOUT', 300) * 1000,  # milliseconds
+        client_args={'limits': limits},
+        async_client_args={'limits': limits},
+    )
+
+
+def get_gemini_client(api_key: Optional[str] = None) -> genai.Client:
+    """
+    Return the process-wide Gemini client for an API key.
+
+    Clients are rebuilt after a fork (e.g. Celery prefork workers), since
+    pooled sockets must not be shared between processes.
+
+    Args:
+        api_key: Google API key (defaults to GOOGLE_API_KEY)
+
+    Returns:
+        Shared genai.Client
+
+    Raises:
+        GeminiClientError: If no API key is available
+    """
+    global _clients_pid
+
+    api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise GeminiClientError("API Key missing. Please set GOOGLE_API_KEY.")
+
+    with _lock:
+        if _clients_pid != os.getpid():
+            # Inherited from the parent process; drop without closing its sockets
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        client = _clients.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key, http_options=build_http_options())
+            _clients[api_key] = client
+            logger.info("Created shared Gemini client")
+        return client
+
+
+def close_gemini_clients() -> None:
+    """Close all shared clients and their connection pools."""
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing Gemini client: {e}")
+        _clients.clear()
+
+
+async def aclose_gemini_clients() -> None:
+    """Close the async connection pools, then the sync ones."""
+    for client in list(_clients.values()):
+        try:
+            await client.aio.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing async Gemini client: {e}")
+    close_gemini_clients()
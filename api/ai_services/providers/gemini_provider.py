@@ -20,6 +20,7 @@ from ..interfaces import (
     ScreenAnalysisResult,
     QualityAssessmentResult
 )
+from ..utils.image_artifact import as_artifact
 from api.visualizer.services import ScreenVisualizer, ScreenVisualizerError
 
 logger = logging.getLogger(__name__)
@@ -119,28 +120,28 @@ class GeminiImageGenerationService(AIImageGenerationService):
                 scope=scope,
                 options=options,
                 progress_callback=progress_callback,
-                tenant_id=tenant_id  # ADD THIS
+                tenant_id=tenant_id,  # ADD THIS
+                checkpoint_store=style_preferences.get('checkpoint_store'),
+                preview_store=style_preferences.get('preview_store')
             )
             
-            # Convert back to bytes for the result
-            import io
-            output = io.BytesIO()
-            result_image.save(output, format='JPEG', quality=85)
-            image_data = output.getvalue()
-
-            # Convert clean image to bytes
-            clean_output = io.BytesIO()
-            clean_image.save(clean_output, format='JPEG', quality=85)
-            clean_image_data = clean_output.getvalue()
-            
+            # Hand over the encoded artifacts; the caller decides whether
+            # the bytes can be stored as they are
             return AIServiceResult(
                 success=True,
                 status=ProcessingStatus.COMPLETED,
                 metadata={
-                    "generated_image_data": image_data,
-                    "clean_image_data": clean_image_data,
+                    "generated_image": as_artifact(result_image),
+                    "clean_image": as_artifact(clean_image),
                     "quality_score": quality_score,
-                    "quality_reason": quality_reason
+                    "quality_reason": quality_reason,
+                    "step_timings": {
+                        name: round(seconds, 3)
+                        for name, seconds in getattr(self.visualizer, 'last_step_timings', {}).items()
+                    },
+                    # Compared across fused and unfused runs by step_fusion.fusion_report
+                    "pipeline_seconds": round(getattr(self.visualizer, 'last_pipeline_seconds', 0.0), 3),
+                    "fused_steps": getattr(self.visualizer, 'last_fused_steps', []),
                 }
             )
             
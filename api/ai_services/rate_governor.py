@@ -0,0 +1,522 @@
+"""
+Rate Governor - Shared token bucket, retry policy and circuit breaker for Gemini.
+
+Every Gemini call goes through one governor per process. Callers take a
+token before each attempt, waiting in FIFO order when the bucket is empty,
+so a burst of jobs shares the quota fairly instead of all hitting the API at
+once. Retryable failures back off exponentially with full jitter. A 429
+drains the bucket so every caller slows down, not only the one that was
+throttled. Too many consecutive failures open the circuit breaker, and
+calls then fail fast until the cooldown has passed.
+
+With GEMINI_RATE_BACKEND = 'redis' the bucket and the breaker live in
+Redis, so the quota is shared by every worker process.
+
+Usage:
+    from api.ai_services.rate_governor import get_rate_governor
+
+    governor = get_rate_governor()
+    response = governor.call(client.models.generate_content, model=..., contents=...)
+    governor.get_status()  # tokens, queue_depth, breaker_state, ...
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from django.conf import settings
+from google.genai import errors as genai_errors
+
+from api.monitoring.metrics import get_metrics_registry
+from api.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class RateGovernorError(Exception):
+    """Base exception for rate governor errors."""
+    pass
+
+
+class CircuitOpenError(RateGovernorError):
+    """Raised when the circuit breaker is open and calls fail fast."""
+    pass
+
+
+class RateLimitTimeout(RateGovernorError):
+    """Raised when a caller waited too long for a token."""
+    pass
+
+
+class RetryableResponseError(Exception):
+    """Raise from a governed call to retry it (e.g. empty model response)."""
+    pass
+
+
+# Network-level failures: the request may not have reached the service
+TRANSPORT_ERRORS = (httpx.TransportError, ConnectionError, TimeoutError)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is a quota/rate limit response."""
+    code = getattr(error, 'code', None)
+    status = str(getattr(error, 'status', '') or '')
+    return code == 429 or status == 'RESOURCE_EXHAUSTED'
+
+
+def _api_status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a google-genai APIError, else None."""
+    if isinstance(error, genai_errors.APIError) and isinstance(error.code, int):
+        return error.code
+    return None
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Check whether an error says the Gemini service itself is unhealthy.
+
+    Only rate limits, 5xx responses and transport failures count. These
+    are what the circuit breaker tracks; a refused prompt or a bug in our
+    code says nothing about upstream health.
+    """
+    if isinstance(error, TRANSPORT_ERRORS):
+        return True
+    code = _api_status_code(error)
+    if code is None:
+        return False
+    return code == 429 or code >= 500 or is_rate_limit_error(error)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Check whether a failed call is worth retrying.
+
+    Upstream failures (429, 5xx, transport) and empty responses are
+    retried. Other 4xx API errors and programming errors are not.
+    """
+    return isinstance(error, RetryableResponseError) or is_upstream_failure(error)
+
+
+class LocalTokenBucket:
+    """In-process token bucket."""
+
+    backend = 'local'
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def try_take(self) -> float:
+        """
+        Take one token if available.
+
+        Returns:
+            0.0 if a token was taken, else seconds until one will be available
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.refill_per_second
+
+    def drain(self) -> None:
+        """Empty the bucket (after a 429) so all callers slow down."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RedisTokenBucket:
+    """Token bucket shared across processes through Redis."""
+
+    backend = 'redis'
+
+    # Refill and take atomically. Returns wait time in milliseconds (0 = taken).
+    TAKE_SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = math.ceil((1 - tokens) / rate * 1000)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], 3600)
+    return wait
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, redis_url: str, key: str):
+        import redis
+
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.key = key
+        self.redis = redis.Redis.from_url(redis_url)
+        self._take = self.redis.register_script(self.TAKE_SCRIPT)
+
+    def try_take(self) -> float:
+        wait_ms = self._take(keys=[self.key], args=[self.capacity, self.refill_per_second, time.time()])
+        return int(wait_ms) / 1000.0
+
+    def drain(self) -> None:
+        self.redis.hset(self.key, mapping={'tokens': 0, 'updated': time.time()})
+
+    def tokens(self) -> float:
+        tokens, updated = self.redis.hmget(self.key, 'tokens', 'updated')
+        if tokens is None:
+            return self.capacity
+        elapsed = max(0.0, time.time() - float(updated))
+        return min(self.capacity, float(tokens) + elapsed * self.refill_per_second)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after `threshold` upstream failures in a row;
+    open -> half_open once `cooldown` seconds have passed. In half_open a
+    single probe call is let through: success closes the breaker, failure
+    re-opens it, and everyone else keeps failing fast meanwhile. With a
+    Redis client, the open state and the probe are shared.
+    """
+
+    def __init__(self, threshold: int, cooldown: float, redis_client=None, key: str = None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.redis = redis_client
+        self.key = key
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_taken = False
+        self._lock = threading.Lock()
+
+    def _open_until(self) -> Optional[float]:
+        if self.redis is not None:
+            value = self.redis.get(self.key)
+            return float(value) if value else None
+        return self._opened_at + self.cooldown if self._opened_at is not None else None
+
+    @property
+    def state(self) -> str:
+        open_until = self._open_until()
+        if open_until is None:
+            return 'closed'
+        return 'open' if time.time() < open_until else 'half_open'
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    def _take_probe(self) -> bool:
+        if self.redis is not None:
+            return bool(self.redis.set(f"{self.key}:probe", 1, nx=True, ex=int(self.cooldown) + 60))
+        with self._lock:
+            if self._probe_taken:
+                return False
+            self._probe_taken = True
+            return True
+
+    def release_probe(self) -> None:
+        """Give back the half-open probe without recording a result."""
+        if self.redis is not None:
+            self.redis.delete(f"{self.key}:probe")
+        with self._lock:
+            self._probe_taken = False
+
+    def allow(self) -> None:
+        """
+        Raise CircuitOpenError if calls should fail fast.
+
+        In half_open the first caller becomes the probe and must report
+        back through record_success/record_failure (or release_probe).
+        """
+        open_until = self._open_until()
+        if open_until is None:
+            return
+        if time.time() < open_until:
+            raise CircuitOpenError(
+                f"Gemini circuit breaker open for another {open_until - time.time():.0f}s"
+            )
+        if not self._take_probe():
+            raise CircuitOpenError("Gemini circuit breaker half-open, probe in progress")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            was_open = self._opened_at is not None
+            self._opened_at = None
+        if self.redis is not None or was_open:
+            if self.redis is not None:
+                self.redis.delete(self.key)
+            self.release_probe()
+
+    def record_failure(self) -> None:
+        half_open = self.state == 'half_open'
+        with self._lock:
+            self._failures += 1
+            reopen = self._failures >= self.threshold or half_open
+            if reopen:
+                self._opened_at = time.time()
+                if self.redis is not None:
+                    self.redis.set(self.key, self._opened_at + self.cooldown, ex=int(self.cooldown) + 60)
+                logger.error(f"Gemini circuit breaker opened after {self._failures} consecutive failures")
+        if half_open:
+            self.release_probe()
+
+
+class RateGovernor:
+    """
+    Token bucket + retry/backoff + circuit breaker around model calls.
+    """
+
+    def __init__(
+        self,
+        bucket,
+        breaker: CircuitBreaker,
+        max_retries: int = 4,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+        acquire_timeout: float = 300.0
+    ):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+
+        # FIFO queue of waiting callers; only the head may take a token
+        self._queue = deque()
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+        self._stats = {'calls': 0, 'retries': 0, 'rate_limited': 0, 'failures': 0}
+
+    # Token acquisition
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait (in FIFO order) for a token.
+
+        Raises:
+            RateLimitTimeout: If no token was available within the timeout
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        ticket = next(self._tickets)
+
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    if self._queue[0] == ticket:
+                        wait = self.bucket.try_take()
+                        if wait == 0:
+                            return
+                    else:
+                        wait = 0.05
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"No Gemini quota available after {timeout:.0f}s")
+                    self._condition.wait(min(wait, remaining))
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for a zero-based attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _start_attempt(self) -> None:
+        """Check the breaker, then wait for a token."""
+        self.breaker.allow()
+        try:
+            self.acquire()
+        except RateLimitTimeout:
+            self.breaker.release_probe()
+            raise
+
+    def _record_failure(self, error: Exception) -> None:
+        """
+        Account for a failed attempt. Only upstream failures count toward
+        the breaker; a 4xx or empty response means the service answered.
+        """
+        self._stats['failures'] += 1
+        if is_rate_limit_error(error):
+            self._stats['rate_limited'] += 1
+            get_metrics_registry().inc('gemini_rate_limited_total')
+            self.bucket.drain()
+
+        if is_upstream_failure(error):
+            self.breaker.record_failure()
+        elif isinstance(error, (RetryableResponseError, genai_errors.APIError)):
+            self.breaker.record_success()
+        else:
+            self.breaker.release_probe()
+
+    # Governed calls
+
+    def call(self, fn: Callable[..., Any], *args, description: str = 'gemini', **kwargs) -> Any:
+        """
+        Call fn with rate limiting, retries and the circuit breaker.
+
+        Args:
+            fn: Function making one API attempt
+            description: Label for logs
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            fn's return value
+
+        Raises:
+            The last error once retries are exhausted or it is not retryable;
+            CircuitOpenError / RateLimitTimeout when the call cannot start
+        """
+        self._stats['calls'] += 1
+        for attempt in range(self.max_retries):
+            with span('gemini.rate_wait', description=description):
+                self._start_attempt()
+            try:
+                with span('gemini.attempt', description=description, attempt=attempt + 1):
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                self._record_failure(e)
+                if not is_retryable_error(e) or attempt == self.max_retries - 1:
+                    logger.error(f"Gemini call failed for {description} after {attempt + 1} attempts: {e}")
+                    raise
+                delay = self.backoff_delay(attempt)
+                self._stats['retries'] += 1
+                get_metrics_registry().inc('gemini_retries_total')
+                logger.warning(
+                    f"Gemini error on {description}: {e}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+                with span('gemini.retry_sleep', description=description, seconds=round(delay, 3)):
+                    time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            if attempt > 0:
+                logger.info(f"Gemini succeeded on attempt {attempt + 1} for {description}")
+            return result
+
+    async def acall(self, fn: Callable[..., Any], *args, description: str = 'gemini', **kwargs) -> Any:
+        """Async variant of call() for coroutine functions (client.aio)."""
+        self._stats['calls'] += 1
+        for attempt in range(self.max_retries):
+            with span('gemini.rate_wait', description=description):
+                await asyncio.to_thread(self._start_attempt)
+            try:
+                with span('gemini.attempt', description=description, attempt=attempt + 1):
+                    result = await fn(*args, **kwargs)
+            except Exception as e:
+                self._record_failure(e)
+                if not is_retryable_error(e) or attempt == self.max_retries - 1:
+                    logger.error(f"Gemini call failed for {description} after {attempt + 1} attempts: {e}")
+                    raise
+                delay = self.backoff_delay(attempt)
+                self._stats['retries'] += 1
+                get_metrics_registry().inc('gemini_retries_total')
+                logger.warning(f"Gemini error on {description}: {e}, retrying in {delay:.1f}s")
+                with span('gemini.retry_sleep', description=description, seconds=round(delay, 3)):
+                    await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    # Monitoring
+
+    def get_status(self) -> Dict[str, Any]:
+        """Current quota, queue and breaker state for monitoring."""
+        try:
+            tokens = round(self.bucket.tokens(), 2)
+            breaker_state = self.breaker.state
+        except Exception as e:
+            logger.error(f"Failed to read rate governor state: {str(e)}")
+            tokens, breaker_state = None, 'unknown'
+
+        return {
+            'backend': self.bucket.backend,
+            'tokens': tokens,
+            'capacity': self.bucket.capacity,
+            'refill_per_second': self.bucket.refill_per_second,
+            'queue_depth': len(self._queue),
+            'breaker_state': breaker_state,
+            'consecutive_failures': self.breaker.failures,
+            **self._stats,
+        }
+
+
+_rate_governor: Optional[RateGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def build_rate_governor() -> RateGovernor:
+    """Create a governor from settings."""
+    per_minute = float(getattr(settings, 'GEMINI_RATE_LIMIT_PER_MINUTE', 60))
+    burst = float(getattr(settings, 'GEMINI_RATE_BURST', 10))
+    threshold = int(getattr(settings, 'GEMINI_BREAKER_THRESHOLD', 5))
+    cooldown = float(getattr(settings, 'GEMINI_BREAKER_COOLDOWN', 60))
+
+    bucket = LocalTokenBucket(burst, per_minute / 60.0)
+    breaker = CircuitBreaker(threshold, cooldown)
+
+    if getattr(settings, 'GEMINI_RATE_BACKEND', 'local') == 'redis':
+        try:
+            bucket = RedisTokenBucket(burst, per_minute / 60.0, settings.REDIS_URL, 'gemini:rate_bucket')
+            breaker = CircuitBreaker(threshold, cooldown, redis_client=bucket.redis, key='gemini:breaker_open_until')
+        except Exception as e:
+            logger.error(f"Redis rate governor unavailable, using in-process bucket: {str(e)}")
+
+    return RateGovernor(
+        bucket,
+        breaker,
+        max_retries=int(getattr(settings, 'GEMINI_MAX_RETRIES', 4)),
+        backoff_base=float(getattr(settings, 'GEMINI_BACKOFF_BASE', 2.0)),
+        backoff_max=float(getattr(settings, 'GEMINI_BACKOFF_MAX', 60.0)),
+        acquire_timeout=float(getattr(settings, 'GEMINI_ACQUIRE_TIMEOUT', 300.0)),
+    )
+
+
+def get_rate_governor() -> RateGovernor:
+    """Return the process-wide rate governor."""
+    global _rate_governor
+    if _rate_governor is None:
+        with _governor_lock:
+            if _rate_governor is None:
+                _rate_governor = build_rate_governor()
+    return _rate_governor
+
+
+def reset_rate_governor() -> None:
+    """Drop the shared governor so the next call rebuilds it from settings."""
+    global _rate_governor
+    with _governor_lock:
+        _rate_governor = None
@@ -8,6 +8,8 @@ Modules:
 - image_utils: Image processing and optimization utilities
 - prompt_utils: Prompt engineering and optimization utilities  
 - performance_utils: Performance monitoring and caching utilities
+- result_cache: Content-addressed disk cache for model step results
+- image_artifact: Encoded image bytes with lazily decoded pixels
 """
 
 from .image_utils import (
@@ -32,9 +34,23 @@ from .prompt_utils import (
 from .performance_utils import (
     PerformanceTracker,
     calculate_request_cost,
+    calculate_usage_cost,
     optimize_api_call_efficiency,
     estimate_processing_time,
-    CacheManager
+    CacheManager,
+    performance_tracker
+)
+
+from .image_artifact import (
+    ImageArtifact,
+    as_artifact,
+    as_content,
+    as_pil
+)
+
+from .result_cache import (
+    StepResultCache,
+    get_step_cache
 )
 
 __all__ = [
@@ -57,7 +73,19 @@ __all__ = [
     # Performance utilities
     'PerformanceTracker',
     'calculate_request_cost',
+    'calculate_usage_cost',
     'optimize_api_call_efficiency',
     'estimate_processing_time',
-    'CacheManager'
+    'CacheManager',
+    'performance_tracker',
+
+    # Image artifacts
+    'ImageArtifact',
+    'as_artifact',
+    'as_content',
+    'as_pil',
+
+    # Result cache
+    'StepResultCache',
+    'get_step_cache'
 ]
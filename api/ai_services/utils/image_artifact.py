@@ -0,0 +1,186 @@
+"""
+Image Artifact - Encoded image bytes with lazily decoded pixels.
+
+Gemini returns each edited image as encoded bytes. Decoding them into a PIL
+image, re-encoding to JPEG for the result and opening the file again to read
+its dimensions costs CPU and a full bitmap per copy. An ImageArtifact keeps
+the bytes as the source of truth: dimensions come from the header, pixels are
+decoded once on first access, and the bytes are sent to the next model call
+or written to storage as they are when the format allows.
+
+Pipeline code accepts either a PIL image or an artifact; use the helpers
+below instead of checking types.
+
+Decodes and encodes are timed through a span hook (set_span_hook), which
+the service layer's tracer installs; without one nothing is timed.
+
+Usage:
+    from api.ai_services.utils.image_artifact import ImageArtifact, as_content, as_pil
+
+    artifact = ImageArtifact(part.inline_data.data, part.inline_data.mime_type)
+    artifact.size                 # header only, no pixel decode
+    contents = [as_content(artifact), prompt]
+    data = artifact.encoded('JPEG', quality=85)  # original bytes if already JPEG
+"""
+import contextlib
+import hashlib
+import io
+import logging
+from typing import Callable, Optional, Tuple, Union
+
+from google.genai import types
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+}
+
+_span_hook: Optional[Callable] = None
+
+
+def set_span_hook(hook: Optional[Callable]) -> None:
+    """Install a span(name, **attributes) context manager factory (None to remove)."""
+    global _span_hook
+    _span_hook = hook
+
+
+def _span(name: str, **attributes):
+    return _span_hook(name, **attributes) if _span_hook else contextlib.nullcontext()
+
+
+class ImageArtifact:
+    """
+    Encoded image bytes plus lazily decoded pixels and known dimensions.
+
+    Instances are treated as immutable; the decoded image is cached and
+    must not be modified in place.
+    """
+
+    def __init__(self, data: bytes, mime_type: str = None, size: Tuple[int, int] = None):
+        self.data = bytes(data)
+        self._mime_type = mime_type
+        self._format = None
+        self._size = tuple(size) if size else None
+        self._image = None
+
+    @classmethod
+    def from_image(cls, image: Image.Image, format: str = 'JPEG', quality: int = 85) -> 'ImageArtifact':
+        """Encode a PIL image into an artifact (keeps the image as its pixels)."""
+        artifact = cls(_encode(image, format, quality), MIME_TYPES.get(format), image.size)
+        artifact._format = format
+        artifact._image = image
+        return artifact
+
+    def _read_header(self) -> None:
+        # Image.open only parses the header; pixels stay undecoded
+        with Image.open(io.BytesIO(self.data)) as header:
+            self._format = header.format
+            self._size = header.size
+
+    @property
+    def format(self) -> str:
+        """PIL format name of the encoded bytes (JPEG, PNG, WEBP, ...)."""
+        if self._format is None:
+            self._read_header()
+        return self._format
+
+    @property
+    def mime_type(self) -> str:
+        if self._mime_type is None:
+            self._mime_type = MIME_TYPES.get(self.format, 'application/octet-stream')
+        return self._mime_type
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        if self._size is None:
+            self._read_header()
+        return self._size
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def image(self) -> Image.Image:
+        """Decoded pixels, decoded on first access."""
+        if self._image is None:
+            with _span('image.decode', bytes=len(self.data)):
+                image = Image.open(io.BytesIO(self.data))
+                image.load()
+            self._image = image
+            self._format = image.format
+            self._size = image.size
+        return self._image
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the encoded bytes."""
+        return hashlib.sha256(self.data).hexdigest()
+
+    def encoded(self, format: str = 'JPEG', quality: int = 85) -> bytes:
+        """
+        Bytes in the requested format, re-encoding only if the format differs.
+
+        Args:
+            format: PIL format name
+            quality: Quality used when a re-encode is needed
+
+        Returns:
+            Encoded bytes
+        """
+        if self.format == format:
+            return self.data
+        logger.debug(f"Re-encoding {self.format} artifact as {format}")
+        return _encode(self.image, format, quality)
+
+    def __repr__(self):
+        return f"<ImageArtifact {self._format or '?'} {self._size or '?'} {len(self.data)} bytes>"
+
+
+def _encode(image: Image.Image, format: str, quality: int) -> bytes:
+    if format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    with _span('image.encode', format=format):
+        image.save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
+
+
+ImageLike = Union[Image.Image, ImageArtifact]
+
+
+def as_pil(image: ImageLike) -> Image.Image:
+    """Pixels of a PIL image or artifact."""
+    if isinstance(image, ImageArtifact):
+        return image.image
+    return image
+
+
+def as_artifact(image: Union[ImageLike, bytes], format: str = 'JPEG', quality: int = 85) -> ImageArtifact:
+    """Wrap bytes, or encode a PIL image; artifacts are returned unchanged."""
+    if isinstance(image, ImageArtifact):
+        return image
+    if isinstance(image, (bytes, bytearray)):
+        return ImageArtifact(image)
+    return ImageArtifact.from_image(image, format, quality)
+
+
+def as_content(image: ImageLike):
+    """
+    Model input for a PIL image or artifact.
+
+    Artifacts are sent as their encoded bytes, so the SDK neither decodes
+    nor re-encodes them.
+    """
+    if isinstance(image, ImageArtifact):
+        return types.Part.from_bytes(data=image.data, mime_type=image.mime_type)
+    return image
+
@@ -5,48 +5,66 @@ Extracted from openai_provider.py for better code organization.
 
 import hashlib
 import io
+import json
 import logging
-from typing import Tuple, Optional
+from typing import Any, Dict, Optional, Tuple
 from PIL import Image
 
+from .image_artifact import ImageArtifact
+
 logger = logging.getLogger(__name__)
 
 
-def get_image_hash(image: Image.Image) -> str:
+def get_image_hash(image: Image.Image) -> Optional[str]:
     """
-    Generate MD5 hash for image content.
-    
+    Generate a content hash for an image's decoded pixels.
+
+    Hashes the raw pixel buffer (plus mode and size) rather than an
+    encoded file, so the same photo gives the same hash no matter how it
+    was loaded, and no re-encode is needed. An ImageArtifact is hashed by
+    its encoded bytes instead, which avoids decoding it.
+
     Args:
-        image: PIL Image object
-        
+        image: PIL Image object or ImageArtifact
+
     Returns:
-        str: MD5 hash of image content
+        str: SHA-256 hex digest of image content, or None if the image
+        could not be read (never use a placeholder as a cache key)
     """
     try:
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-        return hashlib.md5(img_byte_arr).hexdigest()
+        if isinstance(image, ImageArtifact):
+            return f"artifact:{image.digest}"
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
     except Exception as e:
         logger.error(f"Failed to generate image hash: {str(e)}")
-        return "unknown_hash"
+        return None
 
 
-def generate_cache_key(image_hash: str, prompt: str, model: str) -> str:
+def generate_cache_key(
+    image_hash: str,
+    prompt: str,
+    model: str,
+    config: Optional[Dict[str, Any]] = None
+) -> str:
     """
     Generate cache key for request deduplication.
-    
+
     Args:
-        image_hash: MD5 hash of source image
+        image_hash: Hash of source image(s)
         prompt: Generation prompt
         model: AI model name
-        
+        config: Generation config (JSON-serializable, optional)
+
     Returns:
-        str: MD5 hash cache key
+        str: SHA-256 hex digest cache key
     """
     try:
-        cache_string = f"{image_hash}_{prompt}_{model}"
-        return hashlib.md5(cache_string.encode()).hexdigest()
+        config_json = json.dumps(config or {}, sort_keys=True, default=str)
+        cache_string = "\x00".join([image_hash, prompt, model, config_json])
+        return hashlib.sha256(cache_string.encode()).hexdigest()
     except Exception as e:
         logger.error(f"Failed to generate cache key: {str(e)}")
         return "unknown_key"
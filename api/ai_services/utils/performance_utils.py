@@ -60,6 +60,25 @@ class PerformanceTracker:
         except Exception as e:
             logger.error(f"Performance tracking failed: {str(e)}")
     
+    def record_cache_lookup(self, hit: bool) -> None:
+        """
+        Record a result cache lookup without counting a full request.
+
+        Args:
+            hit: Whether the lookup was served from cache
+        """
+        if not self.performance_monitoring_enabled:
+            return
+
+        if hit:
+            self.usage_stats['cache_hits'] += 1
+        else:
+            self.usage_stats['cache_misses'] += 1
+
+        # Shared across workers for /metrics and the health checks
+        from api.monitoring.metrics import get_metrics_registry
+        get_metrics_registry().inc('cache_lookups_total', cache='step', result='hit' if hit else 'miss')
+
     def _log_performance_summary(self) -> None:
         """Log performance summary for monitoring."""
         try:
@@ -87,12 +106,13 @@ class PerformanceTracker:
             stats = self.usage_stats.copy()
             
             # Calculate derived metrics
+            cache_lookups = stats['cache_hits'] + stats['cache_misses']
+            stats['cache_hit_rate'] = (stats['cache_hits'] / cache_lookups) * 100 if cache_lookups > 0 else 0.0
+
             if stats['total_requests'] > 0:
-                stats['cache_hit_rate'] = (stats['cache_hits'] / stats['total_requests']) * 100
                 stats['average_processing_time'] = stats['total_processing_time'] / stats['total_requests']
                 stats['average_cost_per_request'] = stats['total_cost'] / stats['total_requests']
             else:
-                stats['cache_hit_rate'] = 0.0
                 stats['average_processing_time'] = 0.0
                 stats['average_cost_per_request'] = 0.0
             
@@ -149,6 +169,37 @@ def calculate_request_cost(model: str, prompt_length: int, image_size: Tuple[int
         return 0.040  # Default fallback
 
 
+def calculate_usage_cost(model: str, prompt_tokens: int, candidates_tokens: int,
+                         thoughts_tokens: int = 0, image_output: bool = False) -> float:
+    """
+    Calculate the actual cost of a model call from its reported token usage.
+
+    Prices come from settings.GEMINI_MODEL_PRICING (USD per 1M tokens);
+    models not listed use its 'default' entry.
+
+    Args:
+        model: Model that served the call
+        prompt_tokens: usage_metadata.prompt_token_count
+        candidates_tokens: usage_metadata.candidates_token_count
+        thoughts_tokens: usage_metadata.thoughts_token_count (billed as text output)
+        image_output: Whether the candidates are an image (priced at 'output_image')
+
+    Returns:
+        float: Cost in USD
+    """
+    from django.conf import settings
+
+    pricing = getattr(settings, 'GEMINI_MODEL_PRICING', {})
+    prices = pricing.get(model) or pricing.get('default') or {}
+    output_text = prices.get('output_text', 0.0)
+    output = prices.get('output_image', output_text) if image_output else output_text
+    return (
+        prompt_tokens * prices.get('input', 0.0)
+        + candidates_tokens * output
+        + thoughts_tokens * output_text
+    ) / 1_000_000
+
+
 def optimize_api_call_efficiency(image, prompt: str) -> Dict[str, Any]:
     """
     Optimize API call for efficiency and cost reduction.
@@ -323,3 +374,7 @@ class CacheManager:
         except Exception as e:
             logger.error(f"Cache cleanup failed: {str(e)}")
             return 0
+
+
+# Global tracker instance
+performance_tracker = PerformanceTracker()
@@ -0,0 +1,226 @@
+"""
+Step Result Cache - Content-addressed disk cache for Gemini image edits.
+
+Each entry is the raw image bytes Gemini returned for one pipeline step,
+stored under a key derived from the input image digest, prompt, model and
+generation config. Identical inputs (e.g. the cleanup step on a regenerated
+request) are served from disk instead of a new API call.
+
+Usage:
+    from api.ai_services.utils.result_cache import get_step_cache
+
+    cache = get_step_cache()
+    key = cache.make_key([image], prompt, model_name, config)
+    data = cache.get(key)
+    if data is None:
+        data = call_model(...)
+        cache.set(key, data)
+"""
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from PIL import Image
+
+from .image_utils import generate_cache_key, get_image_hash
+from .performance_utils import performance_tracker
+
+logger = logging.getLogger(__name__)
+
+
+class StepResultCache:
+    """
+    Disk-backed LRU cache of model output bytes.
+
+    Entries are sharded by the first two characters of the key. Reads touch
+    the file's mtime, and writes evict the least recently used entries once
+    the directory grows past max_bytes, down to low_water of it. Writes go
+    through a temp file and os.replace, so concurrent workers sharing the
+    directory never see a partial entry.
+
+    The directory size is tracked per process from its own writes, so a
+    write does not scan the directory. It is rescanned when the tracked size
+    passes max_bytes and every rescan_writes writes, to count entries added
+    by other workers.
+    """
+
+    suffix = '.bin'
+    low_water = 0.9
+    rescan_writes = 100
+
+    def __init__(self, cache_dir: str, max_bytes: int, enabled: bool = True):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self._writes = 0
+
+    def make_key(
+        self,
+        images: List[Image.Image],
+        prompt: str,
+        model: str,
+        config: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Build a cache key for a model call.
+
+        Args:
+            images: Input images, in the order they are sent to the model
+            prompt: Prompt text
+            model: Model name
+            config: Generation config as a plain dict
+
+        Returns:
+            str: Hex digest cache key, or None if an image could not be
+            hashed (the call is then not cached)
+        """
+        hashes = [get_image_hash(image) for image in images]
+        if any(image_hash is None for image_hash in hashes):
+            return None
+        return generate_cache_key(':'.join(hashes), prompt, model, config)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def get(self, key: Optional[str]) -> Optional[bytes]:
+        """
+        Look up cached bytes for a key.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Cached bytes, or None on a miss or when the cache is disabled
+        """
+        if not self.enabled or key is None:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            performance_tracker.record_cache_lookup(hit=False)
+            return None
+        except OSError as e:
+            logger.warning(f"Step cache read failed for {key[:8]}: {e}")
+            performance_tracker.record_cache_lookup(hit=False)
+            return None
+
+        performance_tracker.record_cache_lookup(hit=True)
+        logger.info(f"Step cache hit: {key[:8]}...")
+        return data
+
+    def set(self, key: Optional[str], data: bytes) -> None:
+        """
+        Store bytes for a key and evict old entries if over the size limit.
+
+        Args:
+            key: Cache key from make_key()
+            data: Raw bytes to store
+        """
+        if not self.enabled or key is None or not data:
+            return
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            logger.debug(f"Stored step result in cache: {key[:8]}... ({len(data)} bytes)")
+        except OSError as e:
+            logger.warning(f"Step cache write failed for {key[:8]}: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += len(data) - replaced
+            due = self._size is None or self._size > self.max_bytes or self._writes >= self.rescan_writes
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Scan the directory and, if it is over max_bytes, remove least
+        recently used entries until under low_water of it.
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(self.suffix):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            self._writes = 0
+            self._size = total
+            if total <= self.max_bytes:
+                return 0
+
+            target = self.max_bytes * self.low_water
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+
+            self._size = total
+            logger.info(f"Step cache evicted {removed} entries")
+            return removed
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(self.suffix):
+                    os.remove(os.path.join(root, name))
+        with self._lock:
+            self._size = 0
+
+
+_step_cache = None
+
+
+def get_step_cache() -> StepResultCache:
+    """Return the shared step cache configured from settings."""
+    global _step_cache
+    cache_dir = getattr(settings, 'GEMINI_STEP_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'gemini_steps'))
+    if _step_cache is None or _step_cache.cache_dir != str(cache_dir):
+        _step_cache = StepResultCache(cache_dir=cache_dir, max_bytes=0)
+    _step_cache.max_bytes = getattr(settings, 'GEMINI_STEP_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+    _step_cache.enabled = getattr(settings, 'GEMINI_STEP_CACHE_ENABLED', True)
+    return _step_cache
@@ -4,10 +4,12 @@ import json
 import re
 from typing import Optional, Dict, Any
 from PIL import Image
-from google import genai
 from google.genai import types
 from django.conf import settings
 
+from api.ai_services.gemini_backends import get_model_client, requires_api_key
+from api.ai_services.rate_governor import get_rate_governor
+from api.services.usage_ledger import record_usage
 from .prompts import get_audit_prompt
 from .models import AuditReport
 
@@ -23,53 +25,85 @@ class AuditService:
     """
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             logger.error("GOOGLE_API_KEY not found. AuditService cannot function.")
             raise AuditServiceError("API Key missing. Please set GOOGLE_API_KEY.")
 
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = get_model_client(self.api_key)
         self.model_name = "gemini-3-flash-preview"  # Fast vision model for site assessment
 
     def perform_audit(self, visualization_request) -> AuditReport:
         """
         Performs a site assessment on the backyard image.
         """
+        # Check if audit already exists
+        if hasattr(visualization_request, 'audit_report'):
+            return visualization_request.audit_report
+
+        try:
+            image_path = visualization_request.original_image.path
+        except Exception as e:
+            raise AuditServiceError(f"Audit failed: {e}") from e
+
+        result_json = self.analyze_image(image_path)
+        return self.save_report(visualization_request, result_json)
+
+    def analyze_image(self, image_path: str) -> Dict[str, Any]:
+        """
+        Run the site assessment model on an image file.
+
+        Makes no database queries, so it can run on a worker thread while
+        the visualization pipeline is in flight.
+
+        Args:
+            image_path: Path to the request's normalized working image
+
+        Returns:
+            Parsed assessment JSON
+        """
         try:
-            # Check if audit already exists
-            if hasattr(visualization_request, 'audit_report'):
-                return visualization_request.audit_report
-
-            original_image_path = visualization_request.original_image.path
-            if not os.path.exists(original_image_path):
-                raise AuditServiceError(f"Image file not found: {original_image_path}")
-
-            with Image.open(original_image_path) as img:
-                # Resize if too large to save tokens/time, though 1.5 Pro handles large images well.
-                # Let's keep original for detail.
-                
+            if not os.path.exists(image_path):
+                raise AuditServiceError(f"Image file not found: {image_path}")
+
+            with Image.open(image_path) as img:
+                # The working copy is already upright, RGB and model-sized
                 prompt = get_audit_prompt()
-                result_json = self._call_gemini_json(img, prompt)
-
-                # Create AuditReport with new pool site assessment fields
-                audit_report = AuditReport.objects.create(
-                    request=visualization_request,
-                    # New pool site assessment fields
-                    has_tree_clearance_needed=result_json.get('has_tree_clearance_needed', False),
-                    has_structure_relocation_needed=result_json.get('has_structure_relocation_needed', False),
-                    has_grading_needed=result_json.get('has_grading_needed', False),
-                    has_access_considerations=result_json.get('has_access_considerations', False),
-                    site_items=result_json.get('site_items', []),
-                    assessment_summary=result_json.get('assessment_summary', "Site assessment completed."),
-                    # Legacy field mappings for backwards compatibility
-                    has_ground_level_access=result_json.get('has_tree_clearance_needed', False),
-                    has_concealment=result_json.get('has_structure_relocation_needed', False),
-                    has_glass_proximity=result_json.get('has_grading_needed', False),
-                    has_hardware_weakness=result_json.get('has_access_considerations', False),
-                    vulnerabilities=result_json.get('site_items', []),
-                    analysis_summary=result_json.get('assessment_summary', "Site assessment completed."),
-                )
-                
-                return audit_report
+                return self._call_gemini_json(img, prompt)
+
+        except Exception as e:
+            logger.error(f"Audit failed: {e}")
+            raise AuditServiceError(f"Audit failed: {e}") from e
+
+    def save_report(self, visualization_request, result_json: Dict[str, Any]) -> AuditReport:
+        """
+        Store an assessment result as the request's AuditReport.
+
+        Args:
+            visualization_request: VisualizationRequest instance
+            result_json: Output of analyze_image()
+
+        Returns:
+            The created AuditReport
+        """
+        try:
+            # Create AuditReport with new pool site assessment fields
+            return AuditReport.objects.create(
+                request=visualization_request,
+                # New pool site assessment fields
+                has_tree_clearance_needed=result_json.get('has_tree_clearance_needed', False),
+                has_structure_relocation_needed=result_json.get('has_structure_relocation_needed', False),
+                has_grading_needed=result_json.get('has_grading_needed', False),
+                has_access_considerations=result_json.get('has_access_considerations', False),
+                site_items=result_json.get('site_items', []),
+                assessment_summary=result_json.get('assessment_summary', "Site assessment completed."),
+                # Legacy field mappings for backwards compatibility
+                has_ground_level_access=result_json.get('has_tree_clearance_needed', False),
+                has_concealment=result_json.get('has_structure_relocation_needed', False),
+                has_glass_proximity=result_json.get('has_grading_needed', False),
+                has_hardware_weakness=result_json.get('has_access_considerations', False),
+                vulnerabilities=result_json.get('site_items', []),
+                analysis_summary=result_json.get('assessment_summary', "Site assessment completed."),
+            )
 
         except Exception as e:
             logger.error(f"Audit failed: {e}")
@@ -87,23 +121,15 @@ class AuditService:
             # Combine image and prompt
             contents = [image, prompt]
 
-            # Retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.client.models.generate_content(
-                        model=self.model_name,
-                        contents=contents,
-                        config=types.GenerateContentConfig(**config_args)
-                    )
-                    break
-                except Exception as e:
-                    if "429" in str(e) and attempt < max_retries - 1:
-                        import time
-                        time.sleep(2 * (attempt + 1))
-                    else:
-                        raise e
-            
+            response = get_rate_governor().call(
+                self.client.models.generate_content,
+                model=self.model_name,
+                contents=contents,
+                config=types.GenerateContentConfig(**config_args),
+                description="site_audit"
+            )
+            record_usage(self.model_name, 'site_audit', response.usage_metadata)
+
             # Extract text
             text_response = ""
             if response.candidates and response.candidates[0].content.parts:
@@ -0,0 +1,101 @@
+"""
+Django management command to benchmark the visualization pipeline end to end
+Usage: python manage.py bench --jobs 20 --concurrency 4
+       python manage.py bench --latency-median 20 --latency-sigma 0.4 --output bench.json
+       python manage.py bench --compare baseline.json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.benchmark_service import compare_reports, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Run visualization jobs against the offline Gemini backend and report per-stage latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=10, help='Number of visualization requests')
+        parser.add_argument('--concurrency', type=int, default=2, help='Requests processed at once')
+        parser.add_argument('--tenant', default='pools', help='Tenant whose pipeline runs')
+        parser.add_argument('--scope', default=None, help='Request scope as JSON (default: deck, water feature, finishing)')
+        parser.add_argument('--image', default=None, help='Upload to process (default: synthetic 1024x768 JPEG)')
+        parser.add_argument(
+            '--backend', choices=['fake', 'replay'], default='fake',
+            help='Offline Gemini backend (replay serves GEMINI_RECORDINGS_DIR)',
+        )
+        parser.add_argument('--latency-median', type=float, default=0.0, help='Fake model call latency median (seconds)')
+        parser.add_argument('--latency-sigma', type=float, default=0.0, help='Fake latency lognormal sigma (0 = fixed)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fake fraction of calls failing with 503')
+        parser.add_argument('--profile', default=None, help='Full fake profile as JSON (overrides the latency/error flags)')
+        parser.add_argument(
+            '--rate-limit', type=float, default=None,
+            help='Rate governor quota per minute (default GEMINI_RATE_LIMIT_PER_MINUTE)',
+        )
+        parser.add_argument('--step-cache', action='store_true', help='Allow cleanup results from the step cache')
+        parser.add_argument('--keep', action='store_true', help='Keep the bench requests and files')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+        parser.add_argument('--compare', default=None, help='Baseline JSON report to compare p95 against')
+
+    def handle(self, *args, **options):
+        if options['jobs'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--jobs and --concurrency must be at least 1')
+
+        try:
+            scope = json.loads(options['scope']) if options['scope'] else None
+            if options['profile']:
+                profile = json.loads(options['profile'])
+            elif options['latency_sigma'] > 0:
+                profile = {'latency': {
+                    'distribution': 'lognormal',
+                    'median': options['latency_median'],
+                    'sigma': options['latency_sigma'],
+                }}
+            else:
+                profile = {'latency': {'distribution': 'fixed', 'seconds': options['latency_median']}}
+            profile.setdefault('error_rate', options['error_rate'])
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Invalid JSON: {e}')
+
+        image_bytes = None
+        if options['image']:
+            with open(options['image'], 'rb') as f:
+                image_bytes = f.read()
+
+        report = run_benchmark(
+            jobs=options['jobs'],
+            concurrency=options['concurrency'],
+            tenant_id=options['tenant'],
+            scope=scope,
+            backend=options['backend'],
+            fake_profile=profile,
+            image_bytes=image_bytes,
+            step_cache=options['step_cache'],
+            rate_limit_per_minute=options['rate_limit'],
+            keep=options['keep'],
+        )
+
+        self.stdout.write(
+            f"{report['completed']}/{report['jobs']} jobs in {report['wall_seconds']}s "
+            f"(concurrency {report['concurrency']}, {report['throughput_per_minute']} jobs/min, "
+            f"peak RSS {report['peak_rss_mb']} MB)"
+        )
+        self.stdout.write(f"{'stage':<32}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for stage, stats in report['stages'].items():
+            self.stdout.write(f"{stage:<32}{stats['count']:>7}{stats['p50']:>10.4f}{stats['p95']:>10.4f}{stats['p99']:>10.4f}")
+        for failure in report['failures']:
+            self.stdout.write(self.style.WARNING(f"failed: {failure}"))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            self.stdout.write(f"p95 vs {baseline.get('revision') or options['compare']}:")
+            for stage, change in compare_reports(baseline, report).items():
+                ratio = f"{change['ratio']:.2f}x" if change['ratio'] is not None else 'n/a'
+                self.stdout.write(f"  {stage:<30} {change['baseline']} -> {change['current']} ({ratio})")
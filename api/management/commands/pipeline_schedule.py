@@ -0,0 +1,60 @@
+"""
+Django management command to print a tenant's pipeline schedule (dry run)
+Usage: python manage.py pipeline_schedule --tenant pools
+       python manage.py pipeline_schedule --tenant pools --fused
+       python manage.py pipeline_schedule --tenant pools --fusion-report
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.pipeline_registry import PipelineScheduleError, PipelineScheduler
+from api.services.step_fusion import fuse_steps, fusion_report, is_fusion_enabled
+from api.tenants import get_tenant_config
+
+
+class Command(BaseCommand):
+    help = 'Print the step schedule for a tenant pipeline without running it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            default=None,
+            help='Tenant ID (defaults to the active tenant)',
+        )
+        parser.add_argument(
+            '--fused',
+            action='store_true',
+            help='Show the schedule with fusable steps merged, even if fusion is off for the tenant',
+        )
+        parser.add_argument(
+            '--fusion-report',
+            action='store_true',
+            help='Compare latency and quality score of fused and unfused runs',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant_config = get_tenant_config(options['tenant'])
+            steps = [
+                (name, tenant_config.get_step_config(name))
+                for name in tenant_config.get_pipeline_steps()
+            ]
+            fusion = options['fused'] or is_fusion_enabled(tenant_config.tenant_id)
+            if fusion:
+                # Every step counts as selected
+                steps, _ = fuse_steps(steps, lambda name, config: '')
+            scheduler = PipelineScheduler(steps)
+        except (ValueError, PipelineScheduleError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Tenant: {tenant_config.tenant_id} (step fusion {'on' if fusion else 'off'})")
+        self.stdout.write(scheduler.describe())
+
+        if options['fusion_report']:
+            self.stdout.write('Fusion report:')
+            for kind, stats in fusion_report(tenant_config.tenant_id).items():
+                self.stdout.write(
+                    f"  {kind}: {stats['runs']} runs, "
+                    f"mean {stats['mean_pipeline_seconds']}s, "
+                    f"mean quality {stats['mean_quality_score']}"
+                )
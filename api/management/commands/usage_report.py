@@ -0,0 +1,61 @@
+"""
+Django management command to report model spend from the usage ledger
+Usage: python manage.py usage_report
+       python manage.py usage_report --tenant pools --days 30
+       python manage.py usage_report --json
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.services.usage_ledger import daily_costs, daily_spend, get_budget, visualization_costs
+
+
+class Command(BaseCommand):
+    help = 'Show daily model spend and cost per completed visualization'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', default=None, help='Only this tenant (default all)')
+        parser.add_argument('--days', type=int, default=7, help='Days to report, including today')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+
+        since = timezone.now() - timedelta(days=options['days'])
+        report = {
+            'daily': daily_costs(options['days'], options['tenant']),
+            'visualizations': visualization_costs(options['tenant'], since),
+        }
+        if options['tenant']:
+            report['budget'] = dict(get_budget(options['tenant']), spent_today_usd=daily_spend(options['tenant']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'day':<12}{'tenant':<16}{'calls':>8}{'tokens':>12}{'cost USD':>12}")
+        for row in report['daily']:
+            self.stdout.write(
+                f"{row['day']:<12}{row['tenant_id']:<16}{row['calls']:>8}{row['tokens']:>12}{row['cost_usd']:>12.4f}"
+            )
+
+        costs = report['visualizations']
+        if costs['visualizations']:
+            self.stdout.write(
+                f"\n{costs['visualizations']} completed visualizations: mean ${costs['mean_usd']:.4f}, "
+                f"median ${costs['median_usd']:.4f}, max ${costs['max_usd']:.4f}"
+            )
+            for step, cost in costs['by_step'].items():
+                self.stdout.write(f"  {step:<30} ${cost:.4f}")
+        else:
+            self.stdout.write("\nNo completed visualizations in this period")
+
+        if 'budget' in report:
+            budget = report['budget']
+            cap = f"${budget['daily_usd']:.2f}" if budget.get('daily_usd') is not None else 'none'
+            self.stdout.write(f"\nToday: ${budget['spent_today_usd']:.4f} spent, daily budget {cap}")
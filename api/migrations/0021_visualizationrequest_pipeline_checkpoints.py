@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_increase_status_message_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visualizationrequest',
+            name='pipeline_checkpoints',
+            field=models.JSONField(blank=True, default=dict, help_text='Saved intermediate pipeline outputs (step name -> fingerprint and image path)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_visualizationrequest_pipeline_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visualizationrequest',
+            name='step_previews',
+            field=models.JSONField(blank=True, default=list, help_text='Small previews of each finished pipeline step, in order'),
+        ),
+    ]
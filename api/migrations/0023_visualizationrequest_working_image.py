@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:03
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_visualizationrequest_step_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visualizationrequest',
+            name='working_image',
+            field=models.ImageField(blank=True, help_text='Upright, RGB, downscaled copy of the original fed to every pipeline step', null=True, upload_to=api.models.upload_to_working),
+        ),
+    ]
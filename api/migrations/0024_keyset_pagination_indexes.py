@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_visualizationrequest_working_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='generatedimage',
+            name='api_generat_generat_2e51dc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='visualizationrequest',
+            name='api_visuali_created_f6f0bb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(fields=['-generated_at', '-id'], name='api_generat_generat_0ba054_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['-created_at', '-id'], name='api_lead_created_d0c9a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visualizationrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='api_visuali_created_d72c81_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+SCOPE_GIN_INDEX = 'viz_scope_gin_idx'
+
+
+def create_scope_gin_index(apps, schema_editor):
+    """GIN index for scope containment/key queries (PostgreSQL only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('api', 'VisualizationRequest')._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {SCOPE_GIN_INDEX} ON "{table}" USING gin ("scope")'
+    )
+
+
+def drop_scope_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {SCOPE_GIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='visualizationrequest',
+            index=models.Index(fields=['tenant_id', 'status', '-created_at'], name='viz_tenant_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visualizationrequest',
+            index=models.Index(fields=['contractor_id', '-created_at'], name='viz_contractor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visualizationrequest',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['status', 'updated_at'], name='viz_active_updated_idx'),
+        ),
+        # The composite index above now serves contractor_id lookups
+        migrations.AlterField(
+            model_name='visualizationrequest',
+            name='contractor_id',
+            field=models.IntegerField(blank=True, help_text='ID of matched contractor from contractors_contractor table (if FEATURE_CONTRACTOR_LINKING enabled)', null=True),
+        ),
+        migrations.RunPython(create_scope_gin_index, drop_scope_gin_index),
+    ]
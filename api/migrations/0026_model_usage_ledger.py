@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(help_text='Tenant billed for the call', max_length=50)),
+                ('contractor_id', models.IntegerField(blank=True, help_text='Contractor linked to the request, if any', null=True)),
+                ('step', models.CharField(help_text="Pipeline step or service (e.g., 'cleanup', 'quality_check', 'site_audit')", max_length=100)),
+                ('model', models.CharField(help_text='Model that served the call', max_length=100)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('candidates_tokens', models.PositiveIntegerField(default=0)),
+                ('thoughts_tokens', models.PositiveIntegerField(default=0)),
+                ('total_tokens', models.PositiveIntegerField(default=0)),
+                ('cost_usd', models.DecimalField(decimal_places=6, default=0, help_text='Cost in USD at the configured per-token prices', max_digits=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('request', models.ForeignKey(blank=True, help_text='Visualization request the call was made for (kept if the request is deleted)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='model_usage', to='api.visualizationrequest')),
+            ],
+            options={
+                'verbose_name': 'Model Usage',
+                'verbose_name_plural': 'Model Usage',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['tenant_id', 'created_at'], name='usage_tenant_created_idx')],
+            },
+        ),
+    ]
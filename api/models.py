@@ -1,6 +1,8 @@
 import os
 import uuid
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
 from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -59,6 +61,13 @@ def upload_to_generated(instance, filename):
     return os.path.join('generated', str(user_id), filename)
 
 
+def upload_to_working(instance, filename):
+    """Generate upload path for normalized working copies."""
+    ext = filename.split('.')[-1]
+    filename = f"{uuid.uuid4()}.{ext}"
+    return os.path.join('working', str(instance.user.id), filename)
+
+
 class UserProfileManager(models.Manager):
     """Custom manager for UserProfile model."""
 
@@ -142,6 +151,28 @@ class VisualizationRequestManager(models.Manager):
         """Get failed requests."""
         return self.filter(status='failed')
 
+    def with_list_data(self):
+        """
+        Get requests with everything the list serializer reads, in a fixed
+        number of queries regardless of page size.
+
+        Each row has result_count annotated and latest_results prefetched
+        (a list holding at most the newest GeneratedImage).
+        """
+        latest_id = GeneratedImage.objects.filter(
+            request=OuterRef('request')
+        ).order_by('-generated_at', '-id').values('id')[:1]
+
+        return self.select_related('user').annotate(
+            result_count=Count('results')
+        ).prefetch_related(
+            Prefetch(
+                'results',
+                queryset=GeneratedImage.objects.filter(id=Subquery(latest_id)),
+                to_attr='latest_results',
+            )
+        )
+
     def recent(self, days=7):
         """Get requests from the last N days."""
         cutoff_date = timezone.now() - timezone.timedelta(days=days)
@@ -173,6 +204,12 @@ class VisualizationRequest(models.Model):
         ],
         help_text="Original image to be processed"
     )
+    working_image = models.ImageField(
+        upload_to=upload_to_working,
+        null=True,
+        blank=True,
+        help_text="Upright, RGB, downscaled copy of the original fed to every pipeline step"
+    )
     clean_image = models.ImageField(
         upload_to=upload_to_generated,
         null=True,
@@ -359,12 +396,21 @@ class VisualizationRequest(models.Model):
         blank=True,
         help_text="Calculated price breakdown from pricing engine"
     )
+    pipeline_checkpoints = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Saved intermediate pipeline outputs (step name -> fingerprint and image path)"
+    )
+    step_previews = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Small previews of each finished pipeline step, in order"
+    )
 
     # Optional contractor linking (feature-flagged)
     contractor_id = models.IntegerField(
         null=True,
         blank=True,
-        db_index=True,
         help_text="ID of matched contractor from contractors_contractor table (if FEATURE_CONTRACTOR_LINKING enabled)"
     )
 
@@ -377,7 +423,25 @@ class VisualizationRequest(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # Keyset pagination key; also serves created_at range filters
+            models.Index(fields=['-created_at', '-id']),
+            # Tenant dashboards: one tenant's requests by status, newest first
+            models.Index(
+                fields=['tenant_id', 'status', '-created_at'],
+                name='viz_tenant_status_created_idx',
+            ),
+            # Contractor history; also serves contractor_id lookups
+            models.Index(fields=['contractor_id', '-created_at'], name='viz_contractor_created_idx'),
+            # Job scanner: only pending/processing rows are indexed, so the
+            # index stays small however many finished requests pile up
+            models.Index(
+                fields=['status', 'updated_at'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='viz_active_updated_idx',
+            ),
+            # A GIN index on scope (viz_scope_gin_idx) is created on
+            # PostgreSQL only by migration 0025; it is not declared here
+            # because other backends cannot build it.
         ]
 
     def __str__(self):
@@ -391,11 +455,30 @@ class VisualizationRequest(models.Model):
         if self.status == 'complete' and not self.processing_completed_at:
             self.processing_completed_at = timezone.now()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override save to call clean."""
+        """Override save to call clean and keep the stats counters in step."""
         self.clean()
+        adding = self._state.adding
+        previous = None if adding else getattr(self, '_saved_status', None)
+        update_fields = kwargs.get('update_fields')
         super().save(*args, **kwargs)
 
+        if update_fields is None or 'status' in update_fields:
+            current = self.status
+            # previous is unknown when status was deferred on load
+            if previous != current and (adding or previous is not None):
+                from api.services.stats_service import record_status_change
+
+                # Counters only move once the change is committed
+                transaction.on_commit(lambda: record_status_change(self, previous, current))
+            self._saved_status = current
+
     @property
     def processing_duration(self):
         """Get processing duration if available."""
@@ -427,13 +510,36 @@ class VisualizationRequest(models.Model):
         if task_id:
             self.task_id = task_id
         self.save()
+        self._persisted_progress = self.progress_percentage
+        self._publish_progress()
 
     def update_progress(self, progress, status_message=None):
-        """Update processing progress."""
+        """
+        Update processing progress.
+
+        Every update is pushed to the progress stream. The row itself is only
+        written when progress crosses one of PROGRESS_DB_CHECKPOINTS, so
+        polling clients still see coarse progress without a write per tick.
+        """
+        persisted = getattr(self, '_persisted_progress', self.progress_percentage)
         self.progress_percentage = min(100, max(0, progress))
         if status_message:
             self.status_message = status_message
-        self.save(update_fields=['progress_percentage', 'status_message'])
+
+        checkpoints = getattr(settings, 'PROGRESS_DB_CHECKPOINTS', (25, 50, 75, 90))
+        if any(persisted < checkpoint <= self.progress_percentage for checkpoint in checkpoints):
+            from api.services.tracing import span
+
+            with span('db.progress_write', progress=self.progress_percentage):
+                self.save(update_fields=['progress_percentage', 'status_message'])
+            self._persisted_progress = self.progress_percentage
+        self._publish_progress()
+
+    def _publish_progress(self):
+        """Push the current state to progress stream subscribers."""
+        from api.services.progress_stream import publish_progress
+
+        publish_progress(self.id, self.status, self.progress_percentage, self.status_message)
 
     def mark_as_complete(self):
         """Mark request as complete."""
@@ -442,6 +548,8 @@ class VisualizationRequest(models.Model):
         self.progress_percentage = 100
         self.status_message = "Processing completed successfully!"
         self.save()
+        self._persisted_progress = self.progress_percentage
+        self._publish_progress()
 
     def mark_as_failed(self, error_message=None):
         """Mark request as failed."""
@@ -455,11 +563,21 @@ class VisualizationRequest(models.Model):
         else:
             self.status_message = "Processing failed"
         self.save()
+        self._persisted_progress = self.progress_percentage
+        self._publish_progress()
 
     def get_result_count(self):
-        """Get number of generated results."""
+        """Get number of generated results (annotated count if present)."""
+        if hasattr(self, 'result_count'):
+            return self.result_count
         return self.results.count()
 
+    def get_latest_result(self):
+        """Get the newest generated result (prefetched one if present)."""
+        if hasattr(self, 'latest_results'):
+            return self.latest_results[0] if self.latest_results else None
+        return self.results.order_by('-generated_at', '-id').first()
+
 
 class GeneratedImageManager(models.Manager):
     """Custom manager for GeneratedImage model."""
@@ -517,18 +635,23 @@ class GeneratedImage(models.Model):
         ordering = ['-generated_at']
         indexes = [
             models.Index(fields=['request', '-generated_at']),
-            models.Index(fields=['generated_at']),
+            # Keyset pagination key; also serves generated_at range filters
+            models.Index(fields=['-generated_at', '-id']),
         ]
 
     def __str__(self):
         return f"Result for Request {self.request.id}"
 
     def save(self, *args, **kwargs):
-        """Override save to extract image metadata."""
+        """Override save to extract image metadata the caller did not set."""
         if self.generated_image and not self.file_size:
             try:
                 self.file_size = self.generated_image.size
+            except Exception:
+                pass  # Ignore errors in metadata extraction
 
+        if self.generated_image and not (self.image_width and self.image_height):
+            try:
                 # Extract image dimensions
                 img = Image.open(self.generated_image)
                 self.image_width = img.width
@@ -595,6 +718,10 @@ class Lead(models.Model):
         verbose_name = "Lead"
         verbose_name_plural = "Leads"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Lead: {self.name} ({self.email})"
@@ -667,6 +794,50 @@ class TenantConfig(models.Model):
     def __str__(self):
         return f"{self.display_name} (v{self.config_version})"
 
+    def save(self, *args, **kwargs):
+        # Every change is a new version; workers recompile when it moves
+        bump = not self._state.adding
+        if bump:
+            self.config_version = F('config_version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'config_version' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'config_version']
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=['config_version'])
+        self._invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cache()
+        return result
+
+    def _invalidate_cache(self):
+        from api.services.config_cache import invalidate_tenant_cache
+        from api.tenants.loader import clear_tenant_plans
+
+        tenant_id = self.tenant_id
+
+        def invalidate():
+            clear_tenant_plans(tenant_id)
+            invalidate_tenant_cache([tenant_id])
+
+        # Readers keep the old version until the change is committed
+        transaction.on_commit(invalidate)
+
+    @classmethod
+    def bump_version(cls, tenant_id: str) -> None:
+        """Record a change to a tenant's DB config, creating its row if needed."""
+        from api.tenants import get_all_tenants
+
+        base = get_all_tenants().get(tenant_id)
+        config, created = cls.objects.get_or_create(
+            tenant_id=tenant_id,
+            defaults={'display_name': base.display_name if base else tenant_id},
+        )
+        if not created:
+            config.save(update_fields=['config_version'])
+
 
 class PromptOverride(models.Model):
     """
@@ -715,6 +886,15 @@ class PromptOverride(models.Model):
         status = "active" if self.is_active else "inactive"
         return f"{self.tenant_id}/{self.step_name} v{self.version} ({status})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        TenantConfig.bump_version(self.tenant_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        TenantConfig.bump_version(self.tenant_id)
+        return result
+
 
 class ReferenceImage(models.Model):
     """
@@ -773,3 +953,61 @@ class ReferenceImage(models.Model):
 
     def __str__(self):
         return f"{self.tenant_id}/{self.category}/{self.option_value}"
+
+
+class ModelUsage(models.Model):
+    """
+    Ledger row for one model call: token usage from the response's
+    usage_metadata and its cost at GEMINI_MODEL_PRICING.
+
+    Rows are buffered per job and bulk inserted when the job ends
+    (see api.services.usage_ledger).
+    """
+    request = models.ForeignKey(
+        VisualizationRequest,
+        related_name='model_usage',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text="Visualization request the call was made for (kept if the request is deleted)"
+    )
+    tenant_id = models.CharField(
+        max_length=50,
+        help_text="Tenant billed for the call"
+    )
+    contractor_id = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Contractor linked to the request, if any"
+    )
+    step = models.CharField(
+        max_length=100,
+        help_text="Pipeline step or service (e.g., 'cleanup', 'quality_check', 'site_audit')"
+    )
+    model = models.CharField(
+        max_length=100,
+        help_text="Model that served the call"
+    )
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    candidates_tokens = models.PositiveIntegerField(default=0)
+    thoughts_tokens = models.PositiveIntegerField(default=0)
+    total_tokens = models.PositiveIntegerField(default=0)
+    cost_usd = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        default=0,
+        help_text="Cost in USD at the configured per-token prices"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Model Usage"
+        verbose_name_plural = "Model Usage"
+        ordering = ['-created_at']
+        indexes = [
+            # Daily spend per tenant (budgets, reports)
+            models.Index(fields=['tenant_id', 'created_at'], name='usage_tenant_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id}/{self.step} {self.model}: {self.total_tokens} tokens"
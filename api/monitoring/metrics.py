@@ -0,0 +1,373 @@
+"""
+Metrics - Counters and histograms shared by every worker process.
+
+Each gunicorn and Celery worker records into one store, so /metrics and the
+health dashboards see the whole deployment rather than one process's
+slice. With METRICS_BACKEND = 'redis' samples are added to Redis hashes
+(one pipelined round trip per observation); 'local' keeps them in this
+process, for development and tests.
+
+Every sample is added twice: to the running totals that /metrics exposes
+in the Prometheus text format, and to a time bucket of
+METRICS_WINDOW_SECONDS, so the health checks can read the last hour or day
+without keeping per-request history.
+
+Gauges (e.g. queue depth) are read when metrics are collected.
+
+Usage:
+    from api.monitoring.metrics import get_metrics_registry
+
+    metrics = get_metrics_registry()
+    metrics.inc('gemini_retries_total')
+    metrics.observe('gemini_step_duration_seconds', 12.5, step='cleanup')
+    metrics.snapshot(window_seconds=3600)  # last hour
+    metrics.render()                       # Prometheus exposition text
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'visualizer'
+WINDOW_RETENTION_SECONDS = 25 * 3600
+
+
+class MetricsError(Exception):
+    """Raised for undeclared metrics or wrong labels."""
+    pass
+
+
+@dataclass(frozen=True)
+class Metric:
+    """A declared metric. Histogram buckets are upper bounds (le)."""
+    name: str
+    kind: str  # counter, histogram or gauge
+    help: str
+    labels: Tuple[str, ...] = ()
+    buckets: Tuple[float, ...] = ()
+
+
+METRICS = {metric.name: metric for metric in [
+    Metric('http_request_duration_seconds', 'histogram', 'HTTP request latency',
+           ('method', 'route', 'status'), (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)),
+    Metric('visualization_job_duration_seconds', 'histogram', 'Visualization job duration',
+           ('tenant', 'outcome'), (5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600)),
+    Metric('visualization_quality_score', 'histogram', 'Quality check score of completed jobs',
+           ('tenant',), (0.65, 0.75, 0.85, 1.0)),
+    # Dashboard bands (lower bounds inclusive, unlike le buckets)
+    Metric('visualization_quality_band_total', 'counter', 'Completed jobs per quality band', ('tenant', 'band')),
+    Metric('visualization_cost_usd_total', 'counter', 'Estimated model cost of jobs', ('tenant',)),
+    Metric('gemini_step_duration_seconds', 'histogram', 'Pipeline step latency',
+           ('step',), (1, 2.5, 5, 10, 15, 20, 30, 45, 60, 120)),
+    Metric('gemini_retries_total', 'counter', 'Gemini attempts retried after an error'),
+    Metric('gemini_rate_limited_total', 'counter', 'Gemini attempts rejected with 429'),
+    Metric('gemini_tokens_total', 'counter', 'Gemini token usage', ('model', 'kind')),
+    Metric('cache_lookups_total', 'counter', 'Result cache lookups', ('cache', 'result')),
+    Metric('visualization_queue_depth', 'gauge', 'Visualization requests waiting or running', ('status',)),
+]}
+
+
+def _field(name: str, labels: Dict[str, str], suffix: str = '') -> str:
+    """Store field for one sample: name|labels-json|suffix."""
+    return f"{name}|{json.dumps(sorted(labels.items()), separators=(',', ':'))}|{suffix}"
+
+
+def _parse_field(field: str) -> Tuple[str, Dict[str, str], str]:
+    name, rest = field.split('|', 1)
+    labels, suffix = rest.rsplit('|', 1)
+    return name, dict(json.loads(labels)), suffix
+
+
+class LocalMetricStore:
+    """In-process store (one worker only)."""
+
+    backend = 'local'
+
+    def __init__(self):
+        self._totals: Dict[str, float] = defaultdict(float)
+        self._windows: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+
+    def add(self, increments: Dict[str, float], window: int) -> None:
+        with self._lock:
+            bucket = self._windows[window]
+            for field, value in increments.items():
+                self._totals[field] += value
+                bucket[field] += value
+            expired = [start for start in self._windows if start < window - WINDOW_RETENTION_SECONDS]
+            for start in expired:
+                del self._windows[start]
+
+    def totals(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals)
+
+    def windows(self, starts: List[int]) -> List[Dict[str, float]]:
+        with self._lock:
+            return [dict(self._windows[start]) for start in starts if start in self._windows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+            self._windows.clear()
+
+
+class RedisMetricStore:
+    """Store shared by every process through Redis hashes."""
+
+    backend = 'redis'
+
+    def __init__(self, redis_url: str, prefix: str = 'metrics'):
+        import redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.prefix = prefix
+
+    def _window_key(self, start: int) -> str:
+        return f"{self.prefix}:window:{start}"
+
+    def add(self, increments: Dict[str, float], window: int) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        window_key = self._window_key(window)
+        for field, value in increments.items():
+            pipe.hincrbyfloat(f"{self.prefix}:total", field, value)
+            pipe.hincrbyfloat(window_key, field, value)
+        pipe.expire(window_key, WINDOW_RETENTION_SECONDS)
+        pipe.execute()
+
+    @staticmethod
+    def _decode(data: Dict[bytes, bytes]) -> Dict[str, float]:
+        return {field.decode(): float(value) for field, value in data.items()}
+
+    def totals(self) -> Dict[str, float]:
+        return self._decode(self.redis.hgetall(f"{self.prefix}:total"))
+
+    def windows(self, starts: List[int]) -> List[Dict[str, float]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for start in starts:
+            pipe.hgetall(self._window_key(start))
+        return [self._decode(data) for data in pipe.execute()]
+
+    def clear(self) -> None:
+        keys = list(self.redis.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.redis.delete(*keys)
+
+
+class MetricsRegistry:
+    """
+    Records declared metrics into a store and reads them back.
+
+    A failing store is logged and the sample dropped, so metrics cannot
+    break a request or a job. Undeclared metrics or labels raise
+    MetricsError.
+    """
+
+    def __init__(self, store, window_seconds: int = 300):
+        self.store = store
+        self.window_seconds = window_seconds
+        self._collectors: List[Callable[[], Dict[str, List[Tuple[Dict[str, str], float]]]]] = []
+
+    def _metric(self, name: str, kind: str, labels: Dict[str, Any]) -> Metric:
+        metric = METRICS.get(name)
+        if metric is None or metric.kind != kind:
+            raise MetricsError(f"'{name}' is not a declared {kind}")
+        if set(labels) != set(metric.labels):
+            raise MetricsError(f"'{name}' takes labels {metric.labels}, got {tuple(labels)}")
+        return metric
+
+    def _window_start(self, now: float) -> int:
+        return int(now // self.window_seconds * self.window_seconds)
+
+    def _add(self, increments: Dict[str, float]) -> None:
+        try:
+            self.store.add(increments, self._window_start(time.time()))
+        except Exception as e:
+            logger.warning(f"Failed to record metrics: {e}")
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        """Add to a counter."""
+        self._metric(name, 'counter', labels)
+        self._add({_field(name, {k: str(v) for k, v in labels.items()}): value})
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a histogram observation."""
+        metric = self._metric(name, 'histogram', labels)
+        labels = {k: str(v) for k, v in labels.items()}
+        # Buckets are stored per interval and made cumulative when read
+        bound = next((b for b in metric.buckets if value <= b), math.inf)
+        self._add({
+            _field(name, labels, f'bucket:{bound}'): 1,
+            _field(name, labels, 'sum'): value,
+            _field(name, labels, 'count'): 1,
+        })
+
+    def register_collector(self, collector: Callable[[], Dict[str, List[Tuple[Dict[str, str], float]]]]) -> None:
+        """Add a function returning current gauge values {name: [(labels, value)]}."""
+        self._collectors.append(collector)
+
+    def snapshot(self, window_seconds: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Recorded values, as {metric name: {field: value}}.
+
+        Args:
+            window_seconds: Only samples from about this many recent seconds
+                (whole buckets); None for running totals
+
+        Returns:
+            Fields are _field() keys; empty if the store cannot be read
+        """
+        try:
+            if window_seconds is None:
+                fields = self.store.totals()
+            else:
+                newest = self._window_start(time.time())
+                starts = list(range(newest - window_seconds + self.window_seconds, newest + 1, self.window_seconds))
+                fields = defaultdict(float)
+                for bucket in self.store.windows(starts):
+                    for field, value in bucket.items():
+                        fields[field] += value
+        except Exception as e:
+            logger.warning(f"Failed to read metrics: {e}")
+            return {}
+
+        grouped: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for field, value in fields.items():
+            grouped[field.split('|', 1)[0]][field] = value
+        return dict(grouped)
+
+    def total(self, snapshot: Dict[str, Dict[str, float]], name: str, suffix: str = '', **labels) -> float:
+        """Sum of a metric's fields in a snapshot whose labels include these."""
+        wanted = {k: str(v) for k, v in labels.items()}
+        result = 0.0
+        for field, value in snapshot.get(name, {}).items():
+            _, field_labels, field_suffix = _parse_field(field)
+            if field_suffix == suffix and all(field_labels.get(k) == v for k, v in wanted.items()):
+                result += value
+        return result
+
+    def _collect_gauges(self) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+        gauges: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+        for collector in self._collectors:
+            try:
+                gauges.update(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return gauges
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)."""
+        snapshot = self.snapshot()
+        gauges = self._collect_gauges()
+        lines = []
+        for metric in METRICS.values():
+            full_name = f"{NAMESPACE}_{metric.name}"
+            lines.append(f"# HELP {full_name} {metric.help}")
+            lines.append(f"# TYPE {full_name} {metric.kind}")
+
+            if metric.kind == 'gauge':
+                for labels, value in gauges.get(metric.name, []):
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+
+            series: Dict[str, Dict[str, float]] = defaultdict(dict)
+            for field, value in snapshot.get(metric.name, {}).items():
+                _, labels, suffix = _parse_field(field)
+                series[json.dumps(sorted(labels.items()))][suffix] = value
+            for key in sorted(series):
+                labels, values = dict(json.loads(key)), series[key]
+                if metric.kind == 'counter':
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(values.get('', 0.0))}")
+                    continue
+                cumulative = 0.0
+                for bound in metric.buckets + (math.inf,):
+                    cumulative += values.get(f'bucket:{bound}', 0.0)
+                    le = '+Inf' if bound == math.inf else _format_value(bound)
+                    lines.append(f"{full_name}_bucket{_format_labels(dict(labels, le=le))} {_format_value(cumulative)}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(values.get('sum', 0.0))}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {_format_value(values.get('count', 0.0))}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _queue_depth() -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+    """Pending and processing visualization requests, from the database."""
+    from django.db.models import Count
+
+    from api.models import VisualizationRequest
+
+    counts = dict(
+        VisualizationRequest.objects.filter(status__in=('pending', 'processing'))
+        .values_list('status').annotate(total=Count('id'))
+    )
+    return {'visualization_queue_depth': [
+        ({'status': status}, counts.get(status, 0)) for status in ('pending', 'processing')
+    ]}
+
+
+def record_token_usage(model: str, usage) -> None:
+    """Count the tokens in a Gemini response's usage_metadata."""
+    if not usage:
+        return
+    metrics = get_metrics_registry()
+    for kind in ('prompt', 'candidates', 'thoughts'):
+        count = getattr(usage, f'{kind}_token_count', 0) or 0
+        if count:
+            metrics.inc('gemini_tokens_total', count, model=model, kind=kind)
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def build_metrics_registry() -> MetricsRegistry:
+    """Create a registry from settings."""
+    store = LocalMetricStore()
+    if getattr(settings, 'METRICS_BACKEND', 'local') == 'redis':
+        try:
+            store = RedisMetricStore(getattr(settings, 'METRICS_REDIS_URL', settings.REDIS_URL))
+        except Exception as e:
+            logger.error(f"Redis metrics store unavailable, using in-process store: {str(e)}")
+
+    registry = MetricsRegistry(store, int(getattr(settings, 'METRICS_WINDOW_SECONDS', 300)))
+    registry.register_collector(_queue_depth)
+    return registry
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = build_metrics_registry()
+    return _registry
+
+
+def reset_metrics_registry() -> None:
+    """Drop the shared registry so the next call rebuilds it from settings."""
+    global _registry
+    with _registry_lock:
+        _registry = None
@@ -0,0 +1,30 @@
+"""
+Request latency middleware.
+
+Records every HTTP request in the shared metrics registry, labelled by the
+matched URL route (not the path, so IDs do not create new series).
+"""
+
+import time
+
+from .metrics import get_metrics_registry
+
+
+class MetricsMiddleware:
+    """Observe http_request_duration_seconds for each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        get_metrics_registry().observe(
+            'http_request_duration_seconds',
+            time.perf_counter() - start,
+            method=request.method,
+            route=match.route if match else 'unmatched',
+            status=response.status_code,
+        )
+        return response
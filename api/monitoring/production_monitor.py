@@ -1,6 +1,10 @@
 """
 Production Monitoring System
 Comprehensive monitoring and alerting for the homescreen AI services
+
+Request metrics are recorded in the shared metrics registry
+(api/monitoring/metrics.py), so health and dashboard figures cover every
+worker process. Alerts are logged by the process that saw the request.
 """
 
 import logging
@@ -11,15 +15,18 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import os
 
+from .metrics import get_metrics_registry
+
 logger = logging.getLogger(__name__)
 
 class ProductionMonitor:
     """Production monitoring and alerting system."""
     
     def __init__(self):
-        self.metrics_history = []
         self.alerts = []
         self.monitoring_enabled = True
+        # Lowest score of each dashboard band, best first
+        self.quality_bands = (('excellent', 0.85), ('good', 0.75), ('fair', 0.65), ('poor', 0.0))
         self.alert_thresholds = {
             'error_rate': 0.05,  # 5% error rate threshold
             'response_time': 60.0,  # 60 second response time threshold
@@ -31,67 +38,87 @@ class ProductionMonitor:
     def record_request_metrics(self, metrics: Dict[str, Any]):
         """Record metrics for a single request."""
         try:
-            timestamp = datetime.now()
-            
             request_metrics = {
-                'timestamp': timestamp.isoformat(),
+                'timestamp': datetime.now().isoformat(),
+                'tenant_id': metrics.get('tenant_id') or 'unknown',
                 'success': metrics.get('success', False),
                 'processing_time': metrics.get('processing_time', 0.0),
-                'quality_score': metrics.get('quality_score', 0.0),
+                'quality_score': metrics.get('quality_score') or 0.0,
                 'cost': metrics.get('cost', 0.0),
-                'cache_hit': metrics.get('cache_hit', False),
                 'model_used': metrics.get('model_used', 'unknown'),
                 'error_type': metrics.get('error_type', None)
             }
-            
-            self.metrics_history.append(request_metrics)
-            
-            # Keep only last 1000 entries to prevent memory issues
-            if len(self.metrics_history) > 1000:
-                self.metrics_history = self.metrics_history[-1000:]
+
+            registry = get_metrics_registry()
+            tenant = request_metrics['tenant_id']
+            registry.observe(
+                'visualization_job_duration_seconds', request_metrics['processing_time'],
+                tenant=tenant, outcome='success' if request_metrics['success'] else 'failure'
+            )
+            if request_metrics['quality_score'] > 0:
+                registry.observe('visualization_quality_score', request_metrics['quality_score'], tenant=tenant)
+                band = next(name for name, floor in self.quality_bands if request_metrics['quality_score'] >= floor)
+                registry.inc('visualization_quality_band_total', tenant=tenant, band=band)
+            if request_metrics['cost']:
+                registry.inc('visualization_cost_usd_total', request_metrics['cost'], tenant=tenant)
             
             # Check for alerts
             self._check_alerts(request_metrics)
             
         except Exception as e:
             logger.error(f"Failed to record request metrics: {str(e)}")
+
+    def _summarize(self, window_seconds: int = None) -> Dict[str, Any]:
+        """Job, quality, cost and cache figures from the metrics registry."""
+        registry = get_metrics_registry()
+        snapshot = registry.snapshot(window_seconds)
+
+        jobs = 'visualization_job_duration_seconds'
+        total_requests = int(registry.total(snapshot, jobs, 'count'))
+        successful_requests = int(registry.total(snapshot, jobs, 'count', outcome='success'))
+        quality_count = registry.total(snapshot, 'visualization_quality_score', 'count')
+        cache_hits = registry.total(snapshot, 'cache_lookups_total', result='hit')
+        cache_lookups = registry.total(snapshot, 'cache_lookups_total')
+
+        return {
+            'total_requests': total_requests,
+            'successful_requests': successful_requests,
+            'error_rate': (total_requests - successful_requests) / total_requests if total_requests else 0,
+            'avg_response_time': registry.total(snapshot, jobs, 'sum') / total_requests if total_requests else 0,
+            'avg_quality_score': (
+                registry.total(snapshot, 'visualization_quality_score', 'sum') / quality_count if quality_count else 0
+            ),
+            'quality_bands': {
+                name: int(registry.total(snapshot, 'visualization_quality_band_total', band=name))
+                for name, _ in self.quality_bands
+            },
+            'cache_hit_rate': cache_hits / cache_lookups if cache_lookups else None,
+            'total_cost': registry.total(snapshot, 'visualization_cost_usd_total'),
+        }
     
     def get_system_health(self) -> Dict[str, Any]:
-        """Get current system health status."""
+        """Get current system health status (last hour, all workers)."""
         try:
-            if not self.metrics_history:
-                return {
-                    'status': 'unknown',
-                    'message': 'No metrics available',
-                    'last_updated': datetime.now().isoformat()
-                }
-            
-            # Analyze recent metrics (last hour)
-            recent_cutoff = datetime.now() - timedelta(hours=1)
-            recent_metrics = [
-                m for m in self.metrics_history 
-                if datetime.fromisoformat(m['timestamp']) > recent_cutoff
-            ]
-            
-            if not recent_metrics:
+            recent = self._summarize(window_seconds=3600)
+            
+            if not recent['total_requests']:
+                if not self._summarize()['total_requests']:
+                    return {
+                        'status': 'unknown',
+                        'message': 'No metrics available',
+                        'last_updated': datetime.now().isoformat()
+                    }
                 return {
                     'status': 'stale',
                     'message': 'No recent activity',
-                    'last_updated': self.metrics_history[-1]['timestamp']
+                    'last_updated': datetime.now().isoformat()
                 }
             
-            # Calculate health metrics
-            total_requests = len(recent_metrics)
-            successful_requests = sum(1 for m in recent_metrics if m['success'])
-            error_rate = (total_requests - successful_requests) / total_requests if total_requests > 0 else 0
-            
-            avg_response_time = sum(m['processing_time'] for m in recent_metrics) / total_requests if total_requests > 0 else 0
-            avg_quality = sum(m['quality_score'] for m in recent_metrics if m['quality_score'] > 0) / max(1, sum(1 for m in recent_metrics if m['quality_score'] > 0))
-            
-            cache_hits = sum(1 for m in recent_metrics if m['cache_hit'])
-            cache_hit_rate = cache_hits / total_requests if total_requests > 0 else 0
-            
-            total_cost = sum(m['cost'] for m in recent_metrics)
+            error_rate = recent['error_rate']
+            avg_response_time = recent['avg_response_time']
+            avg_quality = recent['avg_quality_score']
+            cache_hit_rate = recent['cache_hit_rate']
+            total_cost = recent['total_cost']
             
             # Determine overall status
             status = 'healthy'
@@ -105,32 +132,39 @@ class ProductionMonitor:
                 status = 'degraded'
                 issues.append(f"Slow response time: {avg_response_time:.1f}s")
             
-            if avg_quality < self.alert_thresholds['quality_score']:
+            if avg_quality and avg_quality < self.alert_thresholds['quality_score']:
                 status = 'degraded'
                 issues.append(f"Low quality score: {avg_quality:.3f}")
             
-            if cache_hit_rate < self.alert_thresholds['cache_hit_rate']:
+            if cache_hit_rate is not None and cache_hit_rate < self.alert_thresholds['cache_hit_rate']:
                 status = 'warning'
                 issues.append(f"Low cache hit rate: {cache_hit_rate:.1%}")
             
             if total_cost > self.alert_thresholds['cost_per_hour']:
                 status = 'warning'
                 issues.append(f"High cost: ${total_cost:.2f}/hour")
-            
+
+            from api.ai_services.rate_governor import get_rate_governor
+            rate_governor = get_rate_governor().get_status()
+            if rate_governor['breaker_state'] != 'closed':
+                status = 'degraded'
+                issues.append(f"Gemini circuit breaker {rate_governor['breaker_state']}")
+
             return {
                 'status': status,
                 'message': '; '.join(issues) if issues else 'All systems operational',
                 'metrics': {
-                    'total_requests': total_requests,
+                    'total_requests': recent['total_requests'],
                     'error_rate': error_rate,
                     'avg_response_time': avg_response_time,
                     'avg_quality_score': avg_quality,
                     'cache_hit_rate': cache_hit_rate,
                     'total_cost_per_hour': total_cost
                 },
+                'rate_governor': rate_governor,
                 'last_updated': datetime.now().isoformat()
             }
-            
+
         except Exception as e:
             logger.error(f"Failed to get system health: {str(e)}")
             return {
@@ -138,7 +172,7 @@ class ProductionMonitor:
                 'message': f'Health check failed: {str(e)}',
                 'last_updated': datetime.now().isoformat()
             }
-    
+
     def _check_alerts(self, metrics: Dict[str, Any]):
         """Check if metrics trigger any alerts."""
         try:
@@ -198,43 +232,21 @@ class ProductionMonitor:
             logger.error(f"Alert checking failed: {str(e)}")
     
     def get_quality_metrics_dashboard(self) -> Dict[str, Any]:
-        """Get quality metrics for dashboard display."""
+        """Get quality metrics for dashboard display (last 24 hours, all workers)."""
         try:
-            if not self.metrics_history:
-                return {'error': 'No metrics available'}
-            
-            # Last 24 hours of data
-            cutoff = datetime.now() - timedelta(hours=24)
-            recent_metrics = [
-                m for m in self.metrics_history 
-                if datetime.fromisoformat(m['timestamp']) > cutoff
-            ]
+            recent = self._summarize(window_seconds=24 * 3600)
             
-            if not recent_metrics:
+            if not recent['total_requests']:
                 return {'error': 'No recent metrics available'}
             
-            # Quality distribution
-            quality_scores = [m['quality_score'] for m in recent_metrics if m['quality_score'] > 0]
-            
-            quality_distribution = {
-                'excellent': sum(1 for q in quality_scores if q >= 0.85),
-                'good': sum(1 for q in quality_scores if 0.75 <= q < 0.85),
-                'fair': sum(1 for q in quality_scores if 0.65 <= q < 0.75),
-                'poor': sum(1 for q in quality_scores if q < 0.65)
-            }
-            
-            # Performance metrics
-            processing_times = [m['processing_time'] for m in recent_metrics]
-            costs = [m['cost'] for m in recent_metrics]
-            
             return {
-                'total_requests': len(recent_metrics),
-                'successful_requests': sum(1 for m in recent_metrics if m['success']),
-                'quality_distribution': quality_distribution,
-                'average_quality': sum(quality_scores) / len(quality_scores) if quality_scores else 0,
-                'average_processing_time': sum(processing_times) / len(processing_times) if processing_times else 0,
-                'total_cost': sum(costs),
-                'cache_hit_rate': sum(1 for m in recent_metrics if m['cache_hit']) / len(recent_metrics) if recent_metrics else 0,
+                'total_requests': recent['total_requests'],
+                'successful_requests': recent['successful_requests'],
+                'quality_distribution': recent['quality_bands'],
+                'average_quality': recent['avg_quality_score'],
+                'average_processing_time': recent['avg_response_time'],
+                'total_cost': recent['total_cost'],
+                'cache_hit_rate': recent['cache_hit_rate'] or 0,
                 'last_updated': datetime.now().isoformat()
             }
             
@@ -243,7 +255,7 @@ class ProductionMonitor:
             return {'error': f'Dashboard metrics failed: {str(e)}'}
     
     def export_metrics(self, filepath: str = None) -> str:
-        """Export metrics to JSON file."""
+        """Export metric totals and recent alerts to a JSON file."""
         try:
             if not filepath:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -251,9 +263,8 @@ class ProductionMonitor:
             
             export_data = {
                 'export_timestamp': datetime.now().isoformat(),
-                'total_metrics': len(self.metrics_history),
                 'total_alerts': len(self.alerts),
-                'metrics_history': self.metrics_history,
+                'metrics': get_metrics_registry().snapshot(),
                 'alerts': self.alerts,
                 'alert_thresholds': self.alert_thresholds
             }
@@ -0,0 +1,28 @@
+"""
+Prometheus scrape endpoint.
+
+Serves the shared metrics registry in the Prometheus text format. Scrapes
+must send METRICS_AUTH_TOKEN as a bearer token. Without a token the
+endpoint is open only when DEBUG is on; otherwise it refuses every scrape.
+"""
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .metrics import get_metrics_registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_view(request):
+    """Return all metrics, aggregated across worker processes."""
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f'Bearer {token}'):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not settings.DEBUG:
+        return HttpResponse('METRICS_AUTH_TOKEN is not configured', status=403, content_type='text/plain')
+    return HttpResponse(get_metrics_registry().render(), content_type=CONTENT_TYPE)
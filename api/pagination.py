@@ -0,0 +1,191 @@
+"""
+API pagination classes.
+
+List endpoints default to keyset (cursor) pagination on (timestamp, id):
+each page is an index range scan from the last row of the previous page,
+with no OFFSET and no COUNT(*), so page latency stays flat however large
+the table grows. Old clients that need page numbers and a total count can
+still ask for them with ?pagination=page (or by sending ?page=N), and
+so does any request with an explicit ?ordering=, since a keyset only
+walks its own order.
+
+Usage:
+    class LeadViewSet(viewsets.ModelViewSet):
+        pagination_class = KeysetOrPageNumberPagination
+        keyset_fields = ('created_at', 'id')
+
+    GET /api/leads/                        -> {"next": ..., "previous": ..., "results": [...]}
+    GET /api/leads/?cursor=<next cursor>   -> following page
+    GET /api/leads/?pagination=page&page=3 -> {"count": ..., "next": ..., "previous": ..., "results": [...]}
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """Standard pagination class for API responses."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a (timestamp, id) key, newest first.
+
+    The view sets keyset_fields to the timestamp field and the primary key.
+    Both are compared together, so rows sharing a timestamp are neither
+    skipped nor repeated. Requires a composite index on
+    (-timestamp, -id) to be an index range scan.
+
+    The cursor is an opaque base64 token of the boundary row's key and the
+    direction of travel.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _encode_cursor(self, row, reverse):
+        timestamp_field, id_field = self.keyset_fields
+        payload = {
+            't': getattr(row, timestamp_field).isoformat(),
+            'i': getattr(row, id_field),
+            'r': reverse,
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def _decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            timestamp = parse_datetime(payload['t'])
+            if timestamp is None:
+                raise ValueError(payload['t'])
+            return timestamp, payload['i'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_fields = getattr(view, 'keyset_fields', ('created_at', 'id'))
+        timestamp_field, id_field = self.keyset_fields
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        cursor = self._decode_cursor(request)
+        reverse = False
+        if cursor:
+            timestamp, row_id, reverse = cursor
+            if reverse:
+                # Rows newer than the boundary, walked oldest first
+                queryset = queryset.filter(
+                    Q(**{f'{timestamp_field}__gt': timestamp})
+                    | Q(**{timestamp_field: timestamp, f'{id_field}__gt': row_id})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{timestamp_field}__lt': timestamp})
+                    | Q(**{timestamp_field: timestamp, f'{id_field}__lt': row_id})
+                )
+
+        if reverse:
+            queryset = queryset.order_by(timestamp_field, id_field)
+        else:
+            queryset = queryset.order_by(f'-{timestamp_field}', f'-{id_field}')
+
+        # One extra row tells us whether there is another page
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = bool(rows)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None and bool(rows)
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOrPageNumberPagination(BasePagination):
+    """
+    Keyset pagination by default; page numbers behind ?pagination=page.
+
+    A request carrying ?page=N is treated as a page-number request so
+    existing clients keep working unchanged, as is one with ?ordering=
+    (custom orderings are not keyset-indexed).
+    """
+    flag_query_param = 'pagination'
+
+    def _use_page_numbers(self, request):
+        return (
+            request.query_params.get(self.flag_query_param) == 'page'
+            or 'page' in request.query_params
+            or 'ordering' in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._use_page_numbers(request):
+            self.paginator = StandardResultsSetPagination()
+        else:
+            self.paginator = KeysetPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPagination().get_paginated_response_schema(schema)
+
+    def get_results(self, data):
+        return data['results']
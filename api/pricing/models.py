@@ -1,11 +1,36 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 
 User = get_user_model()
 
 
-class Vertical(models.Model):
+class CatalogModel(models.Model):
+    """
+    Price book row. Saving or deleting one retires the cached catalog
+    responses of every tenant once the transaction commits.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_catalogs()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_catalogs()
+        return result
+
+    @staticmethod
+    def _invalidate_catalogs():
+        from api.services.config_cache import invalidate_tenant_cache
+
+        transaction.on_commit(invalidate_tenant_cache)
+
+
+class Vertical(CatalogModel):
     """Supported verticals (pools, roofing, solar, windows, security_screens)."""
     id = models.CharField(max_length=50, primary_key=True)
     name = models.CharField(max_length=100)
@@ -31,7 +56,7 @@ class Vertical(models.Model):
         return self.display_name
 
 
-class PriceBookCategory(models.Model):
+class PriceBookCategory(CatalogModel):
     """Categories within a vertical (e.g., 'pool_sizes', 'finishes', 'water_features')."""
     vertical = models.ForeignKey(Vertical, on_delete=models.CASCADE, related_name='categories')
     slug = models.SlugField(max_length=50)
@@ -48,7 +73,7 @@ class PriceBookCategory(models.Model):
         return f"{self.vertical_id} / {self.name}"
 
 
-class PriceBookItem(models.Model):
+class PriceBookItem(CatalogModel):
     """Individual priced item in the price book."""
     category = models.ForeignKey(PriceBookCategory, on_delete=models.CASCADE, related_name='items')
     item_id = models.CharField(max_length=50)  # e.g., 'pebble_tec_blue'
@@ -2,9 +2,11 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+from django.core.files.storage import default_storage
 from PIL import Image
 import io
 from .models import VisualizationRequest, GeneratedImage, UserProfile
+from .services.derivative_service import derivative_urls, prefetch_derivatives
 from api.tenants import get_tenant_config
 
 
@@ -66,13 +68,14 @@ class GeneratedImageSerializer(serializers.ModelSerializer):
     """Enhanced serializer for generated images."""
 
     generated_image_url = serializers.SerializerMethodField()
+    derivatives = serializers.SerializerMethodField()
     file_size_mb = serializers.ReadOnlyField()
     dimensions = serializers.ReadOnlyField()
 
     class Meta:
         model = GeneratedImage
         fields = [
-            'id', 'generated_image_url', 'file_size', 'file_size_mb',
+            'id', 'generated_image_url', 'derivatives', 'file_size', 'file_size_mb',
             'image_width', 'image_height', 'dimensions', 'metadata', 'generated_at'
         ]
         read_only_fields = fields
@@ -87,6 +90,25 @@ class GeneratedImageSerializer(serializers.ModelSerializer):
             return url
         return None
 
+    def get_derivatives(self, obj):
+        """Get thumbnail and medium-size URLs by size then format."""
+        return derivative_urls(obj.generated_image.name, self.context.get('request'))
+
+
+class VisualizationRequestPageSerializer(serializers.ListSerializer):
+    """Reads the derivatives of every image on the page in one cache lookup."""
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        names = []
+        for obj in rows:
+            names.append(obj.original_image.name)
+            latest_result = obj.get_latest_result()
+            if latest_result and latest_result.generated_image:
+                names.append(latest_result.generated_image.name)
+        self.child.context['derivatives'] = prefetch_derivatives(names)
+        return super().to_representation(rows)
+
 
 class VisualizationRequestListSerializer(serializers.ModelSerializer):
     """Optimized serializer for listing requests with minimal data."""
@@ -96,6 +118,8 @@ class VisualizationRequestListSerializer(serializers.ModelSerializer):
     result_count = serializers.SerializerMethodField()
     processing_duration = serializers.SerializerMethodField()
     latest_result_url = serializers.SerializerMethodField()
+    original_image_derivatives = serializers.SerializerMethodField()
+    latest_result_derivatives = serializers.SerializerMethodField()
     user_name = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
@@ -104,9 +128,10 @@ class VisualizationRequestListSerializer(serializers.ModelSerializer):
             'id', 'user_name', 'original_image_url', 'screen_type', 'screen_type_display',
             'status', 'created_at', 'updated_at', 'result_count',
             'processing_duration', 'error_message', 'progress_percentage', 'status_message',
-            'latest_result_url'
+            'latest_result_url', 'original_image_derivatives', 'latest_result_derivatives'
         ]
         read_only_fields = fields
+        list_serializer_class = VisualizationRequestPageSerializer
 
     def get_result_count(self, obj):
         """Get number of generated results."""
@@ -121,7 +146,7 @@ class VisualizationRequestListSerializer(serializers.ModelSerializer):
 
     def get_latest_result_url(self, obj):
         """Get absolute URL of the latest generated image."""
-        latest_result = obj.results.first()
+        latest_result = obj.get_latest_result()
         if latest_result and latest_result.generated_image:
             request = self.context.get('request')
             url = latest_result.generated_image.url
@@ -130,6 +155,21 @@ class VisualizationRequestListSerializer(serializers.ModelSerializer):
             return url
         return None
 
+    def get_original_image_derivatives(self, obj):
+        """Get thumbnail and medium-size URLs of the upload."""
+        return derivative_urls(
+            obj.original_image.name, self.context.get('request'), self.context.get('derivatives')
+        )
+
+    def get_latest_result_derivatives(self, obj):
+        """Get thumbnail and medium-size URLs of the latest generated image."""
+        latest_result = obj.get_latest_result()
+        if latest_result and latest_result.generated_image:
+            return derivative_urls(
+                latest_result.generated_image.name, self.context.get('request'), self.context.get('derivatives')
+            )
+        return {}
+
     def get_screen_type_display(self, obj):
         """Get tenant-aware display name for visualization type."""
         tenant_display_names = {
@@ -152,6 +192,8 @@ class VisualizationRequestDetailSerializer(serializers.ModelSerializer):
     clean_image_url = serializers.ImageField(source='clean_image', read_only=True)
     user = UserSerializer(read_only=True)
     processing_duration = serializers.SerializerMethodField()
+    step_previews = serializers.SerializerMethodField()
+    original_image_derivatives = serializers.SerializerMethodField()
 
     # Write-only fields for creation/update
     screen_type = serializers.ChoiceField(
@@ -169,6 +211,7 @@ class VisualizationRequestDetailSerializer(serializers.ModelSerializer):
             'status', 'created_at', 'updated_at', 'task_id', 'results',
             'processing_started_at', 'processing_completed_at', 'processing_duration',
             'error_message', 'progress_percentage', 'status_message', 'price_data',
+            'step_previews', 'original_image_derivatives',
             # Write-only fields for creation
             'original_image', 'screen_type', 'opacity', 'color',
             'screen_categories', 'mesh_choice', 'frame_color', 'mesh_color', 'scope',
@@ -178,7 +221,8 @@ class VisualizationRequestDetailSerializer(serializers.ModelSerializer):
             'id', 'user', 'status', 'created_at', 'updated_at', 'task_id',
             'results', 'original_image_url', 'clean_image_url', 'screen_type_display',
             'processing_started_at', 'processing_completed_at', 'error_message',
-            'progress_percentage', 'status_message', 'price_data'
+            'progress_percentage', 'status_message', 'price_data', 'step_previews',
+            'original_image_derivatives'
         ]
         extra_kwargs = {
             'original_image': {
@@ -195,6 +239,25 @@ class VisualizationRequestDetailSerializer(serializers.ModelSerializer):
             return duration.total_seconds()
         return None
 
+    def get_step_previews(self, obj):
+        """Get per-step preview images with absolute URLs."""
+        request = self.context.get('request')
+        previews = []
+        for entry in obj.step_previews or []:
+            url = default_storage.url(entry['image'])
+            previews.append({
+                'step': entry['step'],
+                'description': entry.get('description'),
+                'width': entry.get('width'),
+                'height': entry.get('height'),
+                'url': request.build_absolute_uri(url) if request else url,
+            })
+        return previews
+
+    def get_original_image_derivatives(self, obj):
+        """Get thumbnail and medium-size URLs of the upload."""
+        return derivative_urls(obj.original_image.name, self.context.get('request'))
+
     def get_screen_type_display(self, obj):
         """Get tenant-aware display name for visualization type."""
         tenant_display_names = {
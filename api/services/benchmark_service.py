@@ -0,0 +1,320 @@
+"""
+Benchmark Service - End-to-end pipeline benchmark with a per-stage breakdown.
+
+Drives AIEnhancedImageProcessor.process_image for a batch of synthetic
+visualization requests at a fixed concurrency, against the offline Gemini
+backend (fake or replay, see api/ai_services/gemini_backends.py), so the
+numbers describe our own code: ingest, every pipeline step, audit,
+pricing, PDF, storage writes and DB writes. Derivative builds (queued to
+Celery after the job) are switched off.
+
+Stages are timed by wrapping their entry points for the duration of the
+run only. The report has throughput, p50/p95/p99 per stage and peak RSS,
+and is plain JSON so runs on two commits can be compared
+(compare_reports).
+
+Usage:
+    from api.services.benchmark_service import run_benchmark
+
+    report = run_benchmark(jobs=20, concurrency=4, fake_profile={'latency': {'seconds': 0.5}})
+    report['stages']['step:cleanup']['p95']
+"""
+import contextlib
+import io
+import logging
+import math
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, default_storage
+from django.db import close_old_connections, connection, models
+from django.test.utils import override_settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+BENCH_USERNAME = 'pipeline-bench'
+
+# Statements counted as DB writes
+_WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Linear-interpolated percentile (fraction in 0-1), None without values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageRecorder:
+    """Thread-safe duration samples per stage name."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def wrap(self, stage: Callable[..., str], function: Callable) -> Callable:
+        """Time every call of function; stage(*args, **kwargs) names the sample."""
+        def timed(*args, **kwargs):
+            with self.measure(stage(*args, **kwargs)):
+                return function(*args, **kwargs)
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        stages = {}
+        for stage, values in sorted(self.samples.items()):
+            stages[stage] = {
+                'count': len(values),
+                'total': round(sum(values), 4),
+                'mean': round(sum(values) / len(values), 4),
+                'p50': round(percentile(values, 0.50), 4),
+                'p95': round(percentile(values, 0.95), 4),
+                'p99': round(percentile(values, 0.99), 4),
+                'max': round(max(values), 4),
+            }
+        return stages
+
+
+@contextlib.contextmanager
+def instrument(recorder: StageRecorder):
+    """Time each stage's entry point while the block runs."""
+    from api import ai_enhanced_processor
+    from api.audit.services import AuditService
+    from api.services import pipeline_registry
+    from api.utils import pdf_generator
+
+    patches = [
+        mock.patch.object(ai_enhanced_processor, 'load_working_image', recorder.wrap(
+            lambda *a, **k: 'ingest', ai_enhanced_processor.load_working_image)),
+        mock.patch.object(ai_enhanced_processor, 'calculate_request_pricing', recorder.wrap(
+            lambda *a, **k: 'pricing', ai_enhanced_processor.calculate_request_pricing)),
+        mock.patch.object(AuditService, 'analyze_image', recorder.wrap(
+            lambda *a, **k: 'audit', AuditService.analyze_image)),
+        mock.patch.object(pdf_generator, 'generate_visualization_pdf', recorder.wrap(
+            lambda *a, **k: 'pdf', pdf_generator.generate_visualization_pdf)),
+        mock.patch.object(Storage, 'save', recorder.wrap(
+            lambda *a, **k: 'storage_write', Storage.save)),
+        mock.patch.object(pipeline_registry, 'execute_step', recorder.wrap(
+            lambda step_name, *a, **k: f'step:{step_name}', pipeline_registry.execute_step)),
+    ]
+    with contextlib.ExitStack() as stack:
+        for patch in patches:
+            stack.enter_context(patch)
+        yield
+
+
+def _db_write_timer(recorder: StageRecorder):
+    """connection.execute_wrapper that times INSERT/UPDATE/DELETE statements."""
+    def wrapper(execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_WRITE_PREFIXES):
+            return execute(sql, params, many, context)
+        with recorder.measure('db_write'):
+            return execute(sql, params, many, context)
+    return wrapper
+
+
+def _sample_image_bytes(width: int = 1024, height: int = 768) -> bytes:
+    """A deterministic gradient photo, large enough to exercise encoding."""
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def create_bench_requests(jobs: int, tenant_id: str, scope: Dict[str, Any], image_bytes: bytes) -> list:
+    """Create the visualization requests to process (owned by the bench user)."""
+    from api.models import VisualizationRequest
+
+    user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'is_active': False})
+    requests = []
+    for number in range(jobs):
+        viz = VisualizationRequest(user=user, tenant_id=tenant_id, scope=scope)
+        viz.original_image.save(f'bench_{number}.jpg', ContentFile(image_bytes), save=False)
+        viz.save()
+        requests.append(viz)
+    return requests
+
+
+def delete_bench_requests(requests: list) -> None:
+    """Remove bench requests and every file they stored."""
+    for viz in requests:
+        viz.refresh_from_db()
+        for result in viz.results.all():
+            result.generated_image.delete(save=False)
+        stored = [entry.get('image') for entry in (viz.pipeline_checkpoints or {}).values()]
+        stored += [entry.get('image') for entry in viz.step_previews or []]
+        for name in stored:
+            if name:
+                default_storage.delete(name)
+        # Bench calls are not tenant traffic
+        viz.model_usage.all().delete()
+        for field in viz._meta.concrete_fields:
+            if isinstance(field, models.FileField) and getattr(viz, field.name):
+                getattr(viz, field.name).delete(save=False)
+        viz.delete()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(
+    jobs: int = 10,
+    concurrency: int = 2,
+    tenant_id: str = 'pools',
+    scope: Optional[Dict[str, Any]] = None,
+    backend: str = 'fake',
+    fake_profile: Optional[Dict[str, Any]] = None,
+    image_bytes: Optional[bytes] = None,
+    step_cache: bool = False,
+    rate_limit_per_minute: Optional[float] = None,
+    keep: bool = False,
+) -> Dict[str, Any]:
+    """
+    Process `jobs` requests through AIEnhancedImageProcessor and time every stage.
+
+    Args:
+        jobs: Number of visualization requests
+        concurrency: Requests processed at once
+        tenant_id: Tenant whose pipeline runs
+        scope: Request scope (feature selections)
+        backend: 'fake' or 'replay' (never the live API)
+        fake_profile: FakeModels profile (latency, error_rate, bursts)
+        image_bytes: Upload to process (default: synthetic 1024x768 JPEG)
+        step_cache: Allow the cleanup step cache (off, so every job calls the model)
+        rate_limit_per_minute: Rate governor quota (default GEMINI_RATE_LIMIT_PER_MINUTE)
+        keep: Keep the requests and files afterwards
+
+    Returns:
+        JSON-serializable report
+    """
+    from api.ai_enhanced_processor import AIEnhancedImageProcessor
+    from api.ai_services import gemini_backends
+    from api.ai_services.config import ai_config_manager
+    from api.ai_services.interfaces import AIServiceConfig, AIServiceType
+    from api.ai_services.rate_governor import reset_rate_governor
+
+    if backend not in ('fake', 'replay'):
+        raise ValueError(f"Benchmarks run offline: backend must be 'fake' or 'replay', not '{backend}'")
+    if scope is None:
+        scope = {'deck_material': 'travertine', 'water_features': ['rock_waterfall'], 'finishing': True}
+
+    gemini_config = AIServiceConfig('gemini', AIServiceType.IMAGE_GENERATION, additional_params={
+        'backend': backend,
+        'fake': fake_profile or {},
+        'recordings_dir': getattr(settings, 'GEMINI_RECORDINGS_DIR', None),
+    })
+    recorder = StageRecorder()
+    requests = create_bench_requests(jobs, tenant_id, scope, image_bytes or _sample_image_bytes())
+    failures = []
+
+    def process(viz):
+        try:
+            with connection.execute_wrapper(_db_write_timer(recorder)):
+                with recorder.measure('job'):
+                    processor.process_image(viz)
+            viz.refresh_from_db(fields=['status', 'error_message'])
+            if viz.status != 'complete':
+                failures.append(viz.error_message or viz.status)
+        finally:
+            close_old_connections()
+
+    rss_start = peak_rss_mb()
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(ai_config_manager._configs, {'gemini': gemini_config}))
+        # Derivatives are built by Celery after the job, outside what is measured
+        overrides = {'GEMINI_STEP_CACHE_ENABLED': step_cache, 'IMAGE_DERIVATIVES_ENABLED': False}
+        if rate_limit_per_minute:
+            overrides['GEMINI_RATE_LIMIT_PER_MINUTE'] = rate_limit_per_minute
+        stack.enter_context(override_settings(**overrides))
+        stack.callback(gemini_backends.reset_model_clients)
+        stack.callback(reset_rate_governor)
+        gemini_backends.reset_model_clients()
+        reset_rate_governor()
+        stack.enter_context(instrument(recorder))
+
+        processor = AIEnhancedImageProcessor()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench-job') as executor:
+            list(executor.map(process, requests))
+        wall_seconds = time.perf_counter() - started
+
+    if not keep:
+        delete_bench_requests(requests)
+
+    completed = jobs - len(failures)
+    report = {
+        'revision': git_revision(),
+        'tenant_id': tenant_id,
+        'backend': backend,
+        'fake_profile': fake_profile or {},
+        'rate_limit_per_minute': rate_limit_per_minute or getattr(settings, 'GEMINI_RATE_LIMIT_PER_MINUTE', 60),
+        'jobs': jobs,
+        'concurrency': concurrency,
+        'completed': completed,
+        'failures': failures,
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_per_minute': round(completed / wall_seconds * 60, 2) if wall_seconds else None,
+        'rss_mb_at_start': rss_start,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': recorder.summary(),
+    }
+    logger.info(f"Benchmark: {completed}/{jobs} jobs in {wall_seconds:.1f}s at concurrency {concurrency}")
+    return report
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], metric: str = 'p95') -> Dict[str, Dict[str, Any]]:
+    """
+    Per-stage change of a metric between two reports.
+
+    Returns:
+        {stage: {'baseline', 'current', 'ratio'}} for stages in either report
+    """
+    changes = {}
+    for stage in sorted(set(baseline.get('stages', {})) | set(current.get('stages', {}))):
+        before = baseline.get('stages', {}).get(stage, {}).get(metric)
+        after = current.get('stages', {}).get(stage, {}).get(metric)
+        changes[stage] = {
+            'baseline': before,
+            'current': after,
+            'ratio': round(after / before, 3) if before and after is not None else None,
+        }
+    return changes
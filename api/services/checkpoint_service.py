@@ -0,0 +1,147 @@
+"""
+Pipeline Checkpoint Service - Persists intermediate step outputs per request.
+
+Each image-producing pipeline step is stored with a fingerprint of
+everything that led to it (the previous step's fingerprint plus this
+step's prompt and model). When a request is regenerated, the pipeline
+resumes from the last step whose fingerprint still matches and only
+re-runs what is downstream of the change.
+
+Usage:
+    from api.services.checkpoint_service import PipelineCheckpointStore
+
+    store = PipelineCheckpointStore(visualization_request)
+    visualizer.process_pipeline(image, scope, options, checkpoint_store=store)
+"""
+import hashlib
+import logging
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from api.ai_services.utils.image_artifact import ImageArtifact, as_artifact
+from api.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def step_fingerprint(previous: str, step_name: str, prompt: str, model: str) -> str:
+    """
+    Fingerprint a step output from its inputs.
+
+    Args:
+        previous: Fingerprint of the step this one builds on ('' for the first)
+        step_name: Pipeline step name
+        prompt: Prompt sent for this step
+        model: Model name
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    payload = "\x00".join([previous, step_name, prompt, model])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PipelineCheckpointStore:
+    """
+    Checkpoint store bound to a single VisualizationRequest.
+
+    The cleanup output is kept in the request's clean_image field. Other
+    steps are saved as files under checkpoints/<request id>/, and the
+    step -> (fingerprint, file) index lives in pipeline_checkpoints.
+    """
+
+    CLEANUP_STEP_TYPE = 'cleanup'
+    image_format = 'JPEG'
+    image_quality = 95
+
+    def __init__(self, visualization_request):
+        self.request = visualization_request
+
+    @property
+    def checkpoints(self) -> dict:
+        if self.request.pipeline_checkpoints is None:
+            self.request.pipeline_checkpoints = {}
+        return self.request.pipeline_checkpoints
+
+    def has(self, step_name: str, fingerprint: str, step_type: str = None) -> bool:
+        """
+        Check whether a matching checkpoint exists without loading it.
+
+        A clean_image saved before checkpoints existed is trusted for the
+        cleanup step, since cleanup depends only on the original upload.
+        """
+        entry = self.checkpoints.get(step_name)
+        if step_type == self.CLEANUP_STEP_TYPE:
+            if not self.request.clean_image:
+                return False
+            return entry is None or entry.get('fingerprint') == fingerprint
+
+        return bool(entry) and entry.get('fingerprint') == fingerprint
+
+    def load(self, step_name: str, fingerprint: str, step_type: str = None) -> Optional[ImageArtifact]:
+        """
+        Load a checkpoint image if its fingerprint matches.
+
+        Returns:
+            ImageArtifact (pixels decoded on demand), or None if missing,
+            stale or unreadable
+        """
+        if not self.has(step_name, fingerprint, step_type):
+            return None
+
+        try:
+            if step_type == self.CLEANUP_STEP_TYPE:
+                with self.request.clean_image.open('rb') as f:
+                    image = ImageArtifact(f.read())
+            else:
+                with default_storage.open(self.checkpoints[step_name]['image'], 'rb') as f:
+                    image = ImageArtifact(f.read())
+            # Reads the header, so an unreadable file counts as missing
+            logger.info(
+                f"Loaded checkpoint for step {step_name} "
+                f"({image.format} {image.width}x{image.height}, request {self.request.id})"
+            )
+            return image
+        except Exception as e:
+            logger.warning(f"Failed to load checkpoint for step {step_name}: {e}")
+            return None
+
+    def save(self, step_name: str, fingerprint: str, image, step_type: str = None) -> None:
+        """
+        Persist a step output (PIL image or ImageArtifact). Artifacts
+        already in image_format are stored as-is. Failures are logged,
+        never raised.
+        """
+        try:
+            data = as_artifact(image, self.image_format, self.image_quality).encoded(
+                self.image_format, self.image_quality
+            )
+            entry = {'fingerprint': fingerprint}
+
+            if step_type == self.CLEANUP_STEP_TYPE:
+                with span('storage.write', kind='checkpoint', bytes=len(data)):
+                    self.request.clean_image.save(
+                        f"clean_{self.request.id}.jpg",
+                        ContentFile(data),
+                        save=False
+                    )
+                entry['image'] = self.request.clean_image.name
+                self.checkpoints[step_name] = entry
+                self.request.save(update_fields=['clean_image', 'pipeline_checkpoints'])
+            else:
+                previous = self.checkpoints.get(step_name, {}).get('image')
+                with span('storage.write', kind='checkpoint', bytes=len(data)):
+                    entry['image'] = default_storage.save(
+                        f"checkpoints/{self.request.id}/{step_name}_{fingerprint[:12]}.jpg",
+                        ContentFile(data)
+                    )
+                self.checkpoints[step_name] = entry
+                self.request.save(update_fields=['pipeline_checkpoints'])
+                if previous and previous != entry['image']:
+                    default_storage.delete(previous)
+
+            logger.debug(f"Saved checkpoint for step {step_name} (request {self.request.id})")
+        except Exception as e:
+            logger.warning(f"Failed to save checkpoint for step {step_name}: {e}")
@@ -0,0 +1,146 @@
+"""
+Config Cache - Shared, versioned cache for tenant config and catalog responses.
+
+The tenant config, screen type and pricing catalog endpoints return the same
+JSON to every client until an operator changes tenant config or the price
+book. Each response body is rendered once, stored in the shared cache (Redis
+when CACHE_BACKEND is 'redis') and served as-is by every web worker, with an
+ETag and Last-Modified so repeat clients get a bodyless 304.
+
+Keys carry a per-tenant version token: the config_version of the tenant's
+compiled plan (which every process revalidates against the database every
+TENANT_CONFIG_REVALIDATE_SECONDS, see api/tenants/loader.py) plus a
+generation that is reset whenever a TenantConfig or price book row is saved
+or deleted. The generation expires after CONFIG_CACHE_GENERATION_TIMEOUT,
+so a change made by another process (or with the local cache backend)
+is picked up within that interval. A change never has to find and delete
+the old entries; readers simply stop asking for them and they expire after
+CONFIG_CACHE_TIMEOUT.
+
+Usage:
+    from api.services.config_cache import cached_json_response
+
+    def get(self, request):
+        config = get_tenant_config()
+        return cached_json_response(request, config.tenant_id, 'schema', config.get_schema)
+"""
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+
+def _generation_key(tenant_id: str) -> str:
+    return f"config_cache:{tenant_id}:generation"
+
+
+def get_cache_version(tenant_id: str) -> str:
+    """
+    Current version token for a tenant's cached responses.
+
+    Args:
+        tenant_id: Tenant identifier
+
+    Returns:
+        "<config_version>.<generation>"
+    """
+    from api.tenants import get_tenant_config
+
+    config_version = getattr(get_tenant_config(tenant_id), 'version', 0)
+
+    generation_key = _generation_key(tenant_id)
+    timeout = getattr(settings, 'CONFIG_CACHE_GENERATION_TIMEOUT', 300)
+    generation = cache.get(generation_key)
+    if generation is None:
+        # A lost generation must not resurrect entries from an older one
+        generation = uuid.uuid4().hex[:12]
+        if not cache.add(generation_key, generation, timeout):
+            generation = cache.get(generation_key, generation)
+
+    return f"{config_version}.{generation}"
+
+
+def get_cached_payload(tenant_id: str, name: str, build: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Rendered JSON body for a tenant-level response, built at most once per version.
+
+    Args:
+        tenant_id: Tenant the response belongs to
+        name: Response name, unique per tenant (e.g. 'schema')
+        build: Returns the response data on a cache miss
+
+    Returns:
+        Dict with 'body' (bytes), 'etag' and 'last_modified' (epoch seconds)
+    """
+    key = f"config_cache:{tenant_id}:{name}:{get_cache_version(tenant_id)}"
+    payload = cache.get(key)
+    if payload is None:
+        body = JSONRenderer().render(build())
+        payload = {
+            'body': body,
+            'etag': f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            'last_modified': int(time.time()),
+        }
+        cache.set(key, payload, getattr(settings, 'CONFIG_CACHE_TIMEOUT', 86400))
+    return payload
+
+
+def cached_json_response(request, tenant_id: str, name: str, build: Callable[[], Any]) -> HttpResponse:
+    """
+    Serve a cached tenant-level JSON response with conditional GET support.
+
+    Args:
+        request: Incoming request (If-None-Match / If-Modified-Since honoured)
+        tenant_id: Tenant the response belongs to
+        name: Response name, unique per tenant
+        build: Returns the response data on a cache miss
+
+    Returns:
+        200 with the cached body, or 304 Not Modified
+    """
+    payload = get_cached_payload(tenant_id, name, build)
+    response = get_conditional_response(
+        request, etag=payload['etag'], last_modified=payload['last_modified']
+    )
+    if response is None:
+        response = HttpResponse(payload['body'], content_type='application/json')
+    response['ETag'] = payload['etag']
+    response['Last-Modified'] = http_date(payload['last_modified'])
+    # Clients may keep the body but must revalidate it on every use
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def invalidate_tenant_cache(tenant_ids: Optional[Iterable[str]] = None) -> None:
+    """
+    Retire cached responses for some or all tenants.
+
+    Failures are logged, never raised; cached entries then live until
+    CONFIG_CACHE_TIMEOUT.
+
+    Args:
+        tenant_ids: Tenants to invalidate, or None for every registered tenant
+    """
+    if tenant_ids is None:
+        from api.tenants import get_all_tenants
+
+        tenant_ids = get_all_tenants().keys()
+
+    try:
+        for tenant_id in tenant_ids:
+            cache.set(
+                _generation_key(tenant_id), uuid.uuid4().hex[:12],
+                getattr(settings, 'CONFIG_CACHE_GENERATION_TIMEOUT', 300),
+            )
+    except Exception as e:
+        logger.warning(f"Failed to invalidate tenant config cache: {e}")
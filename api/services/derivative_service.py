@@ -0,0 +1,238 @@
+"""
+Derivative Service - Thumbnails and web-sized variants of stored images.
+
+List and gallery pages should never download a 10MB original. Each upload
+and each generated image gets a set of derivatives: every size in
+IMAGE_DERIVATIVE_SIZES, encoded in every format in IMAGE_DERIVATIVE_FORMATS
+that this Pillow build supports. They are stored next to the source with
+a predictable name:
+
+    originals/1/3f2a.jpg -> originals/1/3f2a__thumb.webp, originals/1/3f2a__medium.jpg, ...
+
+The source is decoded once per build (JPEGs at reduced scale via draft),
+sizes are resampled from largest to smallest, and the encodes run in a
+thread pool since Pillow releases the GIL while encoding. Builds run as the
+build_image_derivatives Celery task: after upload, after generation, and
+whenever a serializer finds a variant missing. Known variants are cached so
+listing does not touch storage.
+
+Usage:
+    from api.services.derivative_service import derivative_urls, schedule_derivatives
+
+    schedule_derivatives(visualization_request.original_image.name)
+    urls = derivative_urls(visualization_request.original_image.name)
+    # {'thumb': {'webp': '/media/...', 'jpeg': '/media/...'}, 'medium': {...}}
+"""
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+    'AVIF': 'avif',
+}
+
+# Formats that need an optional Pillow codec
+FORMAT_FEATURES = {
+    'WEBP': 'webp',
+    'AVIF': 'avif',
+}
+
+
+def get_sizes() -> Dict[str, int]:
+    """Derivative size name -> longest edge in pixels."""
+    return dict(getattr(settings, 'IMAGE_DERIVATIVE_SIZES', {'thumb': 320, 'medium': 1024}))
+
+
+def get_formats() -> list:
+    """Configured derivative formats this Pillow build can encode."""
+    formats = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ('WEBP', 'JPEG'))
+    return [
+        image_format for image_format in formats
+        if image_format not in FORMAT_FEATURES or features.check(FORMAT_FEATURES[image_format])
+    ]
+
+
+def derivative_name(name: str, size_name: str, image_format: str) -> str:
+    """Storage name of one derivative of the file at name."""
+    root, _ = os.path.splitext(name)
+    return f"{root}__{size_name}.{EXTENSIONS[image_format]}"
+
+
+def expected_derivatives(name: str) -> Dict[str, Dict[str, str]]:
+    """Storage names of every configured derivative, by size then format."""
+    return {
+        size_name: {
+            image_format.lower(): derivative_name(name, size_name, image_format)
+            for image_format in get_formats()
+        }
+        for size_name in get_sizes()
+    }
+
+
+def _cache_key(name: str) -> str:
+    return f"derivatives:{hashlib.sha256(name.encode()).hexdigest()}"
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+def build_derivatives(name: str) -> Dict[str, Dict[str, str]]:
+    """
+    Build and store every derivative of a stored image.
+
+    Existing derivatives are overwritten.
+
+    Args:
+        name: Storage name of the source image
+
+    Returns:
+        Storage names by size then format
+    """
+    sizes = sorted(get_sizes().items(), key=lambda item: item[1], reverse=True)
+    formats = get_formats()
+    largest = sizes[0][1]
+
+    with default_storage.open(name, 'rb') as f:
+        with Image.open(io.BytesIO(f.read())) as source:
+            if source.format == 'JPEG':
+                source.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(source)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Each size is resampled from the next larger one
+    resized = {}
+    for size_name, max_size in sizes:
+        image = image.copy()
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        resized[size_name] = image
+
+    jobs = [
+        (size_name, image_format)
+        for size_name, _ in sizes
+        for image_format in formats
+    ]
+    workers = getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 4)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='derivatives') as executor:
+        encoded = executor.map(lambda job: _encode(resized[job[0]], job[1]), jobs)
+        results = dict(zip(jobs, encoded))
+
+    paths = {}
+    for (size_name, image_format), data in results.items():
+        path = derivative_name(name, size_name, image_format)
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        paths.setdefault(size_name, {})[image_format.lower()] = default_storage.save(path, ContentFile(data))
+
+    cache.set(_cache_key(name), paths, getattr(settings, 'IMAGE_DERIVATIVE_CACHE_SECONDS', 86400))
+    cache.delete(f"{_cache_key(name)}:pending")
+    logger.info(f"Built {len(results)} derivatives for {name}")
+    return paths
+
+
+def schedule_derivatives(name: Optional[str]) -> None:
+    """Queue a derivative build for a stored image. Failures are logged, never raised."""
+    if not name or not getattr(settings, 'IMAGE_DERIVATIVES_ENABLED', True):
+        return
+
+    # One queued build per image at a time
+    if not cache.add(f"{_cache_key(name)}:pending", True, 300):
+        return
+
+    try:
+        from api.tasks import build_image_derivatives
+        build_image_derivatives.delay(name)
+    except Exception as e:
+        cache.delete(f"{_cache_key(name)}:pending")
+        logger.warning(f"Failed to queue derivatives for {name}: {e}")
+
+
+def get_derivatives(name: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Storage names of the derivatives that exist for an image.
+
+    Served from the cache when the full set is known. Otherwise storage is
+    checked, and a build is queued if anything is missing; the partial set
+    is cached for IMAGE_DERIVATIVE_MISSING_CACHE_SECONDS, so a slow or
+    failed build does not cost a storage check per variant on every read.
+
+    Returns:
+        Storage names by size then format (only the ones that exist)
+    """
+    if not name or not getattr(settings, 'IMAGE_DERIVATIVES_ENABLED', True):
+        return {}
+
+    paths = cache.get(_cache_key(name))
+    if paths is not None:
+        return paths
+
+    expected = expected_derivatives(name)
+    paths = {}
+    missing = False
+    for size_name, variants in expected.items():
+        for image_format, path in variants.items():
+            if default_storage.exists(path):
+                paths.setdefault(size_name, {})[image_format] = path
+            else:
+                missing = True
+
+    if missing:
+        schedule_derivatives(name)
+        timeout = getattr(settings, 'IMAGE_DERIVATIVE_MISSING_CACHE_SECONDS', 60)
+    else:
+        timeout = getattr(settings, 'IMAGE_DERIVATIVE_CACHE_SECONDS', 86400)
+    cache.set(_cache_key(name), paths, timeout)
+    return paths
+
+
+def prefetch_derivatives(names: Iterable[Optional[str]]) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    Cached derivatives of several images in one cache read (e.g. a list page).
+
+    Returns:
+        Storage names by size then format, for the images found in the cache
+    """
+    names = [name for name in names if name]
+    if not names or not getattr(settings, 'IMAGE_DERIVATIVES_ENABLED', True):
+        return {}
+    cached = cache.get_many([_cache_key(name) for name in names])
+    return {name: cached[_cache_key(name)] for name in names if _cache_key(name) in cached}
+
+
+def derivative_urls(name: Optional[str], request=None, prefetched=None) -> Dict[str, Dict[str, str]]:
+    """
+    URLs of the derivatives that exist for an image, by size then format.
+
+    Args:
+        name: Storage name of the source image
+        request: Request used to build absolute URLs (optional)
+        prefetched: Result of prefetch_derivatives (optional)
+    """
+    paths = prefetched[name] if prefetched and name in prefetched else get_derivatives(name)
+    urls = {}
+    for size_name, variants in paths.items():
+        urls[size_name] = {}
+        for image_format, path in variants.items():
+            url = default_storage.url(path)
+            urls[size_name][image_format] = request.build_absolute_uri(url) if request else url
+    return urls
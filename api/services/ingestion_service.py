@@ -0,0 +1,117 @@
+"""
+Ingestion Service - Normalized working copy of each upload.
+
+Uploads can be up to 8192x8192 and 10MB, with EXIF orientation, alpha
+channels or palette modes. Before anything reaches Gemini, the upload is
+decoded once, rotated upright, converted to RGB and resampled to the model's
+working size, then stored as the request's working_image. Every pipeline
+step and the site audit read that copy instead of the original.
+
+JPEGs are decoded with Image.draft so libjpeg scales down during decode
+(1/2, 1/4 or 1/8) and the full-resolution bitmap is never built. Other
+formats are shrunk by an integer factor with Image.reduce before the final
+LANCZOS resize in optimize_image_for_api.
+
+Usage:
+    from api.services.ingestion_service import load_working_image
+
+    image = load_working_image(visualization_request)
+"""
+import io
+import logging
+from typing import Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from api.ai_services.utils.image_artifact import ImageArtifact
+from api.ai_services.utils.image_utils import optimize_image_for_api
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_image(source, max_dimension: int, quality: int) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Decode, orient, convert and resample an upload into a JPEG working copy.
+
+    Args:
+        source: Path or file object of the upload
+        max_dimension: Longest edge of the working copy in pixels
+        quality: JPEG quality of the working copy
+
+    Returns:
+        (jpeg bytes, (width, height))
+    """
+    with Image.open(source) as image:
+        if image.format == 'JPEG':
+            # Let the decoder pick the largest DCT scale that stays above the
+            # target on both edges; the exact resize happens below
+            image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+
+        factor = max(image.size) // (2 * max_dimension)
+        if factor >= 2:
+            image = image.reduce(factor)
+
+        image = _to_rgb(image)
+
+    image, _ = optimize_image_for_api(image, max_dimension=max_dimension)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue(), image.size
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Convert any mode to RGB, flattening transparency onto white."""
+    if image.mode == 'RGB':
+        return image
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image.convert('RGBA'), mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def ensure_working_image(visualization_request) -> None:
+    """
+    Store the request's working copy if it does not have one yet.
+
+    Regenerate and option changes reuse the copy made on the first run.
+    """
+    if visualization_request.working_image:
+        return
+
+    max_dimension = getattr(settings, 'INGESTION_MAX_DIMENSION', 1024)
+    quality = getattr(settings, 'INGESTION_JPEG_QUALITY', 90)
+
+    with visualization_request.original_image.open('rb') as f:
+        data, (width, height) = normalize_image(f, max_dimension, quality)
+
+    visualization_request.working_image.save(
+        f"working_{visualization_request.id}.jpg",
+        ContentFile(data),
+        save=False
+    )
+    visualization_request.save(update_fields=['working_image'])
+    logger.info(
+        f"Stored working copy for request {visualization_request.id}: "
+        f"{width}x{height}, {len(data)} bytes "
+        f"(upload {visualization_request.original_image.size} bytes)"
+    )
+
+
+def load_working_image(visualization_request) -> ImageArtifact:
+    """
+    Return the request's working copy, creating it on first use.
+
+    Returns:
+        ImageArtifact of the JPEG working copy; its bytes go to Gemini as
+        they are
+    """
+    ensure_working_image(visualization_request)
+    with visualization_request.working_image.open('rb') as f:
+        return ImageArtifact(f.read(), 'image/jpeg')
@@ -0,0 +1,129 @@
+"""
+Visualization Job Queue - Enqueues pipeline jobs and enforces per-tenant limits.
+
+Usage:
+    from api.services.job_queue import enqueue_visualization, tenant_slots
+
+    task_id = enqueue_visualization(visualization_request)
+
+    slot = tenant_slots.acquire('pools')
+    if slot:
+        try:
+            ...
+        finally:
+            tenant_slots.release(slot)
+"""
+import logging
+import uuid
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TenantSlotLimiter:
+    """
+    Bounded per-tenant concurrency using Redis-backed slots.
+
+    Each tenant has N numbered slots. A job holds a slot by setting its key
+    with SET NX, which is atomic on the Redis server at REDIS_URL, so the
+    limit is shared by every worker process and host. Slots expire after
+    the task hard time limit so a killed worker can never hold one forever.
+    """
+
+    key_prefix = 'viz:tenant_slot'
+
+    # Delete the key only if it still holds our token
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        """Redis client, created on first use."""
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._client
+
+    def get_limit(self, tenant_id: str) -> int:
+        """Return the max concurrent jobs allowed for a tenant."""
+        limits = getattr(settings, 'VISUALIZATION_TENANT_CONCURRENCY', {})
+        return int(limits.get(tenant_id, limits.get('default', 3)))
+
+    def _slot_key(self, tenant_id: str, index: int) -> str:
+        return f"{self.key_prefix}:{tenant_id}:{index}"
+
+    def acquire(self, tenant_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Try to claim a free slot for the tenant.
+
+        Returns:
+            (slot_key, token) if a slot was claimed, None if all are busy
+        """
+        token = uuid.uuid4().hex
+        timeout = int(getattr(settings, 'CELERY_TASK_TIME_LIMIT', 900))
+
+        for index in range(self.get_limit(tenant_id)):
+            key = self._slot_key(tenant_id, index)
+            if self.client.set(key, token, nx=True, ex=timeout):
+                logger.debug(f"Acquired job slot {key}")
+                return key, token
+
+        logger.info(f"All job slots busy for tenant: {tenant_id}")
+        return None
+
+    def release(self, slot: Optional[Tuple[str, str]]) -> None:
+        """Release a slot previously returned by acquire()."""
+        if not slot:
+            return
+        key, token = slot
+        # Only delete our own claim; an expired slot may have been re-taken
+        if self.client.eval(self.RELEASE_SCRIPT, 1, key, token):
+            logger.debug(f"Released job slot {key}")
+
+    def in_use(self, tenant_id: str) -> int:
+        """Count slots currently held for a tenant."""
+        return sum(
+            1 for index in range(self.get_limit(tenant_id))
+            if self.client.get(self._slot_key(tenant_id, index)) is not None
+        )
+
+
+# Global limiter instance
+tenant_slots = TenantSlotLimiter()
+
+
+def enqueue_visualization(visualization_request) -> str:
+    """
+    Queue a visualization request for background processing.
+
+    The task id is generated and stored on the request before the message
+    is sent. The task only runs while it still owns the request, so a
+    superseded message (e.g. one redelivered after requeue_stale_requests
+    queued a replacement) is dropped instead of processing the job twice.
+
+    Args:
+        visualization_request: VisualizationRequest instance
+
+    Returns:
+        Celery task id
+    """
+    from api.models import VisualizationRequest
+    from api.tasks import process_visualization_request
+
+    task_id = str(uuid.uuid4())
+    VisualizationRequest.objects.filter(pk=visualization_request.pk).update(task_id=task_id)
+    visualization_request.task_id = task_id
+
+    process_visualization_request.apply_async(args=[visualization_request.pk], task_id=task_id)
+
+    logger.info(f"Queued visualization request {visualization_request.pk} as task {task_id}")
+    return task_id
@@ -1,16 +1,41 @@
 """
-Pipeline Step Registry - Maps step types to handler functions.
+Pipeline Step Registry - Maps step types to handler functions and schedules them.
+
+Steps may declare `depends_on` (a list of earlier step names) in their
+tenant step config. Steps without it depend on the step before them, so
+existing tenants keep running in sequence. The scheduler runs every step
+whose dependencies are done in parallel, always through execute_step.
+
+A `fused_insertion` step (built by api/services/step_fusion.py) runs
+several insertion steps as one model call: its prompt combines the prompts
+of the steps listed in its `parts`.
 
 Usage:
-    from api.services.pipeline_registry import execute_step, get_handler
+    from api.services.pipeline_registry import PipelineScheduler, execute_step
 
     result = execute_step('cleanup', step_config, context)
+
+    scheduler = PipelineScheduler([(name, config.get_step_config(name)) for name in steps])
+    run = scheduler.run(context, progress_callback=callback)
+    run.outputs['quality_check']['score'], run.timings
+
+    scheduler.run(context, dry_run=True)  # print the schedule only
 """
+import contextvars
 import logging
-from typing import Dict, Any, Callable, Optional
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from PIL import Image
 
+from django.conf import settings
+from django.db import connections
+
+from api.monitoring.metrics import get_metrics_registry
 from api.services.reference_service import get_reference_image
+from api.services.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +44,86 @@ logger = logging.getLogger(__name__)
 StepHandler = Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
 
 
+# Step types whose handler returns a new image
+IMAGE_STEP_TYPES = ('cleanup', 'insertion', 'fused_insertion', 'reference_insertion')
+
+
+class PipelineScheduleError(ValueError):
+    """Raised when step dependencies are invalid."""
+    pass
+
+
+def combine_prompts(parts: List[Tuple[str, str]]) -> str:
+    """
+    Merge the prompts of consecutive insertion steps into one edit instruction.
+
+    Args:
+        parts: (step_name, prompt) pairs in pipeline order
+
+    Returns:
+        Prompt asking for every edit in a single pass
+    """
+    sections = [
+        f"EDIT {number} ({step_name.replace('_', ' ')}):\n{prompt.strip()}"
+        for number, (step_name, prompt) in enumerate(parts, start=1)
+    ]
+    return (
+        f"Apply the following {len(parts)} edits to this image in a single pass, in order. "
+        "Each later edit builds on the earlier ones; keep everything an edit does not mention unchanged.\n\n"
+        + '\n\n'.join(sections)
+        + "\n\nReturn one image with all of the edits applied."
+    )
+
+
+def get_step_prompt(
+    step_name: str,
+    step_config: Dict[str, Any],
+    prompts,
+    scope: Dict[str, Any],
+    options: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Resolve the prompt a cleanup or insertion step would send.
+
+    Returns:
+        Prompt text, or None if the step is skipped for this scope
+    """
+    step_type = step_config.get('type')
+
+    if step_type == 'cleanup':
+        return prompts.get_cleanup_prompt()
+
+    if step_type == 'fused_insertion':
+        parts = [
+            (name, get_step_prompt(name, config, prompts, scope, options))
+            for name, config in step_config['parts']
+        ]
+        parts = [(name, prompt) for name, prompt in parts if prompt is not None]
+        if not parts:
+            return None
+        return parts[0][1] if len(parts) == 1 else combine_prompts(parts)
+
+    if step_type == 'insertion':
+        scope_key = step_config.get('scope_key')
+        # Run if: no scope_key (always run) OR scope_key value is truthy
+        if scope_key and not scope.get(scope_key):
+            return None
+
+        # Vertical prompt modules route by step name; older ones by feature name
+        if hasattr(prompts, 'get_prompt'):
+            # Some prompts return None if no features selected (e.g., water_features with empty array)
+            return prompts.get_prompt(step_name, scope)
+
+        if not hasattr(prompts, 'get_insertion_prompt'):
+            raise ValueError(
+                f"Prompts module missing get_insertion_prompt(). "
+                f"Each tenant's prompts.py must implement this function."
+            )
+        return prompts.get_insertion_prompt(step_config.get('feature_name', step_name), options)
+
+    return None
+
+
 def cleanup_handler(
     step_name: str,
     step_config: Dict[str, Any],
@@ -39,8 +144,9 @@ def cleanup_handler(
     image = context['image']
     prompts = context['prompts']
 
-    cleanup_prompt = prompts.get_cleanup_prompt()
-    clean_image = visualizer._call_gemini_edit(image, cleanup_prompt, step_name=step_name)
+    cleanup_prompt = get_step_prompt(step_name, step_config, prompts, {}, {})
+    # Cleanup only depends on the upload, so its result is cached
+    clean_image = visualizer._call_gemini_edit(image, cleanup_prompt, step_name=step_name, use_cache=True)
 
     logger.info(f"Pipeline Step: {step_name} complete.")
     return {'image': clean_image, 'clean_image': clean_image}
@@ -63,6 +169,7 @@ def insertion_handler(
 
     Returns:
         - image: Image with insertion, or unchanged if scope not enabled
+        - skipped: True if the step did not run
     """
     visualizer = context['visualizer']
     image = context['image']
@@ -70,22 +177,12 @@ def insertion_handler(
     scope = context.get('scope', {})
     options = context.get('options', {})
 
-    scope_key = step_config.get('scope_key')
+    prompt = get_step_prompt(step_name, step_config, prompts, scope, options)
 
-    # Skip if scope not enabled for this step
-    if scope_key and not scope.get(scope_key, False):
+    # Skip if scope not enabled for this step (or nothing selected)
+    if prompt is None:
         logger.info(f"Pipeline Step: {step_name} skipped (scope not enabled)")
-        return {'image': image}
-
-    feature_name = step_config.get('feature_name', step_name)
-
-    # Get insertion prompt using standard interface
-    if not hasattr(prompts, 'get_insertion_prompt'):
-        raise ValueError(
-            f"Prompts module missing get_insertion_prompt(). "
-            f"Each tenant's prompts.py must implement this function."
-        )
-    prompt = prompts.get_insertion_prompt(feature_name, options)
+        return {'image': image, 'skipped': True}
 
     result_image = visualizer._call_gemini_edit(image, prompt, step_name=step_name)
 
@@ -133,6 +230,36 @@ def quality_check_handler(
     return {'score': score, 'reason': reason}
 
 
+def reference_lookup_handler(
+    step_name: str,
+    step_config: Dict[str, Any],
+    context: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Handler for reference image lookups.
+
+    Has no image input, so it can run in parallel with cleanup. A
+    reference_insertion step that depends on it uses the fetched image
+    instead of looking it up again.
+
+    Step config expected:
+        - reference_category: Which option category to look up
+
+    Returns:
+        - reference_image: PIL Image or None
+        - reference_category: The category looked up
+    """
+    options = context.get('options', {})
+    tenant_id = context.get('tenant_id', 'pools')
+    reference_category = step_config.get('reference_category')
+
+    reference_image = None
+    if reference_category and reference_category in options:
+        reference_image = get_reference_image(tenant_id, reference_category, options[reference_category])
+
+    return {'reference_image': reference_image, 'reference_category': reference_category}
+
+
 def reference_insertion_handler(
     step_name: str,
     step_config: Dict[str, Any],
@@ -172,14 +299,20 @@ def reference_insertion_handler(
     # Skip if scope not enabled
     if scope_key and not scope.get(scope_key, False):
         logger.info(f"Pipeline Step: {step_name} skipped (scope not enabled)")
-        return {'image': image}
+        return {'image': image, 'skipped': True}
 
     feature_name = step_config.get('feature_name', step_name)
     reference_category = step_config.get('reference_category')
 
-    # Try to get reference image
+    # Use a reference fetched by an upstream reference_lookup step, if any
     reference_image = None
-    if reference_category and reference_category in options:
+    prefetched = [
+        result for result in context.get('results', {}).values()
+        if 'reference_image' in result and result.get('reference_category') == reference_category
+    ]
+    if prefetched:
+        reference_image = prefetched[0]['reference_image']
+    elif reference_category and reference_category in options:
         option_value = options[reference_category]
         reference_image = get_reference_image(tenant_id, reference_category, option_value)
 
@@ -210,6 +343,9 @@ def reference_insertion_handler(
 STEP_HANDLERS: Dict[str, StepHandler] = {
     'cleanup': cleanup_handler,
     'insertion': insertion_handler,
+    # Prompt resolution handles the fusion, the model call is the same
+    'fused_insertion': insertion_handler,
+    'reference_lookup': reference_lookup_handler,
     'reference_insertion': reference_insertion_handler,
     'quality_check': quality_check_handler,
 }
@@ -256,3 +392,164 @@ def execute_step(
         raise ValueError(f"No handler registered for step type: {step_type}")
 
     return handler(step_name, step_config, context)
+
+
+@dataclass
+class PipelineRunResult:
+    """Outputs of a scheduled pipeline run."""
+    outputs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    schedule: List[List[str]] = field(default_factory=list)
+
+
+class PipelineScheduler:
+    """
+    Runs pipeline steps as a dependency graph.
+
+    Each step gets the image output of its latest dependency (in pipeline
+    order) as `image`, the cleanup output as `clean_image`, and its
+    dependencies' results as `results`. Steps that return no image pass
+    their input image through, so a step can depend on a quality check or
+    lookup without losing the image.
+
+    Handlers run on worker threads. Progress callbacks and on_step_complete
+    hooks run on the calling thread, so they may write to the database.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Dict[str, Any]]], max_workers: Optional[int] = None):
+        """
+        Args:
+            steps: (step_name, step_config) pairs in pipeline order
+            max_workers: Max steps in flight (default PIPELINE_MAX_PARALLEL_STEPS)
+
+        Raises:
+            PipelineScheduleError: If a dependency is unknown or not an earlier step
+        """
+        self.order = [name for name, _ in steps]
+        self.configs = dict(steps)
+        self.max_workers = max_workers or getattr(settings, 'PIPELINE_MAX_PARALLEL_STEPS', 4)
+        self.dependencies = self._resolve_dependencies()
+
+    def _resolve_dependencies(self) -> Dict[str, List[str]]:
+        dependencies = {}
+        for index, name in enumerate(self.order):
+            config = self.configs[name]
+            if 'depends_on' in config:
+                deps = list(config['depends_on'])
+                for dep in deps:
+                    if dep not in self.configs:
+                        raise PipelineScheduleError(f"Step '{name}' depends on unknown step '{dep}'")
+                    if self.order.index(dep) >= index:
+                        raise PipelineScheduleError(f"Step '{name}' depends on later step '{dep}'")
+            else:
+                # Implicit: run after the previous step
+                deps = [self.order[index - 1]] if index > 0 else []
+            dependencies[name] = sorted(deps, key=self.order.index)
+        return dependencies
+
+    def waves(self) -> List[List[str]]:
+        """Group steps into stages; steps in the same stage can run in parallel."""
+        level = {}
+        for name in self.order:
+            level[name] = max((level[dep] + 1 for dep in self.dependencies[name]), default=0)
+
+        stages: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for name in self.order:
+            stages[level[name]].append(name)
+        return stages
+
+    def describe(self) -> str:
+        """Human-readable schedule, used by dry runs."""
+        stages = self.waves()
+        lines = [f"Pipeline schedule: {len(self.order)} steps in {len(stages)} stages (max_workers={self.max_workers})"]
+        for number, stage in enumerate(stages, start=1):
+            lines.append(f"  stage {number}:")
+            for name in stage:
+                deps = ', '.join(self.dependencies[name]) or '-'
+                step_type = self.configs[name].get('type', '?')
+                lines.append(f"    {name} [{step_type}] after: {deps}")
+        return '\n'.join(lines)
+
+    def run(
+        self,
+        context: Dict[str, Any],
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        completed: Optional[Dict[str, Dict[str, Any]]] = None,
+        on_step_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        dry_run: bool = False
+    ) -> PipelineRunResult:
+        """
+        Execute all steps, running independent ones in parallel.
+
+        Args:
+            context: Shared context (visualizer, prompts, scope, options,
+                tenant_id, original_image, clean_image)
+            progress_callback: Called as (progress_weight, description) when a step starts
+            completed: Results for steps that should not run (e.g. restored checkpoints)
+            on_step_complete: Called as (step_name, result) when a step finishes
+            dry_run: Print the schedule and return without running anything
+
+        Returns:
+            PipelineRunResult with per-step outputs and timings (seconds)
+        """
+        schedule = self.waves()
+        if dry_run:
+            print(self.describe())
+            return PipelineRunResult(schedule=schedule)
+
+        outputs: Dict[str, Dict[str, Any]] = dict(completed or {})
+        timings: Dict[str, float] = {}
+        pending = [name for name in self.order if name not in outputs]
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline-step') as executor:
+            while pending or running:
+                for name in list(pending):
+                    if not all(dep in outputs for dep in self.dependencies[name]):
+                        continue
+                    pending.remove(name)
+                    config = self.configs[name]
+                    if progress_callback and 'progress_weight' in config:
+                        progress_callback(config['progress_weight'], config.get('description', 'Processing'))
+                    step_context = self._step_context(name, context, outputs)
+                    # Copy the context so the step's spans join the job's trace
+                    future = executor.submit(
+                        contextvars.copy_context().run, self._execute_timed, name, config, step_context
+                    )
+                    running[future] = (name, step_context['image'])
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, input_image = running.pop(future)
+                    result, elapsed = future.result()
+                    result.setdefault('image', input_image)
+                    outputs[name] = result
+                    timings[name] = elapsed
+                    logger.info(f"Pipeline Step: {name} took {elapsed:.2f}s")
+                    get_metrics_registry().observe('gemini_step_duration_seconds', elapsed, step=name)
+                    if on_step_complete:
+                        on_step_complete(name, result)
+
+        return PipelineRunResult(outputs=outputs, timings=timings, schedule=schedule)
+
+    def _step_context(self, name: str, context: Dict[str, Any], outputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        deps = self.dependencies[name]
+        step_context = dict(context)
+        step_context['results'] = {dep: outputs[dep] for dep in deps}
+        step_context['image'] = outputs[deps[-1]]['image'] if deps else context['original_image']
+
+        for step_name in self.order:
+            if 'clean_image' in outputs.get(step_name, {}):
+                step_context['clean_image'] = outputs[step_name]['clean_image']
+        return step_context
+
+    def _execute_timed(self, name: str, config: Dict[str, Any], context: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        start = time.perf_counter()
+        try:
+            with span('pipeline.step', step=name, type=config.get('type')):
+                result = execute_step(name, config, context) or {}
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                # Lookups may open a DB connection on this worker thread
+                connections.close_all()
+        return result, time.perf_counter() - start
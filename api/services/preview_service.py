@@ -0,0 +1,127 @@
+"""
+Step Preview Service - Small previews of each pipeline step for the client.
+
+When a step finishes, its output is encoded once as a small progressive
+JPEG, saved under previews/<request id>/, listed in the request's
+step_previews field and pushed to progress stream subscribers. The customer
+sees the cleanup result after the first step instead of a spinner until
+the end.
+
+Usage:
+    from api.services.preview_service import StepPreviewStore
+
+    store = StepPreviewStore(visualization_request)
+    store.reset()
+    store.add('cleanup', image, 'Preparing image')
+"""
+import io
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from api.ai_services.utils.image_artifact import as_pil
+from api.services.progress_stream import publish_progress
+from api.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def encode_preview(image: Image.Image, max_size: int, quality: int) -> tuple:
+    """
+    Encode a downscaled progressive JPEG preview.
+
+    Args:
+        image: Step output
+        max_size: Longest edge in pixels
+        quality: JPEG quality
+
+    Returns:
+        (bytes, (width, height))
+    """
+    preview = image.copy()
+    preview.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if preview.mode != 'RGB':
+        preview = preview.convert('RGB')
+
+    buffer = io.BytesIO()
+    with span('image.encode', format='JPEG', kind='preview'):
+        preview.save(buffer, format='JPEG', quality=quality, progressive=True, optimize=True)
+    return buffer.getvalue(), preview.size
+
+
+class StepPreviewStore:
+    """
+    Preview store bound to a single VisualizationRequest.
+
+    Entries in step_previews are {step, description, image, width, height}
+    in the order the steps finished.
+    """
+
+    def __init__(self, visualization_request):
+        self.request = visualization_request
+        self.enabled = getattr(settings, 'PIPELINE_PREVIEWS_ENABLED', True)
+        self.max_size = getattr(settings, 'PIPELINE_PREVIEW_MAX_SIZE', 640)
+        self.quality = getattr(settings, 'PIPELINE_PREVIEW_QUALITY', 70)
+
+    @property
+    def previews(self) -> list:
+        if self.request.step_previews is None:
+            self.request.step_previews = []
+        return self.request.step_previews
+
+    def reset(self) -> None:
+        """Drop previews from a previous run. Failures are logged, never raised."""
+        if not self.previews:
+            return
+        try:
+            for entry in self.previews:
+                default_storage.delete(entry['image'])
+            self.request.step_previews = []
+            self.request.save(update_fields=['step_previews'])
+        except Exception as e:
+            logger.warning(f"Failed to reset step previews for request {self.request.id}: {e}")
+
+    def add(self, step_name: str, image: Image.Image, description: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Store and publish a preview of a finished step.
+
+        Returns:
+            The preview entry, or None if disabled or saving failed
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            data, (width, height) = encode_preview(as_pil(image), self.max_size, self.quality)
+            index = len(self.previews)
+            with span('storage.write', kind='preview', bytes=len(data)):
+                path = default_storage.save(
+                    f"previews/{self.request.id}/{index:02d}_{step_name}.jpg",
+                    ContentFile(data)
+                )
+            entry = {
+                'step': step_name,
+                'description': description or step_name,
+                'image': path,
+                'width': width,
+                'height': height,
+            }
+            self.previews.append(entry)
+            self.request.save(update_fields=['step_previews'])
+        except Exception as e:
+            logger.warning(f"Failed to save preview for step {step_name}: {e}")
+            return None
+
+        publish_progress(
+            self.request.id,
+            self.request.status,
+            self.request.progress_percentage,
+            self.request.status_message,
+            preview=dict(entry, url=default_storage.url(path)),
+        )
+        logger.debug(f"Published preview for step {step_name} ({len(data)} bytes)")
+        return entry
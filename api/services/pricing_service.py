@@ -0,0 +1,74 @@
+"""
+Pricing Service - Calculates and stores price_data for visualization requests.
+
+Usage:
+    from api.services.pricing_service import calculate_request_pricing
+
+    price_data = calculate_request_pricing(visualization_request)
+"""
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def calculate_request_pricing(instance) -> Optional[Dict[str, Any]]:
+    """
+    Calculate pricing for a visualization request based on tenant and scope.
+
+    The result is saved to instance.price_data. Failures are logged and
+    never raised, since pricing is not required to show a visualization.
+
+    Args:
+        instance: VisualizationRequest instance
+
+    Returns:
+        The stored price_data, or None if no price was calculated
+    """
+    try:
+        from api.pricing.calculators import get_calculator, CalculatorNotFoundError
+
+        # Only calculate for pools tenant (add others as implemented)
+        if instance.tenant_id != 'pools':
+            return None
+
+        # Build pricing config from visualization scope
+        scope = instance.scope or {}
+        pricing_config = {
+            'pool_size': scope.get('pool_size', 'classic'),
+            'shape': scope.get('shape', 'rectangle'),
+            'interior_finish': scope.get('interior_finish', 'white_plaster'),
+            'deck_material': scope.get('deck_material', 'travertine'),
+            'deck_sqft': scope.get('deck_sqft', 600),
+            'water_features': scope.get('water_features', []),
+            'built_in_features': scope.get('built_in_features', {}),
+        }
+
+        try:
+            calculator = get_calculator('pools')
+        except CalculatorNotFoundError:
+            logger.debug(f"No pricing calculator for tenant: {instance.tenant_id}")
+            return None
+
+        price_result = calculator.calculate_final_price(pricing_config)
+
+        # Convert Decimals to strings for JSON storage
+        instance.price_data = {
+            'subtotal': str(price_result['subtotal']),
+            'overhead': str(price_result['overhead']),
+            'profit': str(price_result['profit']),
+            'tax': str(price_result['tax']),
+            'total': str(price_result['total']),
+            'line_items': [
+                {**item, 'unit_price': str(item['unit_price']), 'total': str(item['total'])}
+                for item in price_result['line_items']
+            ],
+            'type': price_result['type'],
+        }
+        instance.save(update_fields=['price_data'])
+        logger.info(f"Pricing calculated for request {instance.id}: ${price_result['total']}")
+        return instance.price_data
+
+    except Exception as e:
+        logger.warning(f"Pricing calculation failed for request {instance.id}: {str(e)}")
+        return None
@@ -0,0 +1,324 @@
+"""
+Progress Stream - Push channel for visualization progress.
+
+Progress ticks are published to a broker instead of being written to the
+database each time, and browsers receive them as Server-Sent Events from
+/api/visualizations/<id>/events/ instead of polling the detail endpoint.
+Waiting clients generate no database reads after the initial snapshot.
+
+The broker keeps the latest event per request, so a client that connects
+mid-run immediately gets the current state. Two backends:
+    - 'local': in-process; only for development or a single process
+    - 'redis': Redis pub/sub; needed when Celery workers and web processes
+      are separate (the normal deployment)
+
+Usage:
+    from api.services.progress_stream import publish_progress, stream_events
+
+    publish_progress(request.id, 'processing', 40, 'Installing pool shell')
+    StreamingHttpResponse(stream_events(request.id, snapshot), content_type='text/event-stream')
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('complete', 'failed')
+
+
+def build_event(
+    request_id: int,
+    status: str,
+    progress: int,
+    message: str = '',
+    preview: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build a progress event payload, optionally carrying a step preview."""
+    event = {
+        'request_id': request_id,
+        'status': status,
+        'progress': progress,
+        'message': message or '',
+        'timestamp': time.time(),
+    }
+    if preview:
+        event['preview'] = preview
+    return event
+
+
+class LocalProgressBroker:
+    """
+    In-process broker (development and tests).
+
+    Finished requests are dropped TERMINAL_TTL seconds after their last event,
+    and at most MAX_REQUESTS are kept (least recently published go first), so
+    a long-lived process does not accumulate every request it has seen.
+    """
+
+    backend = 'local'
+    TERMINAL_TTL = 60
+    MAX_REQUESTS = 1000
+
+    def __init__(self):
+        self._latest: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._finished: Dict[int, float] = {}
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    def publish(self, request_id: int, event: Dict[str, Any]) -> None:
+        with self._condition:
+            self._seq += 1
+            self._latest[request_id] = dict(event, seq=self._seq)
+            self._latest.move_to_end(request_id)
+            if event.get('status') in TERMINAL_STATUSES:
+                self._finished[request_id] = time.monotonic()
+            else:
+                self._finished.pop(request_id, None)
+            self._prune()
+            self._condition.notify_all()
+
+    def _prune(self) -> None:
+        """Drop expired finished requests, then the oldest beyond MAX_REQUESTS."""
+        cutoff = time.monotonic() - self.TERMINAL_TTL
+        for request_id, finished_at in list(self._finished.items()):
+            if finished_at <= cutoff:
+                self._latest.pop(request_id, None)
+                del self._finished[request_id]
+        while len(self._latest) > self.MAX_REQUESTS:
+            request_id, _ = self._latest.popitem(last=False)
+            self._finished.pop(request_id, None)
+
+    def latest(self, request_id: int) -> Optional[Dict[str, Any]]:
+        return self._latest.get(request_id)
+
+    def listen(self, request_id: int, heartbeat: float, last_seq: int = 0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events newer than last_seq; yields None when idle for `heartbeat` seconds.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: (self._latest.get(request_id) or {}).get('seq', 0) > last_seq,
+                    timeout=heartbeat
+                )
+                event = self._latest.get(request_id)
+            if event and event['seq'] > last_seq:
+                last_seq = event['seq']
+                yield event
+            else:
+                yield None
+
+    async def alisten(self, request_id: int, heartbeat: float, last_seq: int = 0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Async variant of listen(); checks the in-memory state without blocking the loop."""
+        idle = 0.0
+        while True:
+            event = self.latest(request_id)
+            if event and event['seq'] > last_seq:
+                last_seq = event['seq']
+                idle = 0.0
+                yield event
+                continue
+            if idle >= heartbeat:
+                idle = 0.0
+                yield None
+            await asyncio.sleep(0.25)
+            idle += 0.25
+
+
+class RedisProgressBroker:
+    """Redis pub/sub broker shared by web and worker processes."""
+
+    backend = 'redis'
+    LATEST_TTL = 3600
+
+    def __init__(self, redis_url: str):
+        import redis
+
+        self.redis_url = redis_url
+        self.redis = redis.Redis.from_url(redis_url)
+
+    @staticmethod
+    def _channel(request_id: int) -> str:
+        return f"progress:{request_id}"
+
+    @staticmethod
+    def _latest_key(request_id: int) -> str:
+        return f"progress:{request_id}:latest"
+
+    @staticmethod
+    def _seq_key(request_id: int) -> str:
+        return f"progress:{request_id}:seq"
+
+    def publish(self, request_id: int, event: Dict[str, Any]) -> None:
+        seq = self.redis.incr(self._seq_key(request_id))
+        payload = json.dumps(dict(event, seq=seq))
+        pipe = self.redis.pipeline()
+        pipe.expire(self._seq_key(request_id), self.LATEST_TTL)
+        pipe.set(self._latest_key(request_id), payload, ex=self.LATEST_TTL)
+        pipe.publish(self._channel(request_id), payload)
+        pipe.execute()
+
+    def latest(self, request_id: int) -> Optional[Dict[str, Any]]:
+        payload = self.redis.get(self._latest_key(request_id))
+        return json.loads(payload) if payload else None
+
+    def listen(self, request_id: int, heartbeat: float, last_seq: int = 0) -> Iterator[Optional[Dict[str, Any]]]:
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(request_id))
+        try:
+            # Catch up on anything published before the subscription started
+            latest = self.latest(request_id)
+            if latest and latest.get('seq', 0) > last_seq:
+                last_seq = latest['seq']
+                yield latest
+            while True:
+                message = pubsub.get_message(timeout=heartbeat)
+                event = json.loads(message['data']) if message else None
+                if event is None or event.get('seq', 0) > last_seq:
+                    last_seq = event['seq'] if event else last_seq
+                    yield event
+        finally:
+            pubsub.close()
+
+    async def alisten(self, request_id: int, heartbeat: float, last_seq: int = 0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.redis_url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel(request_id))
+        try:
+            payload = await client.get(self._latest_key(request_id))
+            latest = json.loads(payload) if payload else None
+            if latest and latest.get('seq', 0) > last_seq:
+                last_seq = latest['seq']
+                yield latest
+            while True:
+                message = await pubsub.get_message(timeout=heartbeat)
+                event = json.loads(message['data']) if message else None
+                if event is None or event.get('seq', 0) > last_seq:
+                    last_seq = event['seq'] if event else last_seq
+                    yield event
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_progress_broker():
+    """Return the process-wide progress broker configured by PROGRESS_STREAM_BACKEND."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if getattr(settings, 'PROGRESS_STREAM_BACKEND', 'local') == 'redis':
+                    _broker = RedisProgressBroker(settings.REDIS_URL)
+                else:
+                    _broker = LocalProgressBroker()
+    return _broker
+
+
+def reset_progress_broker() -> None:
+    """Drop the shared broker so the next call rebuilds it from settings."""
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def publish_progress(
+    request_id: int,
+    status: str,
+    progress: int,
+    message: str = '',
+    preview: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Publish a progress event. Failures are logged, never raised, so the
+    pipeline is not affected by a broker outage.
+    """
+    try:
+        get_progress_broker().publish(request_id, build_event(request_id, status, progress, message, preview))
+    except Exception as e:
+        logger.warning(f"Failed to publish progress for request {request_id}: {e}")
+
+
+def format_sse(event: Optional[Dict[str, Any]], retry_ms: Optional[int] = None) -> str:
+    """
+    Format one Server-Sent Event frame; None becomes a keep-alive comment.
+    """
+    if event is None:
+        return ": keep-alive\n\n"
+    lines = []
+    if retry_ms is not None:
+        lines.append(f"retry: {retry_ms}")
+    if event.get('seq') is not None:
+        lines.append(f"id: {event['seq']}")
+    lines.append("event: progress")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _initial_event(request_id: int, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Prefer the broker's latest event; the DB snapshot may lag behind it."""
+    try:
+        latest = get_progress_broker().latest(request_id)
+    except Exception as e:
+        logger.warning(f"Failed to read latest progress for request {request_id}: {e}")
+        latest = None
+    if latest and snapshot['status'] not in TERMINAL_STATUSES:
+        return latest
+    return snapshot
+
+
+def _stream_settings():
+    return (
+        float(getattr(settings, 'PROGRESS_STREAM_HEARTBEAT', 15)),
+        float(getattr(settings, 'PROGRESS_STREAM_MAX_SECONDS', 120)),
+        int(getattr(settings, 'PROGRESS_STREAM_RETRY_MS', 3000)),
+    )
+
+
+def stream_events(request_id: int, snapshot: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield SSE frames for a request until it completes, fails, or the stream
+    reaches PROGRESS_STREAM_MAX_SECONDS (the browser then reconnects).
+
+    Args:
+        request_id: VisualizationRequest id
+        snapshot: Current state from the database (see build_event)
+    """
+    heartbeat, max_seconds, retry_ms = _stream_settings()
+    event = _initial_event(request_id, snapshot)
+    yield format_sse(event, retry_ms=retry_ms)
+    if event['status'] in TERMINAL_STATUSES:
+        return
+
+    deadline = time.monotonic() + max_seconds
+    for event in get_progress_broker().listen(request_id, heartbeat, event.get('seq', 0)):
+        yield format_sse(event)
+        if (event and event['status'] in TERMINAL_STATUSES) or time.monotonic() >= deadline:
+            return
+
+
+async def astream_events(request_id: int, snapshot: Dict[str, Any]) -> AsyncIterator[str]:
+    """Async variant of stream_events() for ASGI servers."""
+    heartbeat, max_seconds, retry_ms = _stream_settings()
+    event = _initial_event(request_id, snapshot)
+    yield format_sse(event, retry_ms=retry_ms)
+    if event['status'] in TERMINAL_STATUSES:
+        return
+
+    deadline = time.monotonic() + max_seconds
+    async for event in get_progress_broker().alisten(request_id, heartbeat, event.get('seq', 0)):
+        yield format_sse(event)
+        if (event and event['status'] in TERMINAL_STATUSES) or time.monotonic() >= deadline:
+            return
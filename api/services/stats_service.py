@@ -0,0 +1,125 @@
+"""
+Stats Service - Visualization request counts by status.
+
+Counts are scoped to everything, one user, one tenant or one contractor.
+Each (scope, status) count is a cache counter. A cold scope is filled with a
+single GROUP BY status query; after that, every status change saved on a
+VisualizationRequest increments the new status and decrements the old one
+in each scope the request belongs to, so reading the dashboard widget costs
+one cache round trip and no database query.
+
+Counters expire after STATS_COUNTER_TTL so any drift (rows deleted or
+updated through QuerySet.update, lost increments while a scope was being
+filled) is corrected by the next aggregate.
+
+Usage:
+    from api.services.stats_service import get_status_counts
+
+    counts = get_status_counts('tenant', 'pools')
+    # {'pending': 3, 'processing': 1, 'complete': 40, 'failed': 2}
+"""
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'processing', 'complete', 'failed')
+
+# Scope name -> VisualizationRequest field (None counts every row)
+SCOPE_FIELDS = {
+    'all': None,
+    'user': 'user_id',
+    'tenant': 'tenant_id',
+    'contractor': 'contractor_id',
+}
+
+
+def _counter_key(scope: str, value, status: str) -> str:
+    return f"viz_stats:{scope}:{value if value is not None else '*'}:{status}"
+
+
+def aggregate_status_counts(queryset) -> Dict[str, int]:
+    """
+    Count a queryset's rows by status in one GROUP BY query.
+
+    Returns:
+        Count for every status (0 when absent)
+    """
+    counts = dict.fromkeys(STATUSES, 0)
+    rows = queryset.order_by().values('status').annotate(count=Count('id'))
+    for row in rows:
+        counts[row['status']] = row['count']
+    return counts
+
+
+def get_status_counts(scope: str = 'all', value=None) -> Dict[str, int]:
+    """
+    Status counts for a scope, from cache counters when they are warm.
+
+    Args:
+        scope: One of SCOPE_FIELDS
+        value: User id, tenant id or contractor id (ignored for 'all')
+
+    Returns:
+        Count for every status
+    """
+    from api.models import VisualizationRequest
+
+    field = SCOPE_FIELDS[scope]
+    if field is None:
+        value = None
+    keys = {status: _counter_key(scope, value, status) for status in STATUSES}
+
+    cached = cache.get_many(keys.values())
+    if len(cached) == len(keys):
+        return {status: max(0, cached[key]) for status, key in keys.items()}
+
+    queryset = VisualizationRequest.objects.all()
+    if field is not None:
+        queryset = queryset.filter(**{field: value})
+    counts = aggregate_status_counts(queryset)
+
+    cache.set_many(
+        {keys[status]: count for status, count in counts.items()},
+        getattr(settings, 'STATS_COUNTER_TTL', 600)
+    )
+    return counts
+
+
+def _scopes_for(instance) -> Iterable[Tuple[str, Optional[object]]]:
+    yield 'all', None
+    for scope, field in SCOPE_FIELDS.items():
+        if field is not None and getattr(instance, field, None) is not None:
+            yield scope, getattr(instance, field)
+
+
+def record_status_change(instance, previous: Optional[str], current: str) -> None:
+    """
+    Move a request between status counters in every scope it belongs to.
+
+    Scopes that are not cached are left alone; they are filled from the
+    database on their next read. Failures are logged, never raised.
+
+    Args:
+        instance: VisualizationRequest that changed
+        previous: Status before the change (None for a new request)
+        current: Status after the change
+    """
+    if previous == current:
+        return
+
+    for scope, value in _scopes_for(instance):
+        for status, delta in ((previous, -1), (current, 1)):
+            if status not in STATUSES:
+                continue
+            try:
+                cache.incr(_counter_key(scope, value, status), delta)
+            except ValueError:
+                # Counter not warm; the next read aggregates
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to update {scope} stats counter: {e}")
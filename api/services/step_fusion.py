@@ -0,0 +1,181 @@
+"""
+Step Fusion - Collapses adjacent insertion steps into one model call.
+
+Each insertion step is a full Gemini image edit. When a tenant enables
+fusion (PIPELINE_STEP_FUSION), a run of insertion steps marked `fusable`
+in their step config is merged into one `fused_insertion` step whose
+prompt combines theirs (see pipeline_registry.combine_prompts), e.g. pools
+water_features + finishing. Steps are only fused when each depends solely
+on the one before it and nothing else uses the intermediate image; steps
+skipped for the request's scope are left alone.
+
+Runs record whether fusion was used in the generated image metadata
+(`fused_steps`, `pipeline_seconds`, next to `quality_score`), so fused and
+unfused runs can be compared with fusion_report().
+
+Usage:
+    from api.services.step_fusion import fuse_steps, fusion_report, is_fusion_enabled
+
+    if is_fusion_enabled(tenant_id):
+        steps, groups = fuse_steps(steps, resolve_prompt)
+
+    fusion_report(tenant_id='pools')
+"""
+import logging
+from statistics import mean
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from api.services.pipeline_registry import PipelineScheduler
+
+logger = logging.getLogger(__name__)
+
+FUSED_STEP_TYPE = 'fused_insertion'
+
+
+def is_fusion_enabled(tenant_id: str) -> bool:
+    """Whether a tenant's pipeline fuses its fusable insertion steps."""
+    flags = getattr(settings, 'PIPELINE_STEP_FUSION', {})
+    return bool(flags.get(tenant_id, flags.get('default', False)))
+
+
+def fused_step_name(group: List[str]) -> str:
+    """Step name of a fused group, e.g. 'water_features+finishing'."""
+    return '+'.join(group)
+
+
+def find_fusion_groups(
+    steps: List[Tuple[str, Dict[str, Any]]],
+    resolve_prompt: Callable[[str, Dict[str, Any]], Optional[str]]
+) -> List[List[str]]:
+    """
+    Find runs of adjacent steps that can share one model call.
+
+    Args:
+        steps: (step_name, step_config) pairs in pipeline order
+        resolve_prompt: Returns a step's prompt, or None if it is skipped
+
+    Returns:
+        Step name groups (two or more steps each), in pipeline order
+    """
+    scheduler = PipelineScheduler(steps)
+    dependents = {name: [] for name in scheduler.order}
+    for name, deps in scheduler.dependencies.items():
+        for dep in deps:
+            dependents[dep].append(name)
+
+    def fusable(name):
+        config = scheduler.configs[name]
+        return (
+            config.get('type') == 'insertion'
+            and bool(config.get('fusable'))
+            and resolve_prompt(name, config) is not None
+        )
+
+    groups = []
+    current: List[str] = []
+    for name in scheduler.order:
+        if not fusable(name):
+            if len(current) > 1:
+                groups.append(current)
+            current = []
+            continue
+        previous = current[-1] if current else None
+        if previous and scheduler.dependencies[name] == [previous] and dependents[previous] == [name]:
+            current.append(name)
+        else:
+            if len(current) > 1:
+                groups.append(current)
+            current = [name]
+    if len(current) > 1:
+        groups.append(current)
+    return groups
+
+
+def fuse_steps(
+    steps: List[Tuple[str, Dict[str, Any]]],
+    resolve_prompt: Callable[[str, Dict[str, Any]], Optional[str]]
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[List[str]]]:
+    """
+    Replace each fusion group with a single fused_insertion step.
+
+    The fused step takes the first step's dependencies; steps that depended
+    on the last step of a group depend on the fused step instead. Every
+    returned step carries an explicit depends_on, so the schedule does not
+    change for steps outside the groups.
+
+    Args:
+        steps: (step_name, step_config) pairs in pipeline order
+        resolve_prompt: Returns a step's prompt, or None if it is skipped
+
+    Returns:
+        (steps, groups): the fused pipeline and the step names fused
+    """
+    groups = find_fusion_groups(steps, resolve_prompt)
+    if not groups:
+        return steps, []
+
+    dependencies = PipelineScheduler(steps).dependencies
+    configs = dict(steps)
+    fused_into = {group[-1]: fused_step_name(group) for group in groups}
+    group_by_first = {group[0]: group for group in groups}
+    members = {name for group in groups for name in group}
+
+    fused = []
+    for name, config in steps:
+        if name in group_by_first:
+            group = group_by_first[name]
+            parts = [(member, configs[member]) for member in group]
+            fused.append((fused_step_name(group), {
+                'type': FUSED_STEP_TYPE,
+                'parts': parts,
+                'fused_steps': list(group),
+                'progress_weight': sum(part.get('progress_weight', 0) for _, part in parts),
+                'description': ' & '.join(part.get('description', member) for member, part in parts),
+                'depends_on': [fused_into.get(dep, dep) for dep in dependencies[name]],
+            }))
+        elif name not in members:
+            fused.append((name, {
+                **config,
+                'depends_on': [fused_into.get(dep, dep) for dep in dependencies[name]],
+            }))
+
+    logger.info(f"Step fusion: {', '.join(fused_step_name(group) for group in groups)}")
+    return fused, groups
+
+
+def fusion_report(tenant_id: Optional[str] = None, since=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare latency and quality of fused and unfused pipeline runs.
+
+    Args:
+        tenant_id: Only runs for this tenant (default: all tenants)
+        since: Only runs created at or after this datetime
+
+    Returns:
+        {'fused': {...}, 'unfused': {...}}, each with runs,
+        mean_pipeline_seconds and mean_quality_score (None without runs)
+    """
+    from api.models import GeneratedImage
+
+    images = GeneratedImage.objects.filter(metadata__has_key='pipeline_seconds')
+    if tenant_id:
+        images = images.filter(request__tenant_id=tenant_id)
+    if since:
+        images = images.filter(generated_at__gte=since)
+
+    runs = {'fused': [], 'unfused': []}
+    for metadata in images.values_list('metadata', flat=True).iterator():
+        runs['fused' if metadata.get('fused_steps') else 'unfused'].append(metadata)
+
+    report = {}
+    for kind, rows in runs.items():
+        seconds = [row['pipeline_seconds'] for row in rows]
+        scores = [row['quality_score'] for row in rows if isinstance(row.get('quality_score'), (int, float))]
+        report[kind] = {
+            'runs': len(rows),
+            'mean_pipeline_seconds': round(mean(seconds), 3) if seconds else None,
+            'mean_quality_score': round(mean(scores), 3) if scores else None,
+        }
+    return report
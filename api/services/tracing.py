@@ -0,0 +1,265 @@
+"""
+Tracing - Per-job span timelines, exported in OpenTelemetry (OTLP/JSON) format.
+
+A visualization job runs inside start_trace(); code on its path opens
+spans for the work worth timing (Gemini attempts, retry sleeps, image
+decode/encode, storage writes, progress writes, the audit, the PDF).
+Spans nest through contextvars, so worker threads started with
+contextvars.copy_context() (pipeline steps, the audit) attach to the job's
+trace. Outside a trace span() is a no-op.
+
+When the job ends its spans are summarized per name (count, seconds) for
+GeneratedImage.metadata['trace'], and exported by TRACING_EXPORTER:
+
+    none   keep the summary only (default)
+    file   append one OTLP/JSON export request per job to TRACING_FILE
+           (the OpenTelemetry Collector file format, one line per job)
+    otlp   POST it to an OTLP/HTTP collector at TRACING_OTLP_ENDPOINT,
+           off the job's thread
+
+Usage:
+    from api.services.tracing import span, start_trace
+
+    with start_trace('visualization_job', request_id=viz.id) as trace:
+        with span('pdf.render'):
+            ...
+    trace.summary()
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from api.ai_services.utils.image_artifact import set_span_hook
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'pool-visualizer'
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+_export_executor: Optional[ThreadPoolExecutor] = None
+_file_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+    trace: 'Trace'
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_ns: int = 0
+    end_ns: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class Trace:
+    """All spans of one job (thread-safe)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Span:
+        new_span = Span(
+            trace=self,
+            name=name,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+            start_ns=time.time_ns(),
+        )
+        with self._lock:
+            self.spans.append(new_span)
+        return new_span
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Total seconds, per-name span counts and seconds, and seconds per pipeline step."""
+        with self._lock:
+            spans = list(self.spans)
+        names: Dict[str, Dict[str, Any]] = {}
+        steps: Dict[str, float] = {}
+        for item in spans[1:]:
+            entry = names.setdefault(item.name, {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += item.seconds
+            if item.name == 'pipeline.step':
+                steps[item.attributes['step']] = round(item.seconds, 4)
+        for entry in names.values():
+            entry['seconds'] = round(entry['seconds'], 4)
+        return {
+            'trace_id': self.trace_id,
+            'seconds': round(self.root.seconds, 4) if self.root else 0.0,
+            'spans': dict(sorted(names.items(), key=lambda item: -item[1]['seconds'])),
+            'steps': steps,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest for this trace."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [_otlp_span(self.trace_id, item) for item in spans],
+                }],
+            }],
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # int64 is a string in OTLP/JSON
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _otlp_span(trace_id: str, item: Span) -> Dict[str, Any]:
+    data = {
+        'traceId': trace_id,
+        'spanId': item.span_id,
+        'name': item.name,
+        'kind': 1,  # SPAN_KIND_INTERNAL
+        'startTimeUnixNano': str(item.start_ns),
+        'endTimeUnixNano': str(item.end_ns if item.end_ns is not None else time.time_ns()),
+        'attributes': _otlp_attributes(item.attributes),
+        # STATUS_CODE_ERROR / STATUS_CODE_UNSET
+        'status': {'code': 2, 'message': item.error} if item.error else {'code': 0},
+    }
+    if item.parent_id:
+        data['parentSpanId'] = item.parent_id
+    return data
+
+
+@contextlib.contextmanager
+def _open_span(trace: Trace, name: str, attributes: Dict[str, Any]):
+    parent = _current_span.get()
+    new_span = trace.start_span(name, parent if parent and parent.trace is trace else None, attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        new_span.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the running job, if any."""
+    current = _current_span.get()
+    return current.trace if current else None
+
+
+def span(name: str, **attributes):
+    """
+    Time a block as a span of the current trace (no-op outside one).
+
+    Args:
+        name: Low-cardinality operation name, e.g. 'gemini.attempt'
+        **attributes: Span attributes (None values are dropped)
+    """
+    trace = current_trace()
+    if trace is None:
+        return contextlib.nullcontext()
+    return _open_span(trace, name, attributes)
+
+
+# Image decodes and encodes in ai_services.utils report through a hook
+set_span_hook(span)
+
+
+@contextlib.contextmanager
+def start_trace(name: str, **attributes):
+    """
+    Run a block as a new trace; its root span covers the whole block.
+
+    The trace is exported when the block exits (see TRACING_EXPORTER).
+    """
+    trace = Trace(name)
+    # A trace always starts a new root, even inside another trace
+    token = _current_span.set(None)
+    try:
+        with _open_span(trace, name, attributes):
+            yield trace
+    finally:
+        _current_span.reset(token)
+        export_trace(trace)
+
+
+def export_trace(trace: Trace) -> None:
+    """Send a finished trace to the configured exporter. Failures are logged, never raised."""
+    exporter = getattr(settings, 'TRACING_EXPORTER', 'none')
+    if exporter == 'none':
+        return
+    try:
+        if exporter == 'file':
+            _export_to_file(trace)
+        elif exporter == 'otlp':
+            _get_export_executor().submit(_export_to_collector, trace)
+        else:
+            logger.warning(f"Unknown TRACING_EXPORTER '{exporter}'")
+    except Exception as e:
+        logger.warning(f"Failed to export trace {trace.trace_id}: {e}")
+
+
+def _export_to_file(trace: Trace) -> None:
+    path = getattr(settings, 'TRACING_FILE', os.path.join(settings.BASE_DIR, 'logs', 'traces.jsonl'))
+    line = json.dumps(trace.to_otlp(), separators=(',', ':'))
+    with _file_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(line + '\n')
+
+
+def _export_to_collector(trace: Trace) -> None:
+    import httpx
+
+    endpoint = getattr(settings, 'TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    try:
+        response = httpx.post(endpoint, json=trace.to_otlp(), timeout=5)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"OTLP export of trace {trace.trace_id} failed: {e}")
+
+
+def _get_export_executor() -> ThreadPoolExecutor:
+    global _export_executor
+    if _export_executor is None:
+        _export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trace-export')
+    return _export_executor
@@ -0,0 +1,358 @@
+"""
+Usage Ledger - Token usage and cost of every model call, with daily budgets.
+
+Each Gemini response's usage_metadata is costed at GEMINI_MODEL_PRICING
+and written to the ModelUsage table, attributed to the request, tenant,
+contractor, step and model. Inside a job (usage_scope) rows are kept in
+memory and bulk inserted when the job ends, so model calls never wait on
+the database; calls outside a job are inserted right away (a process can
+exit without running atexit hooks, e.g. a Celery prefork child, so rows
+are never left in memory between jobs). Calls served by the fake or replay backend are
+recorded at no cost, so benchmarks and offline runs never count against a
+tenant's budget.
+
+Spend per tenant per UTC day is also counted in the Django cache (shared by
+every worker with the Redis cache), so MODEL_BUDGETS caps apply before the
+ledger rows are written:
+
+    ok         under downgrade_at of the cap
+    downgrade  image edits use the tenant's downgrade_model
+    throttle   the cap is reached; new jobs wait for the next day
+
+Usage:
+    from api.services.usage_ledger import apply_budget, record_usage, usage_scope
+
+    with usage_scope(visualization_request) as usage:
+        apply_budget(visualization_request.tenant_id)
+        ...
+        record_usage(model, 'cleanup', response.usage_metadata, image_output=True)
+    usage.cost_usd
+
+    visualization_costs(tenant_id='pools')  # cost per completed visualization
+"""
+
+import contextlib
+import contextvars
+import logging
+import statistics
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.ai_services.utils.performance_utils import calculate_usage_cost
+from api.monitoring.metrics import record_token_usage
+
+logger = logging.getLogger(__name__)
+
+SPEND_CACHE_TIMEOUT = 2 * 86400
+
+
+class BudgetExceededError(Exception):
+    """Raised when a tenant's daily model budget is spent."""
+    pass
+
+
+@dataclass
+class UsageScope:
+    """Attribution and buffered ledger rows for one job."""
+    request_id: Optional[int] = None
+    tenant_id: str = 'unknown'
+    contractor_id: Optional[int] = None
+    image_model: Optional[str] = None
+    cost_usd: float = 0.0
+    rows: List[Any] = field(default_factory=list)
+    closed: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class BudgetDecision:
+    """What a tenant's spend today allows."""
+    action: str  # ok, downgrade or throttle
+    tenant_id: str
+    spent_usd: float
+    cap_usd: Optional[float] = None
+    model: Optional[str] = None
+
+    @property
+    def message(self) -> str:
+        if self.cap_usd is None:
+            return f"No daily model budget for tenant '{self.tenant_id}'"
+        return f"Tenant '{self.tenant_id}' has spent ${self.spent_usd:.2f} of its ${self.cap_usd:.2f} daily model budget"
+
+
+_current_scope: contextvars.ContextVar[Optional[UsageScope]] = contextvars.ContextVar('usage_scope', default=None)
+
+
+@contextlib.contextmanager
+def usage_scope(visualization_request):
+    """
+    Attribute model calls in this block (and threads started with a copy of
+    its context) to a visualization request; insert their rows at the end.
+    """
+    scope = UsageScope(
+        request_id=visualization_request.id,
+        tenant_id=visualization_request.tenant_id,
+        contractor_id=getattr(visualization_request, 'contractor_id', None),
+    )
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        with scope.lock:
+            scope.closed = True
+            rows, scope.rows = scope.rows, []
+        _bulk_insert(rows)
+
+
+def current_scope() -> Optional[UsageScope]:
+    """The usage scope of the running job, if any."""
+    return _current_scope.get()
+
+
+def job_image_model(default: str) -> str:
+    """Image edit model for the running job (the budget may downgrade it)."""
+    scope = _current_scope.get()
+    return scope.image_model if scope and scope.image_model else default
+
+
+def record_usage(model: str, step: str, usage, image_output: bool = False) -> float:
+    """
+    Cost a model response's usage_metadata and add it to the ledger.
+
+    Never raises; a failure is logged and the call goes unbilled.
+
+    Args:
+        model: Model that served the call
+        step: Pipeline step or service name
+        usage: response.usage_metadata (None is ignored)
+        image_output: Whether the call returned an image
+
+    Returns:
+        Cost in USD
+    """
+    if not usage:
+        return 0.0
+
+    try:
+        from api.models import ModelUsage
+
+        record_token_usage(model, usage)
+        prompt_tokens = usage.prompt_token_count or 0
+        candidates_tokens = usage.candidates_token_count or 0
+        thoughts_tokens = usage.thoughts_token_count or 0
+        cost = 0.0
+        if _live_backend():
+            cost = calculate_usage_cost(model, prompt_tokens, candidates_tokens, thoughts_tokens, image_output)
+
+        job_scope = _current_scope.get()
+        scope = job_scope or UsageScope()
+        row = ModelUsage(
+            request_id=scope.request_id,
+            tenant_id=scope.tenant_id,
+            contractor_id=scope.contractor_id,
+            step=step,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            candidates_tokens=candidates_tokens,
+            thoughts_tokens=thoughts_tokens,
+            total_tokens=usage.total_token_count or (prompt_tokens + candidates_tokens + thoughts_tokens),
+            cost_usd=Decimal(f"{cost:.6f}"),
+            created_at=timezone.now(),
+        )
+        if cost:
+            _add_spend(scope.tenant_id, cost)
+
+        if job_scope:
+            with job_scope.lock:
+                if not job_scope.closed:
+                    job_scope.rows.append(row)
+                    job_scope.cost_usd += cost
+                    return cost
+        _bulk_insert([row])
+        return cost
+    except Exception as e:
+        logger.error(f"Failed to record model usage for {step}: {str(e)}")
+        return 0.0
+
+
+def _live_backend() -> bool:
+    """Whether model calls reach the paid API (fake and replay are free)."""
+    from api.ai_services.gemini_backends import requires_api_key
+
+    try:
+        return requires_api_key()
+    except Exception:
+        return True
+
+
+def _bulk_insert(rows: List[Any]) -> None:
+    if not rows:
+        return
+    from api.models import ModelUsage
+
+    try:
+        ModelUsage.objects.bulk_create(rows, batch_size=500)
+    except Exception as e:
+        logger.error(f"Failed to write {len(rows)} model usage rows: {str(e)}")
+
+
+# Daily spend and budgets
+
+def _day_bounds(day: date):
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _spend_key(tenant_id: str, day: date) -> str:
+    return f"model_spend:{tenant_id}:{day.isoformat()}"
+
+
+def _ledger_spend_micros(tenant_id: str, day: date) -> int:
+    """Spend already in the ledger, in millionths of a dollar."""
+    from api.models import ModelUsage
+
+    total = ModelUsage.objects.filter(
+        tenant_id=tenant_id, created_at__range=_day_bounds(day)
+    ).aggregate(total=Sum('cost_usd'))['total']
+    return int((total or 0) * 1_000_000)
+
+
+def _add_spend(tenant_id: str, cost: float) -> None:
+    day = timezone.now().date()
+    key = _spend_key(tenant_id, day)
+    micros = int(round(cost * 1_000_000))
+    # Seed from the ledger when the counter is missing (new day, eviction)
+    if cache.get(key) is None:
+        cache.add(key, _ledger_spend_micros(tenant_id, day), SPEND_CACHE_TIMEOUT)
+    try:
+        cache.incr(key, micros)
+    except ValueError:
+        cache.set(key, micros, SPEND_CACHE_TIMEOUT)
+
+
+def daily_spend(tenant_id: str, day: Optional[date] = None) -> float:
+    """USD spent by a tenant on a UTC day (today by default), across workers."""
+    day = day or timezone.now().date()
+    micros = cache.get(_spend_key(tenant_id, day))
+    if micros is None:
+        micros = _ledger_spend_micros(tenant_id, day)
+        cache.add(_spend_key(tenant_id, day), micros, SPEND_CACHE_TIMEOUT)
+    return micros / 1_000_000
+
+
+def get_budget(tenant_id: str) -> Dict[str, Any]:
+    """The tenant's MODEL_BUDGETS entry over the default."""
+    budgets = getattr(settings, 'MODEL_BUDGETS', {})
+    return {**budgets.get('default', {}), **budgets.get(tenant_id, {})}
+
+
+def check_budget(tenant_id: str) -> BudgetDecision:
+    """Decide whether a new job may run, and on which image model."""
+    budget = get_budget(tenant_id)
+    cap = budget.get('daily_usd')
+    if cap is None:
+        return BudgetDecision('ok', tenant_id, 0.0)
+
+    spent = daily_spend(tenant_id)
+    if spent >= cap:
+        return BudgetDecision('throttle', tenant_id, spent, cap)
+    if budget.get('downgrade_model') and spent >= cap * budget.get('downgrade_at', 1.0):
+        return BudgetDecision('downgrade', tenant_id, spent, cap, budget['downgrade_model'])
+    return BudgetDecision('ok', tenant_id, spent, cap)
+
+
+def apply_budget(tenant_id: str) -> BudgetDecision:
+    """
+    Enforce the tenant's budget on the running job.
+
+    Raises:
+        BudgetExceededError: If the daily cap is reached
+    """
+    decision = check_budget(tenant_id)
+    if decision.action == 'throttle':
+        raise BudgetExceededError(decision.message)
+    if decision.action == 'downgrade':
+        logger.warning(f"{decision.message}; editing with {decision.model}")
+        scope = _current_scope.get()
+        if scope:
+            scope.image_model = decision.model
+    return decision
+
+
+# Reports
+
+def visualization_costs(tenant_id: Optional[str] = None, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Cost per completed visualization, from the ledger.
+
+    Args:
+        tenant_id: Only this tenant (default all)
+        since: Only calls made at or after this time
+
+    Returns:
+        Dict with visualizations, total_usd, mean_usd, median_usd,
+        max_usd and the total per step and per model
+    """
+    from api.models import ModelUsage
+
+    usage = ModelUsage.objects.filter(request__status='complete')
+    if tenant_id:
+        usage = usage.filter(tenant_id=tenant_id)
+    if since:
+        usage = usage.filter(created_at__gte=since)
+
+    per_request = [
+        float(row['cost']) for row in
+        usage.values('request_id').annotate(cost=Sum('cost_usd')).order_by()
+    ]
+
+    def totals(key: str) -> Dict[str, float]:
+        rows = usage.values(key).annotate(cost=Sum('cost_usd')).order_by('-cost')
+        return {row[key]: round(float(row['cost']), 6) for row in rows}
+
+    return {
+        'visualizations': len(per_request),
+        'total_usd': round(sum(per_request), 6),
+        'mean_usd': round(statistics.mean(per_request), 6) if per_request else None,
+        'median_usd': round(statistics.median(per_request), 6) if per_request else None,
+        'max_usd': round(max(per_request), 6) if per_request else None,
+        'by_step': totals('step'),
+        'by_model': totals('model'),
+    }
+
+
+def daily_costs(days: int = 7, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Spend, calls and tokens per UTC day and tenant for the last `days` days."""
+    from api.models import ModelUsage
+
+    since, _ = _day_bounds(timezone.now().date() - timedelta(days=days - 1))
+    usage = ModelUsage.objects.filter(created_at__gte=since)
+    if tenant_id:
+        usage = usage.filter(tenant_id=tenant_id)
+
+    rows = (
+        usage.annotate(day=TruncDate('created_at', tzinfo=dt_timezone.utc))
+        .values('day', 'tenant_id')
+        .annotate(cost=Sum('cost_usd'), calls=Count('id'), tokens=Sum('total_tokens'))
+        .order_by('day', 'tenant_id')
+    )
+    return [
+        {
+            'day': row['day'].isoformat(),
+            'tenant_id': row['tenant_id'],
+            'cost_usd': round(float(row['cost']), 6),
+            'calls': row['calls'],
+            'tokens': row['tokens'],
+        }
+        for row in rows
+    ]
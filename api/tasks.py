@@ -0,0 +1,137 @@
+"""
+Celery tasks for background visualization processing.
+"""
+
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .services.job_queue import enqueue_visualization, tenant_slots
+from .services.usage_ledger import check_budget
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=40)
+def process_visualization_request(self, request_id):
+    """
+    Run the AI pipeline for a single VisualizationRequest.
+
+    Waits (by retrying) when the tenant is already at its concurrency limit
+    or has spent its daily model budget.
+    Runs only if this task still owns the request (see enqueue_visualization).
+
+    Returns:
+        list: IDs of the GeneratedImage rows created
+    """
+    from .models import VisualizationRequest
+    from .ai_enhanced_processor import AIEnhancedImageProcessor
+
+    try:
+        instance = VisualizationRequest.objects.get(pk=request_id)
+    except VisualizationRequest.DoesNotExist:
+        logger.warning(f"Visualization request {request_id} no longer exists, dropping task")
+        return []
+
+    if instance.status == 'complete':
+        # Redelivered after the job already finished (e.g. worker lost before ack)
+        logger.info(f"Visualization request {request_id} already complete, skipping")
+        return list(instance.results.values_list('id', flat=True))
+
+    if instance.task_id and instance.task_id != self.request.id:
+        # Superseded before it started; the newer task does the waiting
+        logger.info(f"Task {self.request.id} no longer owns request {request_id}, skipping")
+        return []
+
+    budget = check_budget(instance.tenant_id)
+    if budget.action == 'throttle':
+        logger.warning(f"{budget.message}, delaying request {request_id}")
+        _wait(self, instance, "Waiting for processing capacity...", settings.MODEL_BUDGET_RETRY_DELAY)
+
+    slot = tenant_slots.acquire(instance.tenant_id)
+    if slot is None:
+        _wait(self, instance, "Waiting for an available processing slot...", settings.VISUALIZATION_SLOT_RETRY_DELAY)
+
+    # Claim the row: a message superseded by a newer task for this request
+    # (requeued or regenerated) must not run the pipeline a second time
+    claimed = VisualizationRequest.objects.filter(
+        Q(task_id=self.request.id) | Q(task_id__isnull=True) | Q(task_id=''),
+        pk=request_id,
+    ).exclude(status='complete').update(task_id=self.request.id)
+    if not claimed:
+        tenant_slots.release(slot)
+        logger.info(f"Task {self.request.id} no longer owns request {request_id}, skipping")
+        return []
+
+    try:
+        processor = AIEnhancedImageProcessor()
+        generated_images = processor.process_image(instance, task_id=self.request.id)
+        logger.info(f"Successfully processed request {request_id}, generated {len(generated_images)} images")
+        return [image.id for image in generated_images]
+    finally:
+        tenant_slots.release(slot)
+
+
+def _wait(task, instance, message, countdown):
+    """
+    Retry the task later. updated_at is stamped so requeue_stale_requests
+    sees a waiting request as alive rather than undelivered.
+    """
+    from .models import VisualizationRequest
+
+    instance.update_progress(0, message)
+    VisualizationRequest.objects.filter(pk=instance.pk).update(status_message=message, updated_at=timezone.now())
+    raise task.retry(countdown=countdown)
+
+
+@shared_task
+def requeue_stale_requests():
+    """
+    Re-queue requests that were never picked up or whose worker died.
+
+    Pending requests older than the visibility timeout were never delivered
+    (e.g. the broker was down at upload time). Processing requests older
+    than the hard time limit can no longer be running.
+
+    Returns:
+        int: Number of requests re-queued
+    """
+    from .models import VisualizationRequest
+
+    time_limit = getattr(settings, 'CELERY_TASK_TIME_LIMIT', 900)
+    cutoff = timezone.now() - timedelta(seconds=time_limit + 300)
+
+    stale_pending = VisualizationRequest.objects.pending().filter(updated_at__lt=cutoff)
+    stale_processing = VisualizationRequest.objects.processing().filter(processing_started_at__lt=cutoff)
+
+    requeued = 0
+    for instance in list(stale_pending) + list(stale_processing):
+        instance.status = 'pending'
+        instance.status_message = "Re-queued after interrupted processing..."
+        instance.save(update_fields=['status', 'status_message', 'updated_at'])
+        enqueue_visualization(instance)
+        requeued += 1
+
+    if requeued:
+        logger.warning(f"Re-queued {requeued} stale visualization requests")
+    return requeued
+
+
+@shared_task(ignore_result=True)
+def build_image_derivatives(name):
+    """
+    Build thumbnails and web-sized variants of a stored image.
+
+    Args:
+        name: Storage name of the source image
+    """
+    from .services.derivative_service import build_derivatives
+
+    try:
+        build_derivatives(name)
+    except FileNotFoundError:
+        logger.warning(f"Image {name} no longer exists, skipping derivatives")
@@ -1,6 +1,10 @@
 """
 Tenant Registry - Central point for tenant configuration resolution.
 
+The Python tenant configs registered here are the defaults. get_tenant_config
+returns them compiled with any DB config and prompt overrides (see
+api/tenants/loader.py), so edits made in the admin apply without a restart.
+
 Usage:
     from api.tenants import get_tenant_config, get_tenant_prompts
     
@@ -22,8 +26,8 @@ logger = logging.getLogger(__name__)
 # Registry of all available tenants
 _TENANT_REGISTRY: Dict[str, BaseTenantConfig] = {}
 
-# Cached active tenant
-_active_tenant: Optional[BaseTenantConfig] = None
+# Cached active tenant id
+_active_tenant_id: Optional[str] = None
 
 
 def register_tenant(config: BaseTenantConfig) -> None:
@@ -40,31 +44,30 @@ def get_tenant_config(tenant_id: Optional[str] = None) -> BaseTenantConfig:
         tenant_id: Specific tenant ID, or None for active/default tenant
         
     Returns:
-        BaseTenantConfig instance
+        Compiled tenant plan (a BaseTenantConfig)
         
     Raises:
         ValueError: If tenant not found
     """
-    global _active_tenant
-    
+    global _active_tenant_id
+
+    from .loader import get_tenant_plan
+
     if tenant_id:
         if tenant_id not in _TENANT_REGISTRY:
             raise ValueError(f"Unknown tenant: {tenant_id}")
-        return _TENANT_REGISTRY[tenant_id]
-    
-    # Return cached active tenant
-    if _active_tenant:
-        return _active_tenant
-    
-    # Determine active tenant from settings
-    active_id = getattr(settings, 'ACTIVE_TENANT', 'pools')
+        return get_tenant_plan(_TENANT_REGISTRY[tenant_id])
 
-    if active_id not in _TENANT_REGISTRY:
-        logger.warning(f"Configured tenant '{active_id}' not found, falling back to 'pools'")
-        active_id = 'pools'
-    
-    _active_tenant = _TENANT_REGISTRY[active_id]
-    return _active_tenant
+    if _active_tenant_id is None:
+        # Determine active tenant from settings
+        active_id = getattr(settings, 'ACTIVE_TENANT', 'pools')
+
+        if active_id not in _TENANT_REGISTRY:
+            logger.warning(f"Configured tenant '{active_id}' not found, falling back to 'pools'")
+            active_id = 'pools'
+        _active_tenant_id = active_id
+
+    return get_tenant_plan(_TENANT_REGISTRY[_active_tenant_id])
 
 
 def get_tenant_prompts(tenant_id: Optional[str] = None):
@@ -74,14 +77,17 @@ def get_tenant_prompts(tenant_id: Optional[str] = None):
 
 
 def get_all_tenants() -> Dict[str, BaseTenantConfig]:
-    """Get all registered tenants."""
+    """Get all registered tenants (the Python defaults, not compiled plans)."""
     return _TENANT_REGISTRY.copy()
 
 
 def clear_cache() -> None:
-    """Clear cached active tenant (for testing)."""
-    global _active_tenant
-    _active_tenant = None
+    """Clear cached active tenant and compiled plans (for testing)."""
+    global _active_tenant_id
+    from .loader import clear_tenant_plans
+
+    _active_tenant_id = None
+    clear_tenant_plans()
 
 
 # Auto-register tenants on module load
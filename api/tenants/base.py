@@ -50,16 +50,24 @@ class BaseTenantConfig(ABC):
         """Return the prompts module for this tenant."""
         pass
 
+    def get_pricing_catalog(self) -> Dict[str, Any]:
+        """Return the option catalog including prices. For internal/admin use only."""
+        return {}
+
     @abstractmethod
     def get_step_config(self, step_name: str) -> Dict[str, Any]:
         """
         Return configuration for a specific pipeline step.
         
         Returns dict containing:
-            - type: 'cleanup', 'insertion', 'quality_check'
+            - type: 'cleanup', 'insertion', 'reference_lookup',
+              'reference_insertion', 'quality_check'
             - feature_name: (for insertion) e.g. 'patio enclosure'
             - scope_key: (for insertion) e.g. 'patio'
             - progress_weight: (optional) int 0-100
             - description: (optional) for progress updates
+            - depends_on: (optional) list of earlier step names this step
+              needs; defaults to the previous step. Steps with no path
+              between them run in parallel.
         """
         pass
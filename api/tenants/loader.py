@@ -0,0 +1,351 @@
+"""
+Tenant Loader - Compiles DB tenant config and prompt overrides into per-tenant plans.
+
+The Python tenant modules (api/tenants/<tenant>/) are the defaults. A
+TenantConfig row can rename a tenant, replace its pipeline steps, extend
+step configs and add product categories and branding to its schema;
+active PromptOverride rows replace individual prompts. The loader merges
+them into a TenantPlan: an immutable BaseTenantConfig that the rest of the
+code uses exactly like the Python config. Its prompts are memoized per
+plan version (see prompt_utils.py).
+
+Plans live in process memory, so serving a request costs no database read.
+At most every TENANT_CONFIG_REVALIDATE_SECONDS a process re-reads the
+tenant's config_version (one lookup on the unique tenant_id index) and
+recompiles only when it changed. Saving a TenantConfig or PromptOverride
+bumps that version, so an edit reaches every worker within the interval
+without a restart.
+
+Usage:
+    from api.tenants.loader import get_tenant_plan
+
+    plan = get_tenant_plan(PoolsTenantConfig())
+    plan.get_step_config('deck')
+    plan.get_prompts_module().get_cleanup_prompt()
+"""
+import contextlib
+import logging
+import string
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .base import BaseTenantConfig
+from .prompt_utils import get_prompt_cache
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = MappingProxyType({})
+
+# Compiled plans and when each was last revalidated (monotonic seconds)
+_plans: Dict[str, 'TenantPlan'] = {}
+_checked_at: Dict[str, float] = {}
+# Tenants whose plan was compiled without the database (retried on next check)
+_defaults_only: Set[str] = set()
+_lock = threading.Lock()
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class _Variables(dict):
+    """Leaves unknown {placeholders} in an override as written."""
+
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+class PromptTemplate:
+    """PromptOverride text, validated once, rendered with {variable} substitution."""
+
+    def __init__(self, text: str):
+        # Raises ValueError for unbalanced braces
+        list(string.Formatter().parse(text))
+        self.text = text
+
+    def render(self, variables: Optional[Mapping[str, Any]] = None) -> str:
+        try:
+            return self.text.format_map(_Variables(variables or {}))
+        except (AttributeError, IndexError, KeyError, ValueError) as e:
+            logger.warning(f"Prompt override could not be rendered, using it as written: {e}")
+            return self.text
+
+
+# Prompt function -> (override step name, template variables) for its arguments
+_OVERRIDE_KEYS = {
+    'get_cleanup_prompt': lambda *args, **kwargs: ('cleanup', {}),
+    'get_quality_check_prompt': lambda scope=None, *args, **kwargs: ('quality_check', scope),
+    'get_prompt': lambda step, selections=None, *args, **kwargs: (step, selections),
+    # Modules without get_prompt route insertions by the step's feature_name
+    'get_insertion_prompt': lambda feature_name, options=None, *args, **kwargs: (feature_name, options),
+}
+
+
+class TenantPrompts:
+    """
+    A tenant's prompts module with PromptOverride templates applied.
+
+    Prompt functions (names ending in 'prompt') are memoized in the shared
+    prompt cache under the tenant and plan version, so each distinct
+    selection renders once per config version.
+    """
+
+    def __init__(self, module, templates: Mapping[str, PromptTemplate], namespace: Tuple[str, int]):
+        self._module = module
+        self._templates = templates
+        self._namespace = namespace
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        function = getattr(self._module, name)
+        if not callable(function) or not name.endswith('prompt'):
+            return function
+        override_key = _OVERRIDE_KEYS.get(name) if self._templates else None
+
+        def render(*args, **kwargs):
+            if override_key is not None:
+                step, variables = override_key(*args, **kwargs)
+                template = self._templates.get(step)
+                if template is not None:
+                    return template.render(variables)
+            return function(*args, **kwargs)
+
+        memoized = get_prompt_cache().memoize(render, (*self._namespace, name))
+        # Later lookups find it without __getattr__
+        self.__dict__[name] = memoized
+        return memoized
+
+
+class TenantPlan(BaseTenantConfig):
+    """
+    Immutable tenant config compiled from the Python defaults and DB rows.
+
+    Anything the DB does not configure (choices, pricing, prompts without
+    an override) is answered by the Python tenant config.
+    """
+
+    def __init__(
+        self,
+        base: BaseTenantConfig,
+        version: int,
+        display_name: str,
+        pipeline_steps: Iterable[str],
+        step_configs: Mapping[str, Mapping[str, Any]],
+        schema_extras: Mapping[str, Any],
+        prompt_templates: Mapping[str, PromptTemplate],
+    ):
+        attributes = {
+            'base': base,
+            'version': version,
+            '_display_name': display_name,
+            '_pipeline_steps': tuple(pipeline_steps),
+            '_step_configs': _freeze(dict(step_configs)),
+            '_schema_extras': _freeze(dict(schema_extras)),
+            '_prompts': TenantPrompts(
+                base.get_prompts_module(),
+                MappingProxyType(dict(prompt_templates)),
+                (base.tenant_id, version),
+            ),
+            'supports_reference_images': base.supports_reference_images,
+        }
+        for name, value in attributes.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"TenantPlan is immutable (tried to set {name})")
+
+    @property
+    def tenant_id(self) -> str:
+        return self.base.tenant_id
+
+    @property
+    def display_name(self) -> str:
+        return self._display_name
+
+    def get_pipeline_steps(self):
+        return list(self._pipeline_steps)
+
+    def get_step_config(self, step_name):
+        return self._step_configs.get(step_name, _EMPTY)
+
+    def get_prompts_module(self):
+        return self._prompts
+
+    def get_schema(self):
+        schema = self.base.get_schema()
+        if self._schema_extras:
+            schema = {**schema, **self._schema_extras}
+        return schema
+
+    def get_pricing_catalog(self):
+        return self.base.get_pricing_catalog()
+
+    def get_mesh_choices(self):
+        return self.base.get_mesh_choices()
+
+    def get_frame_color_choices(self):
+        return self.base.get_frame_color_choices()
+
+    def get_mesh_color_choices(self):
+        return self.base.get_mesh_color_choices()
+
+    def get_opacity_choices(self):
+        return self.base.get_opacity_choices()
+
+    def __getattr__(self, name):
+        # Tenant-specific extras (e.g. get_product_schema)
+        if name.startswith('_') or name == 'base':
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    def __repr__(self):
+        return f"<TenantPlan {self.tenant_id} v{self.version}>"
+
+
+def compile_tenant_plan(base: BaseTenantConfig, row=None, overrides: Iterable = ()) -> TenantPlan:
+    """
+    Merge a Python tenant config with its TenantConfig row and prompt overrides.
+
+    Args:
+        base: Python tenant config (the defaults)
+        row: TenantConfig for the tenant, or None
+        overrides: Active PromptOverride rows, highest version first per step
+
+    Returns:
+        Compiled TenantPlan
+    """
+    pipeline_steps = list(row.pipeline_steps) if row and row.pipeline_steps else base.get_pipeline_steps()
+    row_step_configs = (row.step_configs if row else None) or {}
+    step_configs = {
+        name: {**base.get_step_config(name), **row_step_configs.get(name, {})}
+        for name in pipeline_steps
+    }
+
+    schema_extras = {}
+    if row and row.product_categories:
+        schema_extras['product_categories'] = row.product_categories
+    if row and row.branding:
+        schema_extras['branding'] = row.branding
+
+    templates = {}
+    for override in overrides:
+        if override.step_name in templates:
+            continue
+        try:
+            templates[override.step_name] = PromptTemplate(override.prompt_text)
+        except ValueError as e:
+            logger.warning(f"Ignoring prompt override {override}: {e}")
+
+    return TenantPlan(
+        base=base,
+        version=row.config_version if row else 0,
+        display_name=(row.display_name if row and row.display_name else base.display_name),
+        pipeline_steps=pipeline_steps,
+        step_configs=step_configs,
+        schema_extras=schema_extras,
+        prompt_templates=templates,
+    )
+
+
+def _guarded():
+    """Savepoint when inside a transaction, so a failed read cannot abort it."""
+    if transaction.get_connection().in_atomic_block:
+        return transaction.atomic()
+    return contextlib.nullcontext()
+
+
+def _read_version(tenant_id: str) -> Optional[int]:
+    """config_version for a tenant (0 without a row), or None if the DB is unavailable."""
+    from api.models import TenantConfig
+
+    try:
+        with _guarded():
+            versions = TenantConfig.objects.filter(tenant_id=tenant_id).values_list('config_version', flat=True)
+            return next(iter(versions[:1]), 0)
+    except DatabaseError as e:
+        logger.warning(f"Could not read tenant config version for {tenant_id}: {e}")
+        return None
+
+
+def _load(base: BaseTenantConfig) -> Tuple[TenantPlan, bool]:
+    """Compile a tenant's plan from the database; (plan, False) if it was unavailable."""
+    from api.models import PromptOverride, TenantConfig
+
+    try:
+        with _guarded():
+            row = TenantConfig.objects.filter(tenant_id=base.tenant_id).first()
+            overrides = list(
+                PromptOverride.objects.filter(tenant_id=base.tenant_id, is_active=True)
+                .order_by('step_name', '-version')
+            )
+    except DatabaseError as e:
+        logger.warning(f"Could not load tenant config for {base.tenant_id}, using defaults: {e}")
+        return compile_tenant_plan(base), False
+
+    plan = compile_tenant_plan(base, row, overrides)
+    logger.info(f"Compiled tenant plan {base.tenant_id} v{plan.version} ({len(overrides)} prompt overrides)")
+    return plan, True
+
+
+def get_tenant_plan(base: BaseTenantConfig) -> TenantPlan:
+    """
+    Compiled plan for a tenant, revalidated at most every TENANT_CONFIG_REVALIDATE_SECONDS.
+
+    Args:
+        base: Registered Python tenant config
+
+    Returns:
+        TenantPlan
+    """
+    if not apps.ready:
+        # Models cannot be queried while apps load (e.g. field choices)
+        return compile_tenant_plan(base)
+
+    tenant_id = base.tenant_id
+    interval = getattr(settings, 'TENANT_CONFIG_REVALIDATE_SECONDS', 5)
+    plan = _plans.get(tenant_id)
+    if plan is not None and plan.base is base and time.monotonic() - _checked_at.get(tenant_id, 0) < interval:
+        return plan
+
+    with _lock:
+        plan = _plans.get(tenant_id)
+        if plan is not None and plan.base is base and time.monotonic() - _checked_at.get(tenant_id, 0) < interval:
+            return plan
+
+        stale = plan is None or plan.base is not base or tenant_id in _defaults_only
+        if not stale:
+            version = _read_version(tenant_id)
+            stale = version is not None and version != plan.version
+        if stale:
+            plan, loaded = _load(base)
+            _plans[tenant_id] = plan
+            if loaded:
+                _defaults_only.discard(tenant_id)
+            else:
+                _defaults_only.add(tenant_id)
+        _checked_at[tenant_id] = time.monotonic()
+        return plan
+
+
+def clear_tenant_plans(tenant_id: Optional[str] = None) -> None:
+    """Drop compiled plans in this process (all tenants when tenant_id is None)."""
+    with _lock:
+        if tenant_id is None:
+            _plans.clear()
+            _checked_at.clear()
+            _defaults_only.clear()
+        else:
+            _plans.pop(tenant_id, None)
+            _checked_at.pop(tenant_id, None)
+            _defaults_only.discard(tenant_id)
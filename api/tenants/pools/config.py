@@ -171,11 +171,11 @@ class PoolsTenantConfig(BaseTenantConfig):
     def get_step_config(self, step_name):
         configs = {
             'cleanup': {'type': 'cleanup', 'progress_weight': 20, 'description': 'Preparing image'},
-            'pool_shell': {'type': 'insertion', 'scope_key': None, 'feature_name': 'pool', 'progress_weight': 30, 'description': 'Adding pool'},
-            'deck': {'type': 'insertion', 'scope_key': None, 'feature_name': 'deck', 'progress_weight': 20, 'description': 'Adding deck'},
-            'water_features': {'type': 'insertion', 'scope_key': 'water_features', 'feature_name': 'water_features', 'progress_weight': 15, 'description': 'Adding water features'},
-            'finishing': {'type': 'insertion', 'scope_key': 'finishing', 'feature_name': 'finishing', 'progress_weight': 10, 'description': 'Adding finishing touches'},
-            'quality_check': {'type': 'quality_check', 'progress_weight': 5, 'description': 'Quality check'},
+            'pool_shell': {'type': 'insertion', 'scope_key': None, 'feature_name': 'pool', 'progress_weight': 30, 'description': 'Adding pool', 'depends_on': ['cleanup']},
+            'deck': {'type': 'insertion', 'scope_key': None, 'feature_name': 'deck', 'progress_weight': 20, 'description': 'Adding deck', 'depends_on': ['pool_shell']},
+            'water_features': {'type': 'insertion', 'scope_key': 'water_features', 'feature_name': 'water_features', 'progress_weight': 15, 'description': 'Adding water features', 'depends_on': ['deck'], 'fusable': True},
+            'finishing': {'type': 'insertion', 'scope_key': 'finishing', 'feature_name': 'finishing', 'progress_weight': 10, 'description': 'Adding finishing touches', 'depends_on': ['water_features'], 'fusable': True},
+            'quality_check': {'type': 'quality_check', 'progress_weight': 5, 'description': 'Quality check', 'depends_on': ['cleanup', 'finishing']},
         }
         return configs.get(step_name, {})
 
@@ -186,6 +186,9 @@ class PoolsTenantConfig(BaseTenantConfig):
     def get_schema(self):
         return get_config()
 
+    def get_pricing_catalog(self):
+        return get_full_config_with_pricing()
+
     def get_mesh_choices(self):
         return []  # Not applicable to pools
 
@@ -6,6 +6,17 @@ Pipeline: cleanup → pool_shell → deck → water_features → finishing → q
 """
 
 from api.tenants.pools import config
+from api.tenants.prompt_utils import options_by_id
+
+# Option lookups by id, built once
+POOL_SIZES_BY_ID = options_by_id(config.POOL_SIZES)
+POOL_SHAPES_BY_ID = options_by_id(config.POOL_SHAPES)
+INTERIOR_FINISHES_BY_ID = options_by_id(config.INTERIOR_FINISHES)
+DECK_MATERIALS_BY_ID = options_by_id(config.DECK_MATERIALS)
+DECK_COLORS_BY_ID = options_by_id(config.DECK_COLORS)
+FINISHING_OPTIONS_LIGHTING_BY_ID = options_by_id(config.FINISHING_OPTIONS['lighting'])
+FINISHING_OPTIONS_LANDSCAPING_BY_ID = options_by_id(config.FINISHING_OPTIONS['landscaping'])
+FINISHING_OPTIONS_FURNITURE_BY_ID = options_by_id(config.FINISHING_OPTIONS['furniture'])
 
 
 def get_cleanup_prompt() -> str:
@@ -48,9 +59,9 @@ Output at the highest resolution possible."""
 
 def get_pool_shell_prompt(selections: dict) -> str:
     """Step 2: Render the pool shell with selected options."""
-    size = next((s for s in config.POOL_SIZES if s['id'] == selections.get('size', 'classic')), config.POOL_SIZES[1])
-    shape = next((s for s in config.POOL_SHAPES if s['id'] == selections.get('shape', 'rectangle')), config.POOL_SHAPES[0])
-    finish = next((f for f in config.INTERIOR_FINISHES if f['id'] == selections.get('finish', 'pebble_blue')), config.INTERIOR_FINISHES[1])
+    size = POOL_SIZES_BY_ID.get(selections.get('size', 'classic'), config.POOL_SIZES[1])
+    shape = POOL_SHAPES_BY_ID.get(selections.get('shape', 'rectangle'), config.POOL_SHAPES[0])
+    finish = INTERIOR_FINISHES_BY_ID.get(selections.get('finish', 'pebble_blue'), config.INTERIOR_FINISHES[1])
 
     features = []
     if selections.get('tanning_ledge', True):
@@ -112,8 +123,8 @@ Output at the highest resolution possible."""
 
 def get_deck_prompt(selections: dict) -> str:
     """Step 3: Add deck/surround around the pool."""
-    material = next((m for m in config.DECK_MATERIALS if m['id'] == selections.get('deck_material', 'travertine')), config.DECK_MATERIALS[0])
-    color = next((c for c in config.DECK_COLORS if c['id'] == selections.get('deck_color', 'cream')), config.DECK_COLORS[0])
+    material = DECK_MATERIALS_BY_ID.get(selections.get('deck_material', 'travertine'), config.DECK_MATERIALS[0])
+    color = DECK_COLORS_BY_ID.get(selections.get('deck_color', 'cream'), config.DECK_COLORS[0])
 
     return f"""Photorealistic inpainting. Add a pool deck around the installed pool.
 
@@ -190,18 +201,9 @@ Output at the highest resolution possible."""
 
 def get_finishing_prompt(selections: dict) -> str:
     """Step 5: Add finishing touches (lighting, landscaping, furniture)."""
-    lighting = next(
-        (l for l in config.FINISHING_OPTIONS['lighting'] if l['id'] == selections.get('lighting', 'none')),
-        config.FINISHING_OPTIONS['lighting'][0]
-    )
-    landscaping = next(
-        (l for l in config.FINISHING_OPTIONS['landscaping'] if l['id'] == selections.get('landscaping', 'none')),
-        config.FINISHING_OPTIONS['landscaping'][0]
-    )
-    furniture = next(
-        (f for f in config.FINISHING_OPTIONS['furniture'] if f['id'] == selections.get('furniture', 'none')),
-        config.FINISHING_OPTIONS['furniture'][0]
-    )
+    lighting = FINISHING_OPTIONS_LIGHTING_BY_ID.get(selections.get('lighting', 'none'), config.FINISHING_OPTIONS['lighting'][0])
+    landscaping = FINISHING_OPTIONS_LANDSCAPING_BY_ID.get(selections.get('landscaping', 'none'), config.FINISHING_OPTIONS['landscaping'][0])
+    furniture = FINISHING_OPTIONS_FURNITURE_BY_ID.get(selections.get('furniture', 'none'), config.FINISHING_OPTIONS['furniture'][0])
 
     additions = []
     if lighting['prompt_hint']:
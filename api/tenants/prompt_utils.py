@@ -0,0 +1,161 @@
+"""
+Prompt Utilities - Option lookups and memoized prompt rendering.
+
+Tenant prompt modules look selected options up in id -> option dicts built
+once at import (options_by_id), instead of scanning the option lists on
+every call.
+
+Rendered prompts are memoized in a bounded, process-wide LRU keyed on
+(tenant, plan version, prompt function, canonical arguments); the plan
+version moves whenever tenant config or a prompt override changes, so an
+edit never serves a stale prompt. Each result is a RenderedPrompt: a str
+whose SHA-256 digest is computed once and can key downstream caches.
+
+Usage:
+    from api.tenants.prompt_utils import options_by_id, get_prompt_cache
+
+    DECK_MATERIALS_BY_ID = options_by_id(config.DECK_MATERIALS)
+    material = DECK_MATERIALS_BY_ID.get(selected, config.DECK_MATERIALS[0])
+
+    render = get_prompt_cache().memoize(prompts.get_prompt, ('pools', 3, 'get_prompt'))
+    prompt = render('deck', {'deck_material': 'travertine'})
+    prompt.digest
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional
+
+from django.conf import settings
+
+_MISSING = object()
+
+
+class OptionIndex(Mapping):
+    """
+    Read-only id -> option mapping.
+
+    Scope values come from client JSON, so a lookup with a non-hashable id
+    (e.g. a list) misses like an unknown id instead of raising TypeError.
+    """
+
+    def __init__(self, index: Dict[str, Dict[str, Any]]):
+        self._index = index
+
+    def __getitem__(self, option_id):
+        try:
+            return self._index[option_id]
+        except TypeError:
+            raise KeyError(option_id) from None
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+def options_by_id(options: Iterable[Dict[str, Any]]) -> Mapping[str, Dict[str, Any]]:
+    """
+    Index a list of option dicts by their 'id' (first occurrence wins).
+
+    Returns:
+        Read-only id -> option mapping (OptionIndex)
+    """
+    index = {}
+    for option in options:
+        index.setdefault(option['id'], option)
+    return OptionIndex(index)
+
+
+class RenderedPrompt(str):
+    """Prompt text with a lazily computed, cached SHA-256 digest."""
+
+    @cached_property
+    def digest(self) -> str:
+        return hashlib.sha256(self.encode()).hexdigest()
+
+
+def prompt_digest(prompt: str) -> str:
+    """SHA-256 hex digest of a prompt, reusing a RenderedPrompt's cached one."""
+    if isinstance(prompt, RenderedPrompt):
+        return prompt.digest
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def canonical_arguments(args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Stable text form of call arguments (dict key order does not matter)."""
+    return json.dumps([args, kwargs], sort_keys=True, separators=(',', ':'), default=str)
+
+
+class PromptCache:
+    """Thread-safe bounded LRU of rendered prompts."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Optional[RenderedPrompt]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Optional[RenderedPrompt]) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def memoize(self, function: Callable[..., Optional[str]], namespace: tuple) -> Callable[..., Optional[str]]:
+        """
+        Wrap a prompt function so each distinct call renders once.
+
+        Args:
+            function: Returns prompt text (or None when the step is skipped)
+            namespace: Identifies the function and the config it renders
+                from, e.g. (tenant_id, plan version, function name)
+
+        Returns:
+            Function returning RenderedPrompt (or None)
+        """
+        def memoized(*args, **kwargs):
+            key = (namespace, canonical_arguments(args, kwargs))
+            value = self.get(key)
+            if value is _MISSING:
+                text = function(*args, **kwargs)
+                value = RenderedPrompt(text) if isinstance(text, str) else text
+                self.set(key, value)
+            return value
+
+        memoized.__wrapped__ = function
+        return memoized
+
+
+_prompt_cache: Optional[PromptCache] = None
+
+
+def get_prompt_cache() -> PromptCache:
+    """Process-wide rendered prompt cache (PROMPT_CACHE_MAX_ENTRIES entries)."""
+    global _prompt_cache
+    if _prompt_cache is None:
+        _prompt_cache = PromptCache(getattr(settings, 'PROMPT_CACHE_MAX_ENTRIES', 1024))
+    return _prompt_cache
@@ -77,6 +77,9 @@ class RoofsTenantConfig(BaseTenantConfig):
     def get_schema(self):
         return get_config()
 
+    def get_pricing_catalog(self):
+        return get_full_config_with_pricing()
+
     def get_mesh_choices(self):
         return []
 
@@ -6,6 +6,13 @@ Pipeline: cleanup -> roof_material -> solar_panels -> gutters_trim -> quality_ch
 """
 
 from api.tenants.roofs import config
+from api.tenants.prompt_utils import options_by_id
+
+# Option lookups by id, built once
+ROOF_MATERIALS_BY_ID = options_by_id(config.ROOF_MATERIALS)
+ROOF_COLORS_BY_ID = options_by_id(config.ROOF_COLORS)
+SOLAR_OPTIONS_BY_ID = options_by_id(config.SOLAR_OPTIONS)
+GUTTER_OPTIONS_BY_ID = options_by_id(config.GUTTER_OPTIONS)
 
 
 def get_cleanup_prompt() -> str:
@@ -46,14 +53,8 @@ Output at the highest resolution possible."""
 
 def get_roof_material_prompt(selections: dict) -> str:
     """Step 2: Replace roof material with selected options."""
-    material = next(
-        (m for m in config.ROOF_MATERIALS if m['id'] == selections.get('roof_material', 'asphalt_architectural')),
-        config.ROOF_MATERIALS[1]
-    )
-    color = next(
-        (c for c in config.ROOF_COLORS if c['id'] == selections.get('roof_color', 'charcoal')),
-        config.ROOF_COLORS[0]
-    )
+    material = ROOF_MATERIALS_BY_ID.get(selections.get('roof_material', 'asphalt_architectural'), config.ROOF_MATERIALS[1])
+    color = ROOF_COLORS_BY_ID.get(selections.get('roof_color', 'charcoal'), config.ROOF_COLORS[0])
 
     # Texas-specific hints based on material
     texas_hints = {
@@ -127,10 +128,7 @@ Output at the highest resolution possible."""
 
 def get_solar_panels_prompt(selections: dict) -> str:
     """Step 3: Add solar panels to the roof (conditional)."""
-    solar_option = next(
-        (s for s in config.SOLAR_OPTIONS if s['id'] == selections.get('solar_option', 'none')),
-        config.SOLAR_OPTIONS[0]
-    )
+    solar_option = SOLAR_OPTIONS_BY_ID.get(selections.get('solar_option', 'none'), config.SOLAR_OPTIONS[0])
 
     if solar_option['id'] == 'none':
         return None
@@ -189,10 +187,7 @@ Output at the highest resolution possible."""
 
 def get_gutters_trim_prompt(selections: dict) -> str:
     """Step 4: Add gutters and trim (conditional)."""
-    gutter = next(
-        (g for g in config.GUTTER_OPTIONS if g['id'] == selections.get('gutter_option', 'none')),
-        config.GUTTER_OPTIONS[0]
-    )
+    gutter = GUTTER_OPTIONS_BY_ID.get(selections.get('gutter_option', 'none'), config.GUTTER_OPTIONS[0])
 
     if gutter['id'] == 'none':
         return None
@@ -94,6 +94,9 @@ class ScreensTenantConfig(BaseTenantConfig):
             },
         ]
 
+    def get_pricing_catalog(self):
+        return get_full_config_with_pricing()
+
     def get_mesh_choices(self) -> List[Tuple[str, str]]:
         """Return mesh type choices as tuples for forms."""
         return [
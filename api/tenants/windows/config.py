@@ -336,6 +336,9 @@ class WindowsTenantConfig(BaseTenantConfig):
     def get_schema(self):
         return get_config()
 
+    def get_pricing_catalog(self):
+        return get_full_config_with_pricing()
+
     def get_mesh_choices(self):
         return []  # Not applicable to windows
 
@@ -6,6 +6,20 @@ Pipeline: cleanup → window_frame → grilles_glass → trim → doors → pati
 """
 
 from api.tenants.windows import config
+from api.tenants.prompt_utils import options_by_id
+
+# Option lookups by id, built once
+PROJECT_TYPES_BY_ID = options_by_id(config.PROJECT_TYPES)
+DOOR_TYPES_BY_ID = options_by_id(config.DOOR_TYPES)
+WINDOW_TYPES_BY_ID = options_by_id(config.WINDOW_TYPES)
+WINDOW_STYLES_BY_ID = options_by_id(config.WINDOW_STYLES)
+FRAME_MATERIALS_BY_ID = options_by_id(config.FRAME_MATERIALS)
+FRAME_COLORS_BY_ID = options_by_id(config.FRAME_COLORS)
+GRILLE_PATTERNS_BY_ID = options_by_id(config.GRILLE_PATTERNS)
+GLASS_OPTIONS_BY_ID = options_by_id(config.GLASS_OPTIONS)
+TRIM_STYLES_BY_ID = options_by_id(config.TRIM_STYLES)
+PATIO_ENCLOSURE_TYPES_BY_ID = options_by_id(config.PATIO_ENCLOSURE_TYPES)
+ENCLOSURE_GLASS_TYPES_BY_ID = options_by_id(config.ENCLOSURE_GLASS_TYPES)
 
 
 def get_cleanup_prompt() -> str:
@@ -55,30 +69,12 @@ def get_window_frame_prompt(selections: dict) -> str:
     """Step 2: Replace/install window frames and doors."""
     from api.tenants.windows import config
 
-    project_type = next(
-        (p for p in config.PROJECT_TYPES if p['id'] == selections.get('project_type', 'replace_existing')),
-        config.PROJECT_TYPES[0]
-    )
-    door_type = next(
-        (d for d in config.DOOR_TYPES if d['id'] == selections.get('door_type', 'none')),
-        config.DOOR_TYPES[0]
-    )
-    window_type = next(
-        (w for w in config.WINDOW_TYPES if w['id'] == selections.get('window_type', 'double_hung')),
-        config.WINDOW_TYPES[1]
-    )
-    window_style = next(
-        (s for s in config.WINDOW_STYLES if s['id'] == selections.get('window_style', 'modern')),
-        config.WINDOW_STYLES[0]
-    )
-    frame_material = next(
-        (m for m in config.FRAME_MATERIALS if m['id'] == selections.get('frame_material', 'vinyl')),
-        config.FRAME_MATERIALS[0]
-    )
-    frame_color = next(
-        (c for c in config.FRAME_COLORS if c['id'] == selections.get('frame_color', 'white')),
-        config.FRAME_COLORS[0]
-    )
+    project_type = PROJECT_TYPES_BY_ID.get(selections.get('project_type', 'replace_existing'), config.PROJECT_TYPES[0])
+    door_type = DOOR_TYPES_BY_ID.get(selections.get('door_type', 'none'), config.DOOR_TYPES[0])
+    window_type = WINDOW_TYPES_BY_ID.get(selections.get('window_type', 'double_hung'), config.WINDOW_TYPES[1])
+    window_style = WINDOW_STYLES_BY_ID.get(selections.get('window_style', 'modern'), config.WINDOW_STYLES[0])
+    frame_material = FRAME_MATERIALS_BY_ID.get(selections.get('frame_material', 'vinyl'), config.FRAME_MATERIALS[0])
+    frame_color = FRAME_COLORS_BY_ID.get(selections.get('frame_color', 'white'), config.FRAME_COLORS[0])
 
     # Build door section if applicable
     door_section = ""
@@ -131,14 +127,8 @@ Output at the highest resolution possible."""
 
 def get_grilles_glass_prompt(selections: dict) -> str:
     """Step 3: Add grille patterns and glass effects to all windows."""
-    grille_pattern = next(
-        (g for g in config.GRILLE_PATTERNS if g['id'] == selections.get('grille_pattern', 'none')),
-        config.GRILLE_PATTERNS[0]
-    )
-    glass_option = next(
-        (g for g in config.GLASS_OPTIONS if g['id'] == selections.get('glass_option', 'clear')),
-        config.GLASS_OPTIONS[0]
-    )
+    grille_pattern = GRILLE_PATTERNS_BY_ID.get(selections.get('grille_pattern', 'none'), config.GRILLE_PATTERNS[0])
+    glass_option = GLASS_OPTIONS_BY_ID.get(selections.get('glass_option', 'clear'), config.GLASS_OPTIONS[0])
 
     # Skip this step if no visible changes needed
     if grille_pattern['id'] == 'none' and glass_option['id'] in ['clear', 'low_e']:
@@ -187,14 +177,8 @@ Output at the highest resolution possible."""
 
 def get_trim_prompt(selections: dict) -> str:
     """Step 4: Add exterior trim around windows."""
-    trim_style = next(
-        (t for t in config.TRIM_STYLES if t['id'] == selections.get('trim_style', 'standard')),
-        config.TRIM_STYLES[0]
-    )
-    frame_color = next(
-        (c for c in config.FRAME_COLORS if c['id'] == selections.get('frame_color', 'white')),
-        config.FRAME_COLORS[0]
-    )
+    trim_style = TRIM_STYLES_BY_ID.get(selections.get('trim_style', 'standard'), config.TRIM_STYLES[0])
+    frame_color = FRAME_COLORS_BY_ID.get(selections.get('frame_color', 'white'), config.FRAME_COLORS[0])
 
     # Skip if standard trim
     if trim_style['id'] == 'standard':
@@ -237,23 +221,14 @@ def get_doors_prompt(selections: dict) -> str:
     """Step 5: Install doors if selected."""
     from api.tenants.windows import config
 
-    door_type = next(
-        (d for d in config.DOOR_TYPES if d['id'] == selections.get('door_type', 'none')),
-        config.DOOR_TYPES[0]
-    )
+    door_type = DOOR_TYPES_BY_ID.get(selections.get('door_type', 'none'), config.DOOR_TYPES[0])
 
     # Skip if no door selected
     if door_type['id'] == 'none':
         return None
 
-    frame_material = next(
-        (m for m in config.FRAME_MATERIALS if m['id'] == selections.get('frame_material', 'vinyl')),
-        config.FRAME_MATERIALS[0]
-    )
-    frame_color = next(
-        (c for c in config.FRAME_COLORS if c['id'] == selections.get('frame_color', 'white')),
-        config.FRAME_COLORS[0]
-    )
+    frame_material = FRAME_MATERIALS_BY_ID.get(selections.get('frame_material', 'vinyl'), config.FRAME_MATERIALS[0])
+    frame_color = FRAME_COLORS_BY_ID.get(selections.get('frame_color', 'white'), config.FRAME_COLORS[0])
 
     # Build door-specific installation details
     door_details = {
@@ -342,27 +317,15 @@ def get_patio_enclosure_prompt(selections: dict) -> str:
     """Step 6: Add patio enclosure if selected."""
     from api.tenants.windows import config
 
-    enclosure_type = next(
-        (e for e in config.PATIO_ENCLOSURE_TYPES if e['id'] == selections.get('enclosure_type', 'none')),
-        config.PATIO_ENCLOSURE_TYPES[0]
-    )
+    enclosure_type = PATIO_ENCLOSURE_TYPES_BY_ID.get(selections.get('enclosure_type', 'none'), config.PATIO_ENCLOSURE_TYPES[0])
 
     # Skip if no enclosure selected
     if enclosure_type['id'] == 'none':
         return None
 
-    frame_material = next(
-        (m for m in config.FRAME_MATERIALS if m['id'] == selections.get('frame_material', 'vinyl')),
-        config.FRAME_MATERIALS[0]
-    )
-    frame_color = next(
-        (c for c in config.FRAME_COLORS if c['id'] == selections.get('frame_color', 'white')),
-        config.FRAME_COLORS[0]
-    )
-    enclosure_glass = next(
-        (g for g in config.ENCLOSURE_GLASS_TYPES if g['id'] == selections.get('enclosure_glass_type', 'double_pane')),
-        config.ENCLOSURE_GLASS_TYPES[1]
-    )
+    frame_material = FRAME_MATERIALS_BY_ID.get(selections.get('frame_material', 'vinyl'), config.FRAME_MATERIALS[0])
+    frame_color = FRAME_COLORS_BY_ID.get(selections.get('frame_color', 'white'), config.FRAME_COLORS[0])
+    enclosure_glass = ENCLOSURE_GLASS_TYPES_BY_ID.get(selections.get('enclosure_glass_type', 'double_pane'), config.ENCLOSURE_GLASS_TYPES[1])
 
     # Build enclosure-specific details
     enclosure_details = {
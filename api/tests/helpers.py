@@ -0,0 +1,76 @@
+"""Shared fixtures for the api test modules."""
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from PIL import Image
+
+from api.models import VisualizationRequest
+
+
+def create_visualization_request(username, **fields):
+    """A request owned by a new user (pools tenant, placeholder upload by default)."""
+    user = User.objects.create_user(username=username, password='x')
+    fields.setdefault('original_image', 'originals/1/test.jpg')
+    fields.setdefault('tenant_id', 'pools')
+    return VisualizationRequest.objects.create(user=user, **fields)
+
+
+class TempMediaMixin:
+    """
+    Stores files under a temporary MEDIA_ROOT, removed after each test.
+
+    media_settings are overridden along with MEDIA_ROOT.
+    """
+
+    media_settings = {}
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, **self.media_settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class StubbedVisualizerMixin:
+    """
+    A ScreenVisualizer whose model calls are stubbed.
+
+    Image edits append their step name to self.calls and return
+    edit_image(step_name); the quality check scores 0.9. run_pipeline
+    processes a blank image of image_size for the pools tenant.
+    """
+
+    image_size = (8, 8)
+
+    def setUp(self):
+        from api.visualizer.services import ScreenVisualizer
+
+        super().setUp()
+        self.visualizer = ScreenVisualizer(api_key='test-key')
+        self.calls = []
+
+        def fake_edit(image, prompt, step_name='unknown', **kwargs):
+            self.calls.append(step_name)
+            return self.edit_image(step_name)
+
+        for name, value in [
+            ('_call_gemini_edit', mock.Mock(side_effect=fake_edit)),
+            ('_call_gemini_json', mock.Mock(return_value={'score': 0.9, 'reason': 'ok'})),
+            ('_save_debug_image', mock.Mock()),
+        ]:
+            patcher = mock.patch.object(self.visualizer, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def edit_image(self, step_name):
+        return Image.new('RGB', self.image_size, 'blue')
+
+    def run_pipeline(self, scope, **kwargs):
+        return self.visualizer.process_pipeline(
+            Image.new('RGB', self.image_size, 'white'), scope=scope, options={}, tenant_id='pools', **kwargs
+        )
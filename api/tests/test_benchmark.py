@@ -0,0 +1,46 @@
+"""Tests for the end-to-end pipeline benchmark."""
+from django.test import SimpleTestCase, TransactionTestCase
+
+from api.models import VisualizationRequest
+from api.services.benchmark_service import StageRecorder, compare_reports, percentile, run_benchmark
+from api.tenants import clear_cache
+from api.tests.helpers import TempMediaMixin
+
+
+class BenchmarkStatsTest(SimpleTestCase):
+
+    def test_percentile_interpolates(self):
+        values = [4.0, 1.0, 3.0, 2.0]
+
+        self.assertEqual(percentile(values, 0.5), 2.5)
+        self.assertEqual(percentile(values, 1.0), 4.0)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summary_and_comparison(self):
+        recorder = StageRecorder()
+        for seconds in (0.1, 0.2, 0.3):
+            recorder.add('ingest', seconds)
+
+        stages = recorder.summary()
+        self.assertEqual((stages['ingest']['count'], stages['ingest']['p50']), (3, 0.2))
+
+        changes = compare_reports({'stages': {'ingest': {'p95': 0.1}}}, {'stages': stages})
+        self.assertEqual(changes['ingest']['ratio'], round(stages['ingest']['p95'] / 0.1, 3))
+
+
+class BenchmarkRunTest(TempMediaMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(clear_cache)
+
+    def test_jobs_run_offline_with_stage_breakdown(self):
+        report = run_benchmark(jobs=2, concurrency=2, rate_limit_per_minute=100000)
+
+        self.assertEqual((report['completed'], report['failures']), (2, []))
+        for stage in ('job', 'ingest', 'pricing', 'audit', 'pdf', 'storage_write', 'db_write', 'step:cleanup'):
+            self.assertIn(stage, report['stages'])
+        self.assertEqual(report['stages']['step:cleanup']['count'], 2)
+        self.assertGreater(report['peak_rss_mb'], 0)
+        # Bench requests are removed afterwards
+        self.assertFalse(VisualizationRequest.objects.exists())
@@ -0,0 +1,69 @@
+"""Tests for resuming the visualization pipeline from saved checkpoints."""
+from django.test import TestCase
+from PIL import Image
+
+from api.models import VisualizationRequest
+from api.services.checkpoint_service import PipelineCheckpointStore
+from api.tests.helpers import StubbedVisualizerMixin, TempMediaMixin, create_visualization_request
+
+
+class PipelineCheckpointTest(TempMediaMixin, StubbedVisualizerMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.viz = create_visualization_request('checkpoints')
+        self.scope = {
+            'deck_material': 'travertine',
+            'water_features': ['rock_waterfall'],
+            'finishing': True,
+            'lighting': 'pool_lights',
+        }
+
+    def edit_image(self, step_name):
+        # Each edit gives a distinct image
+        return Image.new('RGB', self.image_size, (len(self.calls) * 20, 0, 0))
+
+    def _run(self, scope):
+        viz = VisualizationRequest.objects.get(pk=self.viz.pk)
+        return self.run_pipeline(scope, checkpoint_store=PipelineCheckpointStore(viz))
+
+    def test_first_run_saves_checkpoints(self):
+        self._run(self.scope)
+
+        self.assertEqual(self.calls, ['cleanup', 'pool_shell', 'deck', 'water_features', 'finishing'])
+        self.viz.refresh_from_db()
+        self.assertTrue(self.viz.clean_image)
+        self.assertEqual(
+            set(self.viz.pipeline_checkpoints),
+            {'cleanup', 'pool_shell', 'deck', 'water_features', 'finishing'}
+        )
+
+    def test_deck_change_reruns_only_downstream_steps(self):
+        self._run(self.scope)
+        self.calls.clear()
+
+        clean, final, score, _ = self._run(dict(self.scope, deck_material='pavers'))
+
+        self.assertEqual(self.calls, ['deck', 'water_features', 'finishing'])
+        self.assertEqual(self.visualizer._call_gemini_json.call_count, 2)
+        self.assertEqual(score, 0.9)
+
+    def test_unchanged_regenerate_resamples_only_last_step(self):
+        """Regenerate with the same options gives a new final sample."""
+        self._run(self.scope)
+        self.calls.clear()
+
+        clean, final, _, _ = self._run(self.scope)
+
+        self.assertEqual(self.calls, ['finishing'])
+        self.assertEqual(final.size, (8, 8))
+
+    def test_legacy_clean_image_skips_cleanup(self):
+        """A clean_image saved before checkpoints existed is reused."""
+        self._run(self.scope)
+        VisualizationRequest.objects.filter(pk=self.viz.pk).update(pipeline_checkpoints={})
+        self.calls.clear()
+
+        self._run(self.scope)
+
+        self.assertEqual(self.calls, ['pool_shell', 'deck', 'water_features', 'finishing'])
@@ -0,0 +1,91 @@
+"""Tests for the versioned tenant config response cache."""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.models import TenantConfig
+from api.pricing.models import Vertical
+from api.tenants import clear_cache
+from api.tenants.pools.config import PoolsTenantConfig
+
+
+class ConfigCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(clear_cache)
+        patcher = mock.patch.object(
+            PoolsTenantConfig, 'get_schema', autospec=True, return_value={'name': 'pools'}
+        )
+        self.get_schema = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_config_is_built_once_and_revalidated_with_etag(self):
+        first = self.client.get('/api/config/', secure=True)
+        second = self.client.get('/api/config/', secure=True)
+
+        self.assertEqual(first.json(), {'name': 'pools'})
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.get_schema.call_count, 1)
+        self.assertTrue(first['ETag'])
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        not_modified = self.client.get('/api/config/', secure=True, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        since = self.client.get('/api/config/', secure=True, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def test_tenant_config_change_retires_cached_response(self):
+        self.client.get('/api/config/', secure=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TenantConfig.objects.create(tenant_id='pools', display_name='Pools', config_version=2)
+        self.get_schema.return_value = {'name': 'pools', 'display_name': 'Pools v2'}
+
+        response = self.client.get('/api/config/', secure=True)
+        self.assertEqual(response.json()['display_name'], 'Pools v2')
+        self.assertEqual(self.get_schema.call_count, 2)
+
+    def test_version_change_from_another_process_is_seen(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            TenantConfig.objects.create(tenant_id='pools', display_name='Pools')
+        self.client.get('/api/config/', secure=True)
+
+        # Bumped without save(), so nothing in this process invalidated
+        TenantConfig.objects.filter(tenant_id='pools').update(config_version=5)
+        with self.settings(TENANT_CONFIG_REVALIDATE_SECONDS=0):
+            self.client.get('/api/config/', secure=True)
+        self.assertEqual(self.get_schema.call_count, 2)
+
+    def test_price_book_change_retires_pricing_catalog(self):
+        staff = User.objects.create_user(username='staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+
+        with mock.patch.object(PoolsTenantConfig, 'get_pricing_catalog', autospec=True,
+                               return_value={'pool_sizes': []}) as catalog:
+            self.client.get('/api/config/pricing/', secure=True)
+            self.client.get('/api/config/pricing/', secure=True)
+            self.assertEqual(catalog.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Vertical.objects.create(id='pools', name='pools', display_name='Pools')
+            self.client.get('/api/config/pricing/', secure=True)
+            self.assertEqual(catalog.call_count, 2)
+
+    def test_pricing_catalog_is_staff_only(self):
+        self.client.force_login(User.objects.create_user(username='customer', password='x'))
+        self.assertEqual(self.client.get('/api/config/pricing/', secure=True).status_code, 403)
+
+    def test_screen_types_carry_etag(self):
+        response = self.client.get('/api/screentypes/', secure=True)
+
+        self.assertTrue(response.json()['results'])
+        self.assertEqual(
+            self.client.get('/api/screentypes/', secure=True, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304,
+        )
@@ -0,0 +1,92 @@
+"""Tests for image derivatives (thumbnails and web-sized variants)."""
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api.models import GeneratedImage
+from api.services.derivative_service import build_derivatives, derivative_urls, get_derivatives
+from api.tests.helpers import TempMediaMixin, create_visualization_request
+
+
+def _jpeg(size=(1600, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(
+    IMAGE_DERIVATIVE_SIZES={'thumb': 64, 'medium': 256},
+    IMAGE_DERIVATIVE_FORMATS=('WEBP', 'JPEG'),
+)
+class DerivativeTest(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        self.name = default_storage.save('originals/1/yard.jpg', ContentFile(_jpeg()))
+        patcher = mock.patch('api.tasks.build_image_derivatives.delay')
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_builds_every_size_and_format_next_to_the_source(self):
+        paths = build_derivatives(self.name)
+
+        self.assertEqual(paths['thumb']['webp'], 'originals/1/yard__thumb.webp')
+        self.assertEqual(paths['medium']['jpeg'], 'originals/1/yard__medium.jpg')
+        with default_storage.open(paths['thumb']['webp'], 'rb') as f:
+            image = Image.open(f)
+            self.assertEqual((image.format, image.size), ('WEBP', (64, 48)))
+        with default_storage.open(paths['medium']['jpeg'], 'rb') as f:
+            self.assertEqual(Image.open(f).size, (256, 192))
+
+    def test_missing_derivatives_are_queued_once(self):
+        self.assertEqual(get_derivatives(self.name), {})
+        with mock.patch('api.services.derivative_service.default_storage.exists') as exists:
+            self.assertEqual(get_derivatives(self.name), {})
+
+        # The partial set is cached while the build is pending
+        exists.assert_not_called()
+        self.delay.assert_called_once_with(self.name)
+
+        build_derivatives(self.name)
+        self.assertEqual(set(get_derivatives(self.name)), {'thumb', 'medium'})
+
+    def test_known_derivatives_are_served_from_cache(self):
+        build_derivatives(self.name)
+
+        with mock.patch('api.services.derivative_service.default_storage.exists') as exists:
+            urls = derivative_urls(self.name)
+        exists.assert_not_called()
+        self.assertTrue(urls['thumb']['jpeg'].endswith('/originals/1/yard__thumb.jpg'))
+
+    def test_existing_derivatives_are_found_after_cache_loss(self):
+        build_derivatives(self.name)
+        cache.clear()
+
+        paths = get_derivatives(self.name)
+
+        self.assertEqual(set(paths), {'thumb', 'medium'})
+        self.delay.assert_not_called()
+
+    def test_list_and_results_expose_derivative_urls(self):
+        viz = create_visualization_request('thumbs', original_image=self.name)
+        result_name = default_storage.save('generated/1/result.jpg', ContentFile(_jpeg()))
+        GeneratedImage.objects.create(request=viz, generated_image=result_name)
+        build_derivatives(self.name)
+        build_derivatives(result_name)
+
+        response = self.client.get('/api/visualizations/', secure=True)
+        row = response.json()['results'][0]
+        self.assertTrue(row['original_image_derivatives']['thumb']['webp'].startswith('https://'))
+        self.assertIn('result__thumb', row['latest_result_derivatives']['thumb']['jpeg'])
+
+        detail = self.client.get(f'/api/visualizations/{viz.pk}/', secure=True).json()
+        self.assertIn('medium', detail['original_image_derivatives'])
+        self.assertIn('result__medium', detail['results'][0]['derivatives']['medium']['webp'])
@@ -0,0 +1,139 @@
+"""Tests for the fake and record/replay Gemini backends."""
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase
+from google.genai import errors as genai_errors
+from google.genai import types
+from PIL import Image
+
+from api.ai_services import gemini_backends
+from api.ai_services.config import ai_config_manager
+from api.ai_services.gemini_backends import (
+    FakeModels,
+    RecordingStore,
+    RecordReplayModels,
+    ReplayMissError,
+    get_model_client,
+)
+from api.ai_services.interfaces import AIServiceConfig, AIServiceType
+from api.ai_services.rate_governor import is_rate_limit_error, reset_rate_governor
+from api.ai_services.utils.image_artifact import ImageArtifact, as_content
+from api.tenants import clear_cache
+from api.visualizer.services import ScreenVisualizer
+from api.tests.helpers import TempMediaMixin
+
+EDIT_CONFIG = types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+
+
+def use_backend(test, **params):
+    """Select a Gemini backend for the duration of a test."""
+    config = AIServiceConfig('gemini', AIServiceType.IMAGE_GENERATION, additional_params=params)
+    patcher = mock.patch.dict(ai_config_manager._configs, {'gemini': config})
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    gemini_backends.reset_model_clients()
+    test.addCleanup(gemini_backends.reset_model_clients)
+
+
+class FakeBackendTest(SimpleTestCase):
+
+    def setUp(self):
+        self.photo = ImageArtifact.from_image(Image.new('RGB', (16, 8), 'green'))
+
+    def test_edit_echoes_input_image_with_usage(self):
+        response = FakeModels().generate_content(
+            model='m', contents=[as_content(self.photo), 'add a deck'], config=EDIT_CONFIG
+        )
+
+        parts = response.candidates[0].content.parts
+        self.assertEqual(parts[-1].inline_data.data, self.photo.data)
+        self.assertGreater(response.usage_metadata.total_token_count, 0)
+
+    def test_latency_sequence_is_deterministic(self):
+        profile = {'seed': 7, 'latency': {'distribution': 'lognormal', 'median': 20, 'sigma': 0.4}}
+
+        def samples(models):
+            return [models.sample_latency(gemini_backends.random.Random(f"7:{n}")) for n in range(5)]
+
+        first, second = samples(FakeModels(profile)), samples(FakeModels(profile))
+        self.assertEqual(first, second)
+        self.assertEqual(len(set(first)), 5)
+
+    def test_rate_limit_bursts_and_errors(self):
+        models = FakeModels({'rate_limit_bursts': {'every': 4, 'length': 2}})
+        outcomes = []
+        for _ in range(8):
+            try:
+                models.generate_content(model='m', contents=['check'])
+                outcomes.append('ok')
+            except genai_errors.ClientError as e:
+                self.assertTrue(is_rate_limit_error(e))
+                outcomes.append(429)
+        self.assertEqual(outcomes, [429, 429, 'ok', 'ok', 429, 429, 'ok', 'ok'])
+
+        with self.assertRaises(genai_errors.ServerError):
+            FakeModels({'error_rate': 1.0}).generate_content(model='m', contents=['check'])
+
+    def test_fake_client_needs_no_api_key(self):
+        use_backend(self, backend='fake')
+
+        with mock.patch.dict('os.environ', {}, clear=True):
+            visualizer = ScreenVisualizer()
+
+        self.assertIs(visualizer.client, get_model_client())
+        self.assertIsInstance(visualizer.client.models, FakeModels)
+
+
+class RecordReplayTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.photo = ImageArtifact.from_image(Image.new('RGB', (16, 8), 'blue'))
+        self.contents = [as_content(self.photo), 'add a fountain']
+
+    def test_replay_returns_recorded_bytes(self):
+        live = mock.Mock(wraps=FakeModels())
+        recorder = RecordReplayModels(RecordingStore(self.directory), live)
+        recorded = recorder.generate_content(model='m', contents=self.contents, config=EDIT_CONFIG)
+
+        replayer = RecordReplayModels(RecordingStore(self.directory))
+        replayed = replayer.generate_content(model='m', contents=list(self.contents), config=EDIT_CONFIG)
+
+        self.assertEqual(live.generate_content.call_count, 1)
+        self.assertEqual(replayed.model_dump_json(), recorded.model_dump_json())
+        self.assertEqual(replayed.candidates[0].content.parts[-1].inline_data.data, self.photo.data)
+
+    def test_unrecorded_call_fails_in_replay(self):
+        replayer = RecordReplayModels(RecordingStore(self.directory))
+
+        with self.assertRaises(ReplayMissError):
+            replayer.generate_content(model='m', contents=self.contents, config=EDIT_CONFIG)
+
+
+class FakePipelineTest(TempMediaMixin, TransactionTestCase):
+    # Transactional: steps record usage from pool threads, on their own connections
+
+    media_settings = {'GEMINI_STEP_CACHE_ENABLED': False}
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(clear_cache)
+        reset_rate_governor()
+        self.addCleanup(reset_rate_governor)
+        use_backend(self, backend='fake', fake={'text': '{"score": 0.8, "reason": "fake"}'})
+
+    def test_pipeline_runs_offline(self):
+        visualizer = ScreenVisualizer(api_key=None)
+        source = Image.new('RGB', (16, 8), 'white')
+
+        clean, final, score, reason = visualizer.process_pipeline(
+            source, scope={'deck_material': 'pavers'}, options={}, tenant_id='pools'
+        )
+
+        self.assertEqual((score, reason), (0.8, 'fake'))
+        self.assertEqual(final.size, source.size)
+        # cleanup, pool_shell, deck and the quality check
+        self.assertEqual(visualizer.client.models.calls, 4)
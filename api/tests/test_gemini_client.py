@@ -0,0 +1,43 @@
+"""Tests for the shared, pooled Gemini client."""
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.ai_services import gemini_client
+from api.ai_services.gemini_client import GeminiClientError, get_gemini_client
+from api.audit.services import AuditService
+from api.visualizer.services import ScreenVisualizer
+
+
+class SharedGeminiClientTest(SimpleTestCase):
+
+    def setUp(self):
+        gemini_client.close_gemini_clients()
+        self.addCleanup(gemini_client.close_gemini_clients)
+
+    def test_client_is_shared_per_api_key(self):
+        client = get_gemini_client('key-a')
+        self.assertIs(get_gemini_client('key-a'), client)
+        self.assertIsNot(get_gemini_client('key-b'), client)
+
+    def test_visualizer_and_audit_share_client(self):
+        visualizer = ScreenVisualizer(api_key='key-a')
+        audit = AuditService(api_key='key-a')
+        self.assertIs(visualizer.client, audit.client)
+
+    def test_client_rebuilt_after_fork(self):
+        client = get_gemini_client('key-a')
+        with mock.patch.object(gemini_client.os, 'getpid', return_value=os.getpid() + 1):
+            self.assertIsNot(get_gemini_client('key-a'), client)
+
+    def test_pool_limits_from_environment(self):
+        with mock.patch.dict(os.environ, {'GEMINI_HTTP_MAX_CONNECTIONS': '7'}):
+            options = gemini_client.build_http_options()
+        self.assertEqual(options.client_args['limits'].max_connections, 7)
+        self.assertEqual(options.async_client_args['limits'].max_connections, 7)
+
+    def test_missing_api_key(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(GeminiClientError):
+                get_gemini_client()
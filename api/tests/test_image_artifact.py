@@ -0,0 +1,103 @@
+"""Tests for encoded image artifacts on the result path."""
+import io
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from google.genai import types
+from PIL import Image
+
+from api.ai_enhanced_processor import AIEnhancedImageProcessor
+from api.ai_services.utils.image_artifact import ImageArtifact, as_artifact, as_content
+from api.ai_services.utils.image_utils import get_image_hash
+from api.tests.helpers import TempMediaMixin, create_visualization_request
+
+
+def _encoded(format, size=(40, 20), color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class ImageArtifactTest(SimpleTestCase):
+
+    def test_dimensions_come_from_the_header(self):
+        artifact = ImageArtifact(_encoded('PNG'))
+
+        with mock.patch.object(Image.Image, 'load') as load:
+            self.assertEqual(artifact.size, (40, 20))
+            self.assertEqual(artifact.format, 'PNG')
+            self.assertEqual(artifact.mime_type, 'image/png')
+        load.assert_not_called()
+
+    def test_pixels_are_decoded_once(self):
+        artifact = ImageArtifact(_encoded('PNG'))
+
+        self.assertIs(artifact.image, artifact.image)
+        self.assertEqual(artifact.image.getpixel((0, 0)), (255, 0, 0))
+
+    def test_matching_format_is_not_reencoded(self):
+        data = _encoded('JPEG')
+        artifact = ImageArtifact(data)
+
+        self.assertIs(artifact.encoded('JPEG'), data)
+        with Image.open(io.BytesIO(artifact.encoded('PNG'))) as image:
+            self.assertEqual(image.format, 'PNG')
+
+    def test_model_input_is_sent_as_bytes(self):
+        data = _encoded('PNG')
+        part = as_content(ImageArtifact(data))
+
+        self.assertIsInstance(part, types.Part)
+        self.assertEqual(part.inline_data.data, data)
+        self.assertEqual(part.inline_data.mime_type, 'image/png')
+
+        image = Image.new('RGB', (4, 4))
+        self.assertIs(as_content(image), image)
+
+    def test_helpers_accept_bytes_images_and_artifacts(self):
+        artifact = ImageArtifact(_encoded('JPEG'))
+
+        self.assertIs(as_artifact(artifact), artifact)
+        self.assertEqual(as_artifact(_encoded('PNG')).format, 'PNG')
+        encoded = as_artifact(Image.new('RGB', (4, 4)))
+        self.assertEqual((encoded.format, encoded.size), ('JPEG', (4, 4)))
+        self.assertEqual(get_image_hash(artifact), f"artifact:{artifact.digest}")
+
+
+class SaveGeneratedImageTest(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.viz = create_visualization_request('artifact')
+        self.processor = AIEnhancedImageProcessor.__new__(AIEnhancedImageProcessor)
+        self.processor.quality = 85
+        patcher = mock.patch('api.ai_enhanced_processor.schedule_derivatives')
+        self.schedule_derivatives = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_jpeg_bytes_are_stored_verbatim_without_reopening(self):
+        data = _encoded('JPEG')
+        artifact = ImageArtifact(data, size=(40, 20))
+        artifact.format  # as parsed when Gemini's response was read
+
+        with mock.patch('api.models.Image.open') as reopen:
+            saved = self.processor._save_generated_image(
+                artifact, 'standard', self.viz, metadata={'quality_score': 0.9}
+            )
+        reopen.assert_not_called()
+
+        result = saved[0]
+        self.assertTrue(result.generated_image.name.endswith('.jpg'))
+        self.assertEqual((result.image_width, result.image_height), (40, 20))
+        self.assertEqual(result.file_size, len(data))
+        with result.generated_image.open('rb') as f:
+            self.assertEqual(f.read(), data)
+        self.schedule_derivatives.assert_called_once_with(result.generated_image.name)
+
+    def test_other_formats_are_encoded_as_jpeg(self):
+        saved = self.processor._save_generated_image(ImageArtifact(_encoded('PNG')), 'standard', self.viz)
+
+        result = saved[0]
+        self.assertTrue(result.generated_image.name.endswith('.jpg'))
+        with result.generated_image.open('rb') as f:
+            self.assertEqual(Image.open(f).format, 'JPEG')
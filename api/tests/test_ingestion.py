@@ -0,0 +1,91 @@
+"""Tests for the upload ingestion stage."""
+import io
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from PIL import Image
+
+from api.services.ingestion_service import load_working_image, normalize_image
+from api.tests.helpers import TempMediaMixin, create_visualization_request
+
+
+def _encode(image, format='JPEG', **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **kwargs)
+    buffer.seek(0)
+    return buffer
+
+
+class NormalizeImageTest(SimpleTestCase):
+
+    def test_large_jpeg_is_decoded_at_reduced_scale(self):
+        source = _encode(Image.new('RGB', (4000, 3000), 'green'))
+
+        with mock.patch('api.services.ingestion_service.optimize_image_for_api',
+                        side_effect=lambda image, max_dimension: (image, False)) as optimize:
+            normalize_image(source, 1024, 90)
+
+        # draft() scaled by 1/2 during decode; 1/4 would drop below 1024
+        self.assertEqual(optimize.call_args.args[0].size, (2000, 1500))
+
+    def test_output_is_resized_to_working_size(self):
+        data, size = normalize_image(_encode(Image.new('RGB', (4000, 3000), 'green')), 1024, 90)
+
+        self.assertEqual(size, (1024, 768))
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (1024, 768))
+
+    def test_exif_orientation_is_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise to display
+        source = _encode(Image.new('RGB', (400, 200), 'green'), exif=exif)
+
+        data, size = normalize_image(source, 1024, 90)
+
+        self.assertEqual(size, (200, 400))
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertNotIn(0x0112, image.getexif())
+
+    def test_transparency_is_flattened_to_rgb(self):
+        source = _encode(Image.new('RGBA', (3000, 1000), (0, 0, 0, 0)), format='PNG')
+
+        data, size = normalize_image(source, 1024, 90)
+
+        self.assertEqual(size, (1024, 341))
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.mode, 'RGB')
+            self.assertEqual(image.getpixel((10, 10)), (255, 255, 255))
+
+    def test_small_upload_keeps_its_size(self):
+        data, size = normalize_image(_encode(Image.new('L', (300, 200)), format='PNG'), 1024, 90)
+
+        self.assertEqual(size, (300, 200))
+
+
+class WorkingImageTest(TempMediaMixin, TestCase):
+    media_settings = {'INGESTION_MAX_DIMENSION': 256}
+
+    def setUp(self):
+        super().setUp()
+        upload = _encode(Image.new('RGB', (1200, 900), 'green')).getvalue()
+        self.viz = create_visualization_request(
+            'ingest', original_image=SimpleUploadedFile('yard.jpg', upload, content_type='image/jpeg')
+        )
+
+    def test_working_copy_is_stored_once_and_reused(self):
+        image = load_working_image(self.viz)
+
+        self.assertEqual(image.size, (256, 192))
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.image.mode, 'RGB')
+        self.viz.refresh_from_db()
+        name = self.viz.working_image.name
+        self.assertTrue(name.startswith('working/'))
+
+        with mock.patch('api.services.ingestion_service.normalize_image') as normalize:
+            again = load_working_image(self.viz)
+        normalize.assert_not_called()
+        self.assertEqual(again.size, (256, 192))
+        self.assertEqual(self.viz.working_image.name, name)
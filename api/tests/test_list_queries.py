@@ -0,0 +1,104 @@
+"""Query and I/O budget for the visualization list endpoint."""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.models import GeneratedImage, VisualizationRequest
+from api.services import derivative_service
+
+# Keyset page + latest-result prefetch (no COUNT)
+LIST_QUERY_BUDGET = 2
+
+
+class VisualizationListQueryTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='lister', password='x')
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Every derivative exists; storage and cache calls are counted
+        self.exists = self._patch('api.services.derivative_service.default_storage.exists', return_value=True)
+        self.cache = self._patch_object(derivative_service, 'cache', wraps=cache)
+        self._patch('api.tasks.build_image_derivatives.delay')
+
+    def _patch(self, target, **kwargs):
+        patcher = mock.patch(target, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _patch_object(self, target, attribute, **kwargs):
+        patcher = mock.patch.object(target, attribute, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _create(self, count, results_each=2):
+        for _ in range(count):
+            viz = VisualizationRequest.objects.create(
+                user=self.user,
+                original_image='originals/1/test.jpg',
+                tenant_id='pools',
+            )
+            for index in range(results_each):
+                GeneratedImage.objects.create(
+                    request=viz,
+                    generated_image=f'generated/1/{viz.pk}_{index}.jpg',
+                    file_size=1,
+                )
+
+    def _list(self, page_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/visualizations/?page_size={page_size}', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'], len(queries)
+
+    def _page_io(self, page_size):
+        """Storage checks and cache round trips of a page whose derivatives are known."""
+        self._list(page_size)
+        self.exists.reset_mock()
+        self.cache.reset_mock()
+        rows, _ = self._list(page_size)
+        self.assertTrue(rows[0]['original_image_derivatives'])
+        return self.exists.call_count, len(self.cache.method_calls)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self._create(3)
+        _, small = self._list(3)
+
+        self._create(30)
+        rows, large = self._list(33)
+
+        self.assertEqual(len(rows), 33)
+        self.assertLessEqual(small, LIST_QUERY_BUDGET)
+        self.assertLessEqual(large, LIST_QUERY_BUDGET)
+
+    def test_derivative_io_does_not_grow_with_page_size(self):
+        self._create(3)
+        small = self._page_io(3)
+
+        self._create(30)
+        large = self._page_io(33)
+
+        self.assertEqual(small, (0, 1))
+        self.assertEqual(large, small)
+
+    def test_rows_report_count_and_latest_result(self):
+        self._create(2, results_each=3)
+
+        rows, _ = self._list(10)
+
+        for row in rows:
+            self.assertEqual(row['result_count'], 3)
+            self.assertTrue(row['latest_result_url'].endswith(f"/{row['id']}_2.jpg"))
+
+    def test_request_without_results(self):
+        self._create(1, results_each=0)
+
+        rows, _ = self._list(10)
+
+        self.assertEqual(rows[0]['result_count'], 0)
+        self.assertIsNone(rows[0]['latest_result_url'])
+        self.assertEqual(rows[0]['latest_result_derivatives'], {})
@@ -0,0 +1,99 @@
+"""Tests for the shared metrics registry and the /metrics endpoint."""
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.monitoring import metrics as metrics_module
+from api.monitoring.metrics import MetricsError, get_metrics_registry, reset_metrics_registry
+from api.monitoring.production_monitor import ProductionMonitor
+
+
+class MetricsRegistryTest(SimpleTestCase):
+
+    def setUp(self):
+        reset_metrics_registry()
+        self.addCleanup(reset_metrics_registry)
+        self.metrics = get_metrics_registry()
+        # Queue depth reads the database
+        self.metrics._collectors.clear()
+
+    def test_render_prometheus_text(self):
+        self.metrics.inc('gemini_tokens_total', 300, model='m', kind='prompt')
+        for seconds in (0.5, 3, 200):
+            self.metrics.observe('gemini_step_duration_seconds', seconds, step='cleanup')
+
+        text = self.metrics.render()
+
+        self.assertIn('# TYPE visualizer_gemini_step_duration_seconds histogram', text)
+        self.assertIn('visualizer_gemini_tokens_total{kind="prompt",model="m"} 300', text)
+        self.assertIn('visualizer_gemini_step_duration_seconds_bucket{step="cleanup",le="1"} 1', text)
+        self.assertIn('visualizer_gemini_step_duration_seconds_bucket{step="cleanup",le="5"} 2', text)
+        self.assertIn('visualizer_gemini_step_duration_seconds_bucket{step="cleanup",le="+Inf"} 3', text)
+        self.assertIn('visualizer_gemini_step_duration_seconds_sum{step="cleanup"} 203.5', text)
+        self.assertIn('visualizer_gemini_step_duration_seconds_count{step="cleanup"} 3', text)
+
+    def test_window_only_counts_recent_samples(self):
+        with mock.patch.object(metrics_module.time, 'time', return_value=1_000_000):
+            self.metrics.inc('gemini_retries_total')
+        with mock.patch.object(metrics_module.time, 'time', return_value=1_000_000 + 7200):
+            self.metrics.inc('gemini_retries_total', 2)
+            recent = self.metrics.snapshot(window_seconds=3600)
+
+        self.assertEqual(self.metrics.total(recent, 'gemini_retries_total'), 2)
+        self.assertEqual(self.metrics.total(self.metrics.snapshot(), 'gemini_retries_total'), 3)
+
+    def test_undeclared_labels_raise(self):
+        with self.assertRaises(MetricsError):
+            self.metrics.inc('gemini_retries_total', step='cleanup')
+        with self.assertRaises(MetricsError):
+            self.metrics.observe('gemini_retries_total', 1.0)
+
+    def test_health_and_dashboard_read_registry(self):
+        monitor = ProductionMonitor()
+        self.assertEqual(monitor.get_system_health()['status'], 'unknown')
+
+        for score in (0.9, 0.85, 0.75, 0.5):
+            monitor.record_request_metrics({'tenant_id': 'pools', 'success': True, 'processing_time': 30, 'quality_score': score})
+        monitor.record_request_metrics({'tenant_id': 'pools', 'success': False, 'processing_time': 10})
+        self.metrics.inc('cache_lookups_total', cache='step', result='hit')
+
+        health = monitor.get_system_health()
+        self.assertEqual(health['status'], 'degraded')
+        self.assertEqual(health['metrics']['total_requests'], 5)
+        self.assertEqual(health['metrics']['error_rate'], 0.2)
+        self.assertEqual(health['metrics']['avg_response_time'], 26)
+        self.assertEqual(health['metrics']['cache_hit_rate'], 1.0)
+
+        dashboard = monitor.get_quality_metrics_dashboard()
+        self.assertEqual(dashboard['successful_requests'], 4)
+        # Band lower bounds are inclusive
+        self.assertEqual(dashboard['quality_distribution'], {'excellent': 2, 'good': 1, 'fair': 0, 'poor': 1})
+
+
+class MetricsEndpointTest(TestCase):
+
+    def setUp(self):
+        reset_metrics_registry()
+        self.addCleanup(reset_metrics_registry)
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint(self):
+        self.client.get('/api/this-route-does-not-exist/')
+
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('visualizer_visualization_queue_depth{status="pending"} 0', text)
+        self.assertIn('visualizer_http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1', text)
+
+    @override_settings(METRICS_AUTH_TOKEN='')
+    def test_refused_without_token_in_production(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_AUTH_TOKEN='secret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,97 @@
+"""Tests for keyset pagination on list endpoints."""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import GeneratedImage, Lead, VisualizationRequest
+
+
+@override_settings(IMAGE_DERIVATIVES_ENABLED=False)
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='x')
+        self.requests = []
+        now = timezone.now()
+        for index in range(7):
+            viz = VisualizationRequest.objects.create(
+                user=self.user,
+                original_image='originals/1/test.jpg',
+                tenant_id='pools',
+            )
+            # Pairs of rows share a timestamp; the id breaks the tie
+            VisualizationRequest.objects.filter(pk=viz.pk).update(
+                created_at=now - timedelta(minutes=index // 2)
+            )
+            self.requests.append(viz)
+        self.expected = sorted(
+            VisualizationRequest.objects.values_list('created_at', 'id'), reverse=True
+        )
+
+    def _ids(self, response):
+        return [row['id'] for row in response.json()['results']]
+
+    def test_pages_walk_every_row_once_in_key_order(self):
+        seen = []
+        url = '/api/visualizations/?page_size=3'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, secure=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.json())
+            self.assertFalse(any('__count' in query['sql'] for query in queries))
+            seen.extend(self._ids(response))
+            url = response.json()['next']
+
+        self.assertEqual(seen, [row_id for _, row_id in self.expected])
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get('/api/visualizations/?page_size=3', secure=True).json()
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next'], secure=True).json()
+        back = self.client.get(second['previous'], secure=True).json()
+
+        self.assertEqual(
+            [row['id'] for row in back['results']],
+            [row['id'] for row in first['results']],
+        )
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/visualizations/?cursor=not-a-cursor', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_behind_flag(self):
+        response = self.client.get('/api/visualizations/?pagination=page&page_size=3', secure=True)
+        body = response.json()
+        self.assertEqual(body['count'], 7)
+        self.assertIn('page=2', body['next'])
+
+        legacy = self.client.get('/api/visualizations/?page=3&page_size=3', secure=True).json()
+        self.assertEqual(legacy['count'], 7)
+        self.assertEqual(len(legacy['results']), 1)
+
+    def test_generated_images_and_leads_use_keyset(self):
+        self.client.force_login(self.user)
+        viz = self.requests[0]
+        for index in range(3):
+            GeneratedImage.objects.create(
+                request=viz, generated_image=f'generated/1/{index}.jpg', file_size=1
+            )
+            Lead.objects.create(
+                visualization=viz, name='Lead', email=f'lead{index}@example.com',
+                phone='5555555555', address_street='1 Main St', address_city='Austin',
+                address_state='TX', address_zip='78701',
+            )
+
+        images = self.client.get('/api/generated-images/?page_size=2', secure=True).json()
+        leads = self.client.get('/api/leads/?page_size=2', secure=True).json()
+
+        for body in (images, leads):
+            self.assertNotIn('count', body)
+            self.assertEqual(len(body['results']), 2)
+            self.assertIsNotNone(body['next'])
@@ -0,0 +1,106 @@
+"""Tests for the pipeline step scheduler."""
+import io
+import threading
+from contextlib import redirect_stdout
+from unittest import mock
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from api.services import pipeline_registry
+from api.services.pipeline_registry import PipelineScheduleError, PipelineScheduler
+
+
+class PipelineSchedulerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.image = Image.new('RGB', (4, 4), 'white')
+
+    def test_undeclared_steps_run_in_sequence(self):
+        scheduler = PipelineScheduler([
+            ('a', {'type': 'cleanup'}),
+            ('b', {'type': 'insertion'}),
+            ('c', {'type': 'quality_check'}),
+        ])
+        self.assertEqual(scheduler.waves(), [['a'], ['b'], ['c']])
+
+    def test_independent_steps_run_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(step_name, step_config, context):
+            # Deadlocks (and times out) unless both steps run at once
+            barrier.wait()
+            return {'seen': step_name}
+
+        steps = [
+            ('left', {'type': 'meet', 'depends_on': []}),
+            ('right', {'type': 'meet', 'depends_on': []}),
+            ('join', {'type': 'meet_join', 'depends_on': ['left', 'right']}),
+        ]
+        handlers = {'meet': meet, 'meet_join': lambda name, config, context: {'results': sorted(context['results'])}}
+        with mock.patch.dict(pipeline_registry.STEP_HANDLERS, handlers):
+            scheduler = PipelineScheduler(steps)
+            run = scheduler.run({'original_image': self.image})
+
+        self.assertEqual(scheduler.waves(), [['left', 'right'], ['join']])
+        self.assertEqual(run.outputs['join']['results'], ['left', 'right'])
+        self.assertEqual(set(run.timings), {'left', 'right', 'join'})
+        # Steps without an image pass their input through
+        self.assertIs(run.outputs['join']['image'], self.image)
+
+    def test_completed_steps_are_not_rerun(self):
+        handler = mock.Mock(return_value={})
+        with mock.patch.dict(pipeline_registry.STEP_HANDLERS, {'noop': handler}):
+            PipelineScheduler([
+                ('a', {'type': 'noop'}),
+                ('b', {'type': 'noop'}),
+            ]).run({'original_image': self.image}, completed={'a': {'image': self.image}})
+
+        self.assertEqual([c.args[0] for c in handler.call_args_list], ['b'])
+
+    def test_invalid_dependencies(self):
+        with self.assertRaises(PipelineScheduleError):
+            PipelineScheduler([('a', {'type': 'cleanup', 'depends_on': ['missing']})])
+        with self.assertRaises(PipelineScheduleError):
+            PipelineScheduler([
+                ('a', {'type': 'cleanup', 'depends_on': ['b']}),
+                ('b', {'type': 'insertion'}),
+            ])
+
+    def test_dry_run_prints_schedule(self):
+        handler = mock.Mock()
+        output = io.StringIO()
+        with mock.patch.dict(pipeline_registry.STEP_HANDLERS, {'cleanup': handler}), redirect_stdout(output):
+            run = PipelineScheduler([('cleanup', {'type': 'cleanup'})]).run({}, dry_run=True)
+
+        handler.assert_not_called()
+        self.assertIn('stage 1', output.getvalue())
+        self.assertEqual(run.schedule, [['cleanup']])
+
+    def test_reference_lookup_feeds_reference_insertion(self):
+        reference = Image.new('RGB', (4, 4), 'black')
+        visualizer = mock.Mock()
+        visualizer._call_gemini_edit_with_reference.return_value = self.image
+        prompts = mock.Mock()
+        prompts.get_reference_insertion_prompt.return_value = 'use the reference'
+
+        steps = [
+            ('lookup', {'type': 'reference_lookup', 'reference_category': 'color', 'depends_on': []}),
+            ('cleanup', {'type': 'cleanup', 'depends_on': []}),
+            ('insert', {'type': 'reference_insertion', 'reference_category': 'color',
+                        'depends_on': ['lookup', 'cleanup']}),
+        ]
+        visualizer._call_gemini_edit.return_value = self.image
+        with mock.patch.object(pipeline_registry, 'get_reference_image', return_value=reference) as lookup:
+            scheduler = PipelineScheduler(steps)
+            scheduler.run({
+                'visualizer': visualizer,
+                'prompts': prompts,
+                'options': {'color': 'black'},
+                'original_image': self.image,
+            })
+
+        self.assertEqual(scheduler.waves()[0], ['lookup', 'cleanup'])
+        lookup.assert_called_once()
+        args = visualizer._call_gemini_edit_with_reference.call_args.args
+        self.assertIs(args[1], reference)
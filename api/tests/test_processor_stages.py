@@ -0,0 +1,76 @@
+"""Tests for concurrent stages in AIEnhancedImageProcessor."""
+import io
+import threading
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image
+
+from api.ai_enhanced_processor import AIEnhancedImageProcessor
+from api.ai_services.interfaces import AIServiceResult, ProcessingStatus
+from api.ai_services.utils.image_artifact import ImageArtifact
+from api.models import VisualizationRequest
+from api.tests.helpers import TempMediaMixin, create_visualization_request
+
+
+def _jpeg_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (16, 16), 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class ProcessorStagesTest(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.viz = create_visualization_request(
+            'stages',
+            original_image=SimpleUploadedFile('yard.jpg', _jpeg_bytes(), content_type='image/jpeg'),
+            scope={'deck_material': 'pavers'},
+        )
+        self.audit_started = threading.Event()
+        self.order = []
+
+    def _generate(self, *args, **kwargs):
+        # The audit must already be running while the pipeline is in flight
+        self.assertTrue(self.audit_started.wait(timeout=5))
+        self.order.append('pipeline')
+        return AIServiceResult(
+            success=True,
+            status=ProcessingStatus.COMPLETED,
+            metadata={'generated_image': ImageArtifact(_jpeg_bytes()), 'clean_image': ImageArtifact(_jpeg_bytes())},
+        )
+
+    def _analyze(self, image_path):
+        self.audit_started.set()
+        self.order.append('audit')
+        return {'site_items': ['tree'], 'assessment_summary': 'ok'}
+
+    def _pdf(self, visualization_request):
+        self.order.append('pdf')
+        # Every upstream stage has stored its output by now
+        self.assertTrue(VisualizationRequest.objects.get(pk=visualization_request.pk).price_data)
+        self.assertTrue(hasattr(visualization_request, 'audit_report'))
+        return io.BytesIO(b'%PDF-1.4')
+
+    @mock.patch.dict('os.environ', {'GOOGLE_API_KEY': 'test-key'})
+    def test_audit_runs_alongside_pipeline_and_pdf_waits(self):
+        service = mock.Mock()
+        service.generate_screen_visualization.side_effect = self._generate
+
+        with mock.patch('api.ai_enhanced_processor.AIServiceFactory.create_image_generation_service',
+                        return_value=service), \
+                mock.patch('api.audit.services.AuditService.analyze_image',
+                           autospec=True, side_effect=lambda _self, path: self._analyze(path)), \
+                mock.patch('api.utils.pdf_generator.generate_visualization_pdf', side_effect=self._pdf):
+            images = AIEnhancedImageProcessor().process_image(self.viz)
+
+        self.assertEqual(len(images), 1)
+        self.assertEqual(self.order[-1], 'pdf')
+        self.assertEqual(sorted(self.order[:2]), ['audit', 'pipeline'])
+
+        self.viz.refresh_from_db()
+        self.assertEqual(self.viz.status, 'complete')
+        self.assertEqual(self.viz.audit_report.site_items, ['tree'])
+        self.assertIsNotNone(self.viz.price_data)
@@ -0,0 +1,128 @@
+"""Tests for the progress push channel and coalesced progress writes."""
+import json
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from api.models import VisualizationRequest
+from api.services.progress_stream import (
+    LocalProgressBroker,
+    build_event,
+    get_progress_broker,
+    reset_progress_broker,
+    stream_events,
+)
+
+
+def _frames(body):
+    """Parse SSE frames into event payloads (keep-alives dropped)."""
+    events = []
+    for frame in body.split("\n\n"):
+        for line in frame.splitlines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+@override_settings(PROGRESS_STREAM_BACKEND='local', PROGRESS_DB_CHECKPOINTS=(25, 50, 75, 90))
+class ProgressStreamTest(TestCase):
+
+    def setUp(self):
+        reset_progress_broker()
+        self.addCleanup(reset_progress_broker)
+        self.user = User.objects.create_user(username='progress', password='x')
+        self.viz = VisualizationRequest.objects.create(
+            user=self.user,
+            original_image='originals/1/test.jpg',
+            tenant_id='pools',
+        )
+
+    def test_progress_writes_are_coalesced_to_checkpoints(self):
+        self.viz.mark_as_processing()
+        with mock.patch.object(VisualizationRequest, 'save', autospec=True,
+                               side_effect=VisualizationRequest.save) as save:
+            for percent in (5, 10, 15, 20, 30, 35, 40):
+                self.viz.update_progress(percent, f"Step {percent}")
+
+        # Only crossing 25 reached the database
+        self.assertEqual(save.call_count, 1)
+        self.viz.refresh_from_db()
+        self.assertEqual(self.viz.progress_percentage, 30)
+
+        latest = get_progress_broker().latest(self.viz.id)
+        self.assertEqual(latest['progress'], 40)
+        self.assertEqual(latest['message'], 'Step 40')
+
+    @override_settings(PROGRESS_STREAM_HEARTBEAT=0.05, PROGRESS_STREAM_MAX_SECONDS=5)
+    def test_stream_sends_snapshot_then_updates_until_complete(self):
+        broker = get_progress_broker()
+        snapshot = build_event(self.viz.id, 'processing', 0, '')
+        stream = stream_events(self.viz.id, snapshot)
+        # The generator is started (snapshot sent) before anything is published
+        frames = [next(stream)]
+
+        collected = []
+        listener = threading.Thread(target=lambda: collected.extend(stream), daemon=True)
+        listener.start()
+        broker.publish(self.viz.id, build_event(self.viz.id, 'processing', 60, 'Installing deck'))
+        broker.publish(self.viz.id, build_event(self.viz.id, 'complete', 100, 'Done'))
+        listener.join(timeout=5)
+
+        self.assertFalse(listener.is_alive())
+        events = _frames(''.join(frames + collected))
+        self.assertEqual(events[0]['status'], 'processing')
+        self.assertEqual(events[-1]['status'], 'complete')
+        self.assertEqual(events[-1]['progress'], 100)
+
+    def test_stream_catches_up_on_events_published_before_listening(self):
+        """Events published between the snapshot and subscribing are not lost."""
+        broker = get_progress_broker()
+        stream = stream_events(self.viz.id, build_event(self.viz.id, 'processing', 0, ''))
+        next(stream)
+        broker.publish(self.viz.id, build_event(self.viz.id, 'complete', 100, 'Done'))
+
+        events = _frames(''.join(stream))
+        self.assertEqual(events[-1]['status'], 'complete')
+
+    def test_events_endpoint_for_finished_request_closes_immediately(self):
+        self.viz.mark_as_complete()
+
+        response = self.client.get(
+            f'/api/visualizations/{self.viz.id}/events/',
+            HTTP_ACCEPT='text/event-stream',
+            secure=True
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        events = _frames(body)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['status'], 'complete')
+        self.assertIn('retry: 3000', body)
+
+    def test_local_broker_heartbeat_when_idle(self):
+        broker = LocalProgressBroker()
+        self.assertIsNone(next(broker.listen(1, heartbeat=0.01)))
+
+    def test_local_broker_drops_finished_requests(self):
+        broker = LocalProgressBroker()
+        broker.publish(1, build_event(1, 'complete', 100))
+        broker.publish(2, build_event(2, 'processing', 40))
+        self.assertIsNotNone(broker.latest(1))
+
+        with mock.patch('api.services.progress_stream.time.monotonic', return_value=time.monotonic() + 61):
+            broker.publish(3, build_event(3, 'processing', 10))
+        self.assertIsNone(broker.latest(1))
+        self.assertIsNotNone(broker.latest(2))
+
+    def test_local_broker_keeps_at_most_max_requests(self):
+        broker = LocalProgressBroker()
+        broker.MAX_REQUESTS = 2
+        for request_id in (1, 2, 3):
+            broker.publish(request_id, build_event(request_id, 'processing', 10))
+        self.assertIsNone(broker.latest(1))
+        self.assertEqual(broker.latest(3)['progress'], 10)
@@ -0,0 +1,78 @@
+"""Tests for memoized prompt rendering."""
+import hashlib
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from api.models import PromptOverride
+from api.tenants import clear_cache, get_tenant_config
+from api.tenants.pools import prompts as pools_prompts
+from api.tenants.prompt_utils import PromptCache, RenderedPrompt, get_prompt_cache, options_by_id
+
+
+class PromptCacheTest(SimpleTestCase):
+
+    def test_options_by_id(self):
+        index = options_by_id([{'id': 'a', 'n': 1}, {'id': 'b', 'n': 2}, {'id': 'a', 'n': 3}])
+
+        self.assertEqual(index['a']['n'], 1)
+        self.assertEqual(index.get('missing', 'default'), 'default')
+        # Client JSON can send a list where an id is expected
+        self.assertEqual(index.get(['a'], 'default'), 'default')
+
+    def test_malformed_scope_value_falls_back_to_default_option(self):
+        prompt = pools_prompts.get_prompt('deck', {'deck_material': ['x'], 'deck_color': {'id': 'cream'}})
+
+        self.assertIn('travertine', prompt.lower())
+
+    def test_equal_selections_render_once(self):
+        render = mock.Mock(return_value='Add a deck.')
+        memoized = PromptCache(8).memoize(render, ('pools', 1, 'get_prompt'))
+
+        first = memoized('deck', {'deck_material': 'pavers', 'deck_color': 'cream'})
+        second = memoized('deck', {'deck_color': 'cream', 'deck_material': 'pavers'})
+
+        render.assert_called_once()
+        self.assertIs(first, second)
+        self.assertIsInstance(first, RenderedPrompt)
+        self.assertEqual(first.digest, hashlib.sha256(b'Add a deck.').hexdigest())
+
+    def test_skipped_steps_are_cached_too(self):
+        render = mock.Mock(return_value=None)
+        memoized = PromptCache(8).memoize(render, ('roofs', 0, 'get_prompt'))
+
+        self.assertIsNone(memoized('solar_panels', {}))
+        self.assertIsNone(memoized('solar_panels', {}))
+        render.assert_called_once()
+
+    def test_least_recently_used_entry_is_evicted(self):
+        rendered = []
+        render = PromptCache(2).memoize(lambda step: rendered.append(step) or step.upper(), ('t', 0, 'f'))
+
+        for step in ('a', 'b', 'a', 'c', 'a', 'b'):
+            render(step)
+
+        # 'b' was least recently used when 'c' arrived
+        self.assertEqual(rendered, ['a', 'b', 'c', 'b'])
+
+
+class TenantPromptMemoizationTest(TestCase):
+
+    def setUp(self):
+        clear_cache()
+        get_prompt_cache().clear()
+        self.addCleanup(clear_cache)
+
+    def test_tenant_prompts_are_memoized_per_config_version(self):
+        selections = {'deck_material': 'pavers'}
+        prompts = get_tenant_config('pools').get_prompts_module()
+
+        with mock.patch.object(pools_prompts, 'get_deck_prompt', wraps=pools_prompts.get_deck_prompt) as deck:
+            self.assertEqual(prompts.get_prompt('deck', selections), prompts.get_prompt('deck', dict(selections)))
+            deck.assert_called_once()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PromptOverride.objects.create(tenant_id='pools', step_name='deck', prompt_text='Deck: {deck_material}')
+
+        prompts = get_tenant_config('pools').get_prompts_module()
+        self.assertEqual(prompts.get_prompt('deck', selections), 'Deck: pavers')
@@ -0,0 +1,67 @@
+"""EXPLAIN checks that the hot VisualizationRequest queries use their indexes."""
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import VisualizationRequest
+
+
+def _index_name(fields):
+    for index in VisualizationRequest._meta.indexes:
+        if list(index.fields) == fields:
+            return index.name
+    raise AssertionError(f"No index on {fields}")
+
+
+class QueryPlanTest(TestCase):
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # A near-empty test table is cheaper to scan than to index
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_user_history(self):
+        self.assertUsesIndex(
+            VisualizationRequest.objects.filter(user_id=1).order_by('-created_at'),
+            _index_name(['user', '-created_at']),
+        )
+
+    def test_tenant_status_listing(self):
+        self.assertUsesIndex(
+            VisualizationRequest.objects.filter(tenant_id='pools', status='complete').order_by('-created_at'),
+            'viz_tenant_status_created_idx',
+        )
+
+    def test_contractor_history(self):
+        self.assertUsesIndex(
+            VisualizationRequest.objects.filter(contractor_id=7).order_by('-created_at'),
+            'viz_contractor_created_idx',
+        )
+
+    # SQLite only uses a partial index when the query repeats its condition
+    # as literals, and Django binds every value as a parameter.
+    @skipUnless(connection.vendor == 'postgresql', 'partial index planning is PostgreSQL-specific')
+    def test_job_scanner_uses_partial_index(self):
+        cutoff = timezone.now()
+        self.assertUsesIndex(
+            VisualizationRequest.objects.pending().filter(updated_at__lt=cutoff).order_by(),
+            'viz_active_updated_idx',
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'GIN index exists on PostgreSQL only')
+    def test_scope_analytics_use_gin_index(self):
+        self.assertUsesIndex(
+            VisualizationRequest.objects.filter(scope__contains={'hasPatio': True}),
+            'viz_scope_gin_idx',
+        )
+        self.assertUsesIndex(
+            VisualizationRequest.objects.filter(scope__has_key='doorType'),
+            'viz_scope_gin_idx',
+        )
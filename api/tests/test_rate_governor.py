@@ -0,0 +1,178 @@
+"""Tests for the shared Gemini rate governor."""
+import threading
+import time
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+from google.genai import errors as genai_errors
+
+from api.ai_services.rate_governor import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LocalTokenBucket,
+    RateGovernor,
+    RateLimitTimeout,
+    RetryableResponseError,
+    get_rate_governor,
+    is_retryable_error,
+    reset_rate_governor,
+)
+
+
+def api_error(code, status=''):
+    """A google-genai error as the SDK raises it for an HTTP status."""
+    error_cls = genai_errors.ServerError if code >= 500 else genai_errors.ClientError
+    return error_cls(code, {'error': {'code': code, 'status': status, 'message': 'test'}})
+
+
+def _governor(capacity=5, per_second=100.0, threshold=3, cooldown=60.0, max_retries=3):
+    governor = RateGovernor(
+        LocalTokenBucket(capacity, per_second),
+        CircuitBreaker(threshold, cooldown),
+        max_retries=max_retries,
+        backoff_base=0.001,
+        backoff_max=0.01,
+        acquire_timeout=1.0,
+    )
+    return governor
+
+
+class RateGovernorTest(SimpleTestCase):
+
+    def test_error_classification(self):
+        self.assertTrue(is_retryable_error(api_error(429, 'RESOURCE_EXHAUSTED')))
+        self.assertTrue(is_retryable_error(api_error(503)))
+        self.assertTrue(is_retryable_error(RetryableResponseError('empty')))
+        self.assertTrue(is_retryable_error(ConnectionError()))
+        self.assertTrue(is_retryable_error(httpx.ConnectError('refused')))
+        self.assertFalse(is_retryable_error(api_error(400)))
+        self.assertFalse(is_retryable_error(api_error(403)))
+        # Programming errors are bugs, not transient failures
+        self.assertFalse(is_retryable_error(KeyError('candidates')))
+        self.assertFalse(is_retryable_error(TypeError('bad argument')))
+
+    def test_programming_error_is_not_retried_or_counted(self):
+        governor = _governor(threshold=1)
+        fn = mock.Mock(side_effect=AttributeError('parts'))
+
+        with self.assertRaises(AttributeError):
+            governor.call(fn)
+        self.assertEqual(fn.call_count, 1)
+        self.assertEqual(governor.get_status()['breaker_state'], 'closed')
+
+    def test_refused_prompts_do_not_open_breaker(self):
+        """Client errors and empty responses say nothing about upstream health."""
+        governor = _governor(threshold=2, max_retries=2)
+
+        for _ in range(3):
+            with self.assertRaises(genai_errors.APIError):
+                governor.call(mock.Mock(side_effect=api_error(400)))
+            with self.assertRaises(RetryableResponseError):
+                governor.call(mock.Mock(side_effect=RetryableResponseError('blocked')))
+
+        self.assertEqual(governor.get_status()['breaker_state'], 'closed')
+
+    def test_retries_transient_errors_then_succeeds(self):
+        governor = _governor()
+        fn = mock.Mock(side_effect=[api_error(503), RetryableResponseError('empty'), 'ok'])
+
+        self.assertEqual(governor.call(fn, 'arg', description='test'), 'ok')
+        self.assertEqual(fn.call_count, 3)
+        fn.assert_called_with('arg')
+        self.assertEqual(governor.get_status()['retries'], 2)
+
+    def test_client_error_is_not_retried(self):
+        governor = _governor()
+        fn = mock.Mock(side_effect=api_error(400))
+
+        with self.assertRaises(genai_errors.APIError):
+            governor.call(fn)
+        self.assertEqual(fn.call_count, 1)
+
+    def test_rate_limit_drains_bucket(self):
+        governor = _governor(capacity=5, per_second=0.01)
+        fn = mock.Mock(side_effect=api_error(429, 'RESOURCE_EXHAUSTED'))
+
+        with self.assertRaises(RateLimitTimeout):
+            governor.call(fn)
+        self.assertEqual(fn.call_count, 1)
+        self.assertEqual(governor.get_status()['rate_limited'], 1)
+
+    def test_bucket_limits_call_rate(self):
+        governor = _governor(capacity=2, per_second=20.0)
+        start = time.monotonic()
+        for _ in range(4):
+            governor.acquire()
+        # Two burst tokens, then two refills at 20/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_breaker_opens_and_fails_fast(self):
+        governor = _governor(threshold=2, max_retries=2)
+        fn = mock.Mock(side_effect=api_error(500))
+
+        with self.assertRaises(genai_errors.APIError):
+            governor.call(fn)
+        self.assertEqual(governor.get_status()['breaker_state'], 'open')
+
+        with self.assertRaises(CircuitOpenError):
+            governor.call(fn)
+        self.assertEqual(fn.call_count, 2)
+
+    def test_breaker_half_open_closes_on_success(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, 'half_open')
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        breaker.allow()  # this caller is the probe
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+        # A failed probe re-opens the breaker and frees the probe slot
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        time.sleep(0.06)
+        breaker.allow()
+
+    def test_waiters_are_served_in_order(self):
+        governor = _governor(capacity=1, per_second=50.0)
+        governor.acquire()
+        order = []
+
+        def worker(index):
+            governor.acquire()
+            order.append(index)
+
+        threads = []
+        for index in range(4):
+            thread = threading.Thread(target=worker, args=(index,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.005)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3])
+        self.assertEqual(governor.get_status()['queue_depth'], 0)
+
+    @override_settings(GEMINI_RATE_BACKEND='local', GEMINI_RATE_BURST=7)
+    def test_shared_governor_reads_settings(self):
+        reset_rate_governor()
+        self.addCleanup(reset_rate_governor)
+
+        status = get_rate_governor().get_status()
+        self.assertIs(get_rate_governor(), get_rate_governor())
+        self.assertEqual(status['backend'], 'local')
+        self.assertEqual(status['capacity'], 7)
+        self.assertEqual(status['breaker_state'], 'closed')
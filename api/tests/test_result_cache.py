@@ -0,0 +1,143 @@
+"""Tests for the Gemini step result cache."""
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api.ai_services.utils import get_image_hash, get_step_cache, performance_tracker
+from api.visualizer.services import ScreenVisualizer
+
+
+def _png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class StepResultCacheTest(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        self.settings_override = override_settings(
+            GEMINI_STEP_CACHE_DIR=self.cache_dir,
+            GEMINI_STEP_CACHE_MAX_BYTES=10 * 1024 * 1024,
+            GEMINI_STEP_CACHE_ENABLED=True,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        performance_tracker.clear_performance_metrics()
+
+    def test_key_depends_on_image_prompt_and_config(self):
+        cache = get_step_cache()
+        red = Image.new('RGB', (8, 8), 'red')
+        blue = Image.new('RGB', (8, 8), 'blue')
+
+        key = cache.make_key([red], 'prompt', 'model', {'guidance_scale': 70})
+        self.assertEqual(key, cache.make_key([red.copy()], 'prompt', 'model', {'guidance_scale': 70}))
+        self.assertNotEqual(key, cache.make_key([blue], 'prompt', 'model', {'guidance_scale': 70}))
+        self.assertNotEqual(key, cache.make_key([red], 'other', 'model', {'guidance_scale': 70}))
+        self.assertNotEqual(key, cache.make_key([red], 'prompt', 'model', {'guidance_scale': 50}))
+
+    def test_image_hash_ignores_encoding(self):
+        """Same pixels loaded from a file hash the same as in memory."""
+        image = Image.new('RGB', (8, 8), 'green')
+        loaded = Image.open(io.BytesIO(_png_bytes('green')))
+        self.assertEqual(get_image_hash(image), get_image_hash(loaded))
+
+    def test_get_set_reports_hits_and_misses(self):
+        cache = get_step_cache()
+        self.assertIsNone(cache.get('ab' * 32))
+        cache.set('ab' * 32, b'data')
+        self.assertEqual(cache.get('ab' * 32), b'data')
+
+        stats = performance_tracker.get_performance_metrics()
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertEqual(stats['cache_misses'], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = get_step_cache()
+        cache.max_bytes = 12
+        cache.set('aa' * 32, b'12345')
+        cache.set('bb' * 32, b'12345')
+        # Make 'aa' the oldest entry
+        old_path = cache._path('aa' * 32)
+        os.utime(old_path, (0, 0))
+
+        cache.set('cc' * 32, b'12345')
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(cache.get('bb' * 32), b'12345')
+        self.assertEqual(cache.get('cc' * 32), b'12345')
+
+    def test_writes_under_the_limit_do_not_scan_the_directory(self):
+        cache = get_step_cache()
+        cache.set('aa' * 32, b'12345')
+
+        with mock.patch('api.ai_services.utils.result_cache.os.walk') as walk:
+            for index in range(10):
+                cache.set(f'{index:02d}' * 32, b'12345')
+        walk.assert_not_called()
+
+    def test_failed_write_leaves_no_temp_file(self):
+        cache = get_step_cache()
+        with mock.patch('api.ai_services.utils.result_cache.os.replace', side_effect=OSError('disk full')):
+            cache.set('ee' * 32, b'data')
+
+        self.assertEqual(os.listdir(os.path.dirname(cache._path('ee' * 32))), [])
+
+    def test_disabled_cache_is_a_no_op(self):
+        with override_settings(GEMINI_STEP_CACHE_ENABLED=False):
+            cache = get_step_cache()
+            cache.set('dd' * 32, b'data')
+            self.assertIsNone(cache.get('dd' * 32))
+
+    def test_unhashable_image_is_not_cached(self):
+        """An image that cannot be hashed never shares a cache entry."""
+        cache = get_step_cache()
+        broken = mock.Mock(spec=Image.Image, mode='RGB', size=(8, 8))
+        broken.tobytes.side_effect = OSError('truncated')
+
+        self.assertIsNone(get_image_hash(broken))
+        key = cache.make_key([broken], 'prompt', 'model')
+        self.assertIsNone(key)
+        cache.set(key, b'data')
+        self.assertIsNone(cache.get(key))
+
+    def _visualizer(self):
+        visualizer = ScreenVisualizer(api_key='test-key')
+        part = mock.Mock(text=None)
+        part.inline_data.data = _png_bytes('white')
+        part.inline_data.mime_type = 'image/png'
+        candidate = mock.Mock()
+        candidate.content.parts = [part]
+        response = mock.Mock(usage_metadata=None, candidates=[candidate])
+        visualizer.client = mock.Mock()
+        visualizer.client.models.generate_content.return_value = response
+        return visualizer
+
+    def test_design_steps_are_not_cached(self):
+        """Regenerating a design step must give a fresh sample."""
+        visualizer = self._visualizer()
+        source = Image.new('RGB', (8, 8), 'black')
+
+        visualizer._call_gemini_edit(source, 'add a deck', step_name='deck')
+        visualizer._call_gemini_edit(source, 'add a deck', step_name='deck')
+
+        self.assertEqual(visualizer.client.models.generate_content.call_count, 2)
+
+    def test_repeat_edit_skips_api_call(self):
+        """Second identical cleanup is served from disk without calling Gemini."""
+        visualizer = self._visualizer()
+
+        source = Image.new('RGB', (8, 8), 'black')
+        first = visualizer._call_gemini_edit(source, 'clean it', step_name='cleanup', use_cache=True)
+        second = visualizer._call_gemini_edit(source, 'clean it', step_name='cleanup', use_cache=True)
+
+        self.assertEqual(visualizer.client.models.generate_content.call_count, 1)
+        self.assertEqual(first.size, second.size)
+        self.assertEqual(second.image.getpixel((0, 0)), (255, 255, 255))
@@ -0,0 +1,85 @@
+"""Tests for cached visualization status counters."""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.models import VisualizationRequest
+from api.services.stats_service import get_status_counts
+
+
+class StatusCountersTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='stats', password='x')
+        self.other = User.objects.create_user(username='other', password='x')
+
+    def _create(self, user, tenant_id='pools', contractor_id=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return VisualizationRequest.objects.create(
+                user=user,
+                original_image='originals/1/test.jpg',
+                tenant_id=tenant_id,
+                contractor_id=contractor_id,
+            )
+
+    def test_cold_scope_is_one_group_by_query(self):
+        for _ in range(2):
+            self._create(self.user)
+        VisualizationRequest.objects.filter(pk=self._create(self.user).pk).update(status='failed')
+        self._create(self.other, tenant_id='roofs')
+
+        with self.assertNumQueries(1):
+            counts = get_status_counts('tenant', 'pools')
+        self.assertEqual(counts, {'pending': 2, 'processing': 0, 'complete': 0, 'failed': 1})
+
+    def test_transitions_update_warm_counters_without_queries(self):
+        viz = self._create(self.user, contractor_id=7)
+        get_status_counts('user', self.user.id)
+        get_status_counts('contractor', 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            viz.mark_as_processing()
+        with self.captureOnCommitCallbacks(execute=True):
+            viz.mark_as_complete()
+        self._create(self.user, contractor_id=7)
+
+        with self.assertNumQueries(0):
+            user_counts = get_status_counts('user', self.user.id)
+            contractor_counts = get_status_counts('contractor', 7)
+
+        expected = {'pending': 1, 'processing': 0, 'complete': 1, 'failed': 0}
+        self.assertEqual(user_counts, expected)
+        self.assertEqual(contractor_counts, expected)
+
+        # The counters agree with the database
+        cache.clear()
+        self.assertEqual(get_status_counts('user', self.user.id), expected)
+
+    def test_saves_without_status_change_leave_counters_alone(self):
+        viz = self._create(self.user)
+        get_status_counts('all')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            viz.update_progress(60, 'Working')
+            viz.save()
+
+        self.assertEqual(get_status_counts('all')['pending'], 1)
+
+    def test_stats_endpoint_scopes(self):
+        self._create(self.user)
+        viz = self._create(self.other, tenant_id='roofs')
+        with self.captureOnCommitCallbacks(execute=True):
+            viz.mark_as_failed('boom')
+
+        self.assertEqual(
+            self.client.get('/api/visualizations/stats/', secure=True).json(),
+            {'total': 2, 'pending': 1, 'processing': 0, 'completed': 0, 'failed': 1},
+        )
+        roofs = self.client.get('/api/visualizations/stats/?tenant_id=roofs', secure=True).json()
+        self.assertEqual((roofs['total'], roofs['failed']), (1, 1))
+
+        self.client.force_login(self.user)
+        mine = self.client.get('/api/visualizations/stats/', secure=True).json()
+        self.assertEqual((mine['total'], mine['pending']), (1, 1))
@@ -0,0 +1,120 @@
+"""Tests for fusing adjacent insertion steps into one model call."""
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.models import GeneratedImage
+from api.services.pipeline_registry import PipelineScheduler, get_step_prompt
+from api.services.step_fusion import fuse_steps, fusion_report
+from api.tenants import clear_cache
+from api.tenants.pools.config import PoolsTenantConfig
+from api.tenants.pools import prompts as pools_prompts
+from api.tests.helpers import StubbedVisualizerMixin, TempMediaMixin, create_visualization_request
+
+SCOPE = {
+    'deck_material': 'travertine',
+    'water_features': ['rock_waterfall'],
+    'finishing': True,
+    'lighting': 'pool_lights',
+}
+
+
+def always(name, config):
+    return 'prompt'
+
+
+class FuseStepsTest(SimpleTestCase):
+
+    def setUp(self):
+        config = PoolsTenantConfig()
+        self.steps = [(name, config.get_step_config(name)) for name in config.get_pipeline_steps()]
+
+    def test_pools_water_features_and_finishing_are_fused(self):
+        steps, groups = fuse_steps(self.steps, always)
+        scheduler = PipelineScheduler(steps)
+
+        self.assertEqual(groups, [['water_features', 'finishing']])
+        self.assertEqual(
+            scheduler.order,
+            ['cleanup', 'pool_shell', 'deck', 'water_features+finishing', 'quality_check'],
+        )
+        self.assertEqual(scheduler.dependencies['water_features+finishing'], ['deck'])
+        self.assertEqual(scheduler.dependencies['quality_check'], ['cleanup', 'water_features+finishing'])
+        fused = scheduler.configs['water_features+finishing']
+        self.assertEqual((fused['type'], fused['progress_weight']), ('fused_insertion', 25))
+
+    def test_skipped_steps_are_not_fused(self):
+        steps, groups = fuse_steps(self.steps, lambda name, config: None if name == 'finishing' else 'prompt')
+
+        self.assertEqual(groups, [])
+        self.assertIs(steps, self.steps)
+
+    def test_intermediate_image_used_elsewhere_blocks_fusion(self):
+        steps = [
+            ('a', {'type': 'insertion', 'fusable': True}),
+            ('b', {'type': 'insertion', 'fusable': True}),
+            ('c', {'type': 'insertion', 'fusable': True}),
+            ('check', {'type': 'quality_check', 'depends_on': ['a', 'c']}),
+        ]
+
+        _, groups = fuse_steps(steps, always)
+
+        self.assertEqual(groups, [['b', 'c']])
+
+    def test_fused_prompt_combines_part_prompts(self):
+        steps, _ = fuse_steps(self.steps, always)
+        fused = dict(steps)['water_features+finishing']
+
+        prompt = get_step_prompt('water_features+finishing', fused, pools_prompts, SCOPE, {})
+
+        self.assertIn(pools_prompts.get_prompt('water_features', SCOPE).strip(), prompt)
+        self.assertIn(pools_prompts.get_prompt('finishing', SCOPE).strip(), prompt)
+        self.assertLess(prompt.index('EDIT 1 (water features)'), prompt.index('EDIT 2 (finishing)'))
+
+
+class FusedPipelineTest(StubbedVisualizerMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(clear_cache)
+
+    def _run(self, scope):
+        return self.run_pipeline(scope)
+
+    def test_fusion_is_off_by_default(self):
+        self._run(SCOPE)
+
+        self.assertEqual(self.calls, ['cleanup', 'pool_shell', 'deck', 'water_features', 'finishing'])
+        self.assertEqual(self.visualizer.last_fused_steps, [])
+
+    @override_settings(PIPELINE_STEP_FUSION={'default': False, 'pools': True})
+    def test_enabled_tenant_saves_a_model_call(self):
+        _, _, score, _ = self._run(SCOPE)
+
+        self.assertEqual(self.calls, ['cleanup', 'pool_shell', 'deck', 'water_features+finishing'])
+        self.assertEqual(self.visualizer.last_fused_steps, [['water_features', 'finishing']])
+        self.assertIn('water_features+finishing', self.visualizer.last_step_timings)
+        self.assertEqual(score, 0.9)
+
+    @override_settings(PIPELINE_STEP_FUSION={'default': True})
+    def test_single_selected_step_runs_unfused(self):
+        self._run(dict(SCOPE, water_features=[]))
+
+        self.assertEqual(self.calls, ['cleanup', 'pool_shell', 'deck', 'finishing'])
+
+
+class FusionReportTest(TempMediaMixin, TestCase):
+
+    def test_report_compares_fused_and_unfused_runs(self):
+        viz = create_visualization_request('fusion')
+        for seconds, score, fused in [(40.0, 0.9, []), (30.0, 0.8, [['water_features', 'finishing']]),
+                                      (20.0, 0.7, [['water_features', 'finishing']])]:
+            image = GeneratedImage(request=viz, metadata={
+                'pipeline_seconds': seconds, 'quality_score': score, 'fused_steps': fused,
+            })
+            image.generated_image.save('result.jpg', ContentFile(b'x'), save=True)
+
+        report = fusion_report('pools')
+
+        self.assertEqual(report['unfused'], {'runs': 1, 'mean_pipeline_seconds': 40.0, 'mean_quality_score': 0.9})
+        self.assertEqual(report['fused'], {'runs': 2, 'mean_pipeline_seconds': 25.0, 'mean_quality_score': 0.75})
+        self.assertEqual(fusion_report('windows')['fused']['runs'], 0)
@@ -0,0 +1,71 @@
+"""Tests for per-step pipeline previews."""
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api.models import VisualizationRequest
+from api.services.checkpoint_service import PipelineCheckpointStore
+from api.services.preview_service import StepPreviewStore
+from api.services.progress_stream import get_progress_broker, reset_progress_broker
+from api.tests.helpers import StubbedVisualizerMixin, TempMediaMixin, create_visualization_request
+
+
+@override_settings(PROGRESS_STREAM_BACKEND='local', PIPELINE_PREVIEW_MAX_SIZE=32)
+class StepPreviewTest(TempMediaMixin, StubbedVisualizerMixin, TestCase):
+
+    image_size = (200, 100)
+
+    def setUp(self):
+        super().setUp()
+        reset_progress_broker()
+        self.addCleanup(reset_progress_broker)
+        self.viz = create_visualization_request('previews')
+        self.scope = {'deck_material': 'travertine'}
+
+    def _run(self):
+        viz = VisualizationRequest.objects.get(pk=self.viz.pk)
+        self.run_pipeline(
+            self.scope,
+            checkpoint_store=PipelineCheckpointStore(viz),
+            preview_store=StepPreviewStore(viz),
+        )
+
+    def test_each_image_step_gets_a_small_preview(self):
+        self._run()
+
+        self.viz.refresh_from_db()
+        steps = [entry['step'] for entry in self.viz.step_previews]
+        self.assertEqual(steps, ['cleanup', 'pool_shell', 'deck'])
+
+        entry = self.viz.step_previews[0]
+        self.assertEqual((entry['width'], entry['height']), (32, 16))
+        with default_storage.open(entry['image'], 'rb') as f:
+            preview = Image.open(f)
+            self.assertEqual(preview.format, 'JPEG')
+            self.assertTrue(preview.info.get('progressive'))
+
+    def test_preview_is_pushed_to_subscribers(self):
+        self._run()
+
+        latest = get_progress_broker().latest(self.viz.id)
+        self.assertEqual(latest['preview']['step'], 'deck')
+        self.assertIn('/previews/', latest['preview']['url'])
+
+    def test_resumed_run_replaces_previews(self):
+        self._run()
+        self._run()
+
+        self.viz.refresh_from_db()
+        steps = [entry['step'] for entry in self.viz.step_previews]
+        # Cleanup and the resume point are shown, then the re-run last step
+        self.assertEqual(steps, ['cleanup', 'pool_shell', 'deck'])
+
+    def test_detail_endpoint_lists_preview_urls(self):
+        self._run()
+
+        response = self.client.get(f'/api/visualizations/{self.viz.pk}/', secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        previews = response.json()['step_previews']
+        self.assertEqual(len(previews), 3)
+        self.assertTrue(previews[0]['url'].startswith('https://'))
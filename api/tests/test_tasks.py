@@ -0,0 +1,217 @@
+"""Tests for the background visualization job queue."""
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import VisualizationRequest
+from api.services.job_queue import TenantSlotLimiter, enqueue_visualization, tenant_slots
+from api.tasks import process_visualization_request, requeue_stale_requests
+
+
+class SharedSlotStore:
+    """
+    Stand-in for the Redis server: one store shared by several clients, as
+    Redis is shared by every worker process. Implements the commands the
+    slot limiter uses.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def _use_slot_store(test_case):
+    patcher = mock.patch.object(tenant_slots, '_client', SharedSlotStore())
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class VisualizationJobTest(TestCase):
+    """Jobs run in-process through Celery's eager mode."""
+
+    def setUp(self):
+        _use_slot_store(self)
+        self.user = User.objects.create_user(username='jobs', password='x')
+        self.viz = VisualizationRequest.objects.create(
+            user=self.user,
+            original_image='originals/1/test.jpg',
+            tenant_id='pools',
+        )
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_enqueue_runs_processor_and_stores_task_id(self, processor_cls):
+        """Eager broker should run the job inline and record the task id."""
+        processor_cls.return_value.process_image.return_value = []
+
+        task_id = enqueue_visualization(self.viz)
+
+        self.viz.refresh_from_db()
+        self.assertEqual(self.viz.task_id, task_id)
+        processor_cls.return_value.process_image.assert_called_once()
+        _, kwargs = processor_cls.return_value.process_image.call_args
+        self.assertEqual(kwargs['task_id'], task_id)
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_slot_released_after_job(self, processor_cls):
+        """Tenant slot should be free again once the job finishes."""
+        processor_cls.return_value.process_image.return_value = []
+
+        process_visualization_request.apply(args=[self.viz.pk])
+
+        self.assertEqual(tenant_slots.in_use('pools'), 0)
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_retries_when_tenant_is_saturated(self, processor_cls):
+        """Job should wait for a slot instead of running over the limit."""
+        with mock.patch.object(tenant_slots, 'acquire', return_value=None), \
+                mock.patch.object(process_visualization_request, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                process_visualization_request.run(self.viz.pk)
+
+        retry.assert_called_once()
+        processor_cls.assert_not_called()
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_waiting_request_is_not_stale(self, processor_cls):
+        """A job waiting on its budget stays owned and out of the stale sweep."""
+        VisualizationRequest.objects.filter(pk=self.viz.pk).update(
+            task_id='waiting-task', updated_at=self.viz.created_at.replace(year=2020)
+        )
+        throttle = mock.Mock(action='throttle', message='over budget')
+        with mock.patch('api.tasks.check_budget', return_value=throttle), \
+                mock.patch.object(process_visualization_request, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                process_visualization_request.apply(args=[self.viz.pk], task_id='waiting-task', throw=True)
+            # A superseded message does not start another retry chain
+            process_visualization_request.apply(args=[self.viz.pk], task_id='older-task')
+
+        retry.assert_called_once()
+        processor_cls.assert_not_called()
+        self.assertEqual(requeue_stale_requests(), 0)
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_completed_request_is_not_reprocessed(self, processor_cls):
+        """A redelivered job for a finished request should be a no-op."""
+        self.viz.mark_as_complete()
+
+        process_visualization_request.apply(args=[self.viz.pk])
+
+        processor_cls.assert_not_called()
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_superseded_task_does_not_run(self, processor_cls):
+        """A redelivered message for a request that was re-queued is dropped."""
+        VisualizationRequest.objects.filter(pk=self.viz.pk).update(task_id='newer-task')
+
+        process_visualization_request.apply(args=[self.viz.pk], task_id='older-task')
+
+        processor_cls.assert_not_called()
+        self.assertEqual(tenant_slots.in_use('pools'), 0)
+
+    @mock.patch('api.ai_enhanced_processor.AIEnhancedImageProcessor')
+    def test_redelivered_owner_task_runs(self, processor_cls):
+        """The same message redelivered after a worker died still owns the request."""
+        processor_cls.return_value.process_image.return_value = []
+        VisualizationRequest.objects.filter(pk=self.viz.pk).update(task_id='same-task', status='processing')
+
+        process_visualization_request.apply(args=[self.viz.pk], task_id='same-task')
+
+        processor_cls.return_value.process_image.assert_called_once()
+
+    @mock.patch('api.tasks.enqueue_visualization')
+    def test_requeue_stale_requests(self, enqueue):
+        """Pending requests that were never delivered should be re-queued."""
+        VisualizationRequest.objects.filter(pk=self.viz.pk).update(
+            updated_at=self.viz.created_at.replace(year=2020)
+        )
+
+        self.assertEqual(requeue_stale_requests(), 1)
+        enqueue.assert_called_once()
+
+
+@override_settings(VISUALIZATION_TENANT_CONCURRENCY={'default': 2, 'roofs': 1})
+class TenantSlotLimiterTest(TestCase):
+
+    def setUp(self):
+        _use_slot_store(self)
+
+    def test_limit_is_enforced_per_tenant(self):
+        """Only N slots can be held at once for a tenant."""
+        first = tenant_slots.acquire('roofs')
+        self.assertIsNotNone(first)
+        self.assertIsNone(tenant_slots.acquire('roofs'))
+
+        # Other tenants are unaffected
+        self.assertIsNotNone(tenant_slots.acquire('pools'))
+
+        tenant_slots.release(first)
+        self.assertIsNotNone(tenant_slots.acquire('roofs'))
+
+    def test_default_limit(self):
+        self.assertEqual(tenant_slots.get_limit('pools'), 2)
+
+    def test_limit_is_shared_across_processes(self):
+        """Limiters in different worker processes share one set of slots."""
+        store = SharedSlotStore()
+        worker_a = TenantSlotLimiter(client=store)
+        worker_b = TenantSlotLimiter(client=store)
+
+        slot = worker_a.acquire('roofs')
+        self.assertIsNotNone(slot)
+        self.assertIsNone(worker_b.acquire('roofs'))
+
+        # Releasing someone else's token is a no-op
+        worker_b.release((slot[0], 'not-my-token'))
+        self.assertEqual(worker_b.in_use('roofs'), 1)
+
+        worker_a.release(slot)
+        self.assertIsNotNone(worker_b.acquire('roofs'))
+
+    @override_settings(REDIS_URL='redis://cache.internal:6379/3')
+    def test_default_client_uses_redis_url(self):
+        """Slots live in Redis, not in the per-process Django cache."""
+        limiter = TenantSlotLimiter()
+        kwargs = limiter.client.connection_pool.connection_kwargs
+        self.assertEqual(kwargs['host'], 'cache.internal')
+        self.assertEqual(kwargs['db'], 3)
+
+
+class RegenerateQueuesJobTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='regen', password='x')
+        self.viz = VisualizationRequest.objects.create(
+            user=self.user,
+            original_image='originals/1/test.jpg',
+            status='complete',
+        )
+
+    @mock.patch('api.services.job_queue.enqueue_visualization')
+    def test_regenerate_enqueues_after_commit(self, enqueue):
+        """Regenerate should queue a job rather than start a thread."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/visualizations/{self.viz.pk}/regenerate/', secure=True
+            )
+
+        self.assertEqual(response.status_code, 200)
+        enqueue.assert_called_once()
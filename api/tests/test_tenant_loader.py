@@ -0,0 +1,93 @@
+"""Tests for DB-backed tenant plans (TenantConfig + PromptOverride)."""
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.models import PromptOverride, TenantConfig
+from api.tenants import clear_cache, get_tenant_config
+from api.tenants.pools import prompts as pools_prompts
+
+
+class TenantLoaderTest(TestCase):
+
+    def setUp(self):
+        clear_cache()
+        self.addCleanup(clear_cache)
+
+    def test_without_rows_plan_matches_python_config(self):
+        plan = get_tenant_config('pools')
+
+        self.assertEqual(plan.version, 0)
+        self.assertEqual(plan.get_pipeline_steps()[0], 'cleanup')
+        self.assertEqual(plan.get_step_config('deck')['description'], 'Adding deck')
+        self.assertEqual(plan.get_prompts_module().get_cleanup_prompt(), pools_prompts.get_cleanup_prompt())
+        self.assertIn('pool_sizes', plan.get_schema())
+
+    def test_db_config_is_merged_over_python_defaults(self):
+        TenantConfig.objects.create(
+            tenant_id='pools',
+            display_name='Backyard Pools',
+            step_configs={'deck': {'description': 'Laying the deck'}},
+            product_categories=[{'key': 'pool_size'}],
+        )
+
+        plan = get_tenant_config('pools')
+
+        self.assertEqual(plan.display_name, 'Backyard Pools')
+        self.assertEqual(plan.get_step_config('deck')['description'], 'Laying the deck')
+        self.assertEqual(plan.get_step_config('deck')['type'], 'insertion')
+        self.assertEqual(plan.get_schema()['product_categories'][0]['key'], 'pool_size')
+        with self.assertRaises(TypeError):
+            plan.get_step_config('deck')['description'] = 'changed'
+        with self.assertRaises(AttributeError):
+            plan.version = 99
+
+    def test_prompt_override_replaces_step_prompt(self):
+        PromptOverride.objects.create(
+            tenant_id='pools', step_name='deck', prompt_text='Add a {deck_material} deck. Keep {unknown}.'
+        )
+
+        prompts = get_tenant_config('pools').get_prompts_module()
+
+        self.assertEqual(
+            prompts.get_prompt('deck', {'deck_material': 'travertine'}),
+            'Add a travertine deck. Keep {unknown}.',
+        )
+        self.assertEqual(prompts.get_prompt('finishing', {}), pools_prompts.get_prompt('finishing', {}))
+
+    def test_overrides_bump_config_version(self):
+        PromptOverride.objects.create(tenant_id='pools', step_name='cleanup', prompt_text='v1')
+        self.assertEqual(TenantConfig.objects.get(tenant_id='pools').config_version, 1)
+
+        PromptOverride.objects.create(tenant_id='pools', step_name='cleanup', prompt_text='v2', version=2)
+        self.assertEqual(TenantConfig.objects.get(tenant_id='pools').config_version, 2)
+
+        prompts = get_tenant_config('pools').get_prompts_module()
+        self.assertEqual(prompts.get_cleanup_prompt(), 'v2')
+
+    @override_settings(TENANT_CONFIG_REVALIDATE_SECONDS=60)
+    def test_plan_is_revalidated_on_config_version(self):
+        TenantConfig.objects.create(tenant_id='pools', display_name='Pools')
+        plan = get_tenant_config('pools')
+
+        # Another worker edits the config
+        TenantConfig.objects.filter(tenant_id='pools').update(display_name='Edited', config_version=5)
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_tenant_config('pools'), plan)
+
+        later = time.monotonic() + 61
+        with mock.patch('api.tenants.loader.time.monotonic', return_value=later):
+            refreshed = get_tenant_config('pools')
+            self.assertEqual((refreshed.version, refreshed.display_name), (5, 'Edited'))
+
+            # Unchanged version: one lookup, same plan
+            with mock.patch('api.tenants.loader.time.monotonic', return_value=later + 61):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertIs(get_tenant_config('pools'), refreshed)
+            lookups = [q['sql'] for q in queries if 'api_tenantconfig' in q['sql']]
+            self.assertEqual(len(lookups), 1)
+            self.assertNotIn('api_promptoverride', ' '.join(q['sql'] for q in queries))
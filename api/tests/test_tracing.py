@@ -0,0 +1,83 @@
+"""Tests for per-job span tracing."""
+import contextvars
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from api.models import GeneratedImage
+from api.services.benchmark_service import run_benchmark
+from api.services.tracing import current_trace, span, start_trace
+from api.tenants import clear_cache
+from api.tests.helpers import TempMediaMixin
+
+
+class TracingTest(SimpleTestCase):
+
+    def test_spans_nest_and_cross_threads(self):
+        with start_trace('job', request_id=7) as trace:
+            with span('pipeline.step', step='cleanup'):
+                with span('gemini.attempt', attempt=1):
+                    pass
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(contextvars.copy_context().run, self._audit).result()
+
+        root, step, attempt, audit = trace.spans
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(step.parent_id, root.span_id)
+        self.assertEqual(attempt.parent_id, step.span_id)
+        self.assertEqual(audit.parent_id, root.span_id)
+        self.assertIsNone(current_trace())
+
+        summary = trace.summary()
+        self.assertEqual(summary['spans']['gemini.attempt']['count'], 1)
+        self.assertIn('cleanup', summary['steps'])
+        self.assertGreaterEqual(summary['seconds'], summary['spans']['pipeline.step']['seconds'])
+
+    def _audit(self):
+        with span('audit.analyze'):
+            pass
+
+    def test_span_outside_trace_is_noop(self):
+        with span('image.decode') as item:
+            self.assertIsNone(item)
+
+    def test_errors_mark_span_and_export_otlp_json(self):
+        path = os.path.join(tempfile.mkdtemp(), 'traces.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+
+        with override_settings(TRACING_EXPORTER='file', TRACING_FILE=path):
+            with self.assertRaises(ValueError):
+                with start_trace('job'):
+                    with span('pdf.render', pages=2):
+                        raise ValueError('bad font')
+
+        with open(path) as f:
+            exported = json.loads(f.readline())
+        scope_spans = exported['resourceSpans'][0]['scopeSpans'][0]['spans']
+        root, pdf = scope_spans
+        self.assertEqual(pdf['parentSpanId'], root['spanId'])
+        self.assertEqual(len(pdf['traceId']), 32)
+        self.assertEqual(pdf['status'], {'code': 2, 'message': 'ValueError: bad font'})
+        self.assertEqual(pdf['attributes'], [{'key': 'pages', 'value': {'intValue': '2'}}])
+        self.assertGreaterEqual(int(pdf['endTimeUnixNano']), int(pdf['startTimeUnixNano']))
+
+
+class JobTraceTest(TempMediaMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(clear_cache)
+
+    def test_job_summary_saved_in_image_metadata(self):
+        run_benchmark(jobs=1, concurrency=1, rate_limit_per_minute=100000, keep=True)
+
+        trace = GeneratedImage.objects.get().metadata['trace']
+        for name in ('pipeline.step', 'gemini.attempt', 'gemini.rate_wait', 'image.decode',
+                     'storage.write', 'db.progress_write', 'audit.analyze', 'pdf.render'):
+            self.assertIn(name, trace['spans'])
+        self.assertIn('cleanup', trace['steps'])
+        self.assertEqual(len(trace['trace_id']), 32)
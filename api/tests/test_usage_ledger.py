@@ -0,0 +1,147 @@
+"""Tests for the model usage ledger and daily budgets."""
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from google.genai import types
+
+from api.ai_services.utils import calculate_usage_cost
+from api.models import ModelUsage, VisualizationRequest
+from api.services.benchmark_service import run_benchmark
+from api.services.usage_ledger import (
+    BudgetExceededError,
+    apply_budget,
+    check_budget,
+    daily_spend,
+    job_image_model,
+    record_usage,
+    usage_scope,
+    visualization_costs,
+)
+from api.tenants import clear_cache
+from api.tests.helpers import TempMediaMixin, create_visualization_request
+
+PRICING = {
+    'pro': {'input': 2.0, 'output_text': 12.0, 'output_image': 120.0},
+    'default': {'input': 1.0, 'output_text': 1.0},
+}
+
+
+def usage(prompt=1000, candidates=1290, thoughts=200):
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt,
+        candidates_token_count=candidates,
+        thoughts_token_count=thoughts,
+        total_token_count=prompt + candidates + thoughts,
+    )
+
+
+@override_settings(GEMINI_MODEL_PRICING=PRICING)
+class UsageCostTest(SimpleTestCase):
+
+    def test_image_output_priced_separately(self):
+        # 1000 * 2 + 1290 * 120 + 200 * 12 per million tokens
+        self.assertAlmostEqual(calculate_usage_cost('pro', 1000, 1290, 200, image_output=True), 0.1592)
+        self.assertAlmostEqual(calculate_usage_cost('pro', 1000, 100, 0), 0.0032)
+        self.assertAlmostEqual(calculate_usage_cost('unknown', 1000, 1000), 0.002)
+
+
+@override_settings(GEMINI_MODEL_PRICING=PRICING)
+class UsageLedgerTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.viz = create_visualization_request('ledger', contractor_id=42)
+
+    def test_rows_inserted_in_bulk_when_job_ends(self):
+        with usage_scope(self.viz) as scope:
+            record_usage('pro', 'cleanup', usage(), image_output=True)
+            record_usage('pro', 'quality_check', usage(candidates=100, thoughts=0))
+            self.assertFalse(ModelUsage.objects.exists())
+            # Budgets see the spend before the rows are written
+            self.assertAlmostEqual(daily_spend('pools'), 0.1624)
+
+        self.assertAlmostEqual(scope.cost_usd, 0.1624)
+        rows = ModelUsage.objects.order_by('id')
+        self.assertEqual([row.step for row in rows], ['cleanup', 'quality_check'])
+        self.assertEqual(
+            {(row.request_id, row.tenant_id, row.contractor_id, row.model) for row in rows},
+            {(self.viz.id, 'pools', 42, 'pro')},
+        )
+        self.assertEqual(rows[0].total_tokens, 2490)
+
+    def test_call_outside_a_job_is_inserted_at_once(self):
+        record_usage('pro', 'site_audit', usage(candidates=100, thoughts=0))
+
+        row = ModelUsage.objects.get()
+        self.assertEqual((row.request_id, row.tenant_id, row.step), (None, 'unknown', 'site_audit'))
+
+    def test_budget_downgrades_then_throttles(self):
+        budgets = {'pools': {'daily_usd': 1.0, 'downgrade_at': 0.5, 'downgrade_model': 'cheap'}}
+        with override_settings(MODEL_BUDGETS=budgets):
+            self.assertEqual(check_budget('pools').action, 'ok')
+            self.assertEqual(check_budget('other').action, 'ok')
+
+            with usage_scope(self.viz):
+                for _ in range(4):
+                    record_usage('pro', 'cleanup', usage(), image_output=True)
+                decision = apply_budget('pools')
+                self.assertEqual((decision.action, decision.model), ('downgrade', 'cheap'))
+                self.assertEqual(job_image_model('pro'), 'cheap')
+
+                for _ in range(3):
+                    record_usage('pro', 'cleanup', usage(), image_output=True)
+                with self.assertRaises(BudgetExceededError):
+                    apply_budget('pools')
+
+        # Recording into a live counter does not query the ledger
+        with usage_scope(self.viz), self.assertNumQueries(0):
+            record_usage('pro', 'cleanup', usage(), image_output=True)
+
+        # A cleared counter is rebuilt from the ledger
+        cache.clear()
+        self.assertAlmostEqual(daily_spend('pools'), 8 * 0.1592)
+
+    def test_cost_per_completed_visualization(self):
+        with usage_scope(self.viz):
+            record_usage('pro', 'cleanup', usage(), image_output=True)
+            record_usage('pro', 'deck', usage(), image_output=True)
+        self.assertEqual(visualization_costs()['visualizations'], 0)
+
+        VisualizationRequest.objects.filter(pk=self.viz.pk).update(status='complete')
+        costs = visualization_costs(tenant_id='pools')
+
+        self.assertEqual(costs['visualizations'], 1)
+        self.assertAlmostEqual(costs['mean_usd'], 0.3184)
+        self.assertEqual(set(costs['by_step']), {'cleanup', 'deck'})
+
+
+class LedgerPipelineTest(TempMediaMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(clear_cache)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_job_calls_attributed_and_downgraded(self):
+        budgets = {'pools': {'daily_usd': 100.0, 'downgrade_at': 0.0, 'downgrade_model': 'gemini-2.5-flash-image'}}
+        with override_settings(MODEL_BUDGETS=budgets):
+            run_benchmark(jobs=1, concurrency=1, rate_limit_per_minute=100000, keep=True)
+
+        viz = VisualizationRequest.objects.get()
+        rows = ModelUsage.objects.filter(request=viz)
+        steps = {row.step: row.model for row in rows}
+        self.assertEqual(steps['cleanup'], 'gemini-2.5-flash-image')
+        self.assertEqual(steps['quality_check'], 'gemini-3-pro-image-preview')
+        self.assertIn('site_audit', steps)
+        self.assertEqual(visualization_costs()['visualizations'], 1)
+        # Fake backend calls cost nothing and leave the tenant's budget alone
+        self.assertEqual({row.cost_usd for row in rows}, {0})
+        self.assertEqual(daily_spend('pools'), 0)
+
+    def test_bench_does_not_bill_tenant(self):
+        with override_settings(MODEL_BUDGETS={'pools': {'daily_usd': 1.0}}):
+            run_benchmark(jobs=1, concurrency=1, rate_limit_per_minute=100000)
+            self.assertEqual(daily_spend('pools'), 0)
+            self.assertEqual(check_budget('pools').action, 'ok')
+        self.assertFalse(ModelUsage.objects.exists())
@@ -13,7 +13,7 @@ from .auth_views import (
 )
 
 from .audit.views import AuditViewSet
-from .views_config import TenantConfigView
+from .views_config import PricingCatalogView, TenantConfigView
 from .views_debug import debug_errors
 
 # Create a router and register our viewsets with it.
@@ -42,6 +42,7 @@ urlpatterns = [
 
     # API endpoints
     path('config/', TenantConfigView.as_view(), name='tenant-config'),
+    path('config/pricing/', PricingCatalogView.as_view(), name='tenant-pricing-catalog'),
     path('visualization/<int:pk>/pdf/', views.VisualizationRequestViewSet.as_view({'get': 'pdf'}), name='visualization-pdf'),
     path('', include(router.urls)),
 
@@ -1,16 +1,16 @@
 import logging
 import time
 from django.db import transaction
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.core.cache import cache
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import VisualizationRequest, GeneratedImage, UserProfile, Lead
+from .pagination import KeysetOrPageNumberPagination
+from .services.config_cache import cached_json_response
+from .tenants import get_tenant_config
 from .serializers import (
     VisualizationRequestListSerializer,
     VisualizationRequestDetailSerializer,
@@ -19,16 +19,18 @@ from .serializers import (
     UserProfileSerializer,
     LeadSerializer
 )
-# from .tasks import process_image_request # Import later if using Celery
 
 logger = logging.getLogger(__name__)
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    """Standard pagination class for API responses."""
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate text/event-stream for streaming actions."""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -53,7 +55,8 @@ class VisualizationRequestViewSet(viewsets.ModelViewSet):
     Supports filtering, searching, pagination, and optimized queries.
     """
     permission_classes = [permissions.AllowAny]  # Dev mode - no auth required
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_fields = ('created_at', 'id')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'screen_type']
     search_fields = ['screen_type']
@@ -69,7 +72,8 @@ class VisualizationRequestViewSet(viewsets.ModelViewSet):
 
         # Optimize queries based on action
         if self.action == 'list':
-            queryset = queryset.select_related('user').prefetch_related('results')
+            # Annotated count and latest result only; no per-row queries
+            queryset = VisualizationRequest.objects.with_list_data()
         elif self.action in ['retrieve', 'update', 'partial_update']:
             queryset = queryset.select_related('user').prefetch_related('results')
 
@@ -123,10 +127,11 @@ class VisualizationRequestViewSet(viewsets.ModelViewSet):
 
             logger.info(f"VisualizationRequest created: ID={instance.id}, User={user.username}")
 
-            # Calculate pricing if pools tenant
-            self._calculate_pricing(instance)
+            # Thumbnails for list and gallery pages
+            from .services.derivative_service import schedule_derivatives
+            transaction.on_commit(lambda: schedule_derivatives(instance.original_image.name))
 
-            # Trigger AI processing
+            # Trigger AI processing (pricing is calculated by the job)
             self._trigger_ai_processing(instance)
 
         except Exception as e:
@@ -169,8 +174,7 @@ class VisualizationRequestViewSet(viewsets.ModelViewSet):
         instance.error_message = ''
         instance.save()
 
-        # TODO: Trigger AI processing
-        # self._trigger_ai_processing(instance)
+        self._trigger_ai_processing(instance)
 
         logger.info(f"VisualizationRequest retry: ID={instance.id}")
 
@@ -211,93 +215,84 @@ class VisualizationRequestViewSet(viewsets.ModelViewSet):
             logger.error(f"Error generating PDF: {e}")
             return Response({'error': 'Failed to generate PDF'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['get'], renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def events(self, request, pk=None):
+        """
+        Stream progress as Server-Sent Events until the request finishes.
+
+        Reads the row once for the initial state; later updates come from
+        the progress broker, not the database.
+        """
+        from django.core.handlers.asgi import ASGIRequest
+        from django.http import StreamingHttpResponse
+        from .services.progress_stream import astream_events, build_event, stream_events
+
+        instance = self.get_object()
+        snapshot = build_event(instance.id, instance.status, instance.progress_percentage, instance.status_message)
+
+        # ASGI servers need an async iterator to stream without buffering
+        if isinstance(request._request, ASGIRequest):
+            stream = astream_events(instance.id, snapshot)
+        else:
+            stream = stream_events(instance.id, snapshot)
+
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get user's request statistics."""
-        user = request.user
-        queryset = self.get_queryset()
+        """
+        Get request statistics by status.
+
+        Scoped by ?tenant_id= or ?contractor_id= when given, otherwise to the
+        signed-in user (everything in dev mode). Served from cache counters;
+        see api.services.stats_service.
+        """
+        from .services.stats_service import get_status_counts
+
+        if request.query_params.get('tenant_id'):
+            counts = get_status_counts('tenant', request.query_params['tenant_id'])
+        elif request.query_params.get('contractor_id'):
+            try:
+                contractor_id = int(request.query_params['contractor_id'])
+            except ValueError:
+                raise ValidationError({'contractor_id': 'Must be an integer.'})
+            counts = get_status_counts('contractor', contractor_id)
+        elif request.user.is_authenticated:
+            counts = get_status_counts('user', request.user.id)
+        else:
+            counts = get_status_counts('all')
 
         stats = {
-            'total': queryset.count(),
-            'pending': queryset.filter(status='pending').count(),
-            'processing': queryset.filter(status='processing').count(),
-            'completed': queryset.filter(status='complete').count(),
-            'failed': queryset.filter(status='failed').count(),
+            'total': sum(counts.values()),
+            'pending': counts['pending'],
+            'processing': counts['processing'],
+            'completed': counts['complete'],
+            'failed': counts['failed'],
         }
 
         return Response(stats)
 
     def _trigger_ai_processing(self, instance):
         """
-        Trigger AI-enhanced processing for the visualization request.
+        Queue AI-enhanced processing for the visualization request.
+
+        The job is enqueued after the surrounding transaction commits so the
+        worker always sees the saved request.
         """
-        from .ai_enhanced_processor import AIEnhancedImageProcessor
-        import threading
+        from .services.job_queue import enqueue_visualization
 
-        def process_in_background():
-            """Process the image in a background thread using AI services."""
+        def enqueue():
             try:
-                # Use AI-enhanced processor (Gemini)
-                processor = AIEnhancedImageProcessor()
-                generated_images = processor.process_image(instance)
-                logger.info(f"Successfully processed request {instance.id} with AI enhancement, generated {len(generated_images)} images")
+                enqueue_visualization(instance)
             except Exception as e:
-                logger.error(f"Error in AI processing for request {instance.id}: {str(e)}")
-                instance.mark_as_failed(str(e))
-
-        # Start processing in background thread
-        thread = threading.Thread(target=process_in_background)
-        thread.daemon = True
-        thread.start()
-
-        logger.info(f"AI-enhanced processing started for request {instance.id}")
-
-    def _calculate_pricing(self, instance):
-        """
-        Calculate pricing for the visualization request based on tenant and scope.
-        """
-        try:
-            from api.pricing.calculators import get_calculator, CalculatorNotFoundError
-
-            # Only calculate for pools tenant (add others as implemented)
-            if instance.tenant_id != 'pools':
-                return
-
-            # Build pricing config from visualization scope
-            scope = instance.scope or {}
-            pricing_config = {
-                'pool_size': scope.get('pool_size', 'classic'),
-                'shape': scope.get('shape', 'rectangle'),
-                'interior_finish': scope.get('interior_finish', 'white_plaster'),
-                'deck_material': scope.get('deck_material', 'travertine'),
-                'deck_sqft': scope.get('deck_sqft', 600),
-                'water_features': scope.get('water_features', []),
-                'built_in_features': scope.get('built_in_features', {}),
-            }
+                # Left pending; requeue_stale_requests will pick it up
+                logger.error(f"Failed to queue AI processing for request {instance.id}: {str(e)}")
 
-            calculator = get_calculator('pools')
-            price_result = calculator.calculate_final_price(pricing_config)
-
-            # Convert Decimals to strings for JSON storage
-            instance.price_data = {
-                'subtotal': str(price_result['subtotal']),
-                'overhead': str(price_result['overhead']),
-                'profit': str(price_result['profit']),
-                'tax': str(price_result['tax']),
-                'total': str(price_result['total']),
-                'line_items': [
-                    {**item, 'unit_price': str(item['unit_price']), 'total': str(item['total'])}
-                    for item in price_result['line_items']
-                ],
-                'type': price_result['type'],
-            }
-            instance.save(update_fields=['price_data'])
-            logger.info(f"Pricing calculated for request {instance.id}: ${price_result['total']}")
-
-        except CalculatorNotFoundError:
-            logger.debug(f"No pricing calculator for tenant: {instance.tenant_id}")
-        except Exception as e:
-            logger.warning(f"Pricing calculation failed for request {instance.id}: {str(e)}")
+        transaction.on_commit(enqueue)
+        logger.info(f"AI-enhanced processing queued for request {instance.id}")
 
 
 class GeneratedImageViewSet(viewsets.ReadOnlyModelViewSet):
@@ -307,7 +302,8 @@ class GeneratedImageViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = GeneratedImageSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_fields = ('generated_at', 'id')
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['request']
     ordering_fields = ['generated_at']
@@ -376,10 +372,12 @@ class AIServiceViewSet(viewsets.ViewSet):
         """Get overall AI services status."""
         try:
             from .ai_services import ai_service_registry, AIServiceFactory
+            from .ai_services.rate_governor import get_rate_governor
 
             status_info = {
                 'registry_status': ai_service_registry.get_registry_status(),
                 'factory_status': AIServiceFactory.get_factory_status(),
+                'rate_governor': get_rate_governor().get_status(),
                 'timestamp': time.time()
             }
 
@@ -449,12 +447,15 @@ class ScreenTypeViewSet(viewsets.ViewSet):
 
     def list(self, request):
         """Return list of available screen types."""
-        choices = VisualizationRequest.SCREEN_TYPE_CHOICES
-        screen_types = [
-            {'id': code, 'name': label, 'description': label}
-            for code, label in choices
-        ]
-        return Response({'results': screen_types})
+        def build():
+            choices = VisualizationRequest.SCREEN_TYPE_CHOICES
+            screen_types = [
+                {'id': code, 'name': label, 'description': label}
+                for code, label in choices
+            ]
+            return {'results': screen_types}
+
+        return cached_json_response(request, get_tenant_config().tenant_id, 'screen_types', build)
 
 
 class LeadViewSet(viewsets.ModelViewSet):
@@ -466,6 +467,8 @@ class LeadViewSet(viewsets.ModelViewSet):
     serializer_class = LeadSerializer
     permission_classes = [permissions.AllowAny]  # Allow public access for lead capture
     http_method_names = ['post', 'get']  # Only allow create and list
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_fields = ('created_at', 'id')
 
     def get_queryset(self):
         """Filter leads by user if authenticated."""
@@ -1,6 +1,6 @@
 from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from api.services.config_cache import cached_json_response
 from api.tenants import get_tenant_config
 
 
@@ -10,4 +10,13 @@ class TenantConfigView(APIView):
 
     def get(self, request):
         config = get_tenant_config()
-        return Response(config.get_schema())
+        return cached_json_response(request, config.tenant_id, 'schema', config.get_schema)
+
+
+class PricingCatalogView(APIView):
+    """Return the tenant's option catalog including prices (staff only)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        config = get_tenant_config()
+        return cached_json_response(request, config.tenant_id, 'pricing_catalog', config.get_pricing_catalog)
@@ -2,17 +2,21 @@
 
 import logging
 import os
-import time
 import json
 import re
+import time
 from typing import Optional, Dict, Any, Tuple, List
 from PIL import Image
-import io
-from google import genai
 from google.genai import types
 from django.conf import settings
 
 from api.tenants import get_tenant_config
+from api.ai_services.gemini_backends import get_model_client, requires_api_key
+from api.ai_services.rate_governor import RetryableResponseError, get_rate_governor
+from api.ai_services.utils.image_artifact import ImageArtifact, as_artifact, as_content
+from api.ai_services.utils.result_cache import get_step_cache
+from api.services.pipeline_registry import IMAGE_STEP_TYPES, PipelineScheduler, get_step_prompt
+from api.services.usage_ledger import job_image_model, record_usage
 
 logger = logging.getLogger(__name__)
 
@@ -23,23 +27,47 @@ class ScreenVisualizerError(Exception):
 class ScreenVisualizer:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             logger.error("GOOGLE_API_KEY not found. ScreenVisualizer cannot function.")
             raise ScreenVisualizerError("API Key missing. Please set GOOGLE_API_KEY.")
             
-        self.client = genai.Client(api_key=self.api_key)
+        # Shared client for the configured backend (live, fake or record/replay)
+        self.client = get_model_client(self.api_key)
         self.model_name = "gemini-3-pro-image-preview"
 
-    def process_pipeline(self, original_image: Image.Image, scope: dict, options: dict, progress_callback=None, tenant_id: str = None) -> Tuple[Image.Image, Image.Image, float, str]:
+    # Image edit generation settings. Part of the step cache key, so any
+    # change here invalidates previously cached results.
+    EDIT_GENERATION_SETTINGS = {
+        "response_modalities": ["TEXT", "IMAGE"],
+        "include_thoughts": True,
+        "guidance_scale": 70,
+        "person_generation": "dont_generate_people",
+    }
+
+    def process_pipeline(self, original_image: Image.Image, scope: dict, options: dict, progress_callback=None, tenant_id: str = None, checkpoint_store=None, preview_store=None) -> Tuple[Image.Image, Image.Image, float, str]:
         """
-        Executes the visualization pipeline sequentially based on tenant configuration.
+        Executes the visualization pipeline based on tenant configuration.
+
+        Steps are dispatched through the pipeline registry scheduler, which
+        runs independent steps (per `depends_on` in the step config) in
+        parallel. Per-step timings are kept in self.last_step_timings and
+        the run's wall time in self.last_pipeline_seconds.
+
+        Images flow between steps as ImageArtifacts (Gemini's encoded
+        bytes), and are only decoded where pixels are needed. PIL images are
+        accepted anywhere an artifact is.
 
         Args:
-            original_image (Image): The source image.
+            original_image (Image or ImageArtifact): The source image.
             scope (dict): Feature selections
             options (dict): Style options
             progress_callback (callable, optional): Function to update progress.
             tenant_id (str, optional): Tenant identifier for config lookup.
+            checkpoint_store (PipelineCheckpointStore, optional): Saved step
+                outputs to resume from. Steps whose inputs are unchanged are
+                restored instead of re-run.
+            preview_store (StepPreviewStore, optional): Receives a small
+                preview of each image step as soon as it finishes.
         """
         try:
             tenant_config = get_tenant_config(tenant_id)  # CHANGE THIS LINE
@@ -54,47 +82,74 @@ class ScreenVisualizer:
             if progress_callback:
                 progress_callback(10, "Analyzing")
 
-            steps = tenant_config.get_pipeline_steps()
-            
-            for i, step_name in enumerate(steps):
-                step_config = tenant_config.get_step_config(step_name)
-                step_type = step_config.get('type')
-                
-                # Update progress
+            plan = self._plan_pipeline(tenant_config, prompts, scope, options)
+            resume_index = -1
+            if checkpoint_store:
+                resume_index, clean_image, current_image = self._restore_checkpoints(
+                    plan, checkpoint_store, original_image
+                )
+
+            # Steps up to the resume point are handed to the scheduler as done
+            completed = {}
+            for step in plan[:resume_index + 1]:
+                step_config = step['config']
                 if progress_callback and 'progress_weight' in step_config:
                     progress_callback(step_config['progress_weight'], step_config.get('description', 'Processing'))
-                
-                if step_type == 'cleanup':
-                    cleanup_prompt = prompts.get_cleanup_prompt()
-                    clean_image = self._call_gemini_edit(original_image, cleanup_prompt, step_name=step_name)
-                    self._save_debug_image(clean_image, f"{i}_{step_name}")
-                    current_image = clean_image
-                    logger.info(f"Pipeline Step: {step_name} complete.")
-
-                elif step_type == 'insertion':
-                    scope_key = step_config.get('scope_key')
-                    # Run if: no scope_key (always run) OR scope_key value is truthy
-                    should_run = scope_key is None or bool(scope.get(scope_key))
-                    if should_run:
-                        # Use get_prompt which routes to the correct prompt for each step
-                        prompt = prompts.get_prompt(step_name, scope)
-                        # Some prompts return None if no features selected (e.g., water_features with empty array)
-                        if prompt is None:
-                            logger.info(f"Pipeline Step: {step_name} skipped (prompt returned None)")
-                            continue
-                        current_image = self._call_gemini_edit(current_image, prompt, step_name=step_name)
-                        self._save_debug_image(current_image, f"{i}_{step_name}")
-                        logger.info(f"Pipeline Step: {step_name} complete.")
-                    else:
-                        logger.info(f"Pipeline Step: {step_name} skipped (scope_key '{scope_key}' not set)")
-                        
-                elif step_type == 'quality_check':
-                    quality_prompt = prompts.get_quality_check_prompt(scope)
-                    # Pass both clean (reference) and current (final) images
-                    quality_result = self._call_gemini_json([clean_image, current_image], quality_prompt)
-                    score = quality_result.get('score', 0.95)
-                    reason = quality_result.get('reason', 'AI quality check completed.')
-                    logger.info(f"Quality Check: Score={score}, Reason={reason}")
+                if step['prompt'] is not None:
+                    logger.info(f"Pipeline Step: {step['name']} restored from checkpoint.")
+                if step['type'] == 'cleanup':
+                    completed[step['name']] = {'image': clean_image, 'clean_image': clean_image}
+                else:
+                    completed[step['name']] = {'image': current_image}
+
+            # Restored runs show the cleanup and the resume point straight away
+            if preview_store:
+                preview_store.reset()
+                for step in plan[:resume_index + 1]:
+                    if step['type'] == 'cleanup' or step is plan[resume_index]:
+                        if step['fingerprint']:
+                            preview_store.add(step['name'], completed[step['name']]['image'], step['config'].get('description'))
+
+            steps_by_name = {step['name']: step for step in plan}
+
+            def on_step_complete(step_name, result):
+                step = steps_by_name[step_name]
+                if step['type'] not in IMAGE_STEP_TYPES or result.get('skipped'):
+                    return
+                self._save_debug_image(result['image'], f"{step['index']}_{step_name}")
+                if preview_store:
+                    preview_store.add(step_name, result['image'], step['config'].get('description'))
+                if checkpoint_store and step['fingerprint']:
+                    checkpoint_store.save(step_name, step['fingerprint'], result['image'], step['type'])
+
+            scheduler = PipelineScheduler([(step['name'], step['config']) for step in plan])
+            started = time.perf_counter()
+            run = scheduler.run(
+                {
+                    'visualizer': self,
+                    'prompts': prompts,
+                    'scope': scope,
+                    'options': options,
+                    'tenant_id': tenant_config.tenant_id,
+                    'original_image': original_image,
+                    'clean_image': clean_image,
+                },
+                progress_callback=progress_callback,
+                completed=completed,
+                on_step_complete=on_step_complete,
+            )
+            self.last_step_timings = run.timings
+            self.last_pipeline_seconds = time.perf_counter() - started
+
+            for step in plan:
+                result = run.outputs.get(step['name'], {})
+                if 'clean_image' in result:
+                    clean_image = result['clean_image']
+                if step['type'] == 'quality_check' and 'score' in result:
+                    score = result['score']
+                    reason = result['reason']
+            if plan:
+                current_image = run.outputs[plan[-1]['name']]['image']
 
             return clean_image, current_image, score, reason
 
@@ -102,97 +157,104 @@ class ScreenVisualizer:
             logger.error(f"Pipeline failed: {e}")
             raise
 
-    def _call_gemini_edit(self, image: Image.Image, prompt: str, step_name: str = "unknown") -> Image.Image:
+    def _plan_pipeline(self, tenant_config, prompts, scope: dict, options: dict = None) -> List[Dict[str, Any]]:
         """
-        Helper method to handle the actual API call plumbing for image editing.
-        Uses Thinking Mode for better reasoning on complex edits.
-        Includes comprehensive retry logic for transient failures.
+        Resolve each pipeline step's prompt and input fingerprint up front.
+
+        Fusable insertion steps are merged first when the tenant enables
+        step fusion (the groups are kept in self.last_fused_steps).
+
+        Fingerprints chain through the image-producing steps, so changing one
+        step's prompt changes the fingerprint of every step after it. Steps
+        after a reference insertion get no fingerprint, since the reference
+        image is not part of the chain.
+
+        Returns:
+            List of step dicts with index, name, type, config, prompt and
+            fingerprint (prompt is None for skipped and non-image steps)
         """
-        # Enable Thinking Mode - requires TEXT + IMAGE response modalities
-        config_args = {
-            "response_modalities": ["TEXT", "IMAGE"],
-        }
+        from api.services.checkpoint_service import step_fingerprint
 
-        # Enable Thinking with include_thoughts=True (the original working config)
-        if hasattr(types, 'ThinkingConfig'):
-            config_args['thinking_config'] = types.ThinkingConfig(include_thoughts=True)
+        from api.services.step_fusion import fuse_steps, is_fusion_enabled
 
-        if hasattr(types, 'ImageGenerationConfig'):
-            config_args['image_generation_config'] = types.ImageGenerationConfig(
-                guidance_scale=70,
-                person_generation="dont_generate_people"
+        steps = [(name, tenant_config.get_step_config(name)) for name in tenant_config.get_pipeline_steps()]
+        self.last_fused_steps = []
+        if is_fusion_enabled(tenant_config.tenant_id):
+            steps, self.last_fused_steps = fuse_steps(
+                steps, lambda name, config: get_step_prompt(name, config, prompts, scope, options or {})
             )
 
-        # Comprehensive retry logic - retries on API errors AND empty responses
-        max_retries = 4
-        last_error = None
+        plan = []
+        fingerprint = ''
+        for index, (step_name, step_config) in enumerate(steps):
+            step_type = step_config.get('type')
+            step = {
+                'index': index,
+                'name': step_name,
+                'type': step_type,
+                'config': step_config,
+                'prompt': get_step_prompt(step_name, step_config, prompts, scope, options or {}),
+                'fingerprint': None,
+            }
 
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=[image, prompt],
-                    config=types.GenerateContentConfig(**config_args)
-                )
+            if step_type == 'reference_insertion':
+                fingerprint = None
+            elif step['prompt'] is not None and fingerprint is not None:
+                fingerprint = step_fingerprint(fingerprint, step_name, step['prompt'], job_image_model(self.model_name))
+                step['fingerprint'] = fingerprint
 
-                # Log thinking/token usage for monitoring
-                if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                    usage = response.usage_metadata
-                    thinking_tokens = getattr(usage, 'thoughts_token_count', 0) or 0
-                    total_tokens = getattr(usage, 'total_token_count', 0) or 0
-                    logger.info(f"Gemini Usage [{step_name}] - Thinking: {thinking_tokens}, Total: {total_tokens}")
-
-                # Extract and log thinking text, then extract image
-                result_image = None
-                thinking_text = []
-
-                if response.candidates and response.candidates[0].content.parts:
-                    for part in response.candidates[0].content.parts:
-                        # Capture thinking/reasoning text
-                        if hasattr(part, 'text') and part.text:
-                            thinking_text.append(part.text)
-                        # Capture image
-                        if hasattr(part, 'inline_data') and part.inline_data:
-                            from io import BytesIO
-                            result_image = Image.open(BytesIO(part.inline_data.data))
-
-                # Log thinking to file for debugging
-                if thinking_text:
-                    self._log_thinking(step_name, prompt, thinking_text)
-
-                # Success - return the image
-                if result_image:
-                    if attempt > 0:
-                        logger.info(f"Gemini succeeded on attempt {attempt + 1} for {step_name}")
-                    return result_image
-
-                # No image returned - this is a transient failure, retry
-                last_error = "No image data returned from AI service"
-                if attempt < max_retries - 1:
-                    wait_time = 5 * (attempt + 1)
-                    logger.warning(f"No image in response for {step_name}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-
-            except Exception as e:
-                last_error = str(e)
-                # Rate limiting or other transient errors
-                if attempt < max_retries - 1:
-                    if "429" in str(e):
-                        wait_time = 15 * (attempt + 1)
-                        logger.warning(f"Rate limited on {step_name}, waiting {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    else:
-                        wait_time = 5 * (attempt + 1)
-                        logger.warning(f"Gemini error on {step_name}: {e}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.error(f"Gemini call failed after {max_retries} attempts: {e}")
-                    raise ScreenVisualizerError(f"Gemini call failed: {e}") from e
+            plan.append(step)
+        return plan
+
+    def _restore_checkpoints(self, plan: List[Dict[str, Any]], checkpoint_store, original_image: Image.Image):
+        """
+        Find the latest step that can be restored from a checkpoint.
+
+        The last design step is never restored, so a plain Regenerate (same
+        options) still produces a new sample; only unchanged upstream
+        steps are reused.
+
+        Returns:
+            (resume_index, clean_image, current_image). resume_index is -1
+            when nothing can be restored and the pipeline starts over.
+        """
+        image_steps = [(i, step) for i, step in enumerate(plan) if step['fingerprint']]
+        if image_steps and image_steps[-1][1]['type'] != 'cleanup':
+            image_steps = image_steps[:-1]
+
+        for i, step in reversed(image_steps):
+            if not checkpoint_store.has(step['name'], step['fingerprint'], step['type']):
+                continue
+
+            current_image = checkpoint_store.load(step['name'], step['fingerprint'], step['type'])
+            if current_image is None:
+                continue
+
+            clean_image = original_image
+            cleanup = next((s for s in plan if s['type'] == 'cleanup'), None)
+            if cleanup is step:
+                clean_image = current_image
+            elif cleanup is not None:
+                clean_image = checkpoint_store.load(cleanup['name'], cleanup['fingerprint'], cleanup['type'])
+                if clean_image is None:
+                    # Quality check needs the cleaned reference; start over
+                    break
+
+            logger.info(f"Resuming pipeline after step: {step['name']}")
+            return i, clean_image, current_image
 
-        # All retries exhausted
-        logger.error(f"No image data after {max_retries} attempts for {step_name}")
-        raise ScreenVisualizerError(f"No image data returned from AI service after {max_retries} attempts. Last error: {last_error}")
+        return -1, original_image, original_image
+
+    def _call_gemini_edit(self, image: Image.Image, prompt: str, step_name: str = "unknown", use_cache: bool = False) -> ImageArtifact:
+        """
+        Helper method to handle the actual API call plumbing for image editing.
+        Uses Thinking Mode for better reasoning on complex edits.
+        With use_cache, results are served from the step cache when the same
+        image, prompt and config were already processed. Only deterministic
+        upstream steps (cleanup) should use it: design steps must give a
+        fresh sample when the customer regenerates.
+        """
+        return self._generate_image([image], prompt, step_name, use_cache=use_cache)
 
     def _log_thinking(self, step_name: str, prompt: str, thinking_text: List[str]):
         """Log Gemini's thinking/reasoning to a file for debugging and analysis."""
@@ -226,10 +288,9 @@ class ScreenVisualizer:
         reference_image: Image.Image,
         prompt: str,
         step_name: str = "unknown"
-    ) -> Image.Image:
+    ) -> ImageArtifact:
         """
         Call Gemini with a reference image for compositing.
-        Includes comprehensive retry logic for transient failures.
 
         Args:
             target_image: The cleaned customer photo
@@ -238,88 +299,108 @@ class ScreenVisualizer:
             step_name: Name for logging
 
         Returns:
-            PIL Image with reference composited onto target
+            ImageArtifact with reference composited onto target
+        """
+        # Reference first
+        return self._generate_image([reference_image, target_image], prompt, step_name)
+
+    def _generate_image(self, images: List[Any], prompt: str, step_name: str, use_cache: bool = False) -> ImageArtifact:
+        """
+        Run one image edit through the shared rate governor, and the step
+        cache when use_cache is set.
+
+        The governor handles quota, retries with backoff (API errors and
+        empty responses) and the circuit breaker.
+
+        Args:
+            images: Input images (PIL or ImageArtifact), in the order they are sent
+            prompt: Edit instructions
+            step_name: Name for logging
+            use_cache: Read and write the step result cache
+
+        Returns:
+            ImageArtifact holding the bytes returned by the model
+
+        Raises:
+            ScreenVisualizerError: If no image could be generated
         """
+        # The tenant's budget may have switched this job to a cheaper model
+        model = job_image_model(self.model_name)
+        step_cache = get_step_cache()
+        cache_key = None
+        if use_cache:
+            cache_key = step_cache.make_key(images, prompt, model, self.EDIT_GENERATION_SETTINGS)
+        cached = step_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Pipeline Step: {step_name} served from cache")
+            return ImageArtifact(cached)
+
+        # Enable Thinking Mode - requires TEXT + IMAGE response modalities
+        gen = self.EDIT_GENERATION_SETTINGS
         config_args = {
-            "response_modalities": ["TEXT", "IMAGE"],
+            "response_modalities": gen["response_modalities"],
         }
 
+        # Enable Thinking with include_thoughts=True (the original working config)
         if hasattr(types, 'ThinkingConfig'):
-            config_args['thinking_config'] = types.ThinkingConfig(include_thoughts=True)
+            config_args['thinking_config'] = types.ThinkingConfig(include_thoughts=gen["include_thoughts"])
 
         if hasattr(types, 'ImageGenerationConfig'):
             config_args['image_generation_config'] = types.ImageGenerationConfig(
-                guidance_scale=70,
-                person_generation="dont_generate_people"
+                guidance_scale=gen["guidance_scale"],
+                person_generation=gen["person_generation"]
+            )
+
+        def attempt():
+            response = self.client.models.generate_content(
+                model=model,
+                contents=[*(as_content(image) for image in images), prompt],
+                config=types.GenerateContentConfig(**config_args)
             )
 
-        # Comprehensive retry logic - retries on API errors AND empty responses
-        max_retries = 4
-        last_error = None
+            # Log thinking/token usage and add it to the usage ledger
+            if hasattr(response, 'usage_metadata') and response.usage_metadata:
+                usage = response.usage_metadata
+                thinking_tokens = getattr(usage, 'thoughts_token_count', 0) or 0
+                total_tokens = getattr(usage, 'total_token_count', 0) or 0
+                logger.info(f"Gemini Usage [{step_name}] - Thinking: {thinking_tokens}, Total: {total_tokens}")
+                record_usage(model, step_name, usage, image_output=True)
 
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=[reference_image, target_image, prompt],  # Reference first
-                    config=types.GenerateContentConfig(**config_args)
-                )
+            # Extract and log thinking text, then extract image
+            result_image = None
+            thinking_text = []
 
-                # Log thinking/token usage
-                if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                    usage = response.usage_metadata
-                    thinking_tokens = getattr(usage, 'thoughts_token_count', 0) or 0
-                    total_tokens = getattr(usage, 'total_token_count', 0) or 0
-                    logger.info(f"Gemini Usage [{step_name}] - Thinking: {thinking_tokens}, Total: {total_tokens}")
-
-                # Extract image from response
-                result_image = None
-                thinking_text = []
-
-                if response.candidates and response.candidates[0].content.parts:
-                    for part in response.candidates[0].content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            thinking_text.append(part.text)
-                        if hasattr(part, 'inline_data') and part.inline_data:
-                            from io import BytesIO
-                            result_image = Image.open(BytesIO(part.inline_data.data))
-
-                if thinking_text:
-                    self._log_thinking(step_name, prompt, thinking_text)
-
-                # Success - return the image
-                if result_image:
-                    if attempt > 0:
-                        logger.info(f"Reference edit succeeded on attempt {attempt + 1} for {step_name}")
-                    return result_image
-
-                # No image returned - this is a transient failure, retry
-                last_error = f"No image in Gemini response for step {step_name}"
-                if attempt < max_retries - 1:
-                    wait_time = 5 * (attempt + 1)
-                    logger.warning(f"No image in reference response for {step_name}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-
-            except Exception as e:
-                last_error = str(e)
-                # Rate limiting or other transient errors
-                if attempt < max_retries - 1:
-                    if "429" in str(e):
-                        wait_time = 15 * (attempt + 1)
-                        logger.warning(f"Rate limited on {step_name}, waiting {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    else:
-                        wait_time = 5 * (attempt + 1)
-                        logger.warning(f"Reference edit error on {step_name}: {e}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.error(f"Reference edit failed after {max_retries} attempts: {e}")
-                    raise ScreenVisualizerError(f"Reference edit failed: {e}") from e
+            if response.candidates and response.candidates[0].content.parts:
+                for part in response.candidates[0].content.parts:
+                    # Capture thinking/reasoning text
+                    if hasattr(part, 'text') and part.text:
+                        thinking_text.append(part.text)
+                    # Capture image
+                    # Kept encoded; decoded only if a consumer needs pixels
+                    if hasattr(part, 'inline_data') and part.inline_data:
+                        result_image = ImageArtifact(part.inline_data.data, part.inline_data.mime_type)
+
+            # Log thinking to file for debugging
+            if thinking_text:
+                self._log_thinking(step_name, prompt, thinking_text)
+
+            # No image returned - this is a transient failure, retry
+            if not result_image:
+                raise RetryableResponseError(f"No image in Gemini response for step {step_name}")
+            return result_image
+
+        governor = get_rate_governor()
+        try:
+            result_image = governor.call(attempt, description=step_name)
+        except RetryableResponseError as e:
+            raise ScreenVisualizerError(
+                f"No image data returned from AI service after {governor.max_retries} attempts. Last error: {e}"
+            ) from e
+        except Exception as e:
+            raise ScreenVisualizerError(f"Gemini call failed: {e}") from e
 
-        # All retries exhausted
-        logger.error(f"Reference edit failed after {max_retries} attempts for {step_name}")
-        raise ScreenVisualizerError(f"Reference edit failed after {max_retries} attempts. Last error: {last_error}")
+        step_cache.set(cache_key, result_image.data)
+        return result_image
 
     def _call_gemini_json(self, contents: List[Any], prompt: str) -> dict:
         """
@@ -334,24 +415,17 @@ class ScreenVisualizer:
             }
             
             # Combine contents and prompt
-            full_contents = contents + [prompt]
-
-            # Retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.client.models.generate_content(
-                        model=self.model_name,
-                        contents=full_contents,
-                        config=types.GenerateContentConfig(**config_args)
-                    )
-                    break
-                except Exception as e:
-                    if "429" in str(e) and attempt < max_retries - 1:
-                        time.sleep(10 * (attempt + 1))
-                    else:
-                        raise e
-            
+            full_contents = [as_content(content) for content in contents] + [prompt]
+
+            response = get_rate_governor().call(
+                self.client.models.generate_content,
+                model=self.model_name,
+                contents=full_contents,
+                config=types.GenerateContentConfig(**config_args),
+                description="quality_check"
+            )
+            record_usage(self.model_name, 'quality_check', response.usage_metadata)
+
             # Extract text
             text_response = ""
             if response.candidates and response.candidates[0].content.parts:
@@ -377,18 +451,22 @@ class ScreenVisualizer:
             # Return safe default
             return {'score': 0.9, 'reason': f"Quality check failed: {str(e)}"}
 
-    def _save_debug_image(self, image: Image.Image, step_name: str):
+    def _save_debug_image(self, image, step_name: str):
         """Save intermediate image for debugging."""
         try:
             from datetime import datetime
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"pipeline_{timestamp}_{step_name}.jpg"
+            artifact = as_artifact(image)
+            extension = 'jpg' if artifact.format == 'JPEG' else artifact.format.lower()
+            filename = f"pipeline_{timestamp}_{step_name}.{extension}"
             save_path = os.path.join(settings.MEDIA_ROOT, "pipeline_steps", filename)
             
             # Ensure directory exists
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
             
-            image.save(save_path)
+            # Written as-is; no decode or re-encode
+            with open(save_path, 'wb') as f:
+                f.write(artifact.data)
             logger.info(f"Saved debug image: {save_path}")
         except Exception as e:
             logger.error(f"Failed to save debug image {step_name}: {e}")
@@ -22,6 +22,8 @@ const FACTS = [
 const ProcessingScreen = ({
   visualizationId,
   originalImageUrl,
+  previewImageUrl = null,
+  previewLabel = null,
   backendProgress = 0,
   statusMessage = '',
   status = 'processing',
@@ -168,10 +170,10 @@ const ProcessingScreen = ({
             <div className="radar-ring radar-ring-2" />
             <div className="radar-ring radar-ring-3" />
             <div className="radar-core" />
-            {originalImageUrl && (
+            {(previewImageUrl || originalImageUrl) && (
               <img
-                src={originalImageUrl}
-                alt="Your backyard"
+                src={previewImageUrl || originalImageUrl}
+                alt={previewLabel ? `Preview: ${previewLabel}` : 'Your backyard'}
                 className="radar-image"
               />
             )}
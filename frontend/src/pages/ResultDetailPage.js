@@ -4,6 +4,7 @@ import { Shield, Download } from 'lucide-react';
 import {
   getVisualizationRequestById,
   regenerateVisualizationRequest,
+  subscribeToVisualizationProgress,
   getAuditReport
 } from '../services/api';
 import { getTenantContent } from '../content';
@@ -87,25 +88,60 @@ const ResultDetailPage = () => {
   }, [id, isRegenerating, auditReport]);
 
   useEffect(() => {
-    fetchRequestDetails();
+    let pollInterval = null;
+    let source = null;
+
+    const startPolling = () => {
+      if (pollInterval) return;
+      pollInterval = setInterval(async () => {
+        const shouldStop = await fetchRequestDetails();
+        if (shouldStop) {
+          clearInterval(pollInterval);
+        }
+      }, 3000);
+    };
 
-    const pollInterval = setInterval(async () => {
-      const shouldStop = await fetchRequestDetails();
-      if (shouldStop) {
-        clearInterval(pollInterval);
-      }
-    }, 3000);
+    fetchRequestDetails().then((finished) => {
+      if (finished) return;
+
+      // Progress is pushed over SSE; fall back to polling if unavailable
+      source = subscribeToVisualizationProgress(
+        id,
+        (event) => {
+          setRequest((prev) => prev && {
+            ...prev,
+            status: event.status,
+            progress_percentage: event.progress,
+            status_message: event.message,
+            step_previews: event.preview
+              ? [...(prev.step_previews || []), event.preview]
+              : prev.step_previews,
+          });
+          if (event.status === 'complete' || event.status === 'failed') {
+            source.close();
+            fetchRequestDetails();
+          }
+        },
+        () => {
+          if (source && source.readyState === EventSource.CLOSED) {
+            startPolling();
+          }
+        }
+      );
+      if (!source) startPolling();
+    });
 
     return () => {
       if (pollInterval) clearInterval(pollInterval);
+      if (source) source.close();
     };
-  }, [fetchRequestDetails]);
+  }, [id, fetchRequestDetails]);
 
   const handleRegenerate = async () => {
     try {
       setIsRegenerating(true);
       await regenerateVisualizationRequest(id);
-      // Polling will pick up the status change
+      // The progress stream will pick up the status change
     } catch (err) {
       console.error('Failed to regenerate:', err);
       setError('Failed to start regeneration. Please try again.');
@@ -156,6 +192,8 @@ const ResultDetailPage = () => {
   const resultImageUrl = resultImage ? resultImage.generated_image_url : null;
 
   const currentProgress = request?.progress_percentage || 0;
+  const stepPreviews = request?.step_previews || [];
+  const latestPreview = stepPreviews.length > 0 ? stepPreviews[stepPreviews.length - 1] : null;
   const currentStatusMessage = request?.status_message || '';
 
   // Show ProcessingScreen for pending/processing/failed states (failed has nice error UI)
@@ -169,6 +207,8 @@ const ResultDetailPage = () => {
       <ProcessingScreen
         visualizationId={id}
         originalImageUrl={request.clean_image_url || request.original_image_url}
+        previewImageUrl={latestPreview ? latestPreview.url : null}
+        previewLabel={latestPreview ? latestPreview.description : null}
         backendProgress={currentProgress}
         statusMessage={currentStatusMessage}
         status={request.status}
@@ -5,6 +5,24 @@ import './ResultsPage.css';
 
 import Skeleton from '../components/Common/Skeleton';
 
+// Thumbnail derivative with modern formats first; falls back to the
+// full-size image until the derivatives have been built
+const Thumbnail = ({ derivatives, fallbackUrl, alt }) => {
+  const thumb = (derivatives && derivatives.thumb) || {};
+  return (
+    <picture>
+      {thumb.avif && <source srcSet={thumb.avif} type="image/avif" />}
+      {thumb.webp && <source srcSet={thumb.webp} type="image/webp" />}
+      <img
+        src={thumb.jpeg || fallbackUrl}
+        alt={alt}
+        className="thumbnail-image"
+        loading="lazy"
+      />
+    </picture>
+  );
+};
+
 const ResultsPage = () => {
   const [requests, setRequests] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -89,19 +107,19 @@ const ResultsPage = () => {
                 <div className="result-thumbnail">
                   {request.latest_result_url ? (
                     <div className="thumbnail-wrapper">
-                      <img
-                        src={request.latest_result_url}
+                      <Thumbnail
+                        derivatives={request.latest_result_derivatives}
+                        fallbackUrl={request.latest_result_url}
                         alt="Generated Result"
-                        className="thumbnail-image"
                       />
                       <span className="thumbnail-badge">After</span>
                     </div>
                   ) : request.original_image_url ? (
                     <div className="thumbnail-wrapper">
-                      <img
-                        src={request.original_image_url}
+                      <Thumbnail
+                        derivatives={request.original_image_derivatives}
+                        fallbackUrl={request.original_image_url}
                         alt="Original"
-                        className="thumbnail-image"
                       />
                       <span className="thumbnail-badge original">Before</span>
                     </div>
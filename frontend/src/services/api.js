@@ -306,6 +306,21 @@ const createVisualizationRequest = async (formData) => {
   );
 };
 
+// Server-Sent Events stream of progress updates for a request
+const subscribeToVisualizationProgress = (id, onEvent, onError) => {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+  const source = new EventSource(`${API_BASE_URL}/visualizations/${id}/events/`);
+  source.addEventListener('progress', (message) => {
+    onEvent(JSON.parse(message.data));
+  });
+  source.onerror = (err) => {
+    if (onError) onError(err);
+  };
+  return source;
+};
+
 const getVisualizationRequestById = async (id) => {
   return handleApiCall(
     () => api.get(`/visualizations/${id}/`),
@@ -468,6 +483,7 @@ export {
   deleteVisualizationRequest,
   retryVisualizationRequest,
   regenerateVisualizationRequest,
+  subscribeToVisualizationProgress,
 
   // Generated Images
   fetchGeneratedImages,
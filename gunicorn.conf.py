@@ -7,8 +7,10 @@ bind = "127.0.0.1:8000"
 # Workers: 2 * CPU cores + 1
 workers = multiprocessing.cpu_count() * 2 + 1
 
-# Worker class
-worker_class = "sync"
+# Worker class: gevent, so long-lived progress streams (SSE) wait on a
+# greenlet instead of holding a whole worker each
+worker_class = "gevent"
+worker_connections = 1000
 
 # Timeout (increase for AI processing)
 timeout = 180
@@ -24,5 +26,6 @@ proc_name = "visualizer"
 # Reload on code changes (disable in production)
 reload = False
 
-# Preload app for faster worker spawning
-preload_app = True
+# Don't preload: gevent must monkey-patch before Django and its SSL/socket
+# users are imported, which happens in each worker when not preloading
+preload_app = False
@@ -0,0 +1,22 @@
+"""
+Celery application for pools_project.
+
+Workers are started with:
+    celery -A pools_project worker -Q visualizations -l info
+
+All settings are read from Django settings using the CELERY_ namespace.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pools_project.settings')
+
+app = Celery('pools_project')
+
+# Read CELERY_* settings from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Discover tasks.py in installed apps
+app.autodiscover_tasks()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import json
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -61,6 +62,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.monitoring.middleware.MetricsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -289,6 +291,198 @@ ACTIVE_TENANT = os.environ.get('ACTIVE_TENANT', 'pools')
 # Feature flag for gradual rollout
 USE_TENANT_REGISTRY = os.environ.get('USE_TENANT_REGISTRY', 'true').lower() == 'true'
 
+# Celery / job queue
+# Jobs are acknowledged only after they finish, so a worker that is killed
+# mid-job (deploy, OOM, recycle) leaves the message on the broker for another
+# worker to pick up once the visibility timeout expires.
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_TIME_LIMIT = int(os.environ.get('CELERY_TASK_TIME_LIMIT', '900'))
+CELERY_TASK_SOFT_TIME_LIMIT = CELERY_TASK_TIME_LIMIT - 60
+CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', '4'))
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': CELERY_TASK_TIME_LIMIT + 300}
+CELERY_TASK_ROUTES = {
+    'api.tasks.process_visualization_request': {'queue': 'visualizations'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'requeue-stale-visualizations': {
+        'task': 'api.tasks.requeue_stale_requests',
+        'schedule': 300.0,
+    },
+}
+
+# Maximum number of visualization pipelines running at once per tenant,
+# across all workers. Tenants not listed use the default.
+VISUALIZATION_TENANT_CONCURRENCY = {
+    'default': int(os.environ.get('VISUALIZATION_TENANT_CONCURRENCY', '3')),
+}
+# Seconds to wait before retrying a job that could not get a tenant slot
+VISUALIZATION_SLOT_RETRY_DELAY = 15
+
+# Gemini step result cache
+# Raw model output of the cleanup step is stored on disk keyed by (input
+# image, prompt, model, generation config), so re-processing the same upload
+# costs no cleanup call. Design steps are never cached, so Regenerate still
+# gives a fresh sample.
+GEMINI_STEP_CACHE_ENABLED = os.environ.get('GEMINI_STEP_CACHE_ENABLED', 'true').lower() == 'true'
+GEMINI_STEP_CACHE_DIR = os.environ.get('GEMINI_STEP_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'gemini_steps'))
+GEMINI_STEP_CACHE_MAX_BYTES = int(os.environ.get('GEMINI_STEP_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+# Max pipeline steps run in parallel when a tenant declares independent steps
+PIPELINE_MAX_PARALLEL_STEPS = int(os.environ.get('PIPELINE_MAX_PARALLEL_STEPS', '4'))
+
+# Gemini rate governor: one token bucket, retry policy and circuit breaker for
+# all model calls. With the 'redis' backend the quota and breaker are shared
+# by every worker process; 'local' limits each process on its own.
+GEMINI_RATE_BACKEND = os.environ.get('GEMINI_RATE_BACKEND', 'local')
+GEMINI_RATE_LIMIT_PER_MINUTE = float(os.environ.get('GEMINI_RATE_LIMIT_PER_MINUTE', '60'))
+GEMINI_RATE_BURST = float(os.environ.get('GEMINI_RATE_BURST', '10'))
+GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES', '4'))
+GEMINI_BACKOFF_BASE = float(os.environ.get('GEMINI_BACKOFF_BASE', '2'))
+GEMINI_BACKOFF_MAX = float(os.environ.get('GEMINI_BACKOFF_MAX', '60'))
+GEMINI_ACQUIRE_TIMEOUT = float(os.environ.get('GEMINI_ACQUIRE_TIMEOUT', '300'))
+GEMINI_BREAKER_THRESHOLD = int(os.environ.get('GEMINI_BREAKER_THRESHOLD', '5'))
+GEMINI_BREAKER_COOLDOWN = float(os.environ.get('GEMINI_BREAKER_COOLDOWN', '60'))
+
+# Progress stream (Server-Sent Events at /api/visualizations/<id>/events/).
+# Use 'redis' whenever Celery workers run in separate processes from the web
+# server; 'local' only reaches subscribers in the publishing process.
+PROGRESS_STREAM_BACKEND = os.environ.get('PROGRESS_STREAM_BACKEND', 'local')
+PROGRESS_STREAM_HEARTBEAT = 15
+# Streams end after this long and the browser reconnects; keep it below the
+# gunicorn worker timeout (180s)
+PROGRESS_STREAM_MAX_SECONDS = int(os.environ.get('PROGRESS_STREAM_MAX_SECONDS', '120'))
+PROGRESS_STREAM_RETRY_MS = 3000
+# Progress is only written to the database when it crosses one of these
+PROGRESS_DB_CHECKPOINTS = (25, 50, 75, 90)
+
+# Step previews: each finished pipeline step is pushed to the client as a
+# small progressive JPEG (longest edge in pixels, JPEG quality)
+PIPELINE_PREVIEWS_ENABLED = os.environ.get('PIPELINE_PREVIEWS_ENABLED', 'true').lower() == 'true'
+PIPELINE_PREVIEW_MAX_SIZE = 640
+PIPELINE_PREVIEW_QUALITY = 70
+
+# Ingestion: uploads are rotated upright, converted to RGB and resampled to
+# this longest edge once; every pipeline step reads the stored working copy
+INGESTION_MAX_DIMENSION = int(os.environ.get('INGESTION_MAX_DIMENSION', '1024'))
+INGESTION_JPEG_QUALITY = 90
+
+# Formats of Gemini output stored as returned; anything else is encoded as
+# JPEG once before saving
+RESULT_IMAGE_FORMATS = ('JPEG', 'WEBP')
+
+# Image derivatives: thumbnails and web-sized variants stored next to each
+# upload and generated image (size name -> longest edge in pixels). Formats
+# the Pillow build cannot encode are skipped. Built by the
+# build_image_derivatives task on the default 'celery' queue.
+IMAGE_DERIVATIVES_ENABLED = os.environ.get('IMAGE_DERIVATIVES_ENABLED', 'true').lower() == 'true'
+IMAGE_DERIVATIVE_SIZES = {'thumb': 320, 'medium': 1024}
+IMAGE_DERIVATIVE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+IMAGE_DERIVATIVE_QUALITY = 80
+IMAGE_DERIVATIVE_WORKERS = 4
+IMAGE_DERIVATIVE_CACHE_SECONDS = 86400
+# While a build is pending (or has failed) the variants found are cached
+# this long before storage is checked again
+IMAGE_DERIVATIVE_MISSING_CACHE_SECONDS = 60
+
+# Status counters behind /api/visualizations/stats/ are re-aggregated from
+# the database after this many seconds to correct any drift
+STATS_COUNTER_TTL = 600
+
+# Shared cache for counters, derivative paths and tenant config responses.
+# Use 'redis' whenever more than one web or worker process runs; 'local'
+# keeps a separate cache in each process.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'local')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_REDIS_URL', REDIS_URL),
+            'KEY_PREFIX': 'pools',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
 
+# Tenant config, screen type and pricing catalog responses are cached per
+# tenant config version; entries from retired versions expire after this
+CONFIG_CACHE_TIMEOUT = 86400
+# Cached responses are rebuilt at least this often, so config and price
+# book changes made by another process reach every worker
+CONFIG_CACHE_GENERATION_TIMEOUT = int(os.environ.get('CONFIG_CACHE_GENERATION_TIMEOUT', '300'))
+
+# Tenant config: each process re-checks TenantConfig.config_version at most
+# this often and recompiles its in-memory tenant plan when it changed
+TENANT_CONFIG_REVALIDATE_SECONDS = int(os.environ.get('TENANT_CONFIG_REVALIDATE_SECONDS', '5'))
+
+# Rendered prompts memoized per process, keyed on tenant, config version,
+# prompt function and selections (least recently used evicted)
+PROMPT_CACHE_MAX_ENTRIES = int(os.environ.get('PROMPT_CACHE_MAX_ENTRIES', '1024'))
+
+# Step fusion: adjacent insertion steps marked 'fusable' in the tenant step
+# config run as one combined model call. Off unless enabled for the tenant;
+# tenants not listed use the default.
+PIPELINE_STEP_FUSION = {
+    'default': os.environ.get('PIPELINE_STEP_FUSION', 'false').lower() == 'true',
+}
 
+# Gemini model backend (api/ai_services/gemini_backends.py): 'live' calls the
+# API, 'fake' answers offline with the synthetic profile below, 'record'
+# calls the API and saves every response, 'replay' serves saved responses
+# only. Fake and replay need no API key or network access.
+GEMINI_BACKEND = os.environ.get('GEMINI_BACKEND', 'live')
+GEMINI_RECORDINGS_DIR = os.environ.get('GEMINI_RECORDINGS_DIR', os.path.join(BASE_DIR, 'cache', 'gemini_recordings'))
+# Fake backend latency, error rate and 429 bursts (see FakeModels)
+GEMINI_FAKE_PROFILE = json.loads(os.environ.get('GEMINI_FAKE_PROFILE', '{}'))
+
+# Per-job tracing (api/services/tracing.py): every visualization job records
+# spans; 'file' appends OTLP/JSON to TRACING_FILE, 'otlp' posts to an
+# OpenTelemetry collector's OTLP/HTTP endpoint, 'none' keeps only the
+# summary stored in GeneratedImage.metadata['trace']
+TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'none')
+TRACING_FILE = os.environ.get('TRACING_FILE', os.path.join(BASE_DIR, 'logs', 'traces.jsonl'))
+TRACING_OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+
+# Metrics registry behind /metrics and the health checks
+# (api/monitoring/metrics.py). Use redis so every gunicorn and Celery worker
+# records into the same counters; 'local' is per process. Health checks read
+# recent activity in buckets of METRICS_WINDOW_SECONDS. Scrapers send
+# METRICS_AUTH_TOKEN as a bearer token; /metrics is refused without one
+# unless DEBUG is on.
+METRICS_BACKEND = os.environ.get('METRICS_BACKEND', 'local')
+METRICS_WINDOW_SECONDS = int(os.environ.get('METRICS_WINDOW_SECONDS', '300'))
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN', '')
+
+# Model list prices in USD per 1M tokens, used to cost each call in the
+# usage ledger (api/services/usage_ledger.py). Thinking tokens are billed as
+# text output. Models not listed are costed at 'default'.
+GEMINI_MODEL_PRICING = {
+    'gemini-3-pro-image-preview': {'input': 2.00, 'output_text': 12.00, 'output_image': 120.00},
+    'gemini-2.5-flash-image': {'input': 0.30, 'output_text': 2.50, 'output_image': 30.00},
+    'gemini-3-flash-preview': {'input': 0.50, 'output_text': 3.00},
+    'default': {'input': 2.00, 'output_text': 12.00, 'output_image': 120.00},
+}
 
+# Daily model budget per tenant (UTC day). Past downgrade_at of the cap, new
+# jobs edit with downgrade_model; at the cap, jobs wait (the task retries
+# every MODEL_BUDGET_RETRY_DELAY seconds) until the next day. daily_usd None
+# means no cap. Tenants not listed use the default.
+MODEL_BUDGETS = {
+    'default': {
+        'daily_usd': float(os.environ['MODEL_DAILY_BUDGET_USD']) if os.environ.get('MODEL_DAILY_BUDGET_USD') else None,
+        'downgrade_at': 0.8,
+        'downgrade_model': 'gemini-2.5-flash-image',
+    },
+}
+MODEL_BUDGET_RETRY_DELAY = 900
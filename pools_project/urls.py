@@ -20,11 +20,15 @@ from django.conf import settings # Import settings
 from django.conf.urls.static import static # Import static
 from django.views.generic import TemplateView
 
+from api.monitoring.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')), # Include your app's urls
     # Add Browsable API login/logout views for development
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
+    # Prometheus scrape endpoint (all workers)
+    path('metrics', metrics_view, name='metrics'),
 
     # Serve React frontend
     re_path(r'^$', TemplateView.as_view(template_name='index.html')),
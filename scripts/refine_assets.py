@@ -9,17 +9,27 @@ Workflow:
 2. Upscale/Sharpen: Use Gemini Vision to remove artifacts and sharpen.
 3. Normalize: Resize to 2048px height.
 4. Save: Write to media/screen_references/master/{filename}.png
+
+Files are refined concurrently over the shared async Gemini client
+(REFINE_CONCURRENCY requests in flight, default 4).
 """
 
+import asyncio
 import os
 import sys
 import logging
+import django
+from io import BytesIO
 from PIL import Image
-from google import genai
 from google.genai import types
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pools_project.settings')
+django.setup()
+
+from api.ai_services.gemini_client import get_gemini_client, aclose_gemini_clients
+from api.ai_services.rate_governor import get_rate_governor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,8 +37,9 @@ logger = logging.getLogger(__name__)
 
 RAW_ASSETS_DIR = "media/raw_assets"
 MASTER_REF_DIR = "media/screen_references/master"
+CONCURRENCY = int(os.environ.get("REFINE_CONCURRENCY", "4"))
 
-def refine_assets():
+async def refine_assets():
     """
     Main function to refine assets.
     """
@@ -37,19 +48,30 @@ def refine_assets():
         logger.error("GOOGLE_API_KEY not found.")
         return
 
-    client = genai.Client(api_key=api_key)
+    client = get_gemini_client(api_key)
     model_name = "gemini-3-pro-image-preview" # Using the same model for consistency
 
     # Ensure directories exist
     os.makedirs(RAW_ASSETS_DIR, exist_ok=True)
     os.makedirs(MASTER_REF_DIR, exist_ok=True)
 
-    # Process each file in raw_assets
-    for filename in os.listdir(RAW_ASSETS_DIR):
-        if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-            process_file(client, model_name, filename)
+    # Process each file in raw_assets, several requests in flight at once
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def bounded(filename):
+        async with semaphore:
+            await process_file(client, model_name, filename)
+
+    filenames = [
+        filename for filename in os.listdir(RAW_ASSETS_DIR)
+        if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))
+    ]
+    try:
+        await asyncio.gather(*(bounded(filename) for filename in filenames))
+    finally:
+        await aclose_gemini_clients()
 
-def process_file(client, model_name, filename):
+async def process_file(client, model_name, filename):
     """
     Process a single file: Upscale -> Resize -> Save.
     """
@@ -64,7 +86,9 @@ def process_file(client, model_name, filename):
         # Ideally we'd use a dedicated upscaler API, but per instructions we use Gemini Vision.
         prompt = "Sharpen this image. Remove JPEG artifacts. Do NOT add new details. Do NOT change the shape of the handle or tracks. Output a high-resolution version."
         
-        response = client.models.generate_content(
+        response = await get_rate_governor().acall(
+            client.aio.models.generate_content,
+            description=filename,
             model=model_name,
             contents=[image, prompt],
             config=types.GenerateContentConfig(
@@ -82,7 +106,6 @@ def process_file(client, model_name, filename):
         if response.candidates and response.candidates[0].content.parts:
             for part in response.candidates[0].content.parts:
                 if part.inline_data:
-                    from io import BytesIO
                     refined_image = Image.open(BytesIO(part.inline_data.data))
                     break
         
@@ -108,4 +131,4 @@ def process_file(client, model_name, filename):
         logger.error(f"Error processing {filename}: {e}")
 
 if __name__ == "__main__":
-    refine_assets()
+    asyncio.run(refine_assets())